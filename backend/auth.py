@@ -6,8 +6,6 @@ from pydantic import BaseModel
 import jwt
 from jwt.exceptions import InvalidTokenError as JWTError
 import os
-import pymongo
-from motor.motor_asyncio import AsyncIOMotorClient
 
 # Security
 security = HTTPBearer()
@@ -17,10 +15,11 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'your_super_secure_jwt_secret_key_here
 JWT_ALGORITHM = "HS256"
 ADMIN_EMAIL = "dino@cytonic.com"  # Admin email for special privileges
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'ai_simulation')]
+def get_db():
+    """The server's shared database (see database.py); imported lazily because this module
+    is loaded before server.py has put backend/ on sys.path"""
+    from database import get_db
+    return get_db()
 
 # User model
 class User(BaseModel):
@@ -63,6 +62,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     
     # Try to find user by ID first, then by email
     user = None
+    db = get_db()
     if user_id:
         user = await db.users.find_one({"id": user_id})
     
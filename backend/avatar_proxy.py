@@ -0,0 +1,166 @@
+"""
+Avatar image proxy
+Avatar URLs point at full-size portrait_4_3 images on the fal.ai CDN, and those
+URLs can expire. The proxy downloads each source image once into a local blob
+store and serves square thumbnails resized from that copy. Variants are encoded
+on first request in a thread pool (Pillow releases the GIL while resizing and
+encoding), written next to the original and then served straight from disk.
+
+    AVATAR_BLOB_DIR       where originals and variants are stored (default backend/avatar_blobs)
+    AVATAR_PROXY_HOSTS    comma-separated hosts the proxy may fetch from (default fal.media,fal.ai)
+    AVATAR_PROXY_WORKERS  threads resizing and encoding images (default 2)
+
+Imported on first use so workers that never serve avatars don't load Pillow.
+"""
+
+import os
+import io
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from PIL import Image, ImageOps, features
+
+SIZES = (48, 96, 256)
+MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp", "png": "image/png"}
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+BLOB_DIR = Path(os.environ.get("AVATAR_BLOB_DIR", Path(__file__).parent / "avatar_blobs"))
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get("AVATAR_PROXY_HOSTS", "fal.media,fal.ai").split(",") if host.strip()]
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("AVATAR_PROXY_WORKERS", "2")), thread_name_prefix="avatar-proxy")
+_inflight: Dict[Path, asyncio.Future] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+
+class AvatarProxyError(Exception):
+    """Raised when a source image can't be proxied; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def is_allowed_source(url: str) -> bool:
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    return parsed.scheme == "https" and any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_HOSTS)
+
+def snap_size(size: int) -> int:
+    """Smallest stored size at least as large as the requested one, so arbitrary sizes can't fill the disk"""
+    return next((candidate for candidate in SIZES if candidate >= size), SIZES[-1])
+
+def supported_formats() -> list:
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)] + ["png"]
+
+def negotiate_format(requested: Optional[str], accept: str) -> str:
+    """Honour an explicit format, otherwise pick the best one the browser advertises"""
+    available = supported_formats()
+    if requested and requested != "auto":
+        if requested not in available:
+            raise AvatarProxyError(f"Unsupported format: {requested}")
+        return requested
+    for fmt in available:
+        if MEDIA_TYPES[fmt] in (accept or ""):
+            return fmt
+    return "png"
+
+def blob_path(url: str) -> Path:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return BLOB_DIR / key[:2] / key
+
+def render_variant(original: bytes, size: int, fmt: str) -> bytes:
+    """Center-crop to a square (biased upwards to keep the face) and encode at size x size"""
+    with Image.open(io.BytesIO(original)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        thumbnail = ImageOps.fit(image, (size, size), method=Image.LANCZOS, centering=(0.5, 0.35))
+        output = io.BytesIO()
+        if fmt == "png":
+            thumbnail.save(output, "PNG", optimize=True)
+        else:
+            thumbnail.save(output, fmt.upper(), quality=80)
+        return output.getvalue()
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=15.0, follow_redirects=False)
+    return _http_client
+
+async def _fetch_original(url: str, path: Path) -> bytes:
+    try:
+        response = await _get_http_client().get(url)
+    except httpx.HTTPError as e:
+        raise AvatarProxyError(f"Failed to fetch avatar: {e}", status_code=502)
+    if response.status_code != 200:
+        raise AvatarProxyError(f"Avatar source returned {response.status_code}", status_code=502)
+    if len(response.content) > MAX_SOURCE_BYTES:
+        raise AvatarProxyError("Avatar source image is too large", status_code=502)
+    await asyncio.get_running_loop().run_in_executor(_executor, _write_atomic, path, response.content)
+    return response.content
+
+async def _once(path: Path, produce):
+    """Run produce() for a blob path unless it exists on disk or another request is already producing it"""
+    while path in _inflight:
+        shared = _inflight[path]
+        try:
+            await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if not shared.cancelled():
+                raise  # This waiter was cancelled, not the producing request
+            # The producing request was cancelled; produce it here unless another waiter already took over
+    if path.exists():
+        return path
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[path] = future
+    try:
+        await produce()
+        future.set_result(path)
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so a failure nobody else waited on isn't logged as never retrieved
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(path, None)
+        # Release the waiters even when this request is cancelled mid-fetch or mid-render
+        if not future.done():
+            future.cancel()
+    return path
+
+async def get_avatar_variant(url: str, size: int, fmt: str) -> Path:
+    """Path of the size x size variant of url in fmt, fetching and rendering it on first use"""
+    if not is_allowed_source(url):
+        raise AvatarProxyError("Avatar URL host is not allowed")
+
+    base = blob_path(url)
+    original_path = base / "original"
+    variant_path = base / f"{size}.{fmt}"
+
+    async def fetch():
+        await _fetch_original(url, original_path)
+
+    async def render():
+        await _once(original_path, fetch)
+        loop = asyncio.get_running_loop()
+        original = await loop.run_in_executor(_executor, original_path.read_bytes)
+        try:
+            data = await loop.run_in_executor(_executor, render_variant, original, size, fmt)
+        except (OSError, ValueError) as e:
+            logging.error(f"Avatar variant render error for {url}: {e}")
+            raise AvatarProxyError("Avatar source is not a valid image", status_code=502)
+        await loop.run_in_executor(_executor, _write_atomic, variant_path, data)
+
+    return await _once(variant_path, render)
@@ -0,0 +1,245 @@
+"""
+Avatar generation service (fal.ai)
+Imported on first use so workers that never generate avatars don't load fal_client.
+
+Generated images are remembered in the avatar_cache collection, keyed by
+hash(prompt, model, image size), so a prompt is only ever paid for once.
+Identical prompts requested at the same time share one fal.ai job.
+
+Generic headshots (the same templated prompt for every agent or user) come from
+avatar_pool instead: a stock of pre-generated images per (gender, style) bucket,
+topped back up in the background whenever it drops below the low watermark. Every
+worker may notice a low bucket, but only the one holding the bucket's `avatar_pool:<bucket>`
+lease in the `leases` collection refills it.
+
+    AVATAR_CONCURRENCY          fal.ai jobs in flight per batch (default 8)
+    AVATAR_POOL_TARGET          images kept per pool bucket (default 12)
+    AVATAR_POOL_LOW_WATERMARK   refill a bucket when it falls below this (default 4)
+    AVATAR_POOL_REFILL_LEASE    seconds a refill may hold its bucket's lease (default 600)
+"""
+
+import os
+import time
+import uuid
+import socket
+import random
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import fal_client
+from pymongo.errors import DuplicateKeyError
+
+fal_client.api_key = os.environ.get('FAL_KEY')
+
+FLUX_SCHNELL = "fal-ai/flux/schnell"
+FLUX_DEV = "fal-ai/flux/dev"
+DEFAULT_IMAGE_SIZE = "portrait_4_3"  # Good for avatars
+HEADSHOT_ARGUMENTS = {"num_inference_steps": 28, "guidance_scale": 3.5}
+
+HEADSHOT_STYLES = {
+    "professional": "Professional headshot portrait of a {descriptor}, business attire, clean neutral background, high quality, photorealistic, confident expression, professional lighting, facing camera",
+}
+
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def run_fal_model(model: str, arguments: dict) -> dict:
+    """Submit a fal.ai image job and wait for its result"""
+    handler = await fal_client.submit_async(model, arguments=arguments)
+    return await handler.get()
+
+def enhance_avatar_prompt(prompt: str) -> str:
+    """Wrap a user or library prompt in the standard portrait styling"""
+    return f"professional portrait, headshot, detailed face, {prompt}, high quality, photorealistic, studio lighting, neutral background"
+
+def headshot_prompt(gender: str, style: str = "professional") -> str:
+    """Templated prompt for a generic headshot in a pool bucket"""
+    descriptor = "woman" if gender == "female" else "man"
+    return HEADSHOT_STYLES[style].format(descriptor=descriptor)
+
+def custom_headshot_prompt(prompt: str) -> str:
+    """Wrap a user's own description in the professional headshot styling"""
+    return f"Professional headshot portrait, {prompt}, business attire, clean neutral background, high quality, photorealistic, confident expression, professional lighting, facing camera"
+
+def avatar_cache_key(prompt: str, model: str, image_size: str) -> str:
+    return hashlib.sha256(f"{model}\x00{image_size}\x00{prompt}".encode("utf-8")).hexdigest()
+
+async def _generate_and_store(db, key: str, prompt: str, model: str, image_size: str, arguments: dict) -> dict:
+    start_time = time.perf_counter()
+    result = await run_fal_model(model, {"prompt": prompt, "image_size": image_size, "num_images": 1, **arguments})
+    latency_ms = round((time.perf_counter() - start_time) * 1000, 1)
+
+    if not (result and result.get("images")):
+        return {"image_url": "", "cached": False, "latency_ms": latency_ms, "error": "No image returned"}
+
+    image_url = result["images"][0]["url"]
+    await db.avatar_cache.update_one(
+        {"key": key},
+        {"$setOnInsert": {
+            "key": key,
+            "prompt": prompt,
+            "model": model,
+            "image_size": image_size,
+            "image_url": image_url,
+            "latency_ms": latency_ms,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    return {"image_url": image_url, "cached": False, "latency_ms": latency_ms, "error": None}
+
+async def generate_cached_avatar(db, prompt: str, model: str = FLUX_SCHNELL,
+                                 image_size: str = DEFAULT_IMAGE_SIZE, arguments: Optional[dict] = None) -> dict:
+    """Return {"image_url", "cached", "latency_ms", "error"} for a prompt, generating it only if unseen"""
+    key = avatar_cache_key(prompt, model, image_size)
+
+    cached = await db.avatar_cache.find_one({"key": key}, {"image_url": 1})
+    if cached:
+        return {"image_url": cached["image_url"], "cached": True, "latency_ms": 0.0, "error": None}
+
+    shared = _inflight.get(key)
+    if shared is not None:
+        try:
+            return await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if not shared.cancelled():
+                raise  # This waiter was cancelled, not the generating request
+            return {"image_url": "", "cached": False, "latency_ms": 0.0, "error": "Avatar generation was cancelled"}
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    outcome = None
+    try:
+        outcome = await _generate_and_store(db, key, prompt, model, image_size, arguments or {})
+    except Exception as e:
+        logging.error(f"Avatar generation error: {e}")
+        outcome = {"image_url": "", "cached": False, "latency_ms": 0.0, "error": str(e)}
+    finally:
+        _inflight.pop(key, None)
+        # Resolve the waiters even when this request is cancelled mid-generation
+        if outcome is None:
+            future.cancel()
+        else:
+            future.set_result(outcome)
+    return outcome
+
+async def generate_avatars(db, prompts: List[str], model: str = FLUX_SCHNELL, image_size: str = DEFAULT_IMAGE_SIZE,
+                           arguments: Optional[dict] = None, concurrency: Optional[int] = None) -> Dict[str, dict]:
+    """Generate avatars for many prompts under a concurrency limit; duplicates are generated once"""
+    semaphore = asyncio.Semaphore(concurrency or int(os.environ.get("AVATAR_CONCURRENCY", "8")))
+    unique_prompts = list(dict.fromkeys(prompts))
+
+    async def generate(prompt: str):
+        async with semaphore:
+            return prompt, await generate_cached_avatar(db, prompt, model, image_size, arguments)
+
+    return dict(await asyncio.gather(*[generate(prompt) for prompt in unique_prompts]))
+
+class AvatarPool:
+    """Pre-generated generic headshots, so creating an agent never waits on image generation"""
+
+    def __init__(self):
+        self.target = int(os.environ.get("AVATAR_POOL_TARGET", "12"))
+        self.low_watermark = int(os.environ.get("AVATAR_POOL_LOW_WATERMARK", "4"))
+        self.lease_seconds = float(os.environ.get("AVATAR_POOL_REFILL_LEASE", "600"))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._refilling = set()
+        self._tasks = set()
+
+    async def pop(self, db, gender: str, style: str = "professional") -> str:
+        """Take an avatar from the (gender, style) bucket and top the bucket up in the background"""
+        bucket = f"{gender}:{style}"
+        entry = await db.avatar_pool.find_one_and_delete({"bucket": bucket}, sort=[("created_at", 1)])
+        self.schedule_refill(db, gender, style)
+        if entry:
+            return entry["image_url"]
+
+        # Empty bucket (cold start): fall back to the bucket's cached generic headshot,
+        # which is generated once and then shared until the pool fills up
+        logging.warning(f"Avatar pool bucket {bucket} is empty, using the shared cached headshot")
+        outcome = await generate_cached_avatar(db, headshot_prompt(gender, style), FLUX_DEV, DEFAULT_IMAGE_SIZE, HEADSHOT_ARGUMENTS)
+        return outcome["image_url"]
+
+    def schedule_refill(self, db, gender: str, style: str = "professional"):
+        bucket = f"{gender}:{style}"
+        if bucket in self._refilling:
+            return
+        self._refilling.add(bucket)
+        task = asyncio.create_task(self.refill(db, gender, style))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def acquire_lease(self, db, bucket: str) -> bool:
+        """Take the bucket's refill lease; False while another worker is refilling it"""
+        now = datetime.utcnow()
+        try:
+            await db.leases.update_one(
+                {"_id": f"avatar_pool:{bucket}", "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lease document exists and is held by a live refill
+            return False
+        return True
+
+    async def release_lease(self, db, bucket: str):
+        try:
+            await db.leases.delete_one({"_id": f"avatar_pool:{bucket}", "owner": self.owner})
+        except Exception as e:
+            logging.error(f"Avatar pool lease release for {bucket} failed: {e}")
+
+    async def refill(self, db, gender: str, style: str = "professional"):
+        """Generate images until the bucket is back at target, if it is below the low watermark"""
+        bucket = f"{gender}:{style}"
+        leased = False
+        try:
+            # One refill per bucket across workers, so buckets don't overshoot the target
+            leased = await self.acquire_lease(db, bucket)
+            if not leased:
+                return
+            available = await db.avatar_pool.count_documents({"bucket": bucket})
+            if available >= self.low_watermark:
+                return
+
+            prompt = headshot_prompt(gender, style)
+            semaphore = asyncio.Semaphore(int(os.environ.get("AVATAR_CONCURRENCY", "8")))
+
+            async def generate_one():
+                async with semaphore:
+                    start_time = time.perf_counter()
+                    # A fresh seed per image keeps pooled avatars from looking alike
+                    result = await run_fal_model(FLUX_DEV, {
+                        "prompt": prompt,
+                        "image_size": DEFAULT_IMAGE_SIZE,
+                        "num_images": 1,
+                        "seed": random.randrange(2 ** 31),
+                        **HEADSHOT_ARGUMENTS
+                    })
+                    if result and result.get("images"):
+                        await db.avatar_pool.insert_one({
+                            "bucket": bucket,
+                            "image_url": result["images"][0]["url"],
+                            "latency_ms": round((time.perf_counter() - start_time) * 1000, 1),
+                            "created_at": datetime.utcnow()
+                        })
+
+            outcomes = await asyncio.gather(*[generate_one() for _ in range(self.target - available)], return_exceptions=True)
+            failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+            if failures:
+                logging.error(f"Avatar pool refill for {bucket}: {len(failures)} of {len(outcomes)} generations failed ({failures[0]})")
+        except Exception as e:
+            logging.error(f"Avatar pool refill for {bucket} failed: {e}")
+        finally:
+            if leased:
+                await self.release_lease(db, bucket)
+            self._refilling.discard(bucket)
+
+    def warm(self, db):
+        """Start background refills for every bucket"""
+        for gender in ("female", "male"):
+            for style in HEADSHOT_STYLES:
+                self.schedule_refill(db, gender, style)
+
+avatar_pool = AvatarPool()
@@ -4,7 +4,10 @@ import os
 from typing import Optional, Any
 from datetime import timedelta
 import asyncio
-import aioredis
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # Older deployments still pin the standalone aioredis package
+    import aioredis
 
 class CacheManager:
     def __init__(self):
@@ -73,13 +76,23 @@ class CacheManager:
             return False
         
         try:
-            keys = await self.redis_client.keys(pattern)
+            # SCAN instead of KEYS so invalidation never blocks Redis on a large keyspace
+            keys = [key async for key in self.redis_client.scan_iter(match=pattern, count=500)]
             if keys:
                 await self.redis_client.delete(*keys)
             return True
         except Exception as e:
             print(f"Cache invalidate error: {e}")
             return False
+    
+    async def close(self):
+        """Close Redis connection"""
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.close()
+            except Exception as e:
+                print(f"Cache close error: {e}")
+        self.connected = False
 
 # Global cache instance
 cache_manager = CacheManager()
@@ -91,9 +104,9 @@ def cache_key(prefix: str, user_id: str, suffix: str = "") -> str:
         key += f":{suffix}"
     return key
 
-async def cached_user_data(user_id: str, data_type: str, fetch_func, ttl: int = 300):
+async def cached_user_data(user_id: str, data_type: str, fetch_func, ttl: int = 300, suffix: str = ""):
     """Generic caching decorator for user data"""
-    key = cache_key(data_type, user_id)
+    key = cache_key(data_type, user_id, suffix)
     
     # Try to get from cache first
     cached_data = await cache_manager.get(key)
@@ -111,8 +124,14 @@ async def cached_user_data(user_id: str, data_type: str, fetch_func, ttl: int =
 async def invalidate_user_cache(user_id: str, data_types: list = None):
     """Invalidate cache for specific user data types"""
     if data_types is None:
-        data_types = ["agents", "conversations", "documents", "saved_agents"]
+        data_types = ["agents", "conversations", "documents", "saved_agents", "simulation_state"]
     
     for data_type in data_types:
+        # The unfiltered entry lives at the bare key, filtered variants under key:suffix
+        await cache_manager.delete(cache_key(data_type, user_id))
         pattern = cache_key(data_type, user_id, "*")
-        await cache_manager.invalidate_pattern(pattern)
\ No newline at end of file
+        await cache_manager.invalidate_pattern(pattern)
+
+async def invalidate_data_type(data_type: str):
+    """Invalidate a data type for every user (for shared or unscoped writes)"""
+    await cache_manager.invalidate_pattern(f"{data_type}:*")
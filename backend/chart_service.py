@@ -0,0 +1,120 @@
+"""
+Chart rendering for generated documents
+Imported on first use by ProfessionalDocumentFormatter so that workers which never
+render charts don't load matplotlib. Disable entirely with FEATURE_CHARTS=0.
+"""
+
+import io
+import base64
+from typing import List, Dict
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+class ChartGenerator:
+    """Generate charts and visualizations for documents"""
+    
+    def __init__(self):
+        plt.style.use('seaborn-v0_8')
+        self.colors = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c']
+    
+    def create_pie_chart(self, data: Dict[str, float], title: str) -> str:
+        """Create a pie chart and return base64 encoded image"""
+        fig, ax = plt.subplots(figsize=(8, 6))
+        
+        labels = list(data.keys())
+        sizes = list(data.values())
+        
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
+                                         colors=self.colors[:len(labels)], startangle=90)
+        
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        
+        # Make text more readable
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+        
+        plt.tight_layout()
+        
+        # Convert to base64
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.getvalue()).decode()
+        plt.close()
+        
+        return image_base64
+    
+    def create_bar_chart(self, data: Dict[str, float], title: str, x_label: str, y_label: str) -> str:
+        """Create a bar chart and return base64 encoded image"""
+        fig, ax = plt.subplots(figsize=(10, 6))
+        
+        labels = list(data.keys())
+        values = list(data.values())
+        
+        bars = ax.bar(labels, values, color=self.colors[:len(labels)])
+        
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel(x_label, fontsize=12)
+        ax.set_ylabel(y_label, fontsize=12)
+        
+        # Add value labels on bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                   f'{height:,.0f}', ha='center', va='bottom', fontweight='bold')
+        
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        
+        # Convert to base64
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.getvalue()).decode()
+        plt.close()
+        
+        return image_base64
+    
+    def create_timeline_chart(self, milestones: List[Dict], title: str) -> str:
+        """Create a timeline chart for project milestones"""
+        fig, ax = plt.subplots(figsize=(12, 6))
+        
+        dates = [milestone['date'] for milestone in milestones]
+        labels = [milestone['label'] for milestone in milestones]
+        
+        # Create timeline
+        y_pos = 0
+        for i, (date, label) in enumerate(zip(dates, labels)):
+            color = self.colors[i % len(self.colors)]
+            ax.scatter(i, y_pos, s=200, c=color, alpha=0.8, zorder=2)
+            ax.text(i, y_pos + 0.1, label, ha='center', va='bottom', 
+                   fontsize=10, fontweight='bold', rotation=45)
+            ax.text(i, y_pos - 0.1, date, ha='center', va='top', 
+                   fontsize=9, color='gray')
+        
+        # Connect points
+        for i in range(len(dates) - 1):
+            ax.plot([i, i+1], [y_pos, y_pos], 'k-', alpha=0.3, zorder=1)
+        
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlim(-0.5, len(dates) - 0.5)
+        ax.set_ylim(-0.3, 0.3)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['bottom'].set_visible(False)
+        ax.spines['left'].set_visible(False)
+        
+        plt.tight_layout()
+        
+        # Convert to base64
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+        buffer.seek(0)
+        image_base64 = base64.b64encode(buffer.getvalue()).decode()
+        plt.close()
+        
+        return image_base64
@@ -0,0 +1,240 @@
+"""
+Conversation archive
+Hot endpoints only read the last few rounds, so older rounds are moved out of
+`conversations` into `conversation_archive`: one document per (user_id, day) holding
+that day's rounds as a compressed BSON blob. Export, analytics and explicit history reads
+go through all_rounds / recent_rounds / count_rounds, which merge both tiers; polled
+endpoints such as GET /conversations stay on the hot tier.
+
+A round is archived once it is older than CONVERSATION_ARCHIVE_AFTER_DAYS or falls
+outside the newest CONVERSATION_HOT_ROUNDS of its user; the newest MIN_HOT_ROUNDS always
+stay hot because round generation reads them for context.
+
+    CONVERSATION_ARCHIVE_AFTER_DAYS  age after which rounds are archived (default 7)
+    CONVERSATION_HOT_ROUNDS          rounds per user kept hot regardless of age (default 200)
+    CONVERSATION_ARCHIVE_INTERVAL    seconds between compactor passes, 0 disables (default 3600)
+
+Every worker starts the compactor, but a pass only runs in the worker holding the
+`conversation_archiver` lease in the `leases` collection; the lease outlives one interval,
+so another worker takes over within two intervals of the holder dying.
+
+zstd is used when the zstandard package is installed, zlib otherwise; every archive
+document records its codec.
+"""
+
+import os
+import zlib
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import bson
+from pymongo.errors import DuplicateKeyError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MIN_HOT_ROUNDS = 10
+ARCHIVE_BATCH_SIZE = 500
+
+ARCHIVE_AFTER_DAYS = float(os.environ.get("CONVERSATION_ARCHIVE_AFTER_DAYS", "7"))
+HOT_ROUNDS = max(MIN_HOT_ROUNDS, int(os.environ.get("CONVERSATION_HOT_ROUNDS", "200")))
+ARCHIVE_INTERVAL = float(os.environ.get("CONVERSATION_ARCHIVE_INTERVAL", "3600"))
+LEASE_ID = "conversation_archiver"
+
+def default_codec() -> str:
+    return "zstd" if zstandard else "zlib"
+
+def compress_rounds(rounds: List[dict], codec: Optional[str] = None) -> Tuple[str, bytes]:
+    codec = codec or default_codec()
+    raw = bson.encode({"rounds": [{k: v for k, v in r.items() if k != "_id"} for r in rounds]})
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=10).compress(raw)
+    if codec == "zlib":
+        return codec, zlib.compress(raw, 9)
+    raise ValueError(f"Unknown archive codec '{codec}'")
+
+def decompress_rounds(codec: str, data: bytes) -> List[dict]:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed - cannot read zstd conversation archives")
+        raw = zstandard.ZstdDecompressor().decompress(bytes(data))
+    elif codec == "zlib":
+        raw = zlib.decompress(bytes(data))
+    else:
+        raise ValueError(f"Unknown archive codec '{codec}'")
+    return bson.decode(raw)["rounds"]
+
+def bucket_key(created_at: datetime) -> str:
+    return created_at.strftime("%Y-%m-%d")
+
+def merge_rounds(existing: List[dict], new: List[dict]) -> List[dict]:
+    """Union by round id (re-archiving after an interrupted move is harmless), oldest first"""
+    merged = {r["id"]: r for r in existing}
+    merged.update((r["id"], {k: v for k, v in r.items() if k != "_id"}) for r in new)
+    return sorted(merged.values(), key=lambda r: r.get("created_at") or datetime.min)
+
+def archive_threshold(age_cutoff: datetime, keep_boundary: Optional[datetime],
+                      count_boundary: Optional[datetime]) -> Optional[datetime]:
+    """
+    Rounds created before the returned time are archived. keep_boundary is the created_at
+    of the MIN_HOT_ROUNDS-th newest round, count_boundary that of the HOT_ROUNDS-th newest
+    (None when the user has fewer rounds).
+    """
+    if keep_boundary is None:
+        return None
+    threshold = max(age_cutoff, count_boundary) if count_boundary else age_cutoff
+    return min(threshold, keep_boundary)
+
+def _archive_document(user_id: str, bucket: str, rounds: List[dict]) -> dict:
+    codec, data = compress_rounds(rounds)
+    return {
+        "user_id": user_id,
+        "bucket": bucket,
+        "codec": codec,
+        "data": bson.Binary(data),
+        "round_ids": [r["id"] for r in rounds],
+        "round_count": len(rounds),
+        "first_created_at": rounds[0].get("created_at"),
+        "last_created_at": rounds[-1].get("created_at"),
+        "updated_at": datetime.utcnow(),
+    }
+
+def _rounds_of(doc: dict) -> List[dict]:
+    return decompress_rounds(doc["codec"], doc["data"])
+
+async def count_rounds(db, user_id: Optional[str] = None) -> int:
+    """Hot plus archived rounds, for round numbering and totals"""
+    query = {"user_id": user_id} if user_id is not None else {}
+    hot = await db.conversations.count_documents(query)
+    archived = 0
+    async for doc in db.conversation_archive.aggregate([
+        {"$match": query}, {"$group": {"_id": None, "rounds": {"$sum": "$round_count"}}}
+    ]):
+        archived = doc["rounds"]
+    return hot + archived
+
+async def all_rounds(db, user_id: str, hot_limit: int = 1000) -> List[dict]:
+    """Every round of a user, oldest first"""
+    rounds = []
+    async for doc in db.conversation_archive.find({"user_id": user_id}).sort("first_created_at", 1):
+        rounds.extend(_rounds_of(doc))
+    rounds.extend(await db.conversations.find({"user_id": user_id}).sort("created_at", 1).to_list(hot_limit))
+    return rounds
+
+async def recent_rounds(db, limit: int, user_id: Optional[str] = None) -> List[dict]:
+    """The newest rounds, newest first; only as many archive buckets are decompressed as needed"""
+    query = {"user_id": user_id} if user_id is not None else {}
+    rounds = await db.conversations.find(query).sort("created_at", -1).to_list(limit)
+    if len(rounds) < limit:
+        needed = limit - len(rounds)
+        archived = []
+        async for doc in db.conversation_archive.find(query).sort("last_created_at", -1):
+            # Nothing in this or any later bucket is newer than what we already have
+            if sum(1 for r in archived if r.get("created_at") and r["created_at"] >= doc["last_created_at"]) >= needed:
+                break
+            archived.extend(_rounds_of(doc))
+        archived.sort(key=lambda r: r.get("created_at") or datetime.min, reverse=True)
+        rounds.extend(archived[:needed])
+    return rounds
+
+class ConversationArchiver:
+    """Background compactor moving cold rounds into conversation_archive"""
+
+    def __init__(self, db):
+        self.db = db
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire_lease(self, duration: float, now: Optional[datetime] = None) -> bool:
+        """Take or renew the compactor lease; False while another worker holds it"""
+        now = now or datetime.utcnow()
+        try:
+            await self.db.leases.update_one(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=duration)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lease document exists and is held by a live worker
+            return False
+        return True
+
+    async def _boundary(self, db, user_id: str, rank: int) -> Optional[datetime]:
+        docs = await db.conversations.find({"user_id": user_id}, {"created_at": 1}).sort(
+            "created_at", -1).skip(rank - 1).limit(1).to_list(1)
+        return docs[0].get("created_at") if docs else None
+
+    async def compact_user(self, user_id: str, now: Optional[datetime] = None) -> int:
+        """Archive one user's cold rounds; returns how many were moved"""
+        db = self.db
+        now = now or datetime.utcnow()
+        threshold = archive_threshold(
+            now - timedelta(days=ARCHIVE_AFTER_DAYS),
+            await self._boundary(db, user_id, MIN_HOT_ROUNDS),
+            await self._boundary(db, user_id, HOT_ROUNDS),
+        )
+        if threshold is None:
+            return 0
+
+        moved = 0
+        while True:
+            cold = await db.conversations.find(
+                {"user_id": user_id, "created_at": {"$lt": threshold}}
+            ).sort("created_at", 1).to_list(ARCHIVE_BATCH_SIZE)
+            if not cold:
+                return moved
+
+            buckets: Dict[str, List[dict]] = {}
+            for conversation_round in cold:
+                buckets.setdefault(bucket_key(conversation_round["created_at"]), []).append(conversation_round)
+
+            for bucket, rounds in buckets.items():
+                key = {"user_id": user_id, "bucket": bucket}
+                existing = await db.conversation_archive.find_one(key)
+                merged = merge_rounds(_rounds_of(existing) if existing else [], rounds)
+                await db.conversation_archive.replace_one(key, _archive_document(user_id, bucket, merged), upsert=True)
+                # Only delete once the archive write has succeeded
+                await db.conversations.delete_many({"id": {"$in": [r["id"] for r in rounds]}})
+                moved += len(rounds)
+
+            if len(cold) < ARCHIVE_BATCH_SIZE:
+                return moved
+
+    async def compact(self) -> int:
+        db = self.db
+        moved = 0
+        for user_id in await db.conversations.distinct("user_id"):
+            if not user_id:
+                continue
+            try:
+                moved += await self.compact_user(user_id)
+            except Exception as e:
+                logging.error(f"Error archiving conversations for user {user_id}: {e}")
+        if moved:
+            logging.info(f"Archived {moved} conversation rounds")
+        return moved
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                if await self.acquire_lease(2 * interval):
+                    await self.compact()
+            except Exception as e:
+                logging.error(f"Error in conversation archiver pass: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = ARCHIVE_INTERVAL):
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
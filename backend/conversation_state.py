@@ -0,0 +1,161 @@
+"""
+Rolling conversation state
+One per simulation, stored as simulation_state.conversation_state: topics covered, open
+questions, action items, decisions and a compressed narrative of everything said. It is
+updated once per appended message and read as-is when an agent prompt is built, so the
+work per turn and the prompt size stay flat however long the simulation runs.
+
+The last RECENT_MESSAGES messages are kept verbatim; older ones survive as one clause
+each in the narrative, which drops its oldest clauses past NARRATIVE_MAX_CHARS.
+
+Observer and fast-forward rounds are written without touching the state. It records the
+created_at of the last round it has seen (folded_through), and round generation folds in
+the rounds written since then (at most CATCH_UP_ROUNDS, newest kept) before building prompts.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from phrase_matcher import PhraseMatcher
+
+RECENT_MESSAGES = 5
+MAX_ITEMS = 8
+NARRATIVE_MAX_CHARS = 1200
+CLAUSE_CHARS = 90
+NARRATIVE_SEPARATOR = " | "
+CATCH_UP_ROUNDS = 20
+
+TOPIC_KEYWORDS = {
+    "budget": ("budget", "cost", "funding"),
+    "timeline": ("timeline", "schedule", "deadline"),
+    "risk": ("risk", "challenge", "problem"),
+    "action_planning": ("implement", "action", "next steps"),
+}
+ACTION_PHRASES = ("i will", "i recommend", "we should", "action item", "next step")
+DECISION_PHRASES = ("i vote", "let's vote", "we've decided", "we decided", "we agreed", "the consensus",
+                    "let's move forward", "i propose", "i commit to")
+# One pass per message finds topics, action items and decisions together
+MESSAGE_SIGNALS = PhraseMatcher({**TOPIC_KEYWORDS, "action_item": ACTION_PHRASES, "decision": DECISION_PHRASES})
+
+def _message_fields(message) -> tuple:
+    """(agent_name, text) of a ConversationMessage or a message dict ("message" or "content")"""
+    if isinstance(message, dict):
+        return message.get("agent_name", "Unknown"), message.get("message") or message.get("content") or ""
+    return getattr(message, "agent_name", "Unknown"), getattr(message, "message", "") or ""
+
+def _clause(agent_name: str, text: str) -> str:
+    first = text.strip().split(". ")[0]
+    return f"{agent_name}: {first[:CLAUSE_CHARS]}{'...' if len(first) > CLAUSE_CHARS else ''}"
+
+def _push(items: list, item: str):
+    items.append(item)
+    del items[:-MAX_ITEMS]
+
+class ConversationState:
+    """Incrementally maintained summary of a simulation's conversation"""
+
+    def __init__(self, data: Optional[dict] = None):
+        data = data or {}
+        self.topics: List[str] = list(data.get("topics", []))
+        self.recent: List[dict] = list(data.get("recent", []))
+        self.action_items: List[str] = list(data.get("action_items", []))
+        self.action_count: int = data.get("action_count", 0)
+        self.decisions: List[str] = list(data.get("decisions", []))
+        self.narrative: str = data.get("narrative", "")
+        self.message_count: int = data.get("message_count", 0)
+        self.folded_through: Optional[datetime] = data.get("folded_through")
+
+    @classmethod
+    def from_messages(cls, messages: Iterable) -> "ConversationState":
+        state = cls()
+        for message in messages or []:
+            state.add_message(*_message_fields(message))
+        return state
+
+    def newer_rounds_query(self, user_id: str) -> dict:
+        """Rounds of the user the state has not seen yet"""
+        query = {"user_id": user_id}
+        if self.folded_through:
+            query["created_at"] = {"$gt": self.folded_through}
+        return query
+
+    def fold_rounds(self, rounds: Iterable[dict]):
+        """Fold in stored rounds, oldest first"""
+        for conversation_round in rounds:
+            for message in conversation_round.get("messages", []):
+                self.add_message(*_message_fields(message))
+            self.mark_folded(conversation_round.get("created_at"))
+
+    def mark_folded(self, created_at: Optional[datetime]):
+        if created_at and (self.folded_through is None or created_at > self.folded_through):
+            self.folded_through = created_at
+
+    def add_message(self, agent_name: str, text: str):
+        if not text:
+            return
+        signals = MESSAGE_SIGNALS.categories(text)
+        self.message_count += 1
+        self.topics.extend(topic for topic in TOPIC_KEYWORDS if topic in signals and topic not in self.topics)
+        if "action_item" in signals:
+            self.action_count += 1
+            _push(self.action_items, f"{agent_name}: {text[:100]}")
+        if "decision" in signals:
+            _push(self.decisions, f"{agent_name}: {text[:160]}")
+
+        self.recent.append({"agent_name": agent_name, "message": text})
+        while len(self.recent) > RECENT_MESSAGES:
+            oldest = self.recent.pop(0)
+            self._fold(_clause(oldest["agent_name"], oldest["message"]))
+
+    def _fold(self, clause: str):
+        self.narrative = f"{self.narrative}{NARRATIVE_SEPARATOR}{clause}" if self.narrative else clause
+        if len(self.narrative) > NARRATIVE_MAX_CHARS:
+            cut = self.narrative.find(NARRATIVE_SEPARATOR, len(self.narrative) - NARRATIVE_MAX_CHARS)
+            self.narrative = self.narrative[cut + len(NARRATIVE_SEPARATOR):] if cut >= 0 else self.narrative[-NARRATIVE_MAX_CHARS:]
+
+    @property
+    def phase(self) -> str:
+        if self.message_count > 3 and "action_planning" in self.topics:
+            return "implementation"
+        if self.message_count > 2 and len(self.topics) >= 2:
+            return "solution_development"
+        if self.message_count > 4:
+            return "action_planning"
+        return "problem_understanding" if self.message_count else "early"
+
+    def pending_questions_for(self, agent) -> List[dict]:
+        """Questions among the recent messages that name the agent or touch its expertise"""
+        name = agent.name.lower()
+        expertise = (agent.expertise or "").lower()
+        keywords = expertise.split()
+        questions = []
+        for message in self.recent:
+            text = message["message"]
+            if "?" not in text or message["agent_name"] == agent.name:
+                continue
+            lowered = text.lower()
+            if name in lowered or (expertise and expertise in lowered) or any(keyword in lowered for keyword in keywords):
+                questions.append({"asker": message["agent_name"], "question": text, "relevance": "direct"})
+        return questions
+
+    def recent_text(self) -> str:
+        if not self.recent:
+            return ""
+        return "\n\nRecent conversation context:\n" + "".join(
+            f"{message['agent_name']}: {message['message'][:200]}...\n" for message in self.recent
+        )
+
+    def topics_text(self) -> str:
+        return ", ".join(self.topics) if self.topics else "None yet"
+
+    def to_dict(self) -> dict:
+        return {
+            "topics": self.topics,
+            "recent": self.recent,
+            "action_items": self.action_items,
+            "action_count": self.action_count,
+            "decisions": self.decisions,
+            "narrative": self.narrative,
+            "message_count": self.message_count,
+            "folded_through": self.folded_through,
+        }
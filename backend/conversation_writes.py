@@ -0,0 +1,86 @@
+"""
+Conversation write path
+Changes to stored rounds are queued and flushed as one bulk_write, so a write only
+carries what changed: new messages go out as a single $push/$each per round, edits to
+existing messages as targeted $set updates (array filters on the message id, or the
+array position for legacy messages without one). Nothing rewrites the whole
+messages array.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+def _round_key(round_filter: dict) -> tuple:
+    return tuple(sorted(round_filter.items()))
+
+class ConversationWriter:
+    """Queues appends and field updates for conversation rounds until flush()"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._filters: Dict[tuple, dict] = {}
+        self._pushes: Dict[tuple, List[dict]] = {}
+        self._sets: Dict[tuple, dict] = {}
+        self._array_filters: Dict[tuple, List[dict]] = {}
+
+    def _key(self, round_filter: dict) -> tuple:
+        key = _round_key(round_filter)
+        self._filters.setdefault(key, dict(round_filter))
+        return key
+
+    def append(self, round_filter: dict, *messages: dict):
+        """Append messages to the end of a round"""
+        self._pushes.setdefault(self._key(round_filter), []).extend(messages)
+
+    def set_fields(self, round_filter: dict, fields: dict):
+        """Set top-level fields of a round"""
+        self._sets.setdefault(self._key(round_filter), {}).update(fields)
+
+    def set_message(self, round_filter: dict, fields: dict, message_id: Optional[str] = None,
+                    index: Optional[int] = None):
+        """Set fields of one message, matched by id or, for messages without one, by position"""
+        key = self._key(round_filter)
+        updates = self._sets.setdefault(key, {})
+        if message_id is not None:
+            array_filters = self._array_filters.setdefault(key, [])
+            identifier = f"m{len(array_filters)}"
+            array_filters.append({f"{identifier}.id": message_id})
+            path = f"messages.$[{identifier}]"
+        elif index is not None:
+            path = f"messages.{index}"
+        else:
+            raise ValueError("set_message needs a message_id or an index")
+        for field, value in fields.items():
+            updates[f"{path}.{field}"] = value
+
+    @property
+    def pending(self) -> int:
+        return len(self.operations())
+
+    def operations(self) -> List[Tuple[dict, dict, Optional[List[dict]]]]:
+        """(filter, update, array_filters) per write; appends go first so edits can target new messages"""
+        operations = []
+        for key, messages in self._pushes.items():
+            if messages:
+                operations.append((self._filters[key], {"$push": {"messages": {"$each": messages}}}, None))
+        for key, updates in self._sets.items():
+            if updates:
+                operations.append((self._filters[key], {"$set": updates}, self._array_filters.get(key) or None))
+        return operations
+
+    async def flush(self) -> int:
+        """Write everything queued in one ordered bulk_write; returns the number of updates sent"""
+        operations = self.operations()
+        self._filters.clear()
+        self._pushes.clear()
+        self._sets.clear()
+        self._array_filters.clear()
+        if not operations:
+            return 0
+        await self.collection.bulk_write(
+            [UpdateOne(round_filter, update, array_filters=array_filters)
+             for round_filter, update, array_filters in operations],
+            ordered=True
+        )
+        return len(operations)
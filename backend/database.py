@@ -1,9 +1,52 @@
+"""
+MongoDB access
+One Motor client per process, shared by server.py, auth.py and every helper module.
+Pool sizing comes from the environment so it can be checked against the MongoDB
+deployment's connection capacity (scripts/capacity_calculator.py --mongo-pool):
+
+    MONGO_MAX_POOL_SIZE           connections per process (default 100)
+    MONGO_MIN_POOL_SIZE           connections kept open when idle (default 10)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS   how long a request waits for a free connection (default 5000)
+    MONGO_LONG_OPERATION_TIMEOUT  seconds allowed inside long_operation() (default 300)
+
+The client's socketTimeoutMS (20s) and serverSelectionTimeoutMS (3s) apply to every
+operation. Index builds and analytics aggregations run inside long_operation(), a
+pymongo.timeout() block whose budget replaces both timeouts for what runs in it, so it
+first pings the server under the normal 3s server selection: with MongoDB down or still
+starting it fails fast instead of waiting out the long budget.
+"""
+
 import motor.motor_asyncio
 import os
+import pymongo
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError
 import asyncio
+from contextlib import asynccontextmanager
 from typing import Optional
+from instrumentation import mongo_command_listener, mongo_pool_listener, query_profiler_listener
+from indexes import ensure_indexes
+
+LONG_OPERATION_TIMEOUT = float(os.environ.get("MONGO_LONG_OPERATION_TIMEOUT", "300"))
+
+@asynccontextmanager
+async def long_operation(db, seconds: Optional[float] = None):
+    """Give the operations inside one overall deadline instead of socketTimeoutMS, once db answers a ping"""
+    await db.command("ping")
+    with pymongo.timeout(seconds or LONG_OPERATION_TIMEOUT):
+        yield
+
+def pool_options() -> dict:
+    """Connection pool settings for the shared client"""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "10")),
+        "maxIdleTimeMS": 30000,  # Close connections after 30s idle
+        "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        "serverSelectionTimeoutMS": 3000,  # 3s timeout for server selection
+        "socketTimeoutMS": 20000,  # 20s socket timeout
+        "connectTimeoutMS": 10000,  # 10s connection timeout
+    }
 
 class DatabaseManager:
     def __init__(self):
@@ -11,33 +54,35 @@ class DatabaseManager:
         self.client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
         self.db = None
         self.connected = False
-        
-    async def connect(self):
-        """Initialize MongoDB connection with connection pooling"""
-        try:
-            # Configure connection with optimization for high load
+    
+    def configure(self, mongo_url: Optional[str] = None, db_name: Optional[str] = None):
+        """Create the process-wide client without any I/O and return the database; later calls reuse it"""
+        if self.client is None:
+            self.mongo_url = mongo_url or self.mongo_url
             self.client = motor.motor_asyncio.AsyncIOMotorClient(
                 self.mongo_url,
-                maxPoolSize=100,  # Maximum connections in pool
-                minPoolSize=10,   # Minimum connections in pool
-                maxIdleTimeMS=30000,  # Close connections after 30s idle
-                waitQueueTimeoutMS=5000,  # Wait 5s for connection from pool
-                serverSelectionTimeoutMS=3000,  # 3s timeout for server selection
-                socketTimeoutMS=20000,  # 20s socket timeout
-                connectTimeoutMS=10000,  # 10s connection timeout
+                **pool_options(),
                 retryWrites=True,
                 retryReads=True,
                 readPreference='primaryPreferred',
                 w='majority',  # Write concern for data safety
-                journal=True   # Ensure writes are journaled
+                journal=True,  # Ensure writes are journaled
+                # Command metrics, per-request profiling and pool telemetry
+                event_listeners=[mongo_command_listener, query_profiler_listener, mongo_pool_listener]
             )
             
-            # Get database name from URL or use default
-            db_name = 'observer_ai'
-            if '/' in self.mongo_url:
-                db_name = self.mongo_url.split('/')[-1].split('?')[0]
-            
+            # Database name as given, else from the URL, else the default
+            if not db_name:
+                db_name = 'observer_ai'
+                if '/' in self.mongo_url.split('://', 1)[-1]:
+                    db_name = self.mongo_url.split('/')[-1].split('?')[0] or db_name
             self.db = self.client[db_name]
+        return self.db
+        
+    async def connect(self):
+        """Initialize MongoDB connection with connection pooling"""
+        try:
+            self.configure()
             
             # Test connection
             await self.client.admin.command('ping')
@@ -54,44 +99,13 @@ class DatabaseManager:
             raise
     
     async def create_indexes(self):
-        """Create database indexes for optimal performance"""
+        """Create the indexes declared in indexes.py"""
         if not self.connected:
             return
         
         try:
-            # User indexes
-            await self.db.users.create_index("email", unique=True)
-            await self.db.users.create_index("id", unique=True)
-            await self.db.users.create_index("created_at")
-            await self.db.users.create_index("last_login")
-            
-            # Agent indexes  
-            await self.db.agents.create_index("user_id")
-            await self.db.agents.create_index("id", unique=True)
-            await self.db.agents.create_index([("user_id", 1), ("created_at", -1)])
-            await self.db.agents.create_index("archetype")
-            
-            # Conversation indexes
-            await self.db.conversations.create_index("user_id")
-            await self.db.conversations.create_index("id", unique=True)
-            await self.db.conversations.create_index([("user_id", 1), ("created_at", -1)])
-            await self.db.conversations.create_index("round_number")
-            
-            # Document indexes
-            await self.db.documents.create_index("metadata.user_id")
-            await self.db.documents.create_index("id", unique=True)
-            await self.db.documents.create_index([("metadata.user_id", 1), ("metadata.created_at", -1)])
-            await self.db.documents.create_index("metadata.category")
-            
-            # Saved agent indexes
-            await self.db.saved_agents.create_index("user_id")
-            await self.db.saved_agents.create_index("id", unique=True)
-            await self.db.saved_agents.create_index([("user_id", 1), ("created_at", -1)])
-            
-            # Simulation state indexes
-            await self.db.simulation_state.create_index("user_id")
-            await self.db.simulation_state.create_index("created_at")
-            
+            async with long_operation(self.db):
+                await ensure_indexes(self.db)
             print("✅ Database indexes created successfully")
             
         except Exception as e:
@@ -103,11 +117,12 @@ class DatabaseManager:
             return None
         
         try:
+            options = pool_options()
             server_status = await self.client.admin.command("serverStatus")
             return {
                 "connections": server_status.get("connections", {}),
                 "active_clients": server_status.get("globalLock", {}).get("activeClients", {}),
-                "pool_size": "100 max, 10 min"  # Our configured pool size
+                "pool_size": f"{options['maxPoolSize']} max, {options['minPoolSize']} min"
             }
         except Exception as e:
             print(f"Error getting connection stats: {e}")
@@ -124,6 +139,6 @@ class DatabaseManager:
 # Global database instance
 db_manager = DatabaseManager()
 
-# Convenience accessor for the database
+# Convenience accessor for the shared database
 def get_db():
-    return db_manager.db
\ No newline at end of file
+    return db_manager.configure()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Post-round document pipeline
+Document generation runs after a round is saved rather than inside the request. Rounds
+are enqueued per (user_id, scenario_name); rounds arriving within DOCUMENT_PIPELINE_DEBOUNCE
+seconds of each other are coalesced into one job over all of their messages, and at most
+DOCUMENT_PIPELINE_CONCURRENCY jobs run at once. A key never has two jobs running - rounds
+enqueued while its job runs form the next batch.
+
+Every finished job is announced to subscribers as an event (see GET /api/documents/events).
+Events are published on the Redis channel document_pipeline:events when Redis is connected,
+so a stream served by one worker sees jobs finished in any other; each worker relays the
+channel to its own subscribers, filtered by user. Without Redis, events stay in-process.
+
+    DOCUMENT_PIPELINE_DEBOUNCE     seconds without a new round before a batch runs (default 5)
+    DOCUMENT_PIPELINE_MAX_DELAY    longest a round waits under a steady stream of rounds (default 30)
+    DOCUMENT_PIPELINE_CONCURRENCY  jobs running at once across all users (default 2)
+"""
+
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+DEBOUNCE = float(os.environ.get("DOCUMENT_PIPELINE_DEBOUNCE", "5"))
+MAX_DELAY = float(os.environ.get("DOCUMENT_PIPELINE_MAX_DELAY", "30"))
+CONCURRENCY = max(1, int(os.environ.get("DOCUMENT_PIPELINE_CONCURRENCY", "2")))
+
+EVENTS_CHANNEL = "document_pipeline:events"
+RELAY_RETRY_SECONDS = 1.0
+
+PipelineKey = Tuple[str, str]
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+class DocumentPipeline:
+    """
+    Debounced, per-key document jobs. worker(rounds, scenario_name=..., **context) receives
+    every coalesced round (oldest first) and the context of the latest enqueue; whatever it
+    returns is published as the event's "result". redis returns the shared async Redis client,
+    or None while Redis is unavailable.
+    """
+
+    def __init__(self, worker: Callable[..., Awaitable[Any]], debounce: Optional[float] = None,
+                 max_delay: Optional[float] = None, concurrency: Optional[int] = None,
+                 redis: Optional[Callable[[], Any]] = None):
+        self.worker = worker
+        self.debounce = DEBOUNCE if debounce is None else debounce
+        self.max_delay = MAX_DELAY if max_delay is None else max_delay
+        self.redis = redis or (lambda: None)
+        self._semaphore = asyncio.Semaphore(concurrency or CONCURRENCY)
+        self._pending: Dict[PipelineKey, dict] = {}
+        self._drivers: Dict[PipelineKey, asyncio.Task] = {}
+        self._subscribers: Dict[asyncio.Queue, Optional[str]] = {}
+        self._relay: Optional[asyncio.Task] = None
+
+    def enqueue(self, user_id: str, scenario_name: str, conversation_round, **context):
+        """Queue a saved round; returns immediately"""
+        key = (user_id, scenario_name)
+        now = asyncio.get_running_loop().time()
+        batch = self._pending.setdefault(key, {"rounds": [], "first_enqueued": now})
+        batch["rounds"].append(conversation_round)
+        batch["last_enqueued"] = now
+        batch["context"] = context
+        if key not in self._drivers:
+            self._drivers[key] = asyncio.create_task(self._drive(key))
+
+    def pending(self, user_id: str, scenario_name: str) -> int:
+        """Rounds waiting for the key's next job"""
+        batch = self._pending.get((user_id, scenario_name))
+        return len(batch["rounds"]) if batch else 0
+
+    def subscribe(self, user_id: Optional[str] = None) -> asyncio.Queue:
+        """Queue receiving the events of one user, or of every user"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[queue] = user_id
+        if self._relay is None and self.redis() is not None:
+            self._relay = asyncio.create_task(self._run_relay())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def _deliver(self, event: dict):
+        for queue, user_id in list(self._subscribers.items()):
+            if user_id is None or event.get("user_id") == user_id:
+                queue.put_nowait(event)
+
+    async def publish(self, event: dict):
+        client = self.redis()
+        if client is not None:
+            try:
+                await client.publish(EVENTS_CHANNEL, json.dumps(event, default=_json_default))
+                return
+            except Exception as e:
+                logging.error(f"Publishing document event to Redis failed, delivering in-process only: {e}")
+        self._deliver(event)
+
+    async def _run_relay(self):
+        """Relay the Redis channel to this worker's subscribers, resubscribing after errors"""
+        try:
+            while self._subscribers:
+                client = self.redis()
+                if client is None:
+                    return
+                pubsub = client.pubsub()
+                try:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._deliver(json.loads(message["data"]))
+                except Exception as e:
+                    logging.error(f"Document event relay lost its Redis subscription: {e}")
+                    await asyncio.sleep(RELAY_RETRY_SECONDS)
+                finally:
+                    await pubsub.reset()
+        finally:
+            self._relay = None
+
+    async def _wait_for_quiet(self, batch: dict):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            wait = min(batch["last_enqueued"] + self.debounce, batch["first_enqueued"] + self.max_delay) - now
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _drive(self, key: PipelineKey):
+        try:
+            while key in self._pending:
+                await self._wait_for_quiet(self._pending[key])
+                # Rounds enqueued from here on start the next batch
+                batch = self._pending.pop(key)
+                async with self._semaphore:
+                    await self._run(key, batch)
+        finally:
+            self._drivers.pop(key, None)
+
+    async def _run(self, key: PipelineKey, batch: dict):
+        user_id, scenario_name = key
+        rounds = batch["rounds"]
+        event = {
+            "type": "documents_updated",
+            "user_id": user_id,
+            "scenario_name": scenario_name,
+            "round_ids": [getattr(r, "id", None) for r in rounds],
+        }
+        try:
+            event["result"] = await self.worker(rounds, scenario_name=scenario_name, **batch["context"])
+        except Exception as e:
+            logging.error(f"Document pipeline job for {scenario_name or 'unnamed scenario'} failed: {e}")
+            event.update(type="documents_failed", detail=str(e))
+        event["finished_at"] = datetime.utcnow()
+        await self.publish(event)
+
+    async def drain(self):
+        """Wait until every queued round has been processed"""
+        while self._drivers:
+            await asyncio.gather(*list(self._drivers.values()), return_exceptions=True)
+
+    async def stop(self):
+        """Cancel queued and running jobs (documents are a best-effort by-product of rounds)"""
+        drivers = list(self._drivers.values())
+        for task in drivers:
+            task.cancel()
+        await asyncio.gather(*drivers, return_exceptions=True)
+        self._pending.clear()
+        if self._relay:
+            self._relay.cancel()
+            await asyncio.gather(self._relay, return_exceptions=True)
@@ -0,0 +1,144 @@
+"""
+Section-level document patches
+Incremental document updates send the LLM a compact outline of the document plus the few
+sections the conversation touches, and ask for a JSON patch instead of the whole document:
+
+    [{"op": "replace", "section": "s3", "content": "..."},
+     {"op": "append",  "section": "s5", "content": "..."},
+     {"op": "add", "after": "s5", "heading": "## Rollback Plan", "content": "..."}]
+
+The patch is applied locally, so the document's length no longer bounds what the model
+must write, and untouched sections are kept byte for byte.
+"""
+
+import re
+import json
+from typing import Dict, List, Optional
+
+HEADING = re.compile(r"^(#{1,3})\s+\S")
+FENCE = re.compile(r"^\s*(```|~~~)")
+WORD = re.compile(r"[a-z][a-z0-9']{3,}")
+PATCH_OPS = ("replace", "append", "add")
+
+def parse_sections(markdown: str) -> List[dict]:
+    """
+    Split on level 1-3 headings outside code fences. Text before the first heading is
+    section s0 with an empty heading; bodies keep their trailing newlines.
+    """
+    sections = [{"id": "s0", "heading": "", "level": 0, "body": ""}]
+    in_fence = False
+    for line in (markdown or "").splitlines(keepends=True):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line)
+        if match:
+            sections.append({"id": f"s{len(sections)}", "heading": line.rstrip("\n"),
+                             "level": len(match.group(1)), "body": ""})
+        else:
+            sections[-1]["body"] += line
+    return sections
+
+def render_sections(sections: List[dict]) -> str:
+    parts = []
+    for section in sections:
+        if section["heading"]:
+            parts.append(section["heading"] + "\n")
+        parts.append(section["body"])
+    return "".join(parts)
+
+def outline(sections: List[dict]) -> str:
+    """One line per section: id, heading and size, for the model to address sections by id"""
+    lines = []
+    for section in sections:
+        if not section["heading"] and not section["body"].strip():
+            continue
+        heading = section["heading"] or "(preamble)"
+        lines.append(f"{section['id']}  {heading}  [{len(section['body'].splitlines())} lines]")
+    return "\n".join(lines)
+
+def _words(text: str) -> set:
+    return set(WORD.findall(text.lower()))
+
+def relevant_sections(sections: List[dict], text: str, limit: int = 3) -> List[dict]:
+    """The sections sharing the most vocabulary with text, in document order"""
+    words = _words(text)
+    scored = [(len(words & _words(s["heading"] + " " + s["body"])), n) for n, s in enumerate(sections)
+              if s["heading"] or s["body"].strip()]
+    chosen = sorted(n for score, n in sorted(scored, reverse=True)[:limit] if score > 0)
+    return [sections[n] for n in chosen]
+
+def patch_prompt(sections: List[dict], shown: List[dict], conversation_text: str, update_reason: str) -> str:
+    """The user turn of an incremental update: outline, the shown sections in full, the conversation"""
+    shown_text = "\n\n".join(f"[{s['id']}] {s['heading'] or '(preamble)'}\n{s['body'].strip()}" for s in shown)
+    return f"""DOCUMENT OUTLINE (section id, heading, size):
+{outline(sections)}
+
+RELEVANT SECTIONS (full text):
+{shown_text or "(none)"}
+
+NEW CONVERSATION CONTENT:
+{conversation_text}
+
+UPDATE REASON: {update_reason}
+
+Incorporate the new information and decisions from the conversation. Reply with only a JSON array of operations:
+- {{"op": "replace", "section": "<id>", "content": "<new section body>"}} - only for sections whose full text is shown above
+- {{"op": "append", "section": "<id>", "content": "<text added at the end of the section>"}}
+- {{"op": "add", "after": "<id>", "heading": "## <New heading>", "content": "<section body>"}}
+Change only what the conversation adds or changes, mark revisions with a short note where appropriate, and keep professional markdown formatting."""
+
+def parse_patch(response: str) -> List[dict]:
+    """The JSON patch in an LLM response (code fences and surrounding prose are ignored)"""
+    match = re.search(r"\[.*\]", response or "", re.DOTALL)
+    if not match:
+        raise ValueError("No JSON patch in response")
+    patch = json.loads(match.group(0))
+    if not isinstance(patch, list):
+        raise ValueError("Patch must be a list of operations")
+    operations = []
+    for op in patch:
+        if not isinstance(op, dict) or op.get("op") not in PATCH_OPS or not isinstance(op.get("content"), str):
+            raise ValueError(f"Invalid patch operation: {op!r}")
+        if op["op"] == "add" and not op.get("heading"):
+            raise ValueError("'add' operations need a heading")
+        operations.append(op)
+    return operations
+
+def _body(content: str) -> str:
+    return content.strip("\n") + "\n\n"
+
+def apply_patch(sections: List[dict], patch: List[dict], replaceable: Optional[set] = None) -> Optional[str]:
+    """
+    Apply patch to a copy of sections and render the document. Operations naming unknown
+    sections are skipped, as are replacements of sections outside replaceable (the model
+    never saw their text). Returns None when nothing applied.
+    """
+    sections = [dict(s) for s in sections]
+    by_id: Dict[str, dict] = {s["id"]: s for s in sections}
+    applied = 0
+    for op in patch:
+        if op["op"] == "add":
+            heading = op["heading"].strip()
+            if not HEADING.match(heading):
+                heading = "## " + heading.lstrip("# ")
+            new = {"id": f"s{len(by_id)}", "heading": heading, "level": len(heading) - len(heading.lstrip("#")),
+                   "body": "\n" + _body(op["content"])}
+            after = by_id.get(op.get("after"))
+            position = next(n for n, s in enumerate(sections) if s is after) + 1 if after else len(sections)
+            # Keep the new section out of the middle of the anchor's subsections
+            while after and position < len(sections) and sections[position]["level"] > after["level"]:
+                position += 1
+            if position == len(sections) and sections[-1]["body"] and not sections[-1]["body"].endswith("\n\n"):
+                sections[-1]["body"] = _body(sections[-1]["body"])
+            sections.insert(position, new)
+            by_id[new["id"]] = new
+        else:
+            section = by_id.get(op.get("section"))
+            if section is None or (op["op"] == "replace" and replaceable is not None and section["id"] not in replaceable):
+                continue
+            if op["op"] == "replace":
+                section["body"] = "\n" + _body(op["content"]) if section["heading"] else _body(op["content"])
+            else:
+                section["body"] = _body(section["body"]) + _body(op["content"])
+        applied += 1
+    return render_sections(sections) if applied else None
@@ -0,0 +1,164 @@
+"""
+Document version history
+`documents` keeps the current head in full with a `version` counter; every earlier version
+lives in `document_versions` as a reverse line delta against the version after it, so a
+small edit stores only the lines it touched. Every DOCUMENT_SNAPSHOT_EVERY-th version is
+stored in full instead, which bounds reconstruction to that many deltas.
+
+Records are immutable once written (version k is only ever diffed against version k+1),
+and the head is advanced with a compare-and-set on its version, so two concurrent
+revisions of one document cannot interleave - the loser gets a VersionConflict.
+
+The record of the replaced head rides along in that same single-document update as
+`pending_version`, and is copied to `document_versions` afterwards. If the process dies
+in between, the next save or history read of the document stores it (flush_pending), so
+a version is never lost between the two writes.
+
+    DOCUMENT_SNAPSHOT_EVERY  full snapshot every this many versions (default 10)
+"""
+
+import os
+import difflib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import bson
+
+SNAPSHOT_EVERY = max(1, int(os.environ.get("DOCUMENT_SNAPSHOT_EVERY", "10")))
+
+class VersionConflict(Exception):
+    """The document's head moved while a revision was being saved"""
+
+class VersionNotFound(Exception):
+    pass
+
+def _lines(text: str) -> List[str]:
+    return (text or "").splitlines(keepends=True)
+
+def make_delta(source: str, target: str) -> list:
+    """Edits turning source into target: [start, end, lines] replaces source lines start:end"""
+    source_lines, target_lines = _lines(source), _lines(target)
+    matcher = difflib.SequenceMatcher(None, source_lines, target_lines, autojunk=False)
+    return [[i1, i2, target_lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+def apply_delta(source: str, delta: list) -> str:
+    lines = _lines(source)
+    # Back to front, so earlier offsets stay valid
+    for start, end, replacement in reversed(delta):
+        lines[start:end] = replacement
+    return "".join(lines)
+
+def head_version(doc: dict) -> int:
+    """Documents written before versioning are version 1"""
+    return doc.get("version") or 1
+
+def version_record(document_id: str, version: int, content: str, newer_content: str,
+                   author: str = "", reason: str = "", created_at: Optional[datetime] = None) -> dict:
+    """The stored form of `version`, reversed against `newer_content` (version + 1)"""
+    record = {
+        "document_id": document_id,
+        "version": version,
+        "author": author,
+        "reason": reason,
+        "created_at": created_at or datetime.utcnow(),
+        "content_size": len(content.encode()),
+    }
+    if version % SNAPSHOT_EVERY == 0:
+        record.update(kind="snapshot", content=content)
+    else:
+        record.update(kind="delta", delta=make_delta(newer_content, content))
+    record["size"] = len(bson.encode({"content": record.get("content"), "delta": record.get("delta")}))
+    return record
+
+def reconstruct(head_content: str, head: int, records: Dict[int, dict], version: int) -> str:
+    """
+    Content of `version` from the head and the version records above it. Starts from the
+    nearest snapshot at or above `version`, so at most SNAPSHOT_EVERY deltas are applied.
+    """
+    if version == head:
+        return head_content
+    if not 1 <= version < head:
+        raise VersionNotFound(f"Version {version} does not exist (head is {head})")
+
+    start, content = head, head_content
+    for v in range(version, head):
+        record = records.get(v)
+        if record is None:
+            raise VersionNotFound(f"Version {v} is missing from the history")
+        if record["kind"] == "snapshot":
+            start, content = v, record["content"]
+            break
+
+    for v in range(start - 1, version - 1, -1):
+        content = apply_delta(content, records[v]["delta"])
+    return content
+
+async def flush_pending(db, doc: dict):
+    """Store the version record a save left on the document, then drop it from the document"""
+    record = doc.get("pending_version")
+    if not record:
+        return
+    # Keyed by version and immutable, so storing it twice is harmless
+    await db.document_versions.replace_one({"document_id": doc["id"], "version": record["version"]}, record, upsert=True)
+    await db.documents.update_one({"id": doc["id"], "pending_version.version": record["version"]},
+                                  {"$unset": {"pending_version": ""}})
+
+async def save_revision(db, doc: dict, new_content: str, fields: Optional[dict] = None,
+                        author: str = "", reason: str = "") -> int:
+    """
+    Make new_content the head of doc (plus any other `fields` to $set) and keep the
+    previous head as a version record. Returns the new version number.
+    """
+    await flush_pending(db, doc)
+    current = head_version(doc)
+    head_filter = {"id": doc["id"], "version": doc["version"]} if doc.get("version") else \
+        {"id": doc["id"], "version": {"$exists": False}}
+    record = version_record(doc["id"], current, doc.get("content", ""), new_content, author, reason)
+    result = await db.documents.update_one(head_filter, {"$set": {
+        **(fields or {}), "content": new_content, "version": current + 1, "pending_version": record
+    }})
+    if result.matched_count == 0:
+        raise VersionConflict(f"Document {doc['id']} changed while saving version {current + 1}")
+    await flush_pending(db, {"id": doc["id"], "pending_version": record})
+    return current + 1
+
+async def load_version(db, doc: dict, version: int) -> str:
+    await flush_pending(db, doc)
+    head = head_version(doc)
+    if version == head:
+        return doc.get("content", "")
+    # Snapshots land on multiples of SNAPSHOT_EVERY; nothing above the next one is needed
+    snapshot = -(-version // SNAPSHOT_EVERY) * SNAPSHOT_EVERY
+    records = {r["version"]: r async for r in db.document_versions.find(
+        {"document_id": doc["id"], "version": {"$gte": version, "$lte": min(snapshot, head - 1)}}
+    )}
+    return reconstruct(doc.get("content", ""), head, records, version)
+
+def diff_versions(old: str, new: str, old_label: str, new_label: str) -> str:
+    return "".join(difflib.unified_diff(_lines(old), _lines(new), fromfile=old_label, tofile=new_label))
+
+async def list_versions(db, doc: dict) -> List[dict]:
+    """Version metadata, newest first; the head is listed as the current version"""
+    await flush_pending(db, doc)
+    versions = [{"version": head_version(doc), "kind": "head", "current": True,
+                 "size": len(doc.get("content", "").encode())}]
+    async for record in db.document_versions.find(
+        {"document_id": doc["id"]}, {"_id": 0, "content": 0, "delta": 0, "document_id": 0}
+    ).sort("version", -1):
+        versions.append(record)
+    return versions
+
+async def storage_stats(db, document_id: Optional[str] = None) -> dict:
+    """Bytes the history occupies against what storing every version in full would take"""
+    match = {"document_id": document_id} if document_id else {}
+    stats = {"versions": 0, "snapshots": 0, "deltas": 0, "stored_bytes": 0, "full_copy_bytes": 0}
+    async for group in db.document_versions.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$kind", "count": {"$sum": 1}, "stored": {"$sum": "$size"}, "full": {"$sum": "$content_size"}}},
+    ]):
+        stats["versions"] += group["count"]
+        stats["snapshots" if group["_id"] == "snapshot" else "deltas"] += group["count"]
+        stats["stored_bytes"] += group["stored"]
+        stats["full_copy_bytes"] += group["full"]
+    stats["ratio"] = round(stats["stored_bytes"] / stats["full_copy_bytes"], 3) if stats["full_copy_bytes"] else None
+    return stats
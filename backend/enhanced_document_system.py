@@ -10,14 +10,64 @@ import re
 import base64
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import seaborn as sns
-import numpy as np
-import io
-from PIL import Image, ImageDraw, ImageFont
-import pandas as pd
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from llm_providers import LlmChat, UserMessage
+from features import feature_enabled
+from phrase_matcher import PhraseMatcher
+
+# Enhanced trigger detection - more flexible recognition
+THOUGHTFUL_TRIGGERS = [
+    "after careful consideration",
+    "we've thoroughly discussed",
+    "the consensus is clear",
+    "after reviewing all options",
+    "we've reached agreement",
+    "the team has decided",
+    "following our analysis",
+    "based on our discussion",
+    "we're ready to formalize",
+    "let's document our conclusions",
+    "we should capture these decisions",
+    "it's time to create",
+    "we need to formalize",
+    "let's put this in writing",
+    "we need to create",
+    "let's create a",
+    "should document",
+    "need a document",
+    "create a comprehensive"
+]
+
+# More flexible substantive content detection
+SUBSTANTIVE_CONTENT = [
+    "timeline",
+    "budget",
+    "allocation", 
+    "resource",
+    "plan",
+    "strategy",
+    "implementation",
+    "risk",
+    "assessment",
+    "decision",
+    "agreement",
+    "conclusion",
+    "milestone",
+    "deliverable",
+    "responsibility",
+    "cost",
+    "investment",
+    "funding",
+    "schedule",
+    "deadline"
+]
+
+QUALITY_SIGNALS = PhraseMatcher({"trigger": THOUGHTFUL_TRIGGERS, "substance": SUBSTANTIVE_CONTENT})
+
+CHART_SIGNALS = PhraseMatcher({
+    "budget": ['budget', 'cost', 'funding', 'investment', '$', 'money', 'financial', 'allocation'],
+    "timeline": ['timeline', 'schedule', 'milestone', 'phase', 'deadline', 'duration', 'time'],
+    "risk": ['risk', 'assessment', 'probability', 'impact', 'threat', 'challenge', 'issue'],
+})
 
 class DocumentQualityGate:
     """Ensures only high-quality, well-thought-out documents are created"""
@@ -46,63 +96,9 @@ class DocumentQualityGate:
                 "reason": f"Cooldown period active - wait {self.cooldown_period - (conversation_round - last_document_round)} more rounds"
             }
         
-        # Enhanced trigger detection - more flexible recognition
-        thoughtful_triggers = [
-            "after careful consideration",
-            "we've thoroughly discussed",
-            "the consensus is clear",
-            "after reviewing all options",
-            "we've reached agreement",
-            "the team has decided",
-            "following our analysis",
-            "based on our discussion",
-            "we're ready to formalize",
-            "let's document our conclusions",
-            "we should capture these decisions",
-            "it's time to create",
-            "we need to formalize",
-            "let's put this in writing",
-            "we need to create",
-            "let's create a",
-            "should document",
-            "need a document",
-            "create a comprehensive"
-        ]
-        
-        # More flexible substantive content detection
-        substantive_content = [
-            "timeline",
-            "budget",
-            "allocation", 
-            "resource",
-            "plan",
-            "strategy",
-            "implementation",
-            "risk",
-            "assessment",
-            "decision",
-            "agreement",
-            "conclusion",
-            "milestone",
-            "deliverable",
-            "responsibility",
-            "cost",
-            "investment",
-            "funding",
-            "schedule",
-            "deadline"
-        ]
-        
-        conv_lower = conversation_text.lower()
-        
-        # Check for thoughtful triggers OR document creation phrases
-        has_thoughtful_trigger = any(trigger in conv_lower for trigger in thoughtful_triggers)
-        
-        # More lenient check - if substantive content is present, allow document creation
-        has_substance = any(content in conv_lower for content in substantive_content)
-        
-        # Allow creation if EITHER condition is met (not both required)
-        if not (has_thoughtful_trigger or has_substance):
+        # Allow creation if EITHER a thoughtful trigger OR substantive content is present
+        # (not both required) - one pass over the text finds either
+        if QUALITY_SIGNALS.search(conversation_text) is None:
             return {
                 "should_create": False,
                 "reason": "Document requires either thoughtful consensus OR substantive content"
@@ -113,119 +109,19 @@ class DocumentQualityGate:
             "reason": "Quality criteria met - ready for document creation"
         }
 
-class ChartGenerator:
-    """Generate charts and visualizations for documents"""
-    
-    def __init__(self):
-        plt.style.use('seaborn-v0_8')
-        self.colors = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c']
-    
-    def create_pie_chart(self, data: Dict[str, float], title: str) -> str:
-        """Create a pie chart and return base64 encoded image"""
-        fig, ax = plt.subplots(figsize=(8, 6))
-        
-        labels = list(data.keys())
-        sizes = list(data.values())
-        
-        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
-                                         colors=self.colors[:len(labels)], startangle=90)
-        
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        
-        # Make text more readable
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
-    
-    def create_bar_chart(self, data: Dict[str, float], title: str, x_label: str, y_label: str) -> str:
-        """Create a bar chart and return base64 encoded image"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        labels = list(data.keys())
-        values = list(data.values())
-        
-        bars = ax.bar(labels, values, color=self.colors[:len(labels)])
-        
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel(x_label, fontsize=12)
-        ax.set_ylabel(y_label, fontsize=12)
-        
-        # Add value labels on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{height:,.0f}', ha='center', va='bottom', fontweight='bold')
-        
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
-    
-    def create_timeline_chart(self, milestones: List[Dict], title: str) -> str:
-        """Create a timeline chart for project milestones"""
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        dates = [milestone['date'] for milestone in milestones]
-        labels = [milestone['label'] for milestone in milestones]
-        
-        # Create timeline
-        y_pos = 0
-        for i, (date, label) in enumerate(zip(dates, labels)):
-            color = self.colors[i % len(self.colors)]
-            ax.scatter(i, y_pos, s=200, c=color, alpha=0.8, zorder=2)
-            ax.text(i, y_pos + 0.1, label, ha='center', va='bottom', 
-                   fontsize=10, fontweight='bold', rotation=45)
-            ax.text(i, y_pos - 0.1, date, ha='center', va='top', 
-                   fontsize=9, color='gray')
-        
-        # Connect points
-        for i in range(len(dates) - 1):
-            ax.plot([i, i+1], [y_pos, y_pos], 'k-', alpha=0.3, zorder=1)
-        
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlim(-0.5, len(dates) - 0.5)
-        ax.set_ylim(-0.3, 0.3)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return image_base64
-
 class ProfessionalDocumentFormatter:
     """Create professional, PDF-style document formatting"""
     
     def __init__(self):
-        self.chart_generator = ChartGenerator()
+        self._chart_generator = None
+    
+    @property
+    def chart_generator(self):
+        """Chart renderer, imported on first use (matplotlib is slow to load)"""
+        if self._chart_generator is None:
+            from chart_service import ChartGenerator
+            self._chart_generator = ChartGenerator()
+        return self._chart_generator
     
     def format_document(self, content: str, title: str, authors: List[str], 
                        document_type: str, context: str) -> str:
@@ -244,9 +140,12 @@ class ProfessionalDocumentFormatter:
     def _identify_chart_opportunities(self, content: str, context: str) -> List[Dict]:
         """Identify opportunities to add charts based on content"""
         charts = []
+        if not feature_enabled("charts"):
+            return charts
+        signals = CHART_SIGNALS.categories(content)
         
         # Look for budget/financial data - more flexible detection
-        if any(word in content.lower() for word in ['budget', 'cost', 'funding', 'investment', '$', 'money', 'financial', 'allocation']):
+        if "budget" in signals:
             # Extract budget data if available
             budget_data = self._extract_budget_data(content, context)
             if budget_data:
@@ -261,7 +160,7 @@ class ProfessionalDocumentFormatter:
                 })
         
         # Look for timeline/schedule data - broader detection
-        if any(word in content.lower() for word in ['timeline', 'schedule', 'milestone', 'phase', 'deadline', 'duration', 'time']):
+        if "timeline" in signals:
             timeline_data = self._extract_timeline_data(content, context)
             if timeline_data:
                 chart_b64 = self.chart_generator.create_timeline_chart(
@@ -275,7 +174,7 @@ class ProfessionalDocumentFormatter:
                 })
         
         # Look for risk assessment data - more comprehensive detection
-        if any(word in content.lower() for word in ['risk', 'assessment', 'probability', 'impact', 'threat', 'challenge', 'issue']):
+        if "risk" in signals:
             risk_data = self._extract_risk_data(content, context)
             if risk_data:
                 chart_b64 = self.chart_generator.create_bar_chart(
@@ -0,0 +1,94 @@
+"""
+Ensemble round generation
+One structured-output LLM call writes a whole conversation round. The model gets a
+compact persona card per agent instead of each agent's full system prompt, and
+answers with a JSON list of {agent_id, message, mood}. Entries that are missing,
+malformed or rejected by the response filters are regenerated per agent by the caller.
+
+    ROUND_GENERATION_MODE  per_agent (default) | ensemble, for call paths that don't choose
+"""
+
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+ROUND_MODES = ("per_agent", "ensemble")
+
+ENSEMBLE_SYSTEM_MESSAGE = """You write one round of a realistic professional team discussion.
+Each participant speaks exactly once, in the order given, and reacts to what was said before them in the round.
+
+Rules for every message:
+- 1-3 sentences, under 60 words, in the participant's own voice
+- Never introduce yourself, mention your credentials or restate the scenario
+- No filler ("we need to work together", "as you know", "time is of the essence")
+- Show expertise through domain terminology, concrete numbers, owners and deadlines
+- Push toward decisions: propose, challenge, commit or call a vote
+
+Answer with ONLY a JSON array, no prose and no code fences:
+[{"agent_id": "<id from the card>", "message": "<what they say>", "mood": "<one word>"}]"""
+
+def default_round_mode() -> str:
+    return os.environ.get("ROUND_GENERATION_MODE", "per_agent")
+
+def resolve_round_mode(mode: Optional[str] = None) -> str:
+    """The requested mode, or the configured default; raises ValueError for unknown modes"""
+    mode = (mode or default_round_mode()).strip().lower()
+    if mode not in ROUND_MODES:
+        raise ValueError(f"Unknown round generation mode '{mode}' - use {' or '.join(ROUND_MODES)}")
+    return mode
+
+def persona_card(agent, role_description: str) -> str:
+    personality = agent.personality
+    traits = (f"extroversion {personality.extroversion}, optimism {personality.optimism}, "
+              f"curiosity {personality.curiosity}, cooperativeness {personality.cooperativeness}, energy {personality.energy}")
+    return (f"- id: {agent.id} | {agent.name} ({role_description})\n"
+            f"  Expertise: {agent.expertise or 'general'} | Goal: {agent.goal}\n"
+            f"  Background: {(agent.background or '')[:200]}\n"
+            f"  Traits: {traits}")
+
+def build_ensemble_prompt(agents: List, role_descriptions: Dict[str, str], scenario: str, context: str,
+                          language_instruction: str, existing_documents: Optional[List] = None) -> str:
+    """User prompt for an ensemble round; role_descriptions maps archetype -> short description"""
+    cards = "\n".join(persona_card(agent, role_descriptions.get(agent.archetype, agent.archetype)) for agent in agents)
+
+    documents = ""
+    if existing_documents:
+        titles = [f"'{doc.get('title', 'Untitled')}' ({doc.get('category', 'Document')})" for doc in existing_documents[:5]]
+        documents = f"\nTeam documents they can reference: {', '.join(titles)}\n"
+
+    return f"""Scenario: {scenario}
+
+{context}
+{documents}
+Participants, in speaking order:
+{cards}
+
+{language_instruction}
+Write the round now as a JSON array with one entry per participant."""
+
+def parse_ensemble_response(response: str, agents: List) -> Dict[str, dict]:
+    """Map agent_id -> {"message", "mood"} for the well-formed entries of an ensemble reply"""
+    match = re.search(r"\[.*\]", response or "", re.DOTALL)
+    if not match:
+        return {}
+    try:
+        entries = json.loads(match.group(0))
+    except ValueError:
+        return {}
+
+    known_ids = {agent.id for agent in agents}
+    parsed = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        agent_id = entry.get("agent_id")
+        message = entry.get("message")
+        if agent_id not in known_ids or agent_id in parsed or not isinstance(message, str):
+            continue
+        mood = entry.get("mood")
+        parsed[agent_id] = {
+            "message": message.strip(),
+            "mood": mood.strip().lower() if isinstance(mood, str) and mood.strip() else None,
+        }
+    return parsed
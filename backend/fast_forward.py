@@ -0,0 +1,363 @@
+"""
+Batched fast-forward engine
+Plans every (day, period, conversation) slot of the fast-forward horizon up front and
+asks the LLM for several rounds per request. Instead of raw conversation history the
+model gets a rolling compressed summary, which it returns updated with each batch.
+Rounds are written with insert_many per batch, relationship deltas and agent memories
+with one bulk_write each. Jobs run in the background and report progress in the
+fast_forward_jobs collection.
+
+    FAST_FORWARD_ROUNDS_PER_CALL  rounds generated per LLM request (default 3)
+    FAST_FORWARD_JOB_STALE_SECONDS  a queued or running job without a heartbeat for this long
+                                    is treated as orphaned by a restart (default 120)
+
+A user has at most one queued or running job. The worker running a job refreshes its
+heartbeat; jobs whose heartbeat has stopped are marked failed at startup, and when the
+user starts a new one.
+"""
+
+import os
+import re
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from ensemble_round import persona_card
+from response_filters import is_acceptable_response
+from llm_providers import LlmChat, UserMessage, track_llm_usage
+from instrumentation import timed_llm_call, record_fallback, record_round_generation
+from round_summaries import record_rounds
+from conversation_archive import count_rounds
+
+PERIODS = ["morning", "afternoon", "evening"]
+ACTIVE_JOB_STATUSES = ["queued", "running"]
+JOB_STALE_SECONDS = float(os.environ.get("FAST_FORWARD_JOB_STALE_SECONDS", "120"))
+
+# The legacy path sends each agent's ~10KB system prompt plus the round context and gets a 150-token reply
+PER_AGENT_CALL_TOKENS = 2800
+
+BATCH_SYSTEM_MESSAGE = """You write several consecutive rounds of a realistic professional team discussion.
+In every round each participant speaks exactly once, in the order given. Later rounds must build on earlier
+ones: decisions get made, owners and deadlines get assigned, plans get refined. Never repeat a point already
+in the running summary.
+
+Rules for every message:
+- 1-3 sentences, under 60 words, in the participant's own voice
+- Never introduce yourself, mention your credentials or restate the scenario
+- No filler ("we need to work together", "as you know", "time is of the essence")
+- Show expertise through domain terminology, concrete numbers, owners and deadlines
+
+Answer with ONLY a JSON object, no prose and no code fences:
+{"rounds": [{"slot": <slot number>, "messages": [{"agent_id": "<id>", "message": "<text>", "mood": "<one word>"}]}],
+ "summary": "<updated running summary of the whole discussion so far, at most 120 words>"}"""
+
+MEMORY_SYSTEM_MESSAGE = """Update each team member's memory summary after a stretch of discussions. Focus on key
+insights, decisions, relationships and developments that person would find significant given their background.
+2-3 sentences per person.
+
+Answer with ONLY a JSON object mapping agent id to the new memory summary: {"<agent_id>": "<memory>"}"""
+
+async def fail_orphaned_jobs(db, user_id: Optional[str] = None, now: Optional[datetime] = None) -> int:
+    """Mark queued/running jobs whose heartbeat stopped as failed; returns how many"""
+    now = now or datetime.utcnow()
+    # $not also matches jobs from before heartbeats were recorded
+    query = {"status": {"$in": ACTIVE_JOB_STATUSES}, "heartbeat_at": {"$not": {"$gte": now - timedelta(seconds=JOB_STALE_SECONDS)}}}
+    if user_id is not None:
+        query["user_id"] = user_id
+    result = await db.fast_forward_jobs.update_many(
+        query, {"$set": {"status": "failed", "error": "Interrupted by a server restart", "updated_at": now}}
+    )
+    return result.modified_count
+
+async def keep_job_alive(db, job_id: str, interval: Optional[float] = None):
+    """Refresh a job's heartbeat until cancelled"""
+    interval = interval or JOB_STALE_SECONDS / 4
+    while True:
+        await asyncio.sleep(interval)
+        await db.fast_forward_jobs.update_one({"id": job_id}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+
+def plan_slots(current_day: int, current_period: str, target_days: int, conversations_per_period: int) -> List[dict]:
+    """Every round to generate, in order; periods already passed today are skipped"""
+    current_index = PERIODS.index(current_period) if current_period in PERIODS else 0
+    slots = []
+    for day_offset in range(target_days):
+        for period_index, period in enumerate(PERIODS):
+            if day_offset == 0 and period_index <= current_index:
+                continue
+            for conversation in range(conversations_per_period):
+                slots.append({"day": current_day + day_offset, "period": period, "conversation": conversation})
+    return slots
+
+def chunk(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+
+def describe_slot(slot: dict, current_day: int) -> str:
+    description = f"Day {slot['day']}, {slot['period']} (discussion #{slot['conversation'] + 1})"
+    if slot["day"] > current_day and slot["period"] == "morning" and slot["conversation"] == 0:
+        description += " - a new day starts"
+    return description
+
+def initial_summary(conversations: List[dict]) -> str:
+    """Compress the latest stored rounds into a starting summary without an LLM call"""
+    points = []
+    for conversation in reversed(conversations):
+        for message in conversation.get("messages", [])[:2]:
+            points.append(f"{message.get('agent_name', 'Someone')}: {message.get('message', '')[:100]}")
+    return " | ".join(points) if points else "The team has not met yet."
+
+def build_batch_prompt(agents: List, role_descriptions: Dict[str, str], scenario: str, summary: str,
+                       slots: List[dict], current_day: int) -> str:
+    cards = "\n".join(persona_card(agent, role_descriptions.get(agent.archetype, agent.archetype)) for agent in agents)
+    slot_lines = "\n".join(f"Slot {number}: {describe_slot(slot, current_day)}" for number, slot in enumerate(slots, 1))
+    return f"""Scenario: {scenario}
+
+Running summary of the discussion so far:
+{summary}
+
+Participants, in speaking order:
+{cards}
+
+Write one round for each of these slots:
+{slot_lines}"""
+
+def parse_batch_response(response: str, agents: List, slot_count: int) -> Tuple[Dict[int, Dict[str, dict]], Optional[str]]:
+    """({slot number: {agent_id: {"message", "mood"}}}, updated summary) from a batch reply"""
+    match = re.search(r"\{.*\}", response or "", re.DOTALL)
+    if not match:
+        return {}, None
+    try:
+        payload = json.loads(match.group(0))
+    except ValueError:
+        return {}, None
+    if not isinstance(payload, dict):
+        return {}, None
+
+    known_ids = {agent.id for agent in agents}
+    rounds = {}
+    for entry in payload.get("rounds") or []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("slot"), int) or not 1 <= entry["slot"] <= slot_count:
+            continue
+        messages = rounds.setdefault(entry["slot"], {})
+        for message in entry.get("messages") or []:
+            if not isinstance(message, dict) or message.get("agent_id") not in known_ids or message["agent_id"] in messages:
+                continue
+            if not isinstance(message.get("message"), str):
+                continue
+            mood = message.get("mood")
+            messages[message["agent_id"]] = {
+                "message": message["message"].strip(),
+                "mood": mood.strip().lower() if isinstance(mood, str) and mood.strip() else None,
+            }
+
+    summary = payload.get("summary")
+    return rounds, summary.strip() if isinstance(summary, str) and summary.strip() else None
+
+def relationship_updates(agents: List, existing: Dict[Tuple[str, str], int], rounds: int,
+                         compatibility: Callable) -> Dict[Tuple[str, str], int]:
+    """Final score per ordered agent pair after `rounds` rounds of +1/-1 compatibility steps.
+    The step has a fixed sign per pair, so clamping once at the end matches clamping every round."""
+    scores = {}
+    for agent1 in agents:
+        for agent2 in agents:
+            if agent1.id == agent2.id:
+                continue
+            step = 1 if compatibility(agent1, agent2) > 0.5 else -1
+            current = existing.get((agent1.id, agent2.id), 0)
+            scores[(agent1.id, agent2.id)] = max(-10, min(10, current + step * rounds))
+    return scores
+
+def relationship_status(score: int) -> str:
+    return "friends" if score > 3 else "tension" if score < -3 else "neutral"
+
+class FastForwardEngine:
+    """Generates a fast-forward horizon in batches; one engine per job"""
+
+    def __init__(self, db, llm_manager, agents: List, state: dict, *, role_descriptions: Dict[str, str],
+                 compatibility: Callable, round_model, message_model, rounds_per_call: Optional[int] = None):
+        self.db = db
+        self.llm_manager = llm_manager
+        self.agents = agents
+        self.state = state
+        self.role_descriptions = role_descriptions
+        self.compatibility = compatibility
+        self.round_model = round_model
+        self.message_model = message_model
+        self.rounds_per_call = rounds_per_call or int(os.environ.get("FAST_FORWARD_ROUNDS_PER_CALL", "3"))
+        self.scenario = state.get("scenario", "Research Station")
+        self.user_id = state.get("user_id", "")
+        self.current_day = state.get("current_day", 1)
+
+    async def _update_job(self, job_id: str, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        await self.db.fast_forward_jobs.update_one({"id": job_id}, {"$set": fields})
+
+    async def _generate_batch(self, slots: List[dict], summary: str) -> Tuple[Dict[int, Dict[str, dict]], Optional[str]]:
+        if not await self.llm_manager.can_make_request():
+            return {}, None
+        chat = LlmChat(
+            api_key=self.llm_manager.api_key,
+            session_id=f"fast_forward_{int(datetime.now().timestamp())}",
+            system_message=BATCH_SYSTEM_MESSAGE
+        ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(120 * len(self.agents) * len(slots) + 250)
+        prompt = build_batch_prompt(self.agents, self.role_descriptions, self.scenario, summary, slots, self.current_day)
+        try:
+            response = await timed_llm_call(
+                "fast_forward_batch", "gemini-2.0-flash",
+                chat.send_message(UserMessage(text=prompt)),
+                timeout=10.0 + 2.0 * len(slots)
+            )
+            await self.llm_manager.increment_usage()
+        except Exception as e:
+            logging.error(f"Fast-forward batch of {len(slots)} rounds failed: {e}")
+            return {}, None
+        return parse_batch_response(response, self.agents, len(slots))
+
+    def _batch_entries(self, entries: Dict[str, dict], context: str) -> List[tuple]:
+        """[(agent, message, mood)] for one slot of a batch reply, filling failed entries without an LLM call"""
+        results = []
+        for agent in self.agents:
+            entry = entries.get(agent.id)
+            if entry and is_acceptable_response(entry["message"], self.scenario):
+                results.append((agent, entry["message"], entry["mood"]))
+            else:
+                # A per-agent LLM call here would cost what batching saves
+                record_fallback("intelligent_fallback", "rejected_response" if entry else "missing_entry")
+                results.append((agent, self.llm_manager._generate_intelligent_fallback(agent, context, self.scenario), None))
+        return results
+
+    def _build_round(self, slot: dict, round_number: int, results: List[tuple]):
+        messages = [
+            self.message_model(agent_id=agent.id, agent_name=agent.name, message=text, mood=mood or agent.current_mood)
+            for agent, text, mood in results
+        ]
+        return self.round_model(
+            round_number=round_number,
+            time_period=f"Day {slot['day']} - {slot['period']} (#{slot['conversation'] + 1})",
+            scenario=self.scenario,
+            scenario_name=self.state.get("scenario_name", ""),
+            messages=messages,
+            user_id=self.user_id
+        )
+
+    async def _write_relationships(self, rounds: int):
+        agent_ids = [agent.id for agent in self.agents]
+        existing = {
+            (rel["agent1_id"], rel["agent2_id"]): rel.get("score", 0)
+            async for rel in self.db.relationships.find(
+                {"agent1_id": {"$in": agent_ids}, "agent2_id": {"$in": agent_ids}},
+                {"agent1_id": 1, "agent2_id": 1, "score": 1}
+            )
+        }
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"agent1_id": agent1_id, "agent2_id": agent2_id},
+                {"$set": {"score": score, "status": relationship_status(score), "updated_at": now},
+                 "$setOnInsert": {"id": str(uuid.uuid4()), "agent1_id": agent1_id, "agent2_id": agent2_id}},
+                upsert=True
+            )
+            for (agent1_id, agent2_id), score in relationship_updates(self.agents, existing, rounds, self.compatibility).items()
+        ]
+        if operations:
+            await self.db.relationships.bulk_write(operations, ordered=False)
+
+    async def _write_memories(self, summary: str):
+        """One LLM call for every agent's memory, written with a single bulk_write"""
+        if not await self.llm_manager.can_make_request():
+            return
+        cards = "\n".join(
+            f"- id: {agent.id} | {agent.name} | background: {(agent.background or '')[:150]} | previous memory: {agent.memory_summary or 'None'}"
+            for agent in self.agents
+        )
+        chat = LlmChat(
+            api_key=self.llm_manager.api_key,
+            session_id=f"memory_fast_forward_{int(datetime.now().timestamp())}",
+            system_message=MEMORY_SYSTEM_MESSAGE
+        ).with_model("gemini", "gemini-2.0-flash")
+        try:
+            response = await timed_llm_call(
+                "memory_update", "gemini-2.0-flash",
+                chat.send_message(UserMessage(text=f"What happened:\n{summary}\n\nTeam members:\n{cards}")),
+                timeout=20.0
+            )
+            await self.llm_manager.increment_usage()
+            match = re.search(r"\{.*\}", response or "", re.DOTALL)
+            memories = json.loads(match.group(0)) if match else {}
+        except Exception as e:
+            logging.error(f"Fast-forward memory update failed: {e}")
+            return
+
+        operations = [
+            UpdateOne({"id": agent.id}, {"$set": {"memory_summary": memories[agent.id].strip()}})
+            for agent in self.agents
+            if isinstance(memories, dict) and isinstance(memories.get(agent.id), str) and memories[agent.id].strip()
+        ]
+        if operations:
+            await self.db.agents.bulk_write(operations, ordered=False)
+
+    async def run(self, job_id: str, slots: List[dict]) -> dict:
+        await self._update_job(job_id, status="running")
+        history_filter = {"user_id": self.user_id}
+        recent = await self.db.conversations.find(history_filter).sort("created_at", -1).limit(3).to_list(3)
+        summary = initial_summary(recent)
+        # Archived rounds count too, or numbering restarts once the compactor has run
+        next_round_number = await count_rounds(self.db, self.user_id) + 1
+        rounds_written = 0
+
+        with track_llm_usage() as usage:
+            for batch in chunk(slots, self.rounds_per_call):
+                loop = asyncio.get_running_loop()
+                batch_start = loop.time()
+                batch_calls, batch_tokens = usage.calls, usage.total_tokens
+                generated, new_summary = await self._generate_batch(batch, summary)
+
+                rounds = []
+                for number, slot in enumerate(batch, 1):
+                    context = f"{describe_slot(slot, self.current_day)}. Discussion so far: {summary}"
+                    if generated:
+                        results = self._batch_entries(generated.get(number, {}), context)
+                    else:
+                        # The whole batch failed: fall back to one ensemble call per round
+                        results = await self.llm_manager.generate_round("ensemble", self.agents, self.scenario, context)
+                    rounds.append(self._build_round(slot, next_round_number, results))
+                    next_round_number += 1
+                await self.db.conversations.insert_many([conversation_round.dict() for conversation_round in rounds])
+                await record_rounds(self.db, rounds)
+
+                if new_summary:
+                    summary = new_summary
+                else:
+                    # Keep the summary rolling even when the model didn't return one
+                    summary = (summary + " | " + " | ".join(
+                        f"{message.agent_name}: {message.message[:80]}" for message in rounds[-1].messages
+                    ))[-1500:]
+
+                seconds_per_round = (loop.time() - batch_start) / len(batch)
+                for _ in batch:
+                    record_round_generation("fast_forward_batch", (usage.calls - batch_calls) / len(batch),
+                                            (usage.total_tokens - batch_tokens) / len(batch), seconds_per_round)
+                rounds_written += len(rounds)
+                await self._update_job(job_id, rounds_done=rounds_written, llm_requests=usage.calls)
+
+            await self._write_relationships(rounds_written)
+            await self._write_memories(summary)
+
+        legacy_requests = len(slots) * len(self.agents) + len({(slot["day"], slot["period"]) for slot in slots}) * len(self.agents)
+        legacy_tokens = legacy_requests * PER_AGENT_CALL_TOKENS
+        final_day = slots[-1]["day"] if slots else self.current_day
+        return {
+            "conversations_generated": rounds_written,
+            "final_day": final_day,
+            "final_period": "evening",
+            "llm_requests": usage.calls,
+            "legacy_llm_requests": legacy_requests,
+            "requests_saved": legacy_requests - usage.calls,
+            "estimated_tokens": usage.total_tokens,
+            "legacy_estimated_tokens": legacy_tokens,
+            "tokens_saved": legacy_tokens - usage.total_tokens,
+        }
@@ -0,0 +1,26 @@
+"""
+Optional feature switches
+Heavy optional subsystems can be turned off per deployment. A disabled feature's
+service module is never imported and its endpoints answer 503.
+
+    FEATURE_CHARTS   charts embedded in generated documents (matplotlib, seaborn, numpy, pandas)
+    FEATURE_TTS      text-to-speech (google-cloud-texttospeech)
+    FEATURE_VOICE    speech-to-text (OpenAI Whisper, ffmpeg)
+    FEATURE_AVATARS  avatar generation (fal.ai)
+
+All features are enabled unless set to 0/false/no/off.
+"""
+
+import os
+from fastapi import HTTPException
+
+FEATURES = ["charts", "tts", "voice", "avatars"]
+
+def feature_enabled(name: str) -> bool:
+    value = os.environ.get(f"FEATURE_{name.upper()}", "1")
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+def require_feature(name: str):
+    """Raise 503 when an optional feature is switched off"""
+    if not feature_enabled(name):
+        raise HTTPException(status_code=503, detail=f"The {name} feature is disabled on this server")
@@ -0,0 +1,147 @@
+"""
+Index registry
+Every index the backend relies on, declared per collection and applied at startup.
+create_indexes is idempotent, so restarts and multiple workers are harmless; an index
+that conflicts with an existing one (same keys, different options) is logged and skipped.
+
+tests/test_query_plans.py runs the hot endpoints' queries through explain() and fails on
+collection scans and large in-memory sorts - add the supporting index here when it does.
+
+    OBSERVER_MESSAGES_TTL_DAYS  observer messages expire after this many days (default 30)
+    API_USAGE_TTL_DAYS          per-day API usage counters expire after this many days (default 90)
+"""
+
+import os
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+DAY_SECONDS = 86400
+
+def _ttl_seconds(variable: str, default_days: int) -> int:
+    return int(os.environ.get(variable, str(default_days))) * DAY_SECONDS
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("id", unique=True),
+        IndexModel("google_id", sparse=True),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel("last_login"),
+    ],
+    "agents": [
+        IndexModel("id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel("archetype"),
+    ],
+    "saved_agents": [
+        IndexModel("id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "conversations": [
+        IndexModel("id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel("round_number"),
+    ],
+    "conversation_archive": [
+        IndexModel([("user_id", ASCENDING), ("bucket", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("last_created_at", DESCENDING)]),
+        IndexModel([("last_created_at", DESCENDING)]),
+    ],
+    "conversation_history": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel("id"),
+    ],
+    "documents": [
+        IndexModel("id", unique=True),
+        IndexModel([("metadata.user_id", ASCENDING), ("metadata.created_at", DESCENDING)]),
+        # Global simulation documents ({"user_id": ""}) are listed alongside the user's own
+        IndexModel([("user_id", ASCENDING), ("metadata.created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("metadata.created_at", DESCENDING)]),
+        IndexModel([("metadata.updated_at", DESCENDING)]),
+        IndexModel([("updated_at", DESCENDING)]),
+        IndexModel("metadata.category"),
+    ],
+    # Reverse-delta history (see document_versions.py)
+    "document_versions": [
+        IndexModel([("document_id", ASCENDING), ("version", ASCENDING)], unique=True),
+    ],
+    "document_suggestions": [
+        IndexModel("id", unique=True),
+        IndexModel([("document_id", ASCENDING), ("status", ASCENDING)]),
+    ],
+    # Weekly report digests (see round_summaries.py)
+    "round_summaries": [
+        IndexModel("round_id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING), ("folded", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "day_summaries": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], unique=True),
+    ],
+    "observer_messages": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel("timestamp", expireAfterSeconds=_ttl_seconds("OBSERVER_MESSAGES_TTL_DAYS", 30)),
+    ],
+    "simulation_state": [
+        IndexModel("user_id"),
+        IndexModel("created_at"),
+    ],
+    "relationships": [
+        IndexModel([("agent1_id", ASCENDING), ("agent2_id", ASCENDING)]),
+        IndexModel("user_id"),
+    ],
+    "summaries": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "api_usage": [
+        IndexModel("date"),
+        IndexModel("created_at", expireAfterSeconds=_ttl_seconds("API_USAGE_TTL_DAYS", 90)),
+    ],
+    "scenario_uploads": [
+        IndexModel("id"),
+        IndexModel([("user_id", ASCENDING), ("scenario_context", ASCENDING)]),
+    ],
+    "user_profiles": [
+        IndexModel("user_id"),
+    ],
+    "user_passwords": [
+        IndexModel("user_id"),
+    ],
+    # Avatar cache and pool (see avatar_service.py)
+    "avatar_cache": [
+        IndexModel("key", unique=True),
+    ],
+    "avatar_pool": [
+        IndexModel([("bucket", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    # Fast-forward jobs (see fast_forward.py)
+    "fast_forward_jobs": [
+        IndexModel("id", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("heartbeat_at", ASCENDING)]),
+    ],
+}
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every registered index; returns the index names created or confirmed per collection"""
+    applied = {}
+    for collection, models in INDEXES.items():
+        try:
+            applied[collection] = await db[collection].create_indexes(models)
+            continue
+        except OperationFailure as e:
+            logging.warning(f"Batch index creation on {collection} failed ({e}); retrying one by one")
+
+        applied[collection] = []
+        for model in models:
+            try:
+                applied[collection].extend(await db[collection].create_indexes([model]))
+            except OperationFailure as e:
+                logging.error(f"Could not create index {model.document['name']} on {collection}: {e}")
+    return applied
@@ -0,0 +1,29 @@
+"""
+Instrumentation for the Observer AI backend
+Request, LLM, MongoDB and event-loop metrics, all exported on the Prometheus
+port started by monitoring.PerformanceMonitor.
+"""
+
+from .routes import route_template, instrument_app
+from .llm import timed_llm_call, record_fallback, record_round_generation, record_document_update
+from .mongo import MongoCommandMetrics, MongoPoolMetrics, mongo_command_listener, mongo_pool_listener
+from .loop import start_loop_lag_monitor
+from .profiler import QueryProfile, profile_queries, query_profiler_listener, install_query_profiler
+
+__all__ = [
+    "route_template",
+    "instrument_app",
+    "timed_llm_call",
+    "record_fallback",
+    "record_round_generation",
+    "record_document_update",
+    "MongoCommandMetrics",
+    "mongo_command_listener",
+    "MongoPoolMetrics",
+    "mongo_pool_listener",
+    "start_loop_lag_monitor",
+    "QueryProfile",
+    "profile_queries",
+    "query_profiler_listener",
+    "install_query_profiler",
+]
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Awaitable, Optional
+from prometheus_client import Counter, Histogram
+
+LLM_CALL_DURATION = Histogram(
+    'llm_call_duration_seconds',
+    'LLM call latency',
+    ['call_type', 'model', 'outcome'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+)
+LLM_TIMEOUTS = Counter('llm_timeouts_total', 'LLM calls that hit their timeout', ['call_type', 'model'])
+LLM_FALLBACKS = Counter('llm_fallbacks_total', 'Responses served by a non-LLM fallback', ['fallback', 'reason'])
+
+# Per-round cost, labelled by generation mode (per_agent / ensemble) so the modes can be compared
+ROUND_LLM_CALLS = Histogram(
+    'round_llm_calls',
+    'LLM calls made to generate one conversation round',
+    ['mode'],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+)
+ROUND_LLM_TOKENS = Histogram(
+    'round_llm_tokens',
+    'Estimated prompt + completion tokens spent on one conversation round',
+    ['mode'],
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+)
+ROUND_GENERATION_DURATION = Histogram(
+    'round_generation_duration_seconds',
+    'Wall time to generate one conversation round',
+    ['mode'],
+    buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+)
+
+# Document updates, labelled by update mode (full / incremental) so the modes can be compared
+DOCUMENT_UPDATE_TOKENS = Histogram(
+    'document_update_llm_tokens',
+    'Estimated tokens one document update sent (prompt) or received (completion)',
+    ['mode', 'direction'],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+DOCUMENT_UPDATE_DURATION = Histogram(
+    'document_update_duration_seconds',
+    'Wall time of one document update, LLM call and local patching included',
+    ['mode', 'outcome'],
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0)
+)
+
+async def timed_llm_call(call_type: str, model: str, awaitable: Awaitable, timeout: Optional[float] = None):
+    """Await an LLM call, recording its latency by call type, model and outcome"""
+    start_time = time.perf_counter()
+    outcome = "success"
+    try:
+        if timeout is not None:
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        return await awaitable
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        LLM_TIMEOUTS.labels(call_type=call_type, model=model).inc()
+        raise
+    except Exception as e:
+        outcome = "rate_limited" if "429" in str(e) or "quota" in str(e).lower() else "error"
+        raise
+    finally:
+        LLM_CALL_DURATION.labels(call_type=call_type, model=model, outcome=outcome).observe(
+            time.perf_counter() - start_time
+        )
+
+def record_fallback(fallback: str, reason: str):
+    """Count a response that was produced by a fallback generator instead of the LLM"""
+    LLM_FALLBACKS.labels(fallback=fallback, reason=reason).inc()
+
+def record_round_generation(mode: str, calls: int, tokens: int, seconds: float):
+    """Record the LLM calls, estimated tokens and wall time one conversation round cost"""
+    ROUND_LLM_CALLS.labels(mode=mode).observe(calls)
+    ROUND_LLM_TOKENS.labels(mode=mode).observe(tokens)
+    ROUND_GENERATION_DURATION.labels(mode=mode).observe(seconds)
+
+def record_document_update(mode: str, outcome: str, prompt_tokens: int, completion_tokens: int, seconds: float):
+    """Record the estimated tokens and wall time one document update cost"""
+    DOCUMENT_UPDATE_TOKENS.labels(mode=mode, direction="prompt").observe(prompt_tokens)
+    DOCUMENT_UPDATE_TOKENS.labels(mode=mode, direction="completion").observe(completion_tokens)
+    DOCUMENT_UPDATE_DURATION.labels(mode=mode, outcome=outcome).observe(seconds)
@@ -0,0 +1,29 @@
+import asyncio
+from typing import Optional
+from prometheus_client import Gauge, Histogram
+
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds',
+    'Delay between a scheduled wake-up and the event loop running it',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+EVENT_LOOP_LAG_LAST = Gauge('event_loop_lag_last_seconds', 'Most recent event loop lag sample', multiprocess_mode='livemax')
+
+_lag_task: Optional[asyncio.Task] = None
+
+async def _measure_loop_lag(interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        # Anything beyond the requested sleep is time the loop spent blocked
+        lag = max(0.0, loop.time() - scheduled - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+def start_loop_lag_monitor(interval: float = 0.5) -> asyncio.Task:
+    """Start sampling event loop lag on the running loop (idempotent)"""
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.get_running_loop().create_task(_measure_loop_lag(interval))
+    return _lag_task
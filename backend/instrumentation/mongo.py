@@ -0,0 +1,122 @@
+import time
+import threading
+from pymongo import monitoring
+from prometheus_client import Counter, Gauge, Histogram
+
+MONGO_COMMAND_DURATION = Histogram(
+    'mongo_command_duration_seconds',
+    'MongoDB command latency',
+    ['command', 'collection', 'outcome'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    'mongo_pool_checkout_wait_seconds',
+    'Time spent waiting to check a connection out of the pool',
+    ['address', 'outcome'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0)
+)
+# Summed over the live workers in multiprocess mode (see monitoring.py)
+MONGO_POOL_IN_USE = Gauge('mongo_pool_connections_in_use', 'Connections checked out of the pool', ['address'], multiprocess_mode='livesum')
+MONGO_POOL_OPEN = Gauge('mongo_pool_connections_open', 'Connections open in the pool', ['address'], multiprocess_mode='livesum')
+MONGO_POOL_MAX_SIZE = Gauge('mongo_pool_max_size', 'Configured maxPoolSize', ['address'], multiprocess_mode='livesum')
+MONGO_POOL_CONNECTIONS_CREATED = Counter('mongo_pool_connections_created_total', 'Connections opened', ['address'])
+MONGO_POOL_CONNECTIONS_CLOSED = Counter('mongo_pool_connections_closed_total', 'Connections closed', ['address', 'reason'])
+
+# Commands whose first field does not name a collection
+_ADMIN_COMMANDS = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "serverStatus", "endSessions"}
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener that records per-command latency"""
+
+    def __init__(self):
+        # Collection names only appear on the started event, so remember them until completion
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = ""
+        if event.command_name not in _ADMIN_COMMANDS:
+            value = event.command.get(event.command_name)
+            if isinstance(value, str):
+                collection = value
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _observe(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(
+            command=event.command_name,
+            collection=collection,
+            outcome=outcome
+        ).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """pymongo pool listener: checkout wait, connections in use and connection churn"""
+
+    def __init__(self):
+        # Checkout start times per thread, for drivers whose events carry no duration
+        self._checkout_started = {}
+        self._lock = threading.Lock()
+
+    def _checkout_wait(self, event) -> float:
+        with self._lock:
+            started = self._checkout_started.pop((threading.get_ident(), event.address), None)
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            return duration
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def pool_created(self, event):
+        max_size = event.options.get("maxPoolSize")
+        if max_size is not None:
+            MONGO_POOL_MAX_SIZE.labels(address=_address(event)).set(max_size)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        MONGO_POOL_IN_USE.labels(address=_address(event)).set(0)
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS_CREATED.labels(address=_address(event)).inc()
+        MONGO_POOL_OPEN.labels(address=_address(event)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS_CLOSED.labels(address=_address(event), reason=event.reason).inc()
+        MONGO_POOL_OPEN.labels(address=_address(event)).dec()
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started[(threading.get_ident(), event.address)] = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_WAIT.labels(address=_address(event), outcome=event.reason).observe(self._checkout_wait(event))
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKOUT_WAIT.labels(address=_address(event), outcome="success").observe(self._checkout_wait(event))
+        MONGO_POOL_IN_USE.labels(address=_address(event)).inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_IN_USE.labels(address=_address(event)).dec()
+
+# Shared listeners, passed to every client via event_listeners=[...]
+mongo_command_listener = MongoCommandMetrics()
+mongo_pool_listener = MongoPoolMetrics()
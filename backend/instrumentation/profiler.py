@@ -0,0 +1,168 @@
+"""
+Per-request MongoDB query profiler
+Attributes every Mongo command to the request that issued it (via a command
+listener and a context variable) and flags likely N+1 patterns.
+
+Enable with QUERY_PROFILER_ENABLED=1. Thresholds:
+    QUERY_PROFILER_MAX_COMMANDS  commands per request before flagging (default 25)
+    QUERY_PROFILER_MAX_DB_MS     total DB milliseconds before flagging (default 250)
+    QUERY_PROFILER_MAX_REPEATS   identical query shapes before flagging (default 5)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import FastAPI, Request
+from pymongo import monitoring
+import structlog
+
+from .routes import route_template
+
+logger = structlog.get_logger()
+
+# Fields that hold the query predicate for each command we care about
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+class QueryProfile:
+    """Mongo activity attributed to a single request"""
+
+    def __init__(self):
+        self.command_count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def record_start(self, shape: str):
+        with self._lock:
+            self.command_count += 1
+            self.shapes[shape] += 1
+
+    def record_duration(self, seconds: float):
+        with self._lock:
+            self.db_time += seconds
+
+    def repeated_shapes(self, min_repeats: int = 2):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= min_repeats]
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+def _shape_of(value):
+    """Replace literal values with '?' so queries that differ only by id share a shape"""
+    if isinstance(value, dict):
+        return {key: _shape_of(val) for key, val in sorted(value.items())}
+    if isinstance(value, list):
+        return [_shape_of(value[0])] if value else []
+    return "?"
+
+def query_shape(command_name: str, command) -> str:
+    """Build a stable, literal-free description of a Mongo command"""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        collection = ""
+    if command_name in _FILTER_FIELDS:
+        predicate = command.get(_FILTER_FIELDS[command_name], {})
+    elif command_name == "aggregate":
+        predicate = command.get("pipeline", [])
+    elif command_name in ("update", "delete"):
+        statements = command.get(f"{command_name}s") or [{}]
+        predicate = statements[0].get("q", {})
+    else:
+        predicate = {}
+    return f"{command_name} {collection} {json.dumps(_shape_of(predicate), sort_keys=True, default=str)}"
+
+class QueryProfilerListener(monitoring.CommandListener):
+    """Forwards command events to the profile of the request that issued them"""
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+        # Set to a list to collect (database, command) for every command, e.g. to explain() them in tests
+        self.captured: Optional[list] = None
+
+    def started(self, event):
+        if self.captured is not None:
+            self.captured.append((event.database_name, dict(event.command)))
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        profile.record_start(query_shape(event.command_name, event.command))
+        with self._lock:
+            self._profiles[(event.connection_id, event.request_id)] = profile
+
+    def _finish(self, event):
+        with self._lock:
+            profile = self._profiles.pop((event.connection_id, event.request_id), None)
+        if profile is not None:
+            profile.record_duration(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+# Shared listener, passed to every client via event_listeners=[...]
+query_profiler_listener = QueryProfilerListener()
+
+class profile_queries:
+    """Context manager that attributes Mongo commands in the current context to a fresh profile"""
+
+    def __enter__(self) -> QueryProfile:
+        self.profile = QueryProfile()
+        self._token = _current_profile.set(self.profile)
+        return self.profile
+
+    def __exit__(self, *exc):
+        _current_profile.reset(self._token)
+        return False
+
+def query_profiler_enabled() -> bool:
+    return os.environ.get("QUERY_PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+
+def install_query_profiler(app: FastAPI):
+    """Add the profiling middleware when QUERY_PROFILER_ENABLED is set"""
+    if not query_profiler_enabled():
+        return
+
+    max_commands = int(os.environ.get("QUERY_PROFILER_MAX_COMMANDS", "25"))
+    max_db_ms = float(os.environ.get("QUERY_PROFILER_MAX_DB_MS", "250"))
+    max_repeats = int(os.environ.get("QUERY_PROFILER_MAX_REPEATS", "5"))
+
+    @app.middleware("http")
+    async def query_profiler_middleware(request: Request, call_next):
+        start_time = time.perf_counter()
+        with profile_queries() as profile:
+            response = await call_next(request)
+        total_ms = (time.perf_counter() - start_time) * 1000
+        db_ms = profile.db_time * 1000
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{profile.command_count} queries", app;dur={total_ms:.1f}'
+        )
+        response.headers["X-DB-Query-Count"] = str(profile.command_count)
+
+        repeated = profile.repeated_shapes()
+        log_fields = {
+            "method": request.method,
+            "route": route_template(request),
+            "status": response.status_code,
+            "db_commands": profile.command_count,
+            "db_ms": round(db_ms, 1),
+            "total_ms": round(total_ms, 1),
+            "repeated_shapes": repeated[:5],
+        }
+        worst_repeat = repeated[0][1] if repeated else 0
+        if profile.command_count > max_commands or db_ms > max_db_ms or worst_repeat > max_repeats:
+            logger.warning("Query budget exceeded (possible N+1)", **log_fields)
+        else:
+            logger.debug("Request query profile", **log_fields)
+        return response
@@ -0,0 +1,34 @@
+import time
+from fastapi import FastAPI, Request
+
+from monitoring import monitor
+
+UNMATCHED_ROUTE = "unmatched"
+
+def route_template(request: Request) -> str:
+    """Return the matched route template (e.g. /api/agents/{agent_id}) for metric labels"""
+    # FastAPI stores the matched APIRoute in the scope once routing has run
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Never fall back to the raw path: every id would become a new time series
+    return UNMATCHED_ROUTE
+
+def instrument_app(app: FastAPI):
+    """Record request count and duration for every request, labelled by route template"""
+    @app.middleware("http")
+    async def request_metrics_middleware(request: Request, call_next):
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            monitor.record_request(
+                method=request.method,
+                endpoint=route_template(request),
+                status_code=status_code,
+                duration=time.perf_counter() - start_time
+            )
@@ -0,0 +1,507 @@
+"""
+Pluggable LLM providers for the Observer AI backend
+server.py builds chats through the LlmChat/UserMessage classes below, which keep
+the emergentintegrations builder API but hand the actual call to the provider
+selected with LLM_PROVIDER:
+
+    emergent  real Gemini calls through emergentintegrations (default)
+    fake      local fake with configurable latency, fault injection and canned responses
+    record    real calls, with every prompt/response pair appended to LLM_RECORD_FILE
+    replay    serve the pairs in LLM_RECORD_FILE offline
+
+Fake provider settings:
+    FAKE_LLM_LATENCY          fixed:<ms> | uniform:<lo_ms>,<hi_ms> | lognormal:<median_ms>,<sigma>
+                              (default lognormal:800,0.5)
+    FAKE_LLM_ERROR_RATE       share of calls that raise a provider error (default 0)
+    FAKE_LLM_TIMEOUT_RATE     share of calls that hang for FAKE_LLM_HANG_SECONDS, then time out (default 0)
+    FAKE_LLM_RATE_LIMIT_RATE  share of calls that fail with a 429 quota error (default 0)
+    FAKE_LLM_BANNED_RATE      share of agent replies containing a banned phrase (default 0.2)
+    FAKE_LLM_TRIGGER_RATE     share of agent replies containing a document trigger phrase (default 0.15)
+    FAKE_LLM_SEED             seed mixed into every per-prompt RNG (default 0)
+
+Wrap a block in track_llm_usage() to count the calls and estimated tokens it spends.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List
+
+DEFAULT_RECORD_FILE = Path(__file__).parent / "llm_recordings.jsonl"
+
+# Session id prefixes used by the call sites in server.py
+CALL_KINDS = [
+    "ensemble", "fast_forward", "enhanced_analysis", "document_creation", "doc_update", "doc_patch", "doc_gen", "weekly_summary",
+    "day_summary", "url_summary", "translate", "observer", "memory", "voting", "review", "agent", "field",
+]
+
+class UserMessage:
+    """A user turn sent to the model"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class LLMRequest:
+    """Everything a provider needs to answer one send_message call"""
+
+    def __init__(self, api_key: str, session_id: str, system_message: str, provider: str,
+                 model: str, max_tokens: Optional[int], text: str):
+        self.api_key = api_key
+        self.session_id = session_id
+        self.system_message = system_message
+        self.provider = provider
+        self.model = model
+        self.max_tokens = max_tokens
+        self.text = text
+
+    @property
+    def kind(self) -> str:
+        """Call kind taken from the session id prefix, e.g. 'agent', 'voting', 'weekly_summary'"""
+        for kind in CALL_KINDS:
+            if self.session_id.startswith(kind):
+                return kind
+        return "unknown"
+
+    @property
+    def key(self) -> str:
+        """Stable identity of the prompt (session ids carry timestamps, so they are left out)"""
+        payload = "\x00".join([self.kind, self.model, self.system_message or "", self.text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token); providers don't report usage"""
+    return (len(text or "") + 3) // 4
+
+class LLMUsage:
+    """Calls and estimated tokens spent inside a track_llm_usage() block"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+_current_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+@contextmanager
+def track_llm_usage():
+    """Count every LlmChat call made inside the block, including in tasks it starts"""
+    usage = LLMUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+class LLMProvider:
+    """Base class for providers"""
+
+    name = "base"
+
+    async def complete(self, request: LLMRequest) -> str:
+        raise NotImplementedError
+
+class EmergentProvider(LLMProvider):
+    """Real calls through emergentintegrations"""
+
+    name = "emergent"
+
+    async def complete(self, request: LLMRequest) -> str:
+        from emergentintegrations.llm.chat import LlmChat as EmergentChat, UserMessage as EmergentMessage
+
+        chat = EmergentChat(
+            api_key=request.api_key,
+            session_id=request.session_id,
+            system_message=request.system_message
+        ).with_model(request.provider, request.model)
+        if request.max_tokens:
+            chat = chat.with_max_tokens(request.max_tokens)
+        return await chat.send_message(EmergentMessage(text=request.text))
+
+# Canned responses for the fake provider, keyed by call kind. Agent replies are split so
+# the banned-phrase filter and the document trigger/quality gates fire at realistic rates.
+CLEAN_AGENT_REPLIES = [
+    "I'd start with the supply data - if the numbers hold, we can phase the rollout over three weeks.",
+    "What's the failure mode if the sensors drop out? I want a manual fallback before we commit.",
+    "I can take the stakeholder interviews this week; that gives us real constraints instead of guesses.",
+    "The cheaper option works if we accept a slower ramp. I'd rather pilot it with one team first.",
+    "Good point on staffing. Let's split the work: I'll draft the checklist, you own the vendor calls.",
+    "I ran the rough math - the second site pays for itself in about eight months at current volume.",
+    "Before we scale this, how are we measuring success? I'd propose two metrics and a weekly review.",
+    "That timeline is tight but doable if procurement starts Monday. I'll flag the long-lead items.",
+]
+
+BANNED_AGENT_REPLIES = [
+    "As an expert in this field, I think we need to look at the bigger picture here.",
+    "Good morning team, I'm glad we're all here to discuss this important topic.",
+    "From my perspective, we need to work together and make sure everyone is aligned.",
+    "As you know, the situation is complex and we must act now before it escalates.",
+    "Based on my experience, we should consider every option before moving forward.",
+]
+
+TRIGGER_AGENT_REPLIES = [
+    "After careful consideration, let's create a budget plan with the $2M allocation split across three milestones.",
+    "The team consensus is to create an implementation timeline; I'll own the deadline for the first deliverable.",
+    "We've agreed to formalize the risk assessment - let's put our agreed approach in writing today.",
+    "Based on our thorough review, we need to formalize this into a protocol with clear responsibility for each step.",
+    "It's time to create a comprehensive training plan, with the schedule and cost per cohort spelled out.",
+]
+
+ACTION_TRIGGER_REPLIES = [
+    "YES|budget|Phased Investment Plan|after careful consideration, let's create|The team agreed on a milestone-based allocation that needs a formal record",
+    "YES|timeline|Implementation Timeline and Milestones|the team consensus is to create|Deadlines and owners were agreed and need to be tracked",
+    "YES|risk|Risk Assessment and Mitigation Plan|we've agreed to formalize|Risks were ranked and mitigations assigned",
+    "NO - the discussion has not reached a concrete decision yet; participants are still exploring options.",
+]
+
+VOTE_REPLIES = [
+    "YES - the plan is concrete and the risks are covered.",
+    "YES - it matches what we discussed and the cost is reasonable.",
+    "NO - the timeline is too aggressive for the current staffing.",
+    "ABSTAIN - I need the cost figures before I can decide.",
+]
+
+REVIEW_REPLIES = [
+    "APPROVED - the document is clear, complete and ready for use.",
+    "IMPROVE: Add owners to each milestone and a contingency line to the budget table.",
+]
+
+def _ensemble_reply(request: LLMRequest, rng: random.Random, banned_rate: float) -> str:
+    """JSON round with one entry per persona card in the prompt"""
+    entries = []
+    for agent_id in re.findall(r"^- id: (\S+)", request.text, re.MULTILINE):
+        replies = BANNED_AGENT_REPLIES if rng.random() < banned_rate else CLEAN_AGENT_REPLIES
+        entries.append({"agent_id": agent_id, "message": rng.choice(replies), "mood": rng.choice(["focused", "optimistic", "cautious"])})
+    return json.dumps(entries)
+
+def _fast_forward_reply(request: LLMRequest, rng: random.Random, banned_rate: float) -> str:
+    """Batch of rounds, one per slot line and persona card in the prompt, plus the updated summary"""
+    agent_ids = re.findall(r"^- id: (\S+)", request.text, re.MULTILINE)
+    rounds = []
+    for slot in re.findall(r"^Slot (\d+):", request.text, re.MULTILINE):
+        messages = []
+        for agent_id in agent_ids:
+            replies = BANNED_AGENT_REPLIES if rng.random() < banned_rate else CLEAN_AGENT_REPLIES
+            messages.append({"agent_id": agent_id, "message": rng.choice(replies), "mood": rng.choice(["focused", "optimistic", "cautious"])})
+        rounds.append({"slot": int(slot), "messages": messages})
+    summary = "The team agreed to pilot at the north site first; budget risk and staffing remain open."
+    return json.dumps({"rounds": rounds, "summary": summary})
+
+def _document_reply(title: str) -> str:
+    return f"""# {title}
+
+## Overview
+This document captures the decisions reached by the team and the plan to act on them.
+
+## Key Decisions
+1. Run a two-week pilot before committing the full budget.
+2. Assign one owner per milestone with a weekly status check.
+3. Hold 10% of the allocation as contingency.
+
+## Timeline
+| Milestone | Owner | Deadline |
+|-----------|-------|----------|
+| Pilot launch | Operations | Week 2 |
+| Review | Finance | Week 4 |
+| Full rollout | Leadership | Week 8 |
+
+## Risks and Mitigation
+- **Supplier delays**: qualify a second vendor during the pilot.
+- **Budget overrun**: monthly review against the contingency line.
+"""
+
+def _document_patch_reply(request_text: str) -> str:
+    """A section patch against the first section the prompt showed in full (see document_sections.py)"""
+    shown = re.search(r"^\[(s\d+)\]", request_text, re.MULTILINE)
+    section = shown.group(1) if shown else "s0"
+    return json.dumps([
+        {"op": "append", "section": section,
+         "content": "**Update:** the team agreed to run the two-week pilot first and review cost per site in week 4."},
+        {"op": "add", "after": section, "heading": "## Decisions Log",
+         "content": "- Pilot at the north site, owner: Operations\n- Hold 10% of the allocation as contingency"},
+    ])
+
+def _weekly_summary_reply() -> str:
+    sections = [
+        ("📊 EXECUTIVE SUMMARY", "The team moved from exploration to concrete planning and produced its first formal documents."),
+        ("🔥 KEY EVENTS & DISCOVERIES", "1. The pilot scope was agreed.\n\n2. A cost model was validated.\n\n3. Staffing gaps were identified early."),
+        ("📋 DOCUMENTS & DELIVERABLES", "1. Implementation Timeline - sets milestones and owners."),
+        ("📈 RELATIONSHIP DEVELOPMENTS", "1. Trust between the analysts and operations leads grew after the cost review."),
+        ("🎭 EMERGING PERSONALITIES", "1. The skeptic kept the plan grounded; the optimist kept momentum."),
+        ("🤝 SOCIAL DYNAMICS", "Cohesion improved as ownership was split clearly."),
+        ("🎯 STRATEGIC DECISIONS", "1. Pilot first, scale second."),
+        ("🚀 ACTION-ORIENTED OUTCOMES", "1. A timeline with owners and deadlines."),
+        ("🔮 LOOKING AHEAD", "Expect the pilot review to drive the next budget decision."),
+    ]
+    return "\n\n".join(f"**{header}**\n{body}" for header, body in sections)
+
+def parse_latency_spec(spec: str):
+    """Parse a FAKE_LLM_LATENCY spec into (distribution, params in ms)"""
+    distribution, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value.strip()]
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+    if distribution not in expected or len(values) != expected[distribution]:
+        raise ValueError(f"Invalid FAKE_LLM_LATENCY '{spec}' - use fixed:<ms>, uniform:<lo>,<hi> or lognormal:<median>,<sigma>")
+    return distribution, values
+
+class FakeLLMProvider(LLMProvider):
+    """Local stand-in for Gemini: realistic latency, injected faults, deterministic canned replies.
+
+    Every decision for a call (latency, fault, reply) comes from an RNG seeded with the
+    prompt key, so the same prompt always behaves the same way across runs.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: str = "lognormal:800,0.5", error_rate: float = 0.0,
+                 timeout_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 banned_rate: float = 0.2, trigger_rate: float = 0.15,
+                 hang_seconds: float = 30.0, seed: int = 0):
+        self.latency = parse_latency_spec(latency)
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.banned_rate = banned_rate
+        self.trigger_rate = trigger_rate
+        self.hang_seconds = hang_seconds
+        self.seed = seed
+        self.call_count = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMProvider":
+        return cls(
+            latency=os.environ.get("FAKE_LLM_LATENCY", "lognormal:800,0.5"),
+            error_rate=float(os.environ.get("FAKE_LLM_ERROR_RATE", "0")),
+            timeout_rate=float(os.environ.get("FAKE_LLM_TIMEOUT_RATE", "0")),
+            rate_limit_rate=float(os.environ.get("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+            banned_rate=float(os.environ.get("FAKE_LLM_BANNED_RATE", "0.2")),
+            trigger_rate=float(os.environ.get("FAKE_LLM_TRIGGER_RATE", "0.15")),
+            hang_seconds=float(os.environ.get("FAKE_LLM_HANG_SECONDS", "30")),
+            seed=int(os.environ.get("FAKE_LLM_SEED", "0")),
+        )
+
+    def _rng(self, request: LLMRequest) -> random.Random:
+        return random.Random(f"{self.seed}:{request.key}")
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Latency in seconds drawn from the configured distribution"""
+        distribution, params = self.latency
+        if distribution == "fixed":
+            latency_ms = params[0]
+        elif distribution == "uniform":
+            latency_ms = rng.uniform(params[0], params[1])
+        else:
+            latency_ms = rng.lognormvariate(0, params[1]) * params[0]
+        return max(latency_ms, 0) / 1000
+
+    def canned_reply(self, request: LLMRequest, rng: random.Random) -> str:
+        kind = request.kind
+        if kind == "agent":
+            roll = rng.random()
+            if roll < self.banned_rate:
+                return rng.choice(BANNED_AGENT_REPLIES)
+            if roll < self.banned_rate + self.trigger_rate:
+                return rng.choice(TRIGGER_AGENT_REPLIES)
+            return rng.choice(CLEAN_AGENT_REPLIES)
+        if kind == "ensemble":
+            return _ensemble_reply(request, rng, self.banned_rate)
+        if kind == "fast_forward":
+            return _fast_forward_reply(request, rng, self.banned_rate)
+        if kind == "enhanced_analysis":
+            return rng.choice(ACTION_TRIGGER_REPLIES)
+        if kind == "voting":
+            return rng.choice(VOTE_REPLIES)
+        if kind == "review":
+            return rng.choice(REVIEW_REPLIES)
+        if kind in ("document_creation", "doc_gen", "doc_update"):
+            title_match = re.search(r'content for "([^"]+)"|[Tt]itle:\s*(.+)', request.text)
+            title = next((group for group in title_match.groups() if group), None) if title_match else None
+            return _document_reply((title or "Team Plan").strip())
+        if kind == "doc_patch":
+            return _document_patch_reply(request.text)
+        if kind == "weekly_summary":
+            return _weekly_summary_reply()
+        if kind == "day_summary":
+            return "- The team agreed to pilot at the north site first; Operations owns the launch.\n- Budget risk remains open pending a second vendor bid."
+        if kind == "memory":
+            return "Key points: the team agreed on a phased pilot, owners were assigned, and budget risk is the main open question."
+        if kind == "url_summary":
+            return "The page describes current best practice, recent cost figures, and one notable case study."
+        if kind == "translate":
+            quoted = re.search(r'"(.+)"', request.text, re.DOTALL)
+            return quoted.group(1) if quoted else request.text
+        if kind == "observer":
+            return rng.choice(CLEAN_AGENT_REPLIES)
+        return "Understood - here is a concise answer based on the information provided."
+
+    async def complete(self, request: LLMRequest) -> str:
+        self.call_count += 1
+        rng = self._rng(request)
+        fault = rng.random()
+
+        if fault < self.timeout_rate:
+            await asyncio.sleep(self.hang_seconds)
+            raise asyncio.TimeoutError(f"Fake LLM timed out after {self.hang_seconds}s")
+
+        await asyncio.sleep(self.sample_latency(rng))
+
+        if fault < self.timeout_rate + self.rate_limit_rate:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        if fault < self.timeout_rate + self.rate_limit_rate + self.error_rate:
+            raise RuntimeError("500 Internal error encountered.")
+
+        return self.canned_reply(request, rng)
+
+class RecordingProvider(LLMProvider):
+    """Forwards to another provider and appends every prompt/response pair to a JSONL file"""
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, path: Path = DEFAULT_RECORD_FILE):
+        self.inner = inner
+        self.path = Path(path)
+
+    async def complete(self, request: LLMRequest) -> str:
+        start_time = time.perf_counter()
+        response = await self.inner.complete(request)
+        entry = {
+            "key": request.key,
+            "kind": request.kind,
+            "model": request.model,
+            "system_message": request.system_message,
+            "text": request.text,
+            "response": response,
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 1),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return response
+
+class ReplayProvider(LLMProvider):
+    """Serves recorded responses offline.
+
+    Exact prompt matches are served first. Prompts that embed run-specific data (agent
+    names, ids, conversation text) rarely repeat, so misses fall back to cycling through
+    the recordings of the same call kind.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: Path = DEFAULT_RECORD_FILE, replay_latency: bool = True):
+        self.path = Path(path)
+        self.replay_latency = replay_latency
+        self.by_key: Dict[str, dict] = {}
+        self.by_kind: Dict[str, List[dict]] = {}
+        self._kind_cursor: Dict[str, int] = {}
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.by_key[entry["key"]] = entry
+                self.by_kind.setdefault(entry["kind"], []).append(entry)
+
+    async def complete(self, request: LLMRequest) -> str:
+        entry = self.by_key.get(request.key)
+        if entry is None:
+            recorded = self.by_kind.get(request.kind)
+            if not recorded:
+                raise LookupError(f"No recorded LLM responses for call kind '{request.kind}' in {self.path}")
+            cursor = self._kind_cursor.get(request.kind, 0)
+            entry = recorded[cursor % len(recorded)]
+            self._kind_cursor[request.kind] = cursor + 1
+
+        if self.replay_latency:
+            await asyncio.sleep(entry.get("latency_ms", 0) / 1000)
+        return entry["response"]
+
+def create_llm_provider(name: Optional[str] = None) -> LLMProvider:
+    """Build the provider named by LLM_PROVIDER (or the name given)"""
+    name = (name or os.environ.get("LLM_PROVIDER", "emergent")).lower()
+    record_file = Path(os.environ.get("LLM_RECORD_FILE", str(DEFAULT_RECORD_FILE)))
+
+    if name == "emergent":
+        return EmergentProvider()
+    if name == "fake":
+        return FakeLLMProvider.from_env()
+    if name == "record":
+        return RecordingProvider(EmergentProvider(), record_file)
+    if name == "replay":
+        replay_latency = os.environ.get("LLM_REPLAY_LATENCY", "1").lower() in ("1", "true", "yes")
+        return ReplayProvider(record_file, replay_latency=replay_latency)
+    raise ValueError(f"Unknown LLM_PROVIDER '{name}' - use emergent, fake, record or replay")
+
+# Resolved on first use so LLM_PROVIDER can come from backend/.env, which server.py loads after its imports
+llm_provider: Optional[LLMProvider] = None
+
+def get_llm_provider() -> LLMProvider:
+    global llm_provider
+    if llm_provider is None:
+        llm_provider = create_llm_provider()
+        if llm_provider.name != "emergent":
+            logging.warning(f"⚠️ LLM calls are served by the '{llm_provider.name}' provider")
+    return llm_provider
+
+def set_llm_provider(provider: LLMProvider):
+    """Swap the active provider (benchmarks and tests)"""
+    global llm_provider
+    llm_provider = provider
+
+class LlmChat:
+    """Drop-in for emergentintegrations' LlmChat that routes calls through the active provider"""
+
+    def __init__(self, api_key: str, session_id: str, system_message: str):
+        self.api_key = api_key
+        self.session_id = session_id
+        self.system_message = system_message
+        self.provider = "gemini"
+        self.model = "gemini-2.0-flash"
+        self.max_tokens = None
+
+    def with_model(self, provider: str, model: str) -> "LlmChat":
+        self.provider = provider
+        self.model = model
+        return self
+
+    def with_max_tokens(self, max_tokens: int) -> "LlmChat":
+        self.max_tokens = max_tokens
+        return self
+
+    async def send_message(self, user_message: UserMessage) -> str:
+        request = LLMRequest(
+            api_key=self.api_key,
+            session_id=self.session_id,
+            system_message=self.system_message,
+            provider=self.provider,
+            model=self.model,
+            max_tokens=self.max_tokens,
+            text=user_message.text
+        )
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.calls += 1
+            usage.prompt_tokens += estimate_tokens(request.system_message) + estimate_tokens(request.text)
+        response = await get_llm_provider().complete(request)
+        if usage is not None:
+            usage.completion_tokens += estimate_tokens(response)
+        return response
@@ -1,19 +1,47 @@
+"""
+Performance monitoring
+Serves the Prometheus metrics of this module and of the instrumentation package on
+METRICS_PORT. Only one process can bind the port, so with several uvicorn workers set
+PROMETHEUS_MULTIPROC_DIR: every worker then writes its samples there, and the worker that
+holds the port serves all of them through a MultiProcessCollector (counters and histograms
+summed, gauges by their multiprocess_mode). The others keep retrying the port, so one of
+them takes over if that worker exits. The directory must exist and be emptied before the
+workers start (entrypoint.sh and the compose commands do this).
+
+    METRICS_PORT              port of the Prometheus endpoint (default 8000)
+    PROMETHEUS_MULTIPROC_DIR  shared sample directory for multi-worker deployments (unset: single process)
+"""
+
+import os
 import time
 import psutil
 import asyncio
-from prometheus_client import Counter, Histogram, Gauge, start_http_server
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, Gauge, multiprocess, start_http_server
 from typing import Dict, Any
 import structlog
 
+METRICS_PORT_RETRY_SECONDS = 30
+
 # Prometheus metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests', ['method', 'endpoint', 'status'])
 REQUEST_DURATION = Histogram('http_request_duration_seconds', 'HTTP request duration', ['method', 'endpoint'])
-ACTIVE_CONNECTIONS = Gauge('active_database_connections', 'Active database connections')
+ACTIVE_CONNECTIONS = Gauge('active_database_connections', 'Active database connections', multiprocess_mode='livesum')
 CACHE_HITS = Counter('cache_hits_total', 'Cache hits', ['operation'])
 CACHE_MISSES = Counter('cache_misses_total', 'Cache misses', ['operation'])
-SYSTEM_CPU = Gauge('system_cpu_percent', 'System CPU usage')
-SYSTEM_MEMORY = Gauge('system_memory_percent', 'System memory usage')
-ACTIVE_USERS = Gauge('active_users_count', 'Number of active users')
+SYSTEM_CPU = Gauge('system_cpu_percent', 'System CPU usage', multiprocess_mode='livemax')
+SYSTEM_MEMORY = Gauge('system_memory_percent', 'System memory usage', multiprocess_mode='livemax')
+ACTIVE_USERS = Gauge('active_users_count', 'Number of active users', multiprocess_mode='livemax')
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+def metrics_registry():
+    """Registry to serve: every worker's samples in multiprocess mode, this process's otherwise"""
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
 
 # Structured logging
 logger = structlog.get_logger()
@@ -24,16 +52,45 @@ class PerformanceMonitor:
         self.request_count = 0
         self.error_count = 0
         self.active_requests = 0
+        self.metrics_port = int(os.environ.get('METRICS_PORT', '8000'))
+        self.started = False
         
     async def start_monitoring(self):
         """Start background monitoring tasks"""
+        if self.started:
+            return
+        self.started = True
+        
         # Start Prometheus metrics server
-        start_http_server(8000)
+        if not self._serve_metrics():
+            if multiprocess_enabled():
+                # Another worker serves everyone's samples; take over if it goes away
+                asyncio.create_task(self._retry_metrics_port())
+            else:
+                logger.warning("Metrics port unavailable and PROMETHEUS_MULTIPROC_DIR unset; "
+                               "this worker's metrics are not exported", port=self.metrics_port)
         
         # Start system metrics collection
         asyncio.create_task(self._collect_system_metrics())
         
-        logger.info("Performance monitoring started", port=8000)
+        logger.info("Performance monitoring started", port=self.metrics_port, multiprocess=multiprocess_enabled())
+    
+    def _serve_metrics(self) -> bool:
+        try:
+            start_http_server(self.metrics_port, registry=metrics_registry())
+        except OSError:
+            return False
+        return True
+    
+    async def _retry_metrics_port(self):
+        while not self._serve_metrics():
+            await asyncio.sleep(METRICS_PORT_RETRY_SECONDS)
+        logger.info("Serving metrics for all workers", port=self.metrics_port)
+    
+    def stop_monitoring(self):
+        """Drop this worker's live gauges from the multiprocess samples"""
+        if multiprocess_enabled():
+            multiprocess.mark_process_dead(os.getpid())
     
     async def _collect_system_metrics(self):
         """Collect system metrics periodically"""
@@ -60,7 +117,7 @@ class PerformanceMonitor:
                 await asyncio.sleep(60)
     
     def record_request(self, method: str, endpoint: str, status_code: int, duration: float):
-        """Record request metrics"""
+        """Record request metrics (endpoint must be a route template, not the raw path)"""
         REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code).inc()
         REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
         
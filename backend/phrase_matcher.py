@@ -0,0 +1,83 @@
+"""
+Multi-phrase matching
+The keyword heuristics (banned reply phrases, document triggers, decision and topic
+keywords, scenario themes) compile their phrase lists once into a PhraseMatcher instead of
+running `any(phrase in text.lower() for phrase in LIST)` per list and per check.
+
+With the pyahocorasick package installed the phrases become one Aho-Corasick automaton,
+and the lowered text is scanned once in C whatever the number of phrases and categories.
+Otherwise the matcher lowers the text once and sweeps the phrases with str.__contains__
+(no Python frame per phrase), skipping for yes/no and per-category questions the phrases
+that contain another phrase of the same categories. Both keep the substring semantics of
+the `in` checks they replace.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Union
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class Hit(NamedTuple):
+    phrase: str
+    category: str
+
+class PhraseMatcher:
+    """
+    Phrases compiled for case-insensitive substring matching. Built from {category: phrases},
+    or from a plain list where every phrase is its own category; a phrase listed under
+    several categories reports all of them.
+    """
+
+    def __init__(self, phrases: Union[Dict[str, Iterable[str]], Iterable[str]]):
+        groups = phrases.items() if isinstance(phrases, dict) else ((phrase, (phrase,)) for phrase in phrases)
+        self.categories_of: Dict[str, List[str]] = {}
+        for category, members in groups:
+            for phrase in members:
+                phrase = phrase.lower()
+                if phrase and category not in self.categories_of.setdefault(phrase, []):
+                    self.categories_of[phrase].append(category)
+        self._phrases = tuple(self.categories_of)
+
+        self._automaton = None
+        if ahocorasick is not None and self._phrases:
+            self._automaton = ahocorasick.Automaton()
+            for phrase in self._phrases:
+                self._automaton.add_word(phrase, phrase)
+            self._automaton.make_automaton()
+
+        # If the longer phrase is present so is the shorter one it contains
+        def redundant(phrase, same_categories):
+            return any(other != phrase and other in phrase
+                       and (not same_categories or set(self.categories_of[other]) >= set(self.categories_of[phrase]))
+                       for other in self._phrases)
+        self._for_search = tuple(phrase for phrase in self._phrases if not redundant(phrase, False))
+        self._for_categories = tuple(phrase for phrase in self._phrases if not redundant(phrase, True))
+
+    def _found(self, lowered: str, candidates: tuple) -> Iterable[str]:
+        if self._automaton is not None:
+            return (phrase for _, phrase in self._automaton.iter(lowered))
+        return filter(lowered.__contains__, candidates)
+
+    def search(self, text: str) -> Optional[str]:
+        """A phrase found in the text, or None - for plain yes/no checks"""
+        if not text:
+            return None
+        return next(iter(self._found(text.lower(), self._for_search)), None)
+
+    def phrases(self, text: str) -> List[str]:
+        """Distinct phrases found, in text order with the automaton and list order without"""
+        if not text:
+            return []
+        return list(dict.fromkeys(self._found(text.lower(), self._phrases)))
+
+    def hits(self, text: str) -> List[Hit]:
+        """Every phrase found with each of its categories, once each"""
+        return [Hit(phrase, category) for phrase in self.phrases(text) for category in self.categories_of[phrase]]
+
+    def categories(self, text: str) -> Set[str]:
+        if not text:
+            return set()
+        return {category for phrase in self._found(text.lower(), self._for_categories)
+                for category in self.categories_of[phrase]}
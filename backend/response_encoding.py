@@ -0,0 +1,113 @@
+"""
+Response encoding
+Every JSON response is rendered with orjson. List endpoints over trusted DB reads return
+json_response(...) directly, which skips Pydantic models and FastAPI's jsonable_encoder:
+ObjectId goes out as a string and datetimes as ISO 8601, like the encoder would produce.
+Large bodies are compressed - brotli when the brotli package is installed and the client
+accepts it, gzip otherwise.
+
+    RESPONSE_COMPRESSION           auto (default) | gzip | off
+    RESPONSE_COMPRESSION_MIN_SIZE  bodies smaller than this many bytes go out as-is (default 1024)
+"""
+
+import os
+import gzip
+from typing import Any, Optional
+
+import orjson
+from bson import ObjectId
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "image/svg+xml", "text/")
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, BSON-aware"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> ORJSONResponse:
+    """Return from an endpoint to send content as-is, without jsonable_encoder"""
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+def choose_encoding(accept_encoding: str, mode: str = "auto") -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if mode == "off":
+        return None
+    if mode == "auto" and brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+class CompressionMiddleware:
+    """
+    Compresses complete (single-message) responses of compressible types above
+    minimum_size. Streaming responses, files and already-encoded bodies pass through.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None, mode: Optional[str] = None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(
+            os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+        self.mode = (mode or os.environ.get("RESPONSE_COMPRESSION", "auto")).lower()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.mode)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        decided = False
+
+        async def compressing_send(message):
+            nonlocal start_message, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            decided = True
+            headers = MutableHeaders(scope=start_message)
+            body = message.get("body", b"")
+            if (message.get("more_body") or len(body) < self.minimum_size or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                await send(start_message)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
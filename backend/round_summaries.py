@@ -0,0 +1,168 @@
+"""
+Hierarchical conversation summaries
+Weekly reports are reduced from cached summaries instead of re-reading raw rounds:
+
+    round  extractive digest written when a round is saved, no LLM call (round_summaries)
+    day    LLM digest of one user's day, folded forward from its previous digest and the
+           round digests added since - only days with new rounds are refreshed (day_summaries)
+    week   the report, reduced from the last SUMMARY_REPORT_DAYS day digests
+
+A report therefore costs at most one small fold per changed day plus one bounded reduce,
+however many rounds the week had, and none at all when no day changed since the last one.
+
+    SUMMARY_REPORT_DAYS     days a weekly report covers (default 7)
+    SUMMARY_DAY_MAX_CHARS   length cap of a day digest (default 1500)
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from phrase_matcher import PhraseMatcher
+
+REPORT_DAYS = int(os.environ.get("SUMMARY_REPORT_DAYS", "7"))
+DAY_MAX_CHARS = int(os.environ.get("SUMMARY_DAY_MAX_CHARS", "1500"))
+HIGHLIGHTS_PER_ROUND = 3
+HIGHLIGHT_CHARS = 200
+FOLD_BATCH = 40
+
+KEY_EVENT_KEYWORDS = ('decide', 'discovery', 'found', 'breakthrough', 'crisis', 'solution', 'agreement', 'conflict',
+                      'document created', 'protocol', 'training')
+KEY_EVENTS = PhraseMatcher(KEY_EVENT_KEYWORDS)
+
+DAY_SYSTEM_MESSAGE = """You maintain a running digest of one day of an AI team simulation.
+Merge the new rounds into the digest: keep decisions, discoveries, conflicts, commitments and who drove them.
+Drop small talk. Reply with the updated digest only, as short bullet points, under 200 words."""
+
+def day_key(created_at: Optional[datetime]) -> str:
+    return (created_at or datetime.utcnow()).strftime("%Y-%m-%d")
+
+def _field(conversation_round, name, default=None):
+    if isinstance(conversation_round, dict):
+        return conversation_round.get(name, default)
+    return getattr(conversation_round, name, default)
+
+def _message_fields(message) -> tuple:
+    if isinstance(message, dict):
+        return message.get("agent_name", ""), message.get("message", "")
+    return message.agent_name, message.message
+
+def round_digest(conversation_round) -> dict:
+    """Who spoke and the few statements worth keeping; key-event statements come first"""
+    messages = [_message_fields(m) for m in _field(conversation_round, "messages", []) or []]
+    messages = [(name, text) for name, text in messages if text]
+    key = [(name, text) for name, text in messages if KEY_EVENTS.search(text)]
+    chosen = (key + [m for m in messages if m not in key])[:HIGHLIGHTS_PER_ROUND]
+    created_at = _field(conversation_round, "created_at") or datetime.utcnow()
+    return {
+        "round_id": _field(conversation_round, "id"),
+        "user_id": _field(conversation_round, "user_id", ""),
+        "day": day_key(created_at),
+        "round_number": _field(conversation_round, "round_number"),
+        "time_period": _field(conversation_round, "time_period", ""),
+        "scenario_name": _field(conversation_round, "scenario_name", ""),
+        "agents": sorted({name for name, _ in messages}),
+        "highlights": [f"{name}: {text[:HIGHLIGHT_CHARS]}" for name, text in chosen],
+        "key_events": len(key),
+        "created_at": created_at,
+        "folded": False,
+    }
+
+def digest_text(digest: dict) -> str:
+    header = f"Round {digest.get('round_number') or '?'} ({digest.get('time_period') or 'unknown time'})"
+    return header + ":\n" + "\n".join(f"- {line}" for line in digest["highlights"])
+
+async def record_rounds(db, rounds: List) -> int:
+    """Write the round digests of freshly saved rounds; never raises into round generation"""
+    digests = [round_digest(r) for r in rounds if _field(r, "id")]
+    if not digests:
+        return 0
+    try:
+        await db.round_summaries.insert_many(digests, ordered=False)
+    except BulkWriteError as e:
+        # Rounds recorded twice (round_id is unique) are fine
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            logging.error(f"Error recording round summaries: {e}")
+    except Exception as e:
+        logging.error(f"Error recording round summaries: {e}")
+    return len(digests)
+
+def report_days(now: Optional[datetime] = None, days: int = REPORT_DAYS) -> List[str]:
+    now = now or datetime.utcnow()
+    return [day_key(now - timedelta(days=n)) for n in range(days - 1, -1, -1)]
+
+class HierarchicalSummarizer:
+    """
+    Keeps day digests current and assembles report input from them. complete(system_message,
+    prompt) is the LLM call (the server's, so usage limits and instrumentation apply).
+    """
+
+    def __init__(self, db, complete: Callable[[str, str], Awaitable[str]]):
+        self.db = db
+        self.complete = complete
+
+    async def refresh_day(self, user_id: str, day: str) -> Optional[dict]:
+        """Fold the day's unfolded round digests into its digest; returns the day document"""
+        key = {"user_id": user_id, "day": day}
+        day_doc = await self.db.day_summaries.find_one(key)
+        while True:
+            pending = await self.db.round_summaries.find({**key, "folded": False}).sort("created_at", 1).to_list(FOLD_BATCH)
+            if not pending:
+                return day_doc
+
+            previous = day_doc["summary"] if day_doc else "(nothing yet)"
+            prompt = f"CURRENT DIGEST FOR {day}:\n{previous}\n\nNEW ROUNDS:\n" + "\n\n".join(digest_text(d) for d in pending)
+            summary = (await self.complete(DAY_SYSTEM_MESSAGE, prompt)).strip()[:DAY_MAX_CHARS]
+
+            agents = sorted(set(day_doc.get("agents", []) if day_doc else []).union(*(d["agents"] for d in pending)))
+            day_doc = {
+                **key,
+                "summary": summary,
+                "agents": agents,
+                "rounds": (day_doc.get("rounds", 0) if day_doc else 0) + len(pending),
+                "key_events": (day_doc.get("key_events", 0) if day_doc else 0) + sum(d["key_events"] for d in pending),
+                "updated_at": datetime.utcnow(),
+            }
+            await self.db.day_summaries.replace_one(key, day_doc, upsert=True)
+            await self.db.round_summaries.update_many({"_id": {"$in": [d["_id"] for d in pending]}}, {"$set": {"folded": True}})
+
+    async def week(self, user_id: str, now: Optional[datetime] = None) -> Dict:
+        """
+        Day digests of the report window, oldest first, refreshing the days that have new
+        rounds. `refreshed` lists those days; when it is empty nothing changed since the
+        digests were last read.
+        """
+        days = report_days(now)
+        changed = await self.db.round_summaries.distinct("day", {"user_id": user_id, "folded": False, "day": {"$gte": days[0]}})
+        refreshed = []
+        for day in sorted(changed):
+            try:
+                await self.refresh_day(user_id, day)
+                refreshed.append(day)
+            except Exception as e:
+                logging.error(f"Error refreshing day summary {day} for user {user_id}: {e}")
+        digests = await self.db.day_summaries.find(
+            {"user_id": user_id, "day": {"$gte": days[0]}}, {"_id": 0}
+        ).sort("day", 1).to_list(len(days))
+        # Days whose fold failed still contribute their raw highlights
+        stale = await self.db.round_summaries.find(
+            {"user_id": user_id, "folded": False, "day": {"$gte": days[0]}}, {"_id": 0}
+        ).sort("created_at", 1).to_list(FOLD_BATCH)
+        return {
+            "days": digests,
+            "unfolded": stale,
+            "refreshed": refreshed,
+            "rounds": sum(d.get("rounds", 0) for d in digests) + len(stale),
+            "signature": "|".join(f"{d['day']}:{d['updated_at'].isoformat()}" for d in digests),
+        }
+
+def week_text(week: Dict) -> str:
+    """Report input: one block per day digest, plus raw highlights of rounds not yet folded"""
+    parts = [f"**{d['day']}** ({d.get('rounds', 0)} rounds; agents: {', '.join(d.get('agents', []))}):\n{d['summary']}"
+             for d in week["days"]]
+    if week["unfolded"]:
+        parts.append("**Latest rounds:**\n" + "\n".join(digest_text(d) for d in week["unfolded"]))
+    return "\n\n".join(parts)
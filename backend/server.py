@@ -1,11 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, status, APIRouter, UploadFile, File, Query, Request
+from fastapi import FastAPI, HTTPException, Depends, status, APIRouter, UploadFile, File, Query, Request, Response
 from backend.auth import get_current_user
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from smart_conversation import SmartConversationGenerator
 from enhanced_document_system import DocumentQualityGate, ProfessionalDocumentFormatter
+from cache import cache_manager, cached_user_data, invalidate_user_cache, invalidate_data_type
+from monitoring import monitor
+from instrumentation import instrument_app, timed_llm_call, record_fallback, record_round_generation, record_document_update, start_loop_lag_monitor
+from instrumentation import install_query_profiler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, EmailStr
 import bcrypt
@@ -16,25 +22,37 @@ from typing import List, Optional, Dict, Any
 import asyncio
 from datetime import datetime, timedelta, date
 import uuid
+import time
+import weakref
 import logging
 import os
 from pathlib import Path
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from google.cloud import texttospeech
+from llm_providers import LlmChat, UserMessage, track_llm_usage
+from features import feature_enabled, require_feature
+from response_filters import is_acceptable_response
+from ensemble_round import ENSEMBLE_SYSTEM_MESSAGE, build_ensemble_prompt, parse_ensemble_response, resolve_round_mode
+from fast_forward import ACTIVE_JOB_STATUSES, FastForwardEngine, fail_orphaned_jobs, keep_job_alive, plan_slots
+from voting import collect_votes, parse_vote, tally
+from conversation_writes import ConversationWriter
+from conversation_archive import HOT_ROUNDS, ConversationArchiver, all_rounds, count_rounds, recent_rounds
+from response_encoding import CompressionMiddleware, ORJSONResponse, json_response
+from indexes import ensure_indexes
+from document_pipeline import DocumentPipeline
+from document_sections import apply_patch, parse_patch, parse_sections, patch_prompt, relevant_sections
+from conversation_state import CATCH_UP_ROUNDS, ConversationState
+from phrase_matcher import PhraseMatcher
+from round_summaries import HierarchicalSummarizer, record_rounds, week_text
+from document_versions import VersionConflict, VersionNotFound, diff_versions, head_version, list_versions, load_version, save_revision, storage_stats
+from database import db_manager, long_operation
 import base64
-import fal_client
 from jose import JWTError, jwt
-from google.auth.transport import requests
-from google.oauth2 import id_token
 import httpx
-import tempfile
-import openai
-from pydub import AudioSegment
 import io
+import json
 import asyncio
 import re
+import hashlib
 import urllib.parse
 
 ROOT_DIR = Path(__file__).parent
@@ -218,17 +236,18 @@ class ActionTriggerResult(BaseModel):
     trigger_phrase: str = ""
     reasoning: str = ""
 
-# MongoDB connection
+# MongoDB connection - the process-wide client shared with auth.py (see database.py)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'ai_simulation')]
+db = db_manager.configure(mongo_url, os.environ.get('DB_NAME', 'ai_simulation'))
+client = db_manager.client
+
+# Moves cold rounds into conversation_archive (see conversation_archive.py)
+conversation_archiver = ConversationArchiver(db)
 
 # Configure fal.ai
-import fal_client
-fal_client.api_key = os.environ.get('FAL_KEY')
 
-# Create the main app without a prefix
-app = FastAPI()
+# Create the main app without a prefix; JSON is rendered with orjson (see response_encoding.py)
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -282,6 +301,18 @@ AGENT_ARCHETYPES = {
     }
 }
 
+ARCHETYPE_MOODS = {
+    "optimist": "enthusiastic",
+    "skeptic": "cautious",
+    "scientist": "analytical",
+    "leader": "strategic",
+    "artist": "creative",
+}
+
+def archetype_mood(archetype: str) -> str:
+    """Default message mood for an agent archetype"""
+    return ARCHETYPE_MOODS.get(archetype, "engaged")
+
 class ObserverMessage(BaseModel):
     message: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
@@ -289,8 +320,103 @@ class ObserverMessage(BaseModel):
 class ObserverInput(BaseModel):
     observer_message: str
 
+# NDJSON streams: nginx buffers proxied responses unless told not to, which would hold every event
+# until the stream ends; idle streams send a keepalive line well inside proxy_read_timeout (60s)
+STREAM_HEADERS = {"X-Accel-Buffering": "no", "Cache-Control": "no-cache"}
+STREAM_KEEPALIVE_SECONDS = float(os.environ.get("STREAM_KEEPALIVE_SECONDS", "20"))
+
+# Observer replies run concurrently, capped per user so one team can't exhaust the LLM quota alone
+OBSERVER_MAX_CONCURRENCY = int(os.environ.get("OBSERVER_MAX_CONCURRENCY", "4"))
+OBSERVER_REPLY_TIMEOUT = float(os.environ.get("OBSERVER_REPLY_TIMEOUT", "8"))
+# Held only by the fan-outs using them, so a user's entry goes away once their replies are done
+_observer_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+_observer_tasks = set()
+
+def observer_fallback_reply(agent: "Agent", observer_message: str) -> str:
+    # More natural fallback responses based on message content
+    if "hello" in observer_message.lower():
+        return f"Hello! {agent.name} here - good to hear from you."
+    return f"Got it! {agent.name} is on it."
+
+async def generate_observer_reply(agent: "Agent", observer_message: str, scenario: str) -> str:
+    """One agent's reply to the observer, or a fallback on quota, timeout or error"""
+    if not await llm_manager.can_make_request():
+        return f"Hello! {agent.name} here - I hear you loud and clear."
+    
+    # Create LLM chat instance for this agent responding to observer
+    chat = LlmChat(
+        api_key=llm_manager.api_key,
+        session_id=f"observer_{agent.id}_{datetime.now().timestamp()}",
+        system_message=f"""You are {agent.name}, {AGENT_ARCHETYPES[agent.archetype]['description']}.
+                
+Your personality traits:
+- Extroversion: {agent.personality.extroversion}/10
+- Optimism: {agent.personality.optimism}/10  
+- Curiosity: {agent.personality.curiosity}/10
+- Cooperativeness: {agent.personality.cooperativeness}/10
+- Energy: {agent.personality.energy}/10
+
+Your goal: {agent.goal}
+Your expertise: {agent.expertise}
+
+🎯 IMPORTANT: The Observer is your project lead/supervisor with decision-making authority.
+
+You are in {scenario}. The Observer has just spoken to you and your team.
+
+RESPONSE GUIDELINES:
+- Respond naturally and conversationally
+- If they say "hello", respond with a friendly greeting
+- Be authentic to your personality while showing respect
+- Keep responses brief (1-2 sentences)
+- NO formal acknowledgments like "Understood" or "I acknowledge"
+- Talk like a real person, not a robot
+
+Examples:
+- If Observer says "hello agents" → "Hello! Good to hear from you."
+- If Observer gives direction → "Got it, I'll focus on that" or "Sounds like a plan"
+- Be conversational and human-like"""
+    ).with_model("gemini", "gemini-2.0-flash")
+    
+    try:
+        user_message = UserMessage(text=f"Observer says: '{observer_message}'\n\nRespond naturally and conversationally. Be authentic to your personality while showing appropriate respect for their leadership role.")
+        response = await timed_llm_call("observer_reply", "gemini-2.0-flash", chat.send_message(user_message), timeout=OBSERVER_REPLY_TIMEOUT)
+        await llm_manager.increment_usage()
+        if response and response.strip():
+            return response.strip()
+        record_fallback("observer_reply", "empty_response")
+    except asyncio.TimeoutError:
+        logging.error(f"Observer reply timed out for {agent.name}")
+        record_fallback("observer_reply", "timeout")
+    except Exception as e:
+        logging.error(f"Error generating observer response for {agent.name}: {e}")
+        record_fallback("observer_reply", "rate_limited" if "quota" in str(e).lower() or "429" in str(e) else "error")
+    return observer_fallback_reply(agent, observer_message)
+
+async def observer_fan_out(agent_objects: List["Agent"], observer_message: str, scenario: str, user_id: str, on_reply=None) -> List["ConversationMessage"]:
+    """Generate every agent's reply concurrently; on_reply(message) is awaited as each one completes.
+    Returns the replies in agent order."""
+    semaphore = _observer_semaphores.setdefault(user_id, asyncio.Semaphore(OBSERVER_MAX_CONCURRENCY))
+    
+    async def reply(index: int, agent: "Agent"):
+        async with semaphore:
+            response = await generate_observer_reply(agent, observer_message, scenario)
+        return index, ConversationMessage(
+            agent_id=agent.id,
+            agent_name=agent.name,
+            message=response,
+            mood=agent.current_mood
+        )
+    
+    replies = [None] * len(agent_objects)
+    for finished in asyncio.as_completed([reply(i, agent) for i, agent in enumerate(agent_objects)]):
+        index, message = await finished
+        replies[index] = message
+        if on_reply:
+            await on_reply(message)
+    return replies
+
 @api_router.post("/observer/send-message")
-async def send_observer_message(input_data: ObserverInput, current_user: User = Depends(get_current_user)):
+async def send_observer_message(input_data: ObserverInput, stream: bool = Query(False, description="Stream replies as NDJSON as they complete"), current_user: User = Depends(get_current_user)):
     """Send a message from the observer (user) to the AI agents"""
     observer_message = input_data.observer_message.strip()
     
@@ -319,9 +445,6 @@ async def send_observer_message(input_data: ObserverInput, current_user: User =
     }
     await db.observer_messages.insert_one(observer_msg_data)
     
-    # Generate responses from each agent to the observer
-    messages = []
-    
     # Add the observer message as the first "message" in the conversation
     observer_display_msg = ConversationMessage(
         agent_id="observer",
@@ -329,87 +452,62 @@ async def send_observer_message(input_data: ObserverInput, current_user: User =
         message=observer_message,
         mood="authoritative"
     )
-    messages.append(observer_display_msg)
     
-    for agent in agent_objects:
-        if not await llm_manager.can_make_request():
-            response = f"Hello! {agent.name} here - I hear you loud and clear."
-        else:
-            # Create LLM chat instance for this agent responding to observer
-            chat = LlmChat(
-                api_key=llm_manager.api_key,
-                session_id=f"observer_{agent.id}_{datetime.now().timestamp()}",
-                system_message=f"""You are {agent.name}, {AGENT_ARCHETYPES[agent.archetype]['description']}.
-                
-Your personality traits:
-- Extroversion: {agent.personality.extroversion}/10
-- Optimism: {agent.personality.optimism}/10  
-- Curiosity: {agent.personality.curiosity}/10
-- Cooperativeness: {agent.personality.cooperativeness}/10
-- Energy: {agent.personality.energy}/10
-
-Your goal: {agent.goal}
-Your expertise: {agent.expertise}
-
-🎯 IMPORTANT: The Observer is your project lead/supervisor with decision-making authority.
-
-You are in {scenario}. The Observer has just spoken to you and your team.
-
-RESPONSE GUIDELINES:
-- Respond naturally and conversationally
-- If they say "hello", respond with a friendly greeting
-- Be authentic to your personality while showing respect
-- Keep responses brief (1-2 sentences)
-- NO formal acknowledgments like "Understood" or "I acknowledge"
-- Talk like a real person, not a robot
-
-Examples:
-- If Observer says "hello agents" → "Hello! Good to hear from you."
-- If Observer gives direction → "Got it, I'll focus on that" or "Sounds like a plan"
-- Be conversational and human-like"""
-            ).with_model("gemini", "gemini-2.0-flash")
-            
-            try:
-                user_message = UserMessage(text=f"Observer says: '{observer_message}'\n\nRespond naturally and conversationally. Be authentic to your personality while showing appropriate respect for their leadership role.")
-                response = await chat.send_message(user_message)
-                await llm_manager.increment_usage()
-            except Exception as e:
-                logging.error(f"Error generating observer response for {agent.name}: {e}")
-                # More natural fallback responses based on message content
-                if "hello" in observer_message.lower():
-                    response = f"Hello! {agent.name} here - good to hear from you."
-                else:
-                    response = f"Got it! {agent.name} is on it."
-        
-        message = ConversationMessage(
-            agent_id=agent.id,
-            agent_name=agent.name,
-            message=response,
-            mood=agent.current_mood
+    async def persist_round(replies: List[ConversationMessage]) -> ConversationRound:
+        # Get current round number for user (archived rounds included)
+        conversation_count = await count_rounds(db, current_user.id)
+        
+        # Create special observer conversation round
+        conversation_round = ConversationRound(
+            round_number=conversation_count + 1,
+            time_period=f"Observer Input - {datetime.now().strftime('%H:%M')}",
+            scenario=f"Observer Directive: {observer_message}",
+            scenario_name="Observer Guidance",
+            messages=[observer_display_msg] + replies,
+            user_id=current_user.id,
+            created_at=datetime.utcnow()
         )
-        messages.append(message)
+        await db.conversations.insert_one(conversation_round.dict())
+        await record_rounds(db, [conversation_round])
+        return conversation_round
     
-    # Get current round number for user
-    conversation_count = await db.conversations.count_documents({"user_id": current_user.id})
+    if not stream:
+        replies = await observer_fan_out(agent_objects, observer_message, scenario, current_user.id)
+        conversation_round = await persist_round(replies)
+        return {
+            "message": "Observer message sent and responses received",
+            "observer_message": observer_message,
+            "agent_responses": conversation_round
+        }
     
-    # Create special observer conversation round
-    conversation_round = ConversationRound(
-        round_number=conversation_count + 1,
-        time_period=f"Observer Input - {datetime.now().strftime('%H:%M')}",
-        scenario=f"Observer Directive: {observer_message}",
-        scenario_name="Observer Guidance",
-        messages=messages,
-        user_id=current_user.id,
-        created_at=datetime.utcnow()
-    )
+    # Streaming: the fan-out runs in its own task so the round is still persisted if the client disconnects
+    events: asyncio.Queue = asyncio.Queue()
     
-    await db.conversations.insert_one(conversation_round.dict())
+    async def produce():
+        try:
+            replies = await observer_fan_out(
+                agent_objects, observer_message, scenario, current_user.id,
+                on_reply=lambda message: events.put({"type": "reply", "message": message})
+            )
+            conversation_round = await persist_round(replies)
+            await events.put({"type": "done", "agent_responses": conversation_round})
+        except Exception as e:
+            logging.error(f"Observer fan-out failed: {e}")
+            await events.put({"type": "error", "detail": str(e)})
+    
+    task = asyncio.create_task(produce())
+    _observer_tasks.add(task)
+    task.add_done_callback(_observer_tasks.discard)
+    
+    async def event_lines():
+        yield json.dumps(jsonable_encoder({"type": "observer", "message": observer_display_msg})) + "\n"
+        while True:
+            event = await events.get()
+            yield json.dumps(jsonable_encoder(event)) + "\n"
+            if event["type"] != "reply":
+                break
     
-    return {
-        "message": "Observer message sent and responses received",
-        "observer_message": observer_message,
-        "agent_responses": conversation_round
-    }
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson", headers=STREAM_HEADERS)
 
 @api_router.get("/usage")
 async def get_usage():
@@ -548,6 +646,7 @@ class AutoModeRequest(BaseModel):
 class FastForwardRequest(BaseModel):
     target_days: int = Field(ge=1, le=30)  # 1-30 days max
     conversations_per_period: int = Field(ge=1, le=5, default=2)  # 1-5 conversations per time period
+    rounds_per_call: Optional[int] = Field(None, ge=1, le=10)  # Defaults to FAST_FORWARD_ROUNDS_PER_CALL
 
 class SimulationStartRequest(BaseModel):
     time_limit_hours: Optional[int] = None  # Time limit in hours, None for unlimited
@@ -563,6 +662,28 @@ class AgentUpdate(BaseModel):
     memory_summary: Optional[str] = None
     avatar_url: Optional[str] = None
 
+# Enhanced trigger detection - more thoughtful phrases
+HIGH_QUALITY_TRIGGERS = PhraseMatcher([
+    "after thorough discussion, we need to",
+    "the team consensus is to create",
+    "we've agreed to formalize",
+    "following our analysis, we should document",
+    "it's time to create a comprehensive",
+    "we're ready to develop",
+    "let's formalize our decision in",
+    "we need to capture these conclusions",
+    "the team has decided to create",
+    "based on our thorough review",
+    "after careful consideration, let's create",
+    "we should document our final",
+    "let's put our agreed approach in writing",
+    "we need to formalize this into",
+    "time to create a detailed",
+    "let's develop a comprehensive",
+    "we should establish formal",
+    "our discussion points to the need for"
+])
+
 # LLM Integration and Request Management
 class LLMManager:
     def __init__(self):
@@ -577,7 +698,7 @@ class LLMManager:
         today = str(date.today())
         usage = await db.api_usage.find_one({"date": today})
         if not usage:
-            usage = {"date": today, "requests_used": 0}
+            usage = {"date": today, "requests_used": 0, "created_at": datetime.utcnow()}
             await db.api_usage.insert_one(usage)
         return usage["requests_used"]
     
@@ -586,7 +707,7 @@ class LLMManager:
         today = str(date.today())
         await db.api_usage.update_one(
             {"date": today},
-            {"$inc": {"requests_used": 1}},
+            {"$inc": {"requests_used": 1}, "$setOnInsert": {"created_at": datetime.utcnow()}},
             upsert=True
         )
     
@@ -651,7 +772,7 @@ class LLMManager:
                             ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(150)
                             
                             user_message = UserMessage(text=f"Summarize this web content concisely:\n\n{url_content}")
-                            summary = await chat.send_message(user_message)
+                            summary = await timed_llm_call("url_summary", "gemini-2.0-flash", chat.send_message(user_message))
                             await self.increment_usage()
                             
                             # Replace the URL with enriched content
@@ -692,7 +813,7 @@ class LLMManager:
         # No hardcoded limit since we're on paid tier now
         return usage < self.max_daily_requests
 
-    async def generate_agent_response(self, agent: Agent, scenario: str, other_agents: List[Agent], context: str = "", conversation_history: List = None, language_instruction: str = "Respond in English.", existing_documents: List = None, simulation_state: dict = None):
+    async def generate_agent_response(self, agent: Agent, scenario: str, other_agents: List[Agent], context: str = "", conversation_history: List = None, language_instruction: str = "Respond in English.", existing_documents: List = None, simulation_state: dict = None, conversation_state: Optional[ConversationState] = None):
         """Generate a single agent response with better context and progression"""
         other_agent_names = [a.name for a in other_agents if a.id != agent.id]
         others_text = f"Others present: {', '.join(other_agent_names)}" if other_agent_names else "You are alone"
@@ -979,70 +1100,14 @@ Others in discussion: {others_text.replace('Others present: ', '')}
 
 Remember: Great teams don't just talk - they decide, act, and document their progress. Be the agent who moves things forward!"""
         
-        # Enhanced prompts with conversation history awareness and state detection
-        conversation_history_text = ""
-        conversation_topics_covered = set()
-        pending_questions = []
-        action_points_mentioned = []
-        
-        if conversation_history and len(conversation_history) > 0:
-            # Analyze conversation history for state awareness
-            all_messages = []
-            recent_messages = conversation_history[-5:]  # Get more context for better state awareness
-            
-            for msg in conversation_history:
-                if hasattr(msg, 'message'):
-                    message_text = msg.message.lower()
-                    all_messages.append(message_text)
-                    
-                    # Track topics and concepts already covered
-                    if any(word in message_text for word in ['budget', 'cost', 'funding']):
-                        conversation_topics_covered.add('budget')
-                    if any(word in message_text for word in ['timeline', 'schedule', 'deadline']):
-                        conversation_topics_covered.add('timeline')
-                    if any(word in message_text for word in ['risk', 'challenge', 'problem']):
-                        conversation_topics_covered.add('risk')
-                    if any(word in message_text for word in ['implement', 'action', 'next steps']):
-                        conversation_topics_covered.add('action_planning')
-                    
-                    # Track action points mentioned
-                    if any(phrase in message_text for phrase in ['i will', 'i recommend', 'we should', 'action item', 'next step']):
-                        action_points_mentioned.append(message_text[:100])
-                elif isinstance(msg, dict):
-                    message_text = msg.get('message', '').lower()
-                    all_messages.append(message_text)
-            
-            # Build recent conversation context
-            conversation_history_text = "\n\nRecent conversation context:\n"
-            for msg in recent_messages:
-                if hasattr(msg, 'agent_name') and hasattr(msg, 'message'):
-                    message_text = msg.message
-                    agent_name = msg.agent_name
-                    conversation_history_text += f"{agent_name}: {message_text[:200]}...\n"
-                    
-                    # Detect questions directed at this agent
-                    if ("?" in message_text and 
-                        (agent.name.lower() in message_text.lower() or 
-                         agent.expertise.lower() in message_text.lower() or
-                         any(keyword in message_text.lower() for keyword in agent.expertise.lower().split()))):
-                        pending_questions.append({
-                            "asker": agent_name,
-                            "question": message_text,
-                            "relevance": "direct"
-                        })
-                elif isinstance(msg, dict):
-                    message_text = msg.get('message', '')
-                    agent_name = msg.get('agent_name', 'Unknown')
-                    conversation_history_text += f"{agent_name}: {message_text[:200]}...\n"
-            
-            # Determine conversation phase
-            conversation_phase = "problem_understanding"
-            if len(conversation_history) > 3 and 'action_planning' in conversation_topics_covered:
-                conversation_phase = "implementation"
-            elif len(conversation_history) > 2 and len(conversation_topics_covered) >= 2:
-                conversation_phase = "solution_development" 
-            elif len(conversation_history) > 4:
-                conversation_phase = "action_planning"
+        # Enhanced prompts with conversation state awareness. The rolling state is kept up to date as
+        # messages are appended (see conversation_state.py); callers without one get it built here
+        if conversation_state is None:
+            conversation_state = ConversationState.from_messages(conversation_history or [])
+        conversation_history_text = conversation_state.recent_text()
+        pending_questions = conversation_state.pending_questions_for(agent)
+        earlier_discussion = f"\nEarlier discussion: {conversation_state.narrative}" if conversation_state.narrative else ""
+        decisions_text = "; ".join(conversation_state.decisions[-3:]) or "None yet"
         
         if "In this conversation:" in context:
             # This agent is responding to others
@@ -1061,17 +1126,18 @@ RESPOND BY:
 3. NO repetition of scenario/background details already covered
 4. Connect your answer to concrete next steps or decisions
 
-Topics already covered: {', '.join(conversation_topics_covered) if conversation_topics_covered else 'None yet'}
-Action points mentioned: {len(action_points_mentioned)} previous action items exist"""
+Topics already covered: {conversation_state.topics_text()}
+Action points mentioned: {conversation_state.action_count} previous action items exist"""
             else:
                 # Regular response with state awareness
                 prompt = f"""{context}
 {conversation_history_text}
 
 CONVERSATION STATE AWARENESS:
-- Topics already covered: {', '.join(conversation_topics_covered) if conversation_topics_covered else 'None yet'}
-- Phase: {conversation_phase if 'conversation_phase' in locals() else 'early'}
-- Action points mentioned: {len(action_points_mentioned)} previous items
+- Topics already covered: {conversation_state.topics_text()}
+- Phase: {conversation_state.phase}
+- Action points mentioned: {conversation_state.action_count} previous items
+- Recent decisions: {decisions_text}{earlier_discussion}
 
 RESPOND BY:
 - Building SPECIFICALLY on the most recent point made (reference exact details)
@@ -1082,7 +1148,7 @@ RESPOND BY:
 - Focus on advancing the conversation forward"""
         else:
             # This agent is speaking first
-            prompt = f"""Current situation: {scenario}
+            prompt = f"""Current situation: {scenario}{earlier_discussion}
 {conversation_history_text}
 
 PROVIDE EXPERT ANALYSIS:
@@ -1104,73 +1170,26 @@ PROVIDE EXPERT ANALYSIS:
             
             # Add timeout to prevent hanging - very short timeout for quick fallbacks
             try:
-                response = await asyncio.wait_for(
+                response = await timed_llm_call(
+                    "agent_response", "gemini-2.0-flash",
                     chat.send_message(user_message), 
                     timeout=3.0  # Fast timeout for quick conversation generation
                 )
                 await self.increment_usage()
                 
                 # Validate response and filter out repetitive content
+                if is_acceptable_response(response, scenario):
+                    return response.strip()
                 if response and len(response.strip()) > 5:
-                    # Enhanced banned phrases detection for natural expertise demonstration
-                    banned_phrases = [
-                        # Time-based and introductory phrases
-                        "good morning", "good afternoon", "good evening", "i'm", "my name is",
-                        "alright team", "alright everyone", "okay team", "okay everyone",
-                        
-                        # Expert/perspective statements - NO CREDENTIALS MENTIONING
-                        "as an expert in", "as a", "this is concerning", "this is interesting",
-                        "this is exciting", "this is fascinating", "let me share my perspective",
-                        "from my perspective", "from my experience in", "in my experience with",
-                        "based on my experience", "given my background", "with my expertise",
-                        "as someone with", "having worked in", "in my field", "as a professional",
-                        "from my professional experience", "speaking as a", "given my expertise in",
-                        "based on my background in", "with my years of experience", "as someone who has",
-                        
-                        # Urgency and repetition
-                        "we need to act urgently", "the situation requires immediate",
-                        "this is urgent", "we must act now", "time is of the essence",
-                        "urgent action is needed", "we need to move quickly",
-                        
-                        # Background restatements  
-                        "as you know", "as mentioned earlier", "as discussed before",
-                        "to reiterate", "as previously stated", "let me remind you",
-                        "the situation is", "the problem we're facing", "we're dealing with",
-                        
-                        # Generic team statements
-                        "we need to work together", "collaboration is key",
-                        "teamwork makes the dream work", "let's all pitch in",
-                        
-                        # Circular conversation killers
-                        "we need to address", "the situation requires", "we should consider",
-                        "it's important that we", "we must ensure that", "we need to make sure"
-                    ]
-                    
-                    response_lower = response.lower()
-                    
-                    # Check for scenario repetition (more sophisticated)
-                    scenario_keywords = scenario.lower().split()[:5]  # First 5 words of scenario
-                    scenario_repetition = sum(1 for word in scenario_keywords if len(word) > 3 and word in response_lower)
-                    excessive_scenario_repeat = scenario_repetition >= 3  # More than 3 scenario keywords = repetition
-                    
-                    has_banned_phrase = any(phrase in response_lower for phrase in banned_phrases)
-                    
-                    # Check if this is a good answer to a question
-                    has_question_marker = "?" in context or any(q_word in context.lower() for q_word in ["asked you", "question:", "your assessment", "your take", "what's your", "how would you"])
-                    
-                    if not has_banned_phrase and not excessive_scenario_repeat:
-                        return response.strip()
-                    elif has_question_marker and not has_banned_phrase and not excessive_scenario_repeat:
-                        # If answering a question, be more lenient with response requirements
-                        return response.strip()
-                    else:
-                        # Generate a better fallback if banned phrases or excessive repetition detected
-                        logging.warning(f"Detected repetitive/banned content in {agent.name}'s response, using fallback")
+                    # Generate a better fallback if banned phrases or excessive repetition detected
+                    logging.warning(f"Detected repetitive/banned content in {agent.name}'s response, using fallback")
                 
                 # Generate intelligent fallback if response was poor or empty
-                return self._generate_intelligent_fallback(agent, context, scenario, pending_questions if 'pending_questions' in locals() else [])
+                record_fallback("intelligent_fallback", "rejected_response")
+                return self._generate_intelligent_fallback(agent, context, scenario, pending_questions)
             except asyncio.TimeoutError:
                 logging.error(f"LLM request timed out for {agent.name}")
+                record_fallback("intelligent_fallback", "timeout")
                 return self._generate_intelligent_fallback(agent, context, scenario)
                 
         except Exception as e:
@@ -1179,9 +1198,86 @@ PROVIDE EXPERT ANALYSIS:
             # Check if it's a quota error specifically
             if "quota" in str(e).lower() or "429" in str(e):
                 logging.warning("API quota exceeded - using intelligent fallbacks")
+                record_fallback("intelligent_fallback", "rate_limited")
+            else:
+                record_fallback("intelligent_fallback", "error")
             
             return self._generate_intelligent_fallback(agent, context, scenario)
     
+    async def generate_ensemble_round(self, agents: List[Agent], scenario: str, context: str = "", conversation_history: List = None, language_instruction: str = "Respond in English.", existing_documents: List = None, simulation_state: dict = None):
+        """Generate a whole round in one LLM call; returns [(agent, message, mood or None)] in speaking order.
+        Entries that are missing or fail the response filters are regenerated with generate_agent_response."""
+        accepted = {}
+        failure_reason = "missing_entry"
+        
+        if await self.can_make_request():
+            prompt = build_ensemble_prompt(
+                agents, {archetype: info["description"] for archetype, info in AGENT_ARCHETYPES.items()},
+                scenario, context, language_instruction, existing_documents
+            )
+            try:
+                chat = LlmChat(
+                    api_key=self.api_key,
+                    session_id=f"ensemble_{int(datetime.now().timestamp())}",
+                    system_message=ENSEMBLE_SYSTEM_MESSAGE
+                ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(150 * len(agents))
+                
+                response = await timed_llm_call(
+                    "ensemble_round", "gemini-2.0-flash",
+                    chat.send_message(UserMessage(text=prompt)),
+                    timeout=6.0 + len(agents)  # One call for the whole round, so a longer budget than a single reply
+                )
+                await self.increment_usage()
+                
+                for agent_id, entry in parse_ensemble_response(response, agents).items():
+                    if is_acceptable_response(entry["message"], scenario):
+                        accepted[agent_id] = entry
+                    else:
+                        record_fallback("per_agent_response", "rejected_response")
+            except asyncio.TimeoutError:
+                logging.error("Ensemble round request timed out")
+                failure_reason = "timeout"
+            except Exception as e:
+                logging.error(f"Ensemble round LLM error: {e}")
+                failure_reason = "rate_limited" if "quota" in str(e).lower() or "429" in str(e) else "error"
+        
+        results = []
+        for agent in agents:
+            entry = accepted.get(agent.id)
+            if entry:
+                results.append((agent, entry["message"], entry["mood"]))
+                continue
+            
+            # Regenerate just this agent, with the part of the round already written as context
+            record_fallback("per_agent_response", failure_reason)
+            agent_context = context
+            if results:
+                agent_context += "\n\nIn this conversation:\n" + "\n".join(f"- {speaker.name}: {message}" for speaker, message, _ in results)
+            message = await self.generate_agent_response(
+                agent, scenario, agents, agent_context, conversation_history, language_instruction, existing_documents, simulation_state
+            )
+            results.append((agent, message, None))
+        return results
+    
+    async def generate_round(self, mode: str, agents: List[Agent], scenario: str, context: str = "", conversation_history: List = None, language_instruction: str = "Respond in English.", existing_documents: List = None, simulation_state: dict = None):
+        """Generate one round where every agent gets the same context; returns [(agent, message, mood or None)].
+        Records calls, estimated tokens and wall time per round under the generation mode."""
+        start_time = time.perf_counter()
+        with track_llm_usage() as usage:
+            if mode == "ensemble":
+                results = await self.generate_ensemble_round(
+                    agents, scenario, context, conversation_history, language_instruction, existing_documents, simulation_state
+                )
+            else:
+                results = []
+                for agent in agents:
+                    message = await self.generate_agent_response(
+                        agent, scenario, agents, context, conversation_history, language_instruction, existing_documents, simulation_state
+                    )
+                    results.append((agent, message, None))
+        record_round_generation(mode, usage.calls, usage.total_tokens, time.perf_counter() - start_time)
+        return results
+    
     def _generate_intelligent_fallback(self, agent: Agent, context: str, scenario: str, pending_questions: list = None) -> str:
         """Generate intelligent fallback responses that are solution-focused and non-repetitive"""
         import random
@@ -1357,7 +1453,7 @@ Previous memory: {agent.memory_summary or 'None'}"""
         
         try:
             user_message = UserMessage(text=f"Recent conversations:\n{conv_text}\n\nUpdate my memory focusing on developments relevant to my background and expertise:")
-            response = await chat.send_message(user_message)
+            response = await timed_llm_call("memory_update", "gemini-2.0-flash", chat.send_message(user_message))
             await self.increment_usage()
             
             # Update agent memory in database
@@ -1365,6 +1461,7 @@ Previous memory: {agent.memory_summary or 'None'}"""
                 {"id": agent.id},
                 {"$set": {"memory_summary": response}}
             )
+            await invalidate_user_cache(agent.user_id, ["agents"])
         except Exception as e:
             logging.error(f"Error updating memory for {agent.name}: {e}")
 
@@ -1386,32 +1483,7 @@ Previous memory: {agent.memory_summary or 'None'}"""
         if not await self.can_make_request():
             return ActionTriggerResult(should_create_document=False)
         
-        # Enhanced trigger detection - more thoughtful phrases
-        high_quality_triggers = [
-            "after thorough discussion, we need to",
-            "the team consensus is to create",
-            "we've agreed to formalize",
-            "following our analysis, we should document",
-            "it's time to create a comprehensive",
-            "we're ready to develop",
-            "let's formalize our decision in",
-            "we need to capture these conclusions",
-            "the team has decided to create",
-            "based on our thorough review",
-            "after careful consideration, let's create",
-            "we should document our final",
-            "let's put our agreed approach in writing",
-            "we need to formalize this into",
-            "time to create a detailed",
-            "let's develop a comprehensive",
-            "we should establish formal",
-            "our discussion points to the need for"
-        ]
-        
-        conv_lower = conversation_text.lower()
-        found_triggers = [trigger for trigger in high_quality_triggers if trigger in conv_lower]
-        
-        if not found_triggers:
+        if HIGH_QUALITY_TRIGGERS.search(conversation_text) is None:
             return ActionTriggerResult(
                 should_create_document=False,
                 reasoning="No thoughtful document creation triggers found - need more deliberate consensus"
@@ -1470,7 +1542,7 @@ Format: YES|budget|Critical Investment Decision Framework|after careful consider
 If NO: Explain what's missing for document creation."""
 
             user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            response = await timed_llm_call("action_trigger", "gemini-2.0-flash", chat.send_message(user_message))
             await self.increment_usage()
             
             # Parse enhanced response
@@ -1497,16 +1569,17 @@ If NO: Explain what's missing for document creation."""
             logging.error(f"Error in enhanced conversation analysis: {e}")
             return ActionTriggerResult(should_create_document=False)
 
-    async def check_agent_voting_consensus(self, agents: List[Agent], proposal: str, conversation_context: str) -> dict:
-        """Check if agents reach voting consensus on a proposal"""
+    async def check_agent_voting_consensus(self, agents: List[Agent], proposal: str, conversation_context: str,
+                                           wait_for_all: Optional[bool] = None) -> dict:
+        """Check if agents reach voting consensus on a proposal; votes run concurrently and
+        the rest are cancelled once the majority is settled, unless wait_for_all is set"""
         if not await self.can_make_request():
-            return {"consensus": False, "votes": {}}
+            return {"consensus": False, "votes": {}, "cancelled": []}
         
-        voting_results = {}
+        prompt = f"""Conversation context:\n{conversation_context}\n\nProposal to vote on: {proposal}\n\nYour vote (YES/NO/ABSTAIN) and brief reason:"""
         
-        for agent in agents:
-            try:
-                system_message = f"""You are {agent.name}, a {AGENT_ARCHETYPES[agent.archetype]['description']}.
+        async def cast_vote(agent: Agent) -> dict:
+            system_message = f"""You are {agent.name}, a {AGENT_ARCHETYPES[agent.archetype]['description']}.
 
 Your expertise: {agent.expertise}
 Your background: {agent.background}
@@ -1522,42 +1595,32 @@ Personality traits:
 You need to vote on a proposal. Consider your expertise, background, and personality when making this decision.
 Respond with ONLY: YES, NO, or ABSTAIN followed by a brief 1-sentence reason."""
 
-                chat = LlmChat(
-                    api_key=self.api_key,
-                    session_id=f"voting_{agent.id}_{datetime.now().timestamp()}",
-                    system_message=system_message
-                ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(150)
-                
-                prompt = f"""Conversation context:\n{conversation_context}\n\nProposal to vote on: {proposal}\n\nYour vote (YES/NO/ABSTAIN) and brief reason:"""
-                
-                user_message = UserMessage(text=prompt)
-                response = await chat.send_message(user_message)
-                await self.increment_usage()
-                
-                # Parse vote
-                response_upper = response.upper()
-                if response_upper.startswith("YES"):
-                    voting_results[agent.name] = {"vote": "YES", "reason": response}
-                elif response_upper.startswith("NO"):
-                    voting_results[agent.name] = {"vote": "NO", "reason": response}
-                else:
-                    voting_results[agent.name] = {"vote": "ABSTAIN", "reason": response}
-                    
-            except Exception as e:
-                logging.error(f"Error getting vote from {agent.name}: {e}")
-                voting_results[agent.name] = {"vote": "ABSTAIN", "reason": "Unable to vote due to technical issue"}
+            chat = LlmChat(
+                api_key=self.api_key,
+                session_id=f"voting_{agent.id}_{datetime.now().timestamp()}",
+                system_message=system_message
+            ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(150)
+            
+            response = await timed_llm_call("vote", "gemini-2.0-flash", chat.send_message(UserMessage(text=prompt)))
+            await self.increment_usage()
+            return parse_vote(response)
         
-        # Determine consensus (simple majority)
-        yes_votes = sum(1 for vote in voting_results.values() if vote["vote"] == "YES")
-        no_votes = sum(1 for vote in voting_results.values() if vote["vote"] == "NO")
-        total_voting = yes_votes + no_votes  # Exclude abstentions from majority calculation
+        voting_results, cancelled = await collect_votes(
+            {agent.name: (lambda agent=agent: cast_vote(agent)) for agent in agents}, wait_for_all
+        )
         
-        consensus = yes_votes > (total_voting / 2) if total_voting > 0 else False
+        # Determine consensus (simple majority, abstentions excluded)
+        yes_votes, no_votes, abstain_votes = tally(voting_results)
+        consensus = yes_votes > no_votes
         
+        summary = f"{yes_votes} YES, {no_votes} NO, {abstain_votes} ABSTAIN"
+        if cancelled:
+            summary += f" ({len(cancelled)} not needed)"
         return {
             "consensus": consensus,
             "votes": voting_results,
-            "summary": f"{yes_votes} YES, {no_votes} NO, {len(voting_results) - yes_votes - no_votes} ABSTAIN"
+            "cancelled": cancelled,
+            "summary": summary
         }
 
     async def generate_document_content(self, document_type: str, title: str, conversation_context: str, creating_agent: Agent) -> str:
@@ -2233,7 +2296,7 @@ Create the {document_type} content for "{title}". Use this template structure bu
 Make it immediately usable for medical professionals. Include specific details, timeframes, and practical guidance."""
 
             user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            response = await timed_llm_call("document_content", "gemini-2.0-flash", chat.send_message(user_message))
             await self.increment_usage()
             
             # Format the response using the template
@@ -2310,7 +2373,7 @@ Be constructive and focus on actionable feedback."""
             ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(200)
             
             user_message = UserMessage(text=review_context)
-            review_response = await chat.send_message(user_message)
+            review_response = await timed_llm_call("document_review", "gemini-2.0-flash", chat.send_message(user_message))
             await llm_manager.increment_usage()
             
             # If improvements are suggested, store them for the creator to consider
@@ -2349,6 +2412,7 @@ Be constructive and focus on actionable feedback."""
                     {"id": lead_reviewer.id},
                     {"$set": {"memory_summary": updated_memory}}
                 )
+                await invalidate_user_cache(lead_reviewer.user_id, ["agents"])
                 
                 logging.info(f"Document review completed with suggestions by {lead_reviewer.name}")
             else:
@@ -2361,232 +2425,18 @@ Be constructive and focus on actionable feedback."""
                     {"id": lead_reviewer.id},
                     {"$set": {"memory_summary": updated_memory}}
                 )
+                await invalidate_user_cache(lead_reviewer.user_id, ["agents"])
                 
                 logging.info(f"Document approved by {lead_reviewer.name}")
     
     except Exception as e:
         logging.error(f"Error in document review process: {e}")
 
-# OpenAI Whisper Speech-to-Text Service
-class WhisperService:
-    def __init__(self):
-        self.api_key = os.environ.get('OPENAI_API_KEY')
-        if not self.api_key:
-            logging.warning("OPENAI_API_KEY not found in environment variables")
-        else:
-            openai.api_key = self.api_key
-            logging.info("OpenAI Whisper service initialized")
-    
-    async def transcribe_audio(self, audio_file: bytes, language: str = None, filename: str = "audio.webm") -> Dict[str, Any]:
-        """Transcribe audio using OpenAI Whisper API"""
-        if not self.api_key or self.api_key == "sk-dummy-api-key-for-testing-purposes-only":
-            # Mock transcription for demo/testing when no real API key is available
-            logging.warning("Using mock transcription - no real OpenAI API key configured")
-            return {
-                "success": True,
-                "text": "This is a mock transcription. Your voice input was recorded successfully, but a real OpenAI API key is needed for actual transcription.",
-                "language": "en",
-                "duration": 5.0,
-                "confidence": 0.95
-            }
-        
-        try:
-            # Create a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_file:
-                temp_file.write(audio_file)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Convert audio to supported format if needed
-                # Try to detect and handle different audio formats
-                wav_path = temp_file_path.replace('.webm', '.wav')
-                
-                try:
-                    # First, try to load as WebM/Opus
-                    audio = AudioSegment.from_file(temp_file_path, format="webm")
-                except Exception as webm_error:
-                    logging.warning(f"Failed to load as WebM: {webm_error}")
-                    try:
-                        # Try without format specification
-                        audio = AudioSegment.from_file(temp_file_path)
-                    except Exception as general_error:
-                        logging.warning(f"Failed general audio load: {general_error}")
-                        # Fallback: Use the original file directly if it's valid
-                        # Some browsers send different formats than expected
-                        try:
-                            # Test if the file can be opened by OpenAI directly
-                            with open(temp_file_path, "rb") as test_file:
-                                client = openai.OpenAI(api_key=self.api_key)
-                                # Try direct transcription without conversion
-                                transcript = client.audio.transcriptions.create(
-                                    model="whisper-1",
-                                    file=test_file,
-                                    language=language if language else None,
-                                    response_format="verbose_json"
-                                )
-                                
-                                # Clean up
-                                os.unlink(temp_file_path)
-                                
-                                return {
-                                    "success": True,
-                                    "text": transcript.text,
-                                    "language": transcript.language,
-                                    "duration": getattr(transcript, 'duration', 0),
-                                    "words": getattr(transcript, 'words', []),
-                                    "confidence": getattr(transcript, 'avg_logprob', None)
-                                }
-                        except Exception as direct_error:
-                            logging.error(f"Direct transcription failed: {direct_error}")
-                            raise HTTPException(status_code=400, detail="Invalid audio format. Please try recording again.")
-                
-                # If we got here, audio conversion worked
-                # Convert to wav for better compatibility
-                audio.export(wav_path, format="wav")
-                
-                # Transcribe with OpenAI Whisper
-                client = openai.OpenAI(api_key=self.api_key)
-                
-                with open(wav_path, "rb") as audio_file_obj:
-                    transcript = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file_obj,
-                        language=language if language else None,  # Auto-detect if not specified
-                        response_format="verbose_json",
-                        timestamp_granularities=["word"]
-                    )
-                
-                # Clean up temporary files
-                os.unlink(temp_file_path)
-                os.unlink(wav_path)
-                
-                return {
-                    "success": True,
-                    "text": transcript.text,
-                    "language": transcript.language,
-                    "duration": transcript.duration,
-                    "words": getattr(transcript, 'words', []),
-                    "confidence": getattr(transcript, 'avg_logprob', None)
-                }
-                
-            except Exception as e:
-                # Clean up temp file on error
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                if 'wav_path' in locals() and os.path.exists(wav_path):
-                    os.unlink(wav_path)
-                raise e
-                
-        except Exception as e:
-            logging.error(f"Error transcribing audio: {e}")
-            raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-    
-    def get_supported_languages(self) -> List[Dict[str, str]]:
-        """Get list of supported languages for Whisper"""
-        return [
-            {"code": "af", "name": "Afrikaans"},
-            {"code": "am", "name": "Amharic"},
-            {"code": "ar", "name": "Arabic"},
-            {"code": "as", "name": "Assamese"},
-            {"code": "az", "name": "Azerbaijani"},
-            {"code": "ba", "name": "Bashkir"},
-            {"code": "be", "name": "Belarusian"},
-            {"code": "bg", "name": "Bulgarian"},
-            {"code": "bn", "name": "Bengali"},
-            {"code": "bo", "name": "Tibetan"},
-            {"code": "br", "name": "Breton"},
-            {"code": "bs", "name": "Bosnian"},
-            {"code": "ca", "name": "Catalan"},
-            {"code": "cs", "name": "Czech"},
-            {"code": "cy", "name": "Welsh"},
-            {"code": "da", "name": "Danish"},
-            {"code": "de", "name": "German"},
-            {"code": "el", "name": "Greek"},
-            {"code": "en", "name": "English"},
-            {"code": "es", "name": "Spanish"},
-            {"code": "et", "name": "Estonian"},
-            {"code": "eu", "name": "Basque"},
-            {"code": "fa", "name": "Persian"},
-            {"code": "fi", "name": "Finnish"},
-            {"code": "fo", "name": "Faroese"},
-            {"code": "fr", "name": "French"},
-            {"code": "gl", "name": "Galician"},
-            {"code": "gu", "name": "Gujarati"},
-            {"code": "ha", "name": "Hausa"},
-            {"code": "haw", "name": "Hawaiian"},
-            {"code": "he", "name": "Hebrew"},
-            {"code": "hi", "name": "Hindi"},
-            {"code": "hr", "name": "Croatian"},  # ✅ Croatian support!
-            {"code": "ht", "name": "Haitian Creole"},
-            {"code": "hu", "name": "Hungarian"},
-            {"code": "hy", "name": "Armenian"},
-            {"code": "id", "name": "Indonesian"},
-            {"code": "is", "name": "Icelandic"},
-            {"code": "it", "name": "Italian"},
-            {"code": "ja", "name": "Japanese"},
-            {"code": "jw", "name": "Javanese"},
-            {"code": "ka", "name": "Georgian"},
-            {"code": "kk", "name": "Kazakh"},
-            {"code": "km", "name": "Khmer"},
-            {"code": "kn", "name": "Kannada"},
-            {"code": "ko", "name": "Korean"},
-            {"code": "la", "name": "Latin"},
-            {"code": "lb", "name": "Luxembourgish"},
-            {"code": "ln", "name": "Lingala"},
-            {"code": "lo", "name": "Lao"},
-            {"code": "lt", "name": "Lithuanian"},
-            {"code": "lv", "name": "Latvian"},
-            {"code": "mg", "name": "Malagasy"},
-            {"code": "mi", "name": "Maori"},
-            {"code": "mk", "name": "Macedonian"},
-            {"code": "ml", "name": "Malayalam"},
-            {"code": "mn", "name": "Mongolian"},
-            {"code": "mr", "name": "Marathi"},
-            {"code": "ms", "name": "Malay"},
-            {"code": "mt", "name": "Maltese"},
-            {"code": "my", "name": "Myanmar"},
-            {"code": "ne", "name": "Nepali"},
-            {"code": "nl", "name": "Dutch"},
-            {"code": "nn", "name": "Nynorsk"},
-            {"code": "no", "name": "Norwegian"},
-            {"code": "oc", "name": "Occitan"},
-            {"code": "pa", "name": "Punjabi"},
-            {"code": "pl", "name": "Polish"},
-            {"code": "ps", "name": "Pashto"},
-            {"code": "pt", "name": "Portuguese"},
-            {"code": "ro", "name": "Romanian"},
-            {"code": "ru", "name": "Russian"},
-            {"code": "sa", "name": "Sanskrit"},
-            {"code": "sd", "name": "Sindhi"},
-            {"code": "si", "name": "Sinhala"},
-            {"code": "sk", "name": "Slovak"},
-            {"code": "sl", "name": "Slovenian"},
-            {"code": "sn", "name": "Shona"},
-            {"code": "so", "name": "Somali"},
-            {"code": "sq", "name": "Albanian"},
-            {"code": "sr", "name": "Serbian"},
-            {"code": "su", "name": "Sundanese"},
-            {"code": "sv", "name": "Swedish"},
-            {"code": "sw", "name": "Swahili"},
-            {"code": "ta", "name": "Tamil"},
-            {"code": "te", "name": "Telugu"},
-            {"code": "tg", "name": "Tajik"},
-            {"code": "th", "name": "Thai"},
-            {"code": "tk", "name": "Turkmen"},
-            {"code": "tl", "name": "Tagalog"},
-            {"code": "tr", "name": "Turkish"},
-            {"code": "tt", "name": "Tatar"},
-            {"code": "uk", "name": "Ukrainian"},
-            {"code": "ur", "name": "Urdu"},
-            {"code": "uz", "name": "Uzbek"},
-            {"code": "vi", "name": "Vietnamese"},
-            {"code": "yi", "name": "Yiddish"},
-            {"code": "yo", "name": "Yoruba"},
-            {"code": "zh", "name": "Chinese"}
-        ]
-
-# Initialize Whisper service
-whisper_service = WhisperService()
+def get_whisper_service():
+    """Import the Whisper service (OpenAI client, ffmpeg pipeline) on first use"""
+    require_feature("voice")
+    from whisper_service import whisper_service
+    return whisper_service
 
 # Authentication Functions
 def create_access_token(data: dict):
@@ -2601,6 +2451,8 @@ async def verify_google_token(token: str) -> dict:
     """Verify Google OAuth token and extract user info"""
     try:
         # Verify the token with Google
+        from google.auth.transport import requests
+        from google.oauth2 import id_token
         idinfo = id_token.verify_oauth2_token(token, requests.Request(), GOOGLE_CLIENT_ID)
         
         if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
@@ -2980,7 +2832,7 @@ async def get_admin_dashboard_stats(current_user: User = Depends(get_admin_user)
         })
         
         # Get total conversations
-        total_conversations = await db.conversations.count_documents({})
+        total_conversations = await count_rounds(db)
         
         # Get total documents
         total_documents = await db.documents.count_documents({})
@@ -3006,7 +2858,8 @@ async def get_admin_dashboard_stats(current_user: User = Depends(get_admin_user)
                 "total_documents": total_documents,
                 "total_agents": total_agents,
                 "total_saved_agents": total_saved_agents
-            }
+            },
+            "document_history": await storage_stats(db)
         }
         
     except Exception as e:
@@ -3274,8 +3127,11 @@ async def setup_admin_account(setup_data: dict):
 @api_router.get("/saved-agents", response_model=List[SavedAgent])
 async def get_saved_agents(current_user: User = Depends(get_current_user)):
     """Get user's saved agents"""
-    agents = await db.saved_agents.find({"user_id": current_user.id}).sort("created_at", -1).to_list(100)
-    return [SavedAgent(**agent) for agent in agents]
+    async def fetch_saved_agents():
+        agents = await db.saved_agents.find({"user_id": current_user.id}).sort("created_at", -1).to_list(100)
+        return [SavedAgent(**agent).dict() for agent in agents]
+    
+    return await cached_user_data(current_user.id, "saved_agents", fetch_saved_agents)
 
 @api_router.post("/saved-agents", response_model=SavedAgent)
 async def create_saved_agent(agent_data: SavedAgentCreate, current_user: User = Depends(get_current_user)):
@@ -3294,6 +3150,7 @@ async def create_saved_agent(agent_data: SavedAgentCreate, current_user: User =
     )
     
     await db.saved_agents.insert_one(saved_agent.dict())
+    await invalidate_user_cache(current_user.id, ["saved_agents"])
     return saved_agent
 
 @api_router.delete("/saved-agents/{agent_id}")
@@ -3302,6 +3159,7 @@ async def delete_saved_agent(agent_id: str, current_user: User = Depends(get_cur
     result = await db.saved_agents.delete_one({"id": agent_id, "user_id": current_user.id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Agent not found")
+    await invalidate_user_cache(current_user.id, ["saved_agents"])
     return {"message": "Agent deleted successfully"}
 
 @api_router.put("/agents/{agent_id}")
@@ -3328,6 +3186,7 @@ async def update_agent(agent_id: str, agent_data: dict):
         
         # Return updated agent
         updated_agent = await db.agents.find_one({"id": agent_id})
+        await invalidate_user_cache(updated_agent.get("user_id", ""), ["agents"])
         return Agent(**updated_agent)
         
     except Exception as e:
@@ -3361,6 +3220,7 @@ async def update_saved_agent(agent_id: str, agent_data: SavedAgentCreate, curren
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Saved agent not found")
+        await invalidate_user_cache(current_user.id, ["saved_agents"])
         
         # Return updated agent
         updated_agent = await db.saved_agents.find_one({"id": agent_id, "user_id": current_user.id})
@@ -3390,6 +3250,7 @@ async def toggle_agent_favorite(agent_id: str, current_user: User = Depends(get_
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Saved agent not found")
+        await invalidate_user_cache(current_user.id, ["saved_agents"])
         
         # Return updated agent
         updated_agent = await db.saved_agents.find_one({"id": agent_id, "user_id": current_user.id})
@@ -3439,6 +3300,7 @@ async def set_scenario(request: ScenarioRequest, current_user: User = Depends(ge
         }},
         upsert=True
     )
+    await invalidate_user_cache(current_user.id, ["simulation_state"])
     
     return {"message": "Scenario updated", "scenario": scenario, "scenario_name": scenario_name}
 
@@ -3499,6 +3361,7 @@ async def pause_simulation(current_user: User = Depends(get_current_user)):
         }},
         upsert=True
     )
+    await invalidate_user_cache(current_user.id, ["simulation_state"])
     return {"message": "Simulation paused", "is_active": False, "success": True}
 
 @api_router.post("/simulation/resume")
@@ -3509,34 +3372,63 @@ async def resume_simulation(current_user: User = Depends(get_current_user)):
         {"$set": {"is_active": True}},
         upsert=True
     )
+    await invalidate_user_cache(current_user.id, ["simulation_state"])
     return {"message": "Simulation resumed", "is_active": True, "success": True}
 
+async def summarize_for_report(system_message: str, prompt: str) -> str:
+    """LLM call behind the day digests of weekly reports (see round_summaries.py)"""
+    if not await llm_manager.can_make_request():
+        raise RuntimeError("Daily API limit reached")
+    chat = LlmChat(
+        api_key=llm_manager.api_key,
+        session_id=f"day_summary_{datetime.now().timestamp()}",
+        system_message=system_message
+    ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(400)
+    response = await timed_llm_call("day_summary", "gemini-2.0-flash", chat.send_message(UserMessage(text=prompt)), timeout=15.0)
+    await llm_manager.increment_usage()
+    return response
+
+report_summarizer = HierarchicalSummarizer(db, summarize_for_report)
+
 @api_router.post("/simulation/generate-summary")
-async def generate_weekly_summary():
-    """Generate structured AI summary of conversations with focus on key discoveries and documents created"""
-    # Get all conversations
-    conversations = await db.conversations.find().sort("created_at", -1).to_list(100)
-    
-    if not conversations:
+async def generate_weekly_summary(current_user: User = Depends(get_current_user)):
+    """
+    Generate structured AI summary of conversations with focus on key discoveries and documents created.
+    Reduced from the user's cached day digests; only days with new rounds are re-summarized.
+    """
+    week = await report_summarizer.week(current_user.id)
+    
+    if not week["days"] and not week["unfolded"]:
         return {"summary": "No conversations to summarize yet."}
     
     # Get current simulation state
-    state = await db.simulation_state.find_one()
+    state = await db.simulation_state.find_one({"user_id": current_user.id})
     current_day = state.get("current_day", 1) if state else 1
     
-    # Filter conversations from recent days (last 7 days or all if less than 7)
-    recent_conversations = conversations[:min(21, len(conversations))]  # Last 21 rounds (7 days * 3 periods)
-    
-    if not recent_conversations:
-        return {"summary": "No recent conversations to summarize."}
+    # Nothing new since the last report: serve it again instead of paying for the same reduce
+    if not week["refreshed"] and not week["unfolded"]:
+        latest = await db.summaries.find_one(
+            {"user_id": current_user.id, "report_type": "weekly_structured", "source_signature": week["signature"],
+             "is_fallback": {"$ne": True}},
+            sort=[("created_at", -1)]
+        )
+        if latest:
+            return {
+                "summary": latest["summary"],
+                "day": latest.get("day_generated", current_day),
+                "conversations_count": latest.get("conversations_analyzed", week["rounds"]),
+                "report_type": "weekly_structured",
+                "cached": True
+            }
     
     # Get documents created during this period
     try:
         # Get documents created in the last week
         one_week_ago = datetime.utcnow() - timedelta(days=7)
         recent_documents = await db.documents.find({
-            "metadata.created_at": {"$gte": one_week_ago.isoformat()}
-        }).sort("metadata.created_at", -1).to_list(50)
+            "metadata.user_id": current_user.id,
+            "metadata.created_at": {"$gte": one_week_ago}
+        }).sort("metadata.created_at", -1).to_list(10)
     except Exception as e:
         logging.warning(f"Could not fetch recent documents: {e}")
         recent_documents = []
@@ -3545,20 +3437,10 @@ async def generate_weekly_summary():
     if not await llm_manager.can_make_request():
         return {"summary": "Cannot generate summary - daily API limit reached"}
     
-    # Prepare conversation text for summary
-    conv_text = ""
-    key_decisions = []
-    agent_interactions = []
+    # Day digests stand in for the raw rounds, so the prompt size doesn't depend on the round count
+    conv_text = week_text(week)
     document_summary = ""
     
-    for conv in recent_conversations:
-        conv_text += f"\n**{conv['time_period']}:**\n"
-        for msg in conv.get('messages', []):
-            conv_text += f"- **{msg['agent_name']}**: {msg['message']}\n"
-            # Track significant statements for key events
-            if any(keyword in msg['message'].lower() for keyword in ['decide', 'discovery', 'found', 'breakthrough', 'crisis', 'solution', 'agreement', 'conflict', 'document created', 'protocol', 'training']):
-                key_decisions.append(f"{msg['agent_name']}: {msg['message']}")
-    
     # Prepare document summary
     if recent_documents:
         document_summary = "\n\n**DOCUMENTS CREATED THIS WEEK:**\n"
@@ -3595,7 +3477,7 @@ async def generate_weekly_summary():
         Pay special attention to the documents created and their strategic value."""
     ).with_model("gemini", "gemini-2.0-flash")
     
-    prompt = f"""Analyze these AI agent conversations from the Research Station simulation:
+    prompt = f"""Analyze these day-by-day digests of AI agent conversations from the Research Station simulation:
 
 {conv_text}
 
@@ -3671,15 +3553,18 @@ IMPORTANT FORMATTING RULES:
     
     try:
         user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        response = await timed_llm_call("weekly_summary", "gemini-2.0-flash", chat.send_message(user_message))
         await llm_manager.increment_usage()
         
         # Store structured summary in database
         summary_doc = {
             "id": str(uuid.uuid4()),
+            "user_id": current_user.id,
             "summary": response,
             "day_generated": current_day,
-            "conversations_analyzed": len(recent_conversations),
+            "conversations_analyzed": week["rounds"],
+            "days_summarized": len(week["days"]),
+            "source_signature": week["signature"] if not week["unfolded"] else None,
             "report_type": "weekly_structured",
             "created_at": datetime.utcnow()
         }
@@ -3687,15 +3572,15 @@ IMPORTANT FORMATTING RULES:
         
         # Update last auto report timestamp
         await db.simulation_state.update_one(
-            {},
-            {"$set": {"last_auto_report": datetime.utcnow().isoformat()}},
-            upsert=True
+            {"user_id": current_user.id},
+            {"$set": {"last_auto_report": datetime.utcnow().isoformat()}}
         )
+        await invalidate_user_cache(current_user.id, ["simulation_state"])
         
         return {
             "summary": response, 
             "day": current_day, 
-            "conversations_count": len(recent_conversations),
+            "conversations_count": week["rounds"],
             "report_type": "weekly_structured"
         }
         
@@ -3706,8 +3591,8 @@ IMPORTANT FORMATTING RULES:
         fallback_summary = f"""**Week Summary - Day {current_day}**
 
 **1. 🔥 KEY EVENTS & DISCOVERIES**
-- {len(recent_conversations)} conversations analyzed from recent simulation periods
-- Team dynamics continue to evolve between {len(set([msg['agent_name'] for conv in recent_conversations for msg in conv.get('messages', [])]))} active agents
+- {week["rounds"]} conversations analyzed from recent simulation periods
+- Team dynamics continue to evolve between {len(set(agent for day in week["days"] for agent in day.get("agents", [])) | set(agent for digest in week["unfolded"] for agent in digest["agents"]))} active agents
 
 **2. 📈 RELATIONSHIP DEVELOPMENTS**
 - Ongoing interactions between team members showing personality-driven responses
@@ -3730,9 +3615,10 @@ IMPORTANT FORMATTING RULES:
         # Store fallback summary in database
         fallback_doc = {
             "id": str(uuid.uuid4()),
+            "user_id": current_user.id,
             "summary": fallback_summary,
             "day_generated": current_day,
-            "conversations_analyzed": len(recent_conversations),
+            "conversations_analyzed": week["rounds"],
             "created_at": datetime.utcnow(),
             "is_fallback": True,
             "report_type": "weekly_structured"
@@ -3742,14 +3628,16 @@ IMPORTANT FORMATTING RULES:
         return {
             "summary": fallback_summary, 
             "day": current_day, 
-            "conversations_count": len(recent_conversations),
+            "conversations_count": week["rounds"],
             "report_type": "weekly_structured",
             "note": "Fallback summary generated due to API limitations"
         }
 
 @api_router.get("/archetypes")
-async def get_archetypes():
+async def get_archetypes(response: Response):
     """Get all available agent archetypes"""
+    # Archetypes are a static in-process table, so let clients and proxies cache them
+    response.headers["Cache-Control"] = "public, max-age=3600"
     return AGENT_ARCHETYPES
 
 @api_router.post("/agents", response_model=Agent)
@@ -3766,30 +3654,19 @@ async def create_agent(agent_data: AgentCreate, current_user: User = Depends(get
     # Use existing avatar URL if provided, otherwise generate new one
     avatar_url = agent_data.avatar_url  # Use preview image if available
     
-    if not avatar_url and agent_data.avatar_prompt:
+    if not avatar_url and agent_data.avatar_prompt and feature_enabled("avatars"):
         try:
-            # Enhanced prompt for better avatar results
-            enhanced_prompt = f"professional portrait, headshot, detailed face, {agent_data.avatar_prompt}, high quality, photorealistic, studio lighting, neutral background"
-            
-            # Submit to fal.ai using the Flux Schnell model (fastest and cheapest)
-            handler = await fal_client.submit_async(
-                "fal-ai/flux/schnell",
-                arguments={
-                    "prompt": enhanced_prompt,
-                    "image_size": "portrait_4_3",  # Good for avatars
-                    "num_images": 1,
-                    "enable_safety_checker": True
-                }
+            # Flux Schnell (fastest and cheapest), served from the avatar cache when the prompt was seen before
+            from avatar_service import enhance_avatar_prompt, generate_cached_avatar
+            outcome = await generate_cached_avatar(
+                db, enhance_avatar_prompt(agent_data.avatar_prompt), arguments={"enable_safety_checker": True}
             )
             
-            # Get the result
-            result = await handler.get()
-            
-            if result and result.get("images") and len(result["images"]) > 0:
-                avatar_url = result["images"][0]["url"]
+            if outcome["image_url"]:
+                avatar_url = outcome["image_url"]
                 logging.info(f"Avatar generated successfully for {agent_data.name}")
             else:
-                logging.warning(f"No avatar generated for {agent_data.name}")
+                logging.warning(f"No avatar generated for {agent_data.name}: {outcome['error']}")
                 
         except Exception as e:
             logging.error(f"Avatar generation error for {agent_data.name}: {e}")
@@ -3809,13 +3686,17 @@ async def create_agent(agent_data: AgentCreate, current_user: User = Depends(get
     )
     
     await db.agents.insert_one(agent.dict())
+    await invalidate_user_cache(current_user.id, ["agents"])
     return agent
 
 @api_router.get("/agents", response_model=List[Agent])
 async def get_agents(current_user: User = Depends(get_current_user)):
     """Get all agents for the current user (requires authentication)"""
-    agents = await db.agents.find({"user_id": current_user.id}).to_list(100)
-    return [Agent(**agent) for agent in agents]
+    async def fetch_agents():
+        agents = await db.agents.find({"user_id": current_user.id}).to_list(100)
+        return [Agent(**agent).dict() for agent in agents]
+    
+    return await cached_user_data(current_user.id, "agents", fetch_agents)
 
 @api_router.put("/agents/{agent_id}")
 async def update_agent(agent_id: str, agent_update: AgentUpdate, current_user: User = Depends(get_current_user)):
@@ -3857,6 +3738,7 @@ async def update_agent(agent_id: str, agent_update: AgentUpdate, current_user: U
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Agent not found")
+        await invalidate_user_cache(agent.get("user_id", ""), ["agents"])
         
         # Return updated agent
         updated_agent = await db.agents.find_one({"id": agent_id})
@@ -3914,6 +3796,7 @@ async def update_agent_expertise(agent_id: str, expertise_data: dict, current_us
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Agent not found")
+        await invalidate_user_cache(agent.get("user_id", ""), ["agents"])
         
         # Return updated agent
         updated_agent = await db.agents.find_one({"id": agent_id})
@@ -3949,131 +3832,112 @@ async def update_agent_expertise(agent_id: str, expertise_data: dict, current_us
         # Otherwise, return a 500 error
         raise HTTPException(status_code=500, detail=f"Failed to update agent expertise: {str(e)}")
 
+_fast_forward_tasks = set()
+
+async def run_fast_forward_job(engine: FastForwardEngine, job_id: str, slots: List[dict], state: dict):
+    """Background body of a fast-forward job: generate, then advance the simulation clock"""
+    heartbeat = asyncio.create_task(keep_job_alive(db, job_id))
+    try:
+        result = await engine.run(job_id, slots)
+        await db.simulation_state.update_one(
+            {"id": state["id"]},
+            {"$set": {
+                "current_day": result["final_day"],
+                "current_time_period": result["final_period"]
+            }}
+        )
+        await invalidate_user_cache(state.get("user_id", ""), ["simulation_state", "agents"])
+        await invalidate_data_type("relationships")
+        await db.fast_forward_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "completed", "result": result, "updated_at": datetime.utcnow()}}
+        )
+        logging.info(f"Fast-forward job {job_id} finished: {result['conversations_generated']} rounds in {result['llm_requests']} LLM requests ({result['requests_saved']} saved)")
+    except Exception as e:
+        logging.error(f"Error during fast forward job {job_id}: {e}")
+        await db.fast_forward_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+    finally:
+        heartbeat.cancel()
+
 @api_router.post("/simulation/fast-forward")
 async def fast_forward_simulation(request: FastForwardRequest):
-    """Fast forward the simulation by generating multiple days of conversations"""
+    """Start a batched fast-forward job; poll /simulation/fast-forward/{job_id} for progress"""
     # Get current simulation state
     state = await db.simulation_state.find_one()
     if not state or not state.get("is_active"):
         raise HTTPException(status_code=400, detail="Simulation not active")
     
     # Get agents
-    agents = await db.agents.find().to_list(100)
+    agent_filter = {"user_id": state["user_id"]} if state.get("user_id") else {}
+    agents = await db.agents.find(agent_filter).to_list(100)
     if len(agents) < 2:
         raise HTTPException(status_code=400, detail="Need at least 2 agents")
     
-    agent_objects = [Agent(**agent) for agent in agents]
-    
-    current_day = state.get("current_day", 1)
-    current_period = state.get("current_time_period", "morning")
-    scenario = state.get("scenario", "Research Station")
+    # One job per user at a time; a job orphaned by a restart no longer blocks a new one
+    user_id = state.get("user_id", "")
+    await fail_orphaned_jobs(db, user_id)
+    active = await db.fast_forward_jobs.find_one({"user_id": user_id, "status": {"$in": ACTIVE_JOB_STATUSES}}, {"id": 1})
+    if active:
+        raise HTTPException(status_code=409, detail=f"Fast-forward job {active['id']} is already in progress")
     
-    periods = ["morning", "afternoon", "evening"]
-    generated_conversations = []
+    agent_objects = [Agent(**agent) for agent in agents]
+    engine = FastForwardEngine(
+        db, llm_manager, agent_objects, state,
+        role_descriptions={archetype: info["description"] for archetype, info in AGENT_ARCHETYPES.items()},
+        compatibility=calculate_compatibility,
+        round_model=ConversationRound,
+        message_model=ConversationMessage,
+        rounds_per_call=request.rounds_per_call
+    )
+    slots = plan_slots(state.get("current_day", 1), state.get("current_time_period", "morning"),
+                       request.target_days, request.conversations_per_period)
     
-    # Check if we have enough API requests
+    # Check if we have enough API requests (one per batch plus one memory update)
     usage = await llm_manager.get_usage_today()
-    estimated_requests = request.target_days * 3 * request.conversations_per_period * len(agent_objects)
+    estimated_requests = -(-len(slots) // engine.rounds_per_call) + 1
     if usage + estimated_requests > llm_manager.max_daily_requests:
         raise HTTPException(status_code=400, detail=f"Not enough API requests remaining. Need {estimated_requests}, have {llm_manager.max_daily_requests - usage}")
     
-    try:
-        for day_offset in range(request.target_days):
-            target_day = current_day + day_offset
-            
-            for period in periods:
-                # Skip periods we've already passed today
-                if day_offset == 0:
-                    current_period_index = periods.index(current_period)
-                    period_index = periods.index(period)
-                    if period_index <= current_period_index:
-                        continue
-                
-                # Generate conversations for this period
-                for conv_num in range(request.conversations_per_period):
-                    # Get conversation history for context
-                    conversation_history = await db.conversations.find().sort("created_at", -1).limit(10).to_list(10)
-                    
-                    # Create progressive context based on day and time
-                    day_context = f"Day {target_day}, {period}. "
-                    if target_day > current_day:
-                        day_context += f"Several days have passed. "
-                    
-                    if period == "morning":
-                        day_context += "Starting a new day with fresh energy. "
-                    elif period == "afternoon":
-                        day_context += "Midday progress check and developments. "
-                    else:
-                        day_context += "Evening reflection and planning. "
-                    
-                    # Add progression context
-                    if conversation_history:
-                        day_context += "Build upon previous discussions and introduce new developments. "
-                    
-                    # Generate responses from each agent
-                    messages = []
-                    for agent in agent_objects:
-                        response = await llm_manager.generate_agent_response(
-                            agent, scenario, agent_objects, day_context, conversation_history
-                        )
-                        
-                        message = ConversationMessage(
-                            agent_id=agent.id,
-                            agent_name=agent.name,
-                            message=response,
-                            mood=agent.current_mood
-                        )
-                        messages.append(message)
-                    
-                    # Create conversation round
-                    conversation_count = await db.conversations.count_documents({})
-                    conversation_round = ConversationRound(
-                        round_number=conversation_count + 1,
-                        time_period=f"Day {target_day} - {period} (#{conv_num + 1})",
-                        scenario=scenario,
-                        messages=messages
-                    )
-                    
-                    await db.conversations.insert_one(conversation_round.dict())
-                    generated_conversations.append(conversation_round)
-                    
-                    # Update relationships
-                    await update_relationships(agent_objects, messages)
-                    
-                    # Update agent memories periodically
-                    if conv_num == request.conversations_per_period - 1:  # Last conversation of the period
-                        for agent in agent_objects:
-                            await llm_manager.update_agent_memory(agent, conversation_history + [conversation_round.dict()])
-        
-        # Update simulation state
-        final_day = current_day + request.target_days - 1
-        final_period = "evening"  # Always end on evening
-        
-        await db.simulation_state.update_one(
-            {"id": state["id"]},
-            {"$set": {
-                "current_day": final_day,
-                "current_time_period": final_period
-            }}
-        )
-        
-        return {
-            "message": f"Fast forwarded {request.target_days} days",
-            "conversations_generated": len(generated_conversations),
-            "final_day": final_day,
-            "final_period": final_period,
-            "api_requests_used": len(generated_conversations) * len(agent_objects)
-        }
-        
-    except Exception as e:
-        logging.error(f"Error during fast forward: {e}")
-        raise HTTPException(status_code=500, detail=f"Fast forward failed: {str(e)}")
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": "queued",
+        "target_days": request.target_days,
+        "rounds_total": len(slots),
+        "rounds_done": 0,
+        "rounds_per_call": engine.rounds_per_call,
+        "llm_requests": 0,
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "heartbeat_at": datetime.utcnow()
+    }
+    await db.fast_forward_jobs.insert_one(dict(job))
+    
+    task = asyncio.create_task(run_fast_forward_job(engine, job["id"], slots, state))
+    _fast_forward_tasks.add(task)
+    task.add_done_callback(_fast_forward_tasks.discard)
+    
+    return {"job_id": job["id"], **job}
+
+@api_router.get("/simulation/fast-forward/{job_id}")
+async def get_fast_forward_job(job_id: str):
+    """Progress and, once finished, the result of a fast-forward job"""
+    job = await db.fast_forward_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Fast-forward job not found")
+    return job
 
 @api_router.post("/test/background-differences")
 async def test_background_differences():
     """Create test agents with different backgrounds to demonstrate behavioral differences"""
     # Clear existing agents
     await db.agents.delete_many({})
+    await invalidate_data_type("agents")
     
     # Create agents with dramatically different backgrounds
     test_agents = [
@@ -4122,6 +3986,7 @@ async def test_background_differences():
         {"$set": {"scenario": "A mysterious, structured signal has been detected coming from the direction of Proxima Centauri. The signal contains mathematical patterns and repeats every 11 hours. Ground control has lost communication and the team must decide how to respond."}},
         upsert=True
     )
+    await invalidate_data_type("simulation_state")
     
     return {
         "message": "Test agents with diverse backgrounds created",
@@ -4157,9 +4022,14 @@ async def start_simulation(request: Optional[SimulationStartRequest] = None, cur
     
     # Clear only the current user's simulation data (not all data globally)
     await db.conversations.delete_many({"user_id": current_user.id})  # Clear only user's conversations
+    await db.conversation_archive.delete_many({"user_id": current_user.id})
     await db.relationships.delete_many({"user_id": current_user.id})  # Clear only user's relationships
     await db.summaries.delete_many({"user_id": current_user.id})  # Clear only user's summaries
+    await db.round_summaries.delete_many({"user_id": current_user.id})
+    await db.day_summaries.delete_many({"user_id": current_user.id})
     # Note: We keep agents as they are associated with the user and shouldn't be deleted on simulation start
+    await invalidate_user_cache(current_user.id, ["simulation_state", "conversations"])
+    await invalidate_data_type("relationships")
     
     # Log the simulation start with time limit info
     time_limit_msg = f" with {time_limit_display} time limit" if time_limit_display else " with no time limit"
@@ -4175,17 +4045,21 @@ async def start_simulation(request: Optional[SimulationStartRequest] = None, cur
 @api_router.get("/simulation/state")
 async def get_simulation_state(current_user: User = Depends(get_current_user)):
     """Get current simulation state for the user"""
-    state = await db.simulation_state.find_one({"user_id": current_user.id})
-    if not state:
-        # Create default state for the user
-        state = SimulationState(user_id=current_user.id).dict()
-        await db.simulation_state.insert_one(state)
+    async def fetch_state():
+        state = await db.simulation_state.find_one({"user_id": current_user.id}, {"conversation_state": 0})
+        if not state:
+            # Create default state for the user
+            state = SimulationState(user_id=current_user.id).dict()
+            await db.simulation_state.insert_one(state)
+        
+        # Convert MongoDB ObjectId to string to make it JSON serializable
+        if '_id' in state:
+            state['_id'] = str(state['_id'])
         return state
     
-    # Convert MongoDB ObjectId to string to make it JSON serializable
-    if '_id' in state:
-        state['_id'] = str(state['_id'])
+    state = await cached_user_data(current_user.id, "simulation_state", fetch_state)
     
+    # Time fields are derived on every read rather than written back on each poll
     # Calculate remaining time if time limit is set
     if state.get('time_limit_hours') and state.get('simulation_start_time'):
         start_time = state['simulation_start_time']
@@ -4199,12 +4073,6 @@ async def get_simulation_state(current_user: User = Depends(get_current_user)):
         state['time_remaining_hours'] = remaining_hours
         state['time_elapsed_hours'] = elapsed_hours
         state['time_expired'] = remaining_hours <= 0
-        
-        # Update the database with calculated time
-        await db.simulation_state.update_one(
-            {"id": state["id"], "user_id": current_user.id},
-            {"$set": {"time_remaining_hours": remaining_hours}}
-        )
     
     return state
 
@@ -4280,6 +4148,7 @@ async def advance_time_period():
         {"id": state["id"]},
         {"$set": {"current_time_period": new_period}}
     )
+    await invalidate_user_cache(state.get("user_id", ""), ["simulation_state"])
     
     return {"message": f"Advanced to {new_period}", "new_period": new_period}
 
@@ -4373,22 +4242,30 @@ async def debug_simple_conversation():
         logging.error(f"Debug conversation error: {e}")
         return {"error": str(e), "success": False}
 
-async def auto_generate_documents_from_conversation(conversation_round, agent_objects, scenario, scenario_name, llm_manager):
-    """Automatically generate and update documents based on conversation content"""
+async def auto_generate_documents_from_conversation(conversation_rounds, agent_objects, scenario, scenario_name, llm_manager):
+    """
+    Automatically generate and update documents based on conversation content.
+    Runs from the document pipeline, once per batch of coalesced rounds (oldest first).
+    """
     
     # Analyze conversation content to determine what documents would be helpful
-    conversation_text = "\n".join([f"{msg.agent_name}: {msg.message}" for msg in conversation_round.messages])
+    conversation_text = "\n".join([
+        f"{msg.agent_name}: {msg.message}" for conversation_round in conversation_rounds for msg in conversation_round.messages
+    ])
     
     # Check if agents made decisions, votes, or commitments that need documentation
     decisions_made = extract_decisions_from_conversation(conversation_text)
     
-    # Get existing documents to see what needs updating
-    existing_docs = await db.documents.find({"user_id": ""}).to_list(100)
+    # Only this scenario's simulation documents can be updated (see determine_document_actions)
+    existing_docs = await db.documents.find(
+        {"user_id": "", "title": {"$regex": re.escape(scenario_name), "$options": "i"}}
+    ).to_list(100)
     
     # Determine if we should update existing documents or create new ones
     needed_actions = determine_document_actions(scenario, scenario_name, conversation_text, existing_docs, decisions_made)
     
     # Execute document actions (create new, update existing)
+    done = {"created": [], "updated": []}
     for action_type, doc_info in needed_actions:
         try:
             if action_type == "create":
@@ -4400,6 +4277,7 @@ async def auto_generate_documents_from_conversation(conversation_round, agent_ob
                 )
                 await db.documents.insert_one(document)
                 print(f"📄 Created: {doc_title} by {creating_agent.name}")
+                done["created"].append(doc_title)
                 
             elif action_type == "update":
                 existing_doc, update_reason = doc_info
@@ -4407,39 +4285,58 @@ async def auto_generate_documents_from_conversation(conversation_round, agent_ob
                 updated_doc = await update_existing_document(
                     existing_doc, updating_agent, conversation_text, update_reason, llm_manager
                 )
-                await db.documents.replace_one({"id": existing_doc["id"]}, updated_doc)
+                await save_revision(db, existing_doc, updated_doc["content"],
+                                    {"updated_at": updated_doc["updated_at"], "description": updated_doc["description"]},
+                                    author=updating_agent.name, reason=update_reason)
                 print(f"📝 Updated: {existing_doc['title']} by {updating_agent.name} - {update_reason}")
+                done["updated"].append(existing_doc["title"])
                 
         except Exception as e:
             print(f"Failed to {action_type} document: {e}")
+    if done["created"] or done["updated"]:
+        # Simulation documents are shared (user_id ""), so every user's listing changes
+        await invalidate_data_type("documents")
+    return done
+
+# Job events go through Redis pub/sub when it is connected, so every worker's streams see them
+document_pipeline = DocumentPipeline(
+    auto_generate_documents_from_conversation,
+    redis=lambda: cache_manager.redis_client if cache_manager.connected else None
+)
+
+# Look for decision indicators
+DECISION_KEYWORDS = PhraseMatcher([
+    "vote yes", "vote no", "i vote", "let's vote", "decision", "we should", 
+    "i recommend", "my recommendation", "i propose", "let's move forward",
+    "i'll take responsibility", "i commit to", "i'll handle", "i'll create",
+    "i'll update", "based on our discussion", "the consensus", "we've decided"
+])
 
 def extract_decisions_from_conversation(conversation_text):
-    """Extract key decisions, votes, and commitments from conversation"""
-    decisions = []
-    
-    # Look for decision indicators
-    decision_keywords = [
-        "vote yes", "vote no", "i vote", "let's vote", "decision", "we should", 
-        "i recommend", "my recommendation", "i propose", "let's move forward",
-        "i'll take responsibility", "i commit to", "i'll handle", "i'll create",
-        "i'll update", "based on our discussion", "the consensus", "we've decided"
-    ]
-    
-    for keyword in decision_keywords:
-        if keyword.lower() in conversation_text.lower():
-            # Extract the sentence containing the decision
-            sentences = conversation_text.split('.')
-            for sentence in sentences:
-                if keyword.lower() in sentence.lower():
-                    decisions.append(sentence.strip())
-    
-    return decisions
+    """Extract key decisions, votes, and commitments from conversation, once each and in order"""
+    found = DECISION_KEYWORDS.phrases(conversation_text)
+    if not found:
+        return []
+    # Extract the sentences containing a decision, looking only for the keywords that occur
+    return [sentence.strip() for sentence in conversation_text.split('.')
+            if any(keyword in sentence.lower() for keyword in found)]
+
+# Document types and the keywords that make them relevant, in priority order
+DOCUMENT_TOPIC_KEYWORDS = {
+    "budget": ["cost", "budget", "funding", "investment", "economic", "financial"],
+    "implementation": ["implement", "deploy", "rollout", "strategy", "plan"],
+    "risk": ["risk", "challenge", "threat", "danger", "crisis"],
+    "technical": ["technology", "technical", "engineering", "system", "design"],
+    "policy": ["policy", "regulation", "law", "compliance", "governance"],
+    "training": ["training", "education", "skill", "workforce", "job retraining"],
+    "timeline": ["timeline", "schedule", "deadline", "phases", "milestones"],
+    "action": ["action", "next steps", "decisions", "commitments"],
+}
+DOCUMENT_TOPICS = PhraseMatcher(DOCUMENT_TOPIC_KEYWORDS)
 
 def determine_document_actions(scenario, scenario_name, conversation_text, existing_docs, decisions_made):
     """Determine whether to create new documents or update existing ones"""
     actions = []
-    scenario_lower = scenario.lower()
-    conversation_lower = conversation_text.lower()
     
     # Create a map of existing documents by type
     existing_by_type = {}
@@ -4448,27 +4345,16 @@ def determine_document_actions(scenario, scenario_name, conversation_text, exist
             doc_type = doc.get("category", "").lower()
             existing_by_type[doc_type] = doc
     
-    # Check what documents are needed
-    potential_docs = [
-        ("budget", "budget", ["cost", "budget", "funding", "investment", "economic", "financial"]),
-        ("implementation", "implementation", ["implement", "deploy", "rollout", "strategy", "plan"]),
-        ("risk", "risk", ["risk", "challenge", "threat", "danger", "crisis"]),
-        ("technical", "technical", ["technology", "technical", "engineering", "system", "design"]),
-        ("policy", "policy", ["policy", "regulation", "law", "compliance", "governance"]),
-        ("training", "training", ["training", "education", "skill", "workforce", "job retraining"]),
-        ("timeline", "timeline", ["timeline", "schedule", "deadline", "phases", "milestones"]),
-        ("action", "action", ["action", "next steps", "decisions", "commitments"])
-    ]
+    # Check what documents are needed, scenario and conversation scanned once each
+    relevant = DOCUMENT_TOPICS.categories(scenario) | DOCUMENT_TOPICS.categories(conversation_text)
     
-    for doc_key, doc_type, keywords in potential_docs:
-        is_relevant = any(word in scenario_lower or word in conversation_lower for word in keywords)
-        
-        if is_relevant:
-            if doc_key in existing_by_type:
+    for doc_type in DOCUMENT_TOPIC_KEYWORDS:
+        if doc_type in relevant:
+            if doc_type in existing_by_type:
                 # Update existing document if there are new decisions or significant discussion
                 if decisions_made or len(conversation_text) > 500:
                     update_reason = "New decisions and discussion points"
-                    actions.append(("update", (existing_by_type[doc_key], update_reason)))
+                    actions.append(("update", (existing_by_type[doc_type], update_reason)))
             else:
                 # Create new document
                 title = f"{scenario_name} - {doc_type.title()}"
@@ -4482,9 +4368,13 @@ def determine_document_actions(scenario, scenario_name, conversation_text, exist
     
     return actions[:3]  # Limit to 3 actions per conversation
 
-async def update_existing_document(existing_doc, updating_agent, conversation_text, update_reason, llm_manager):
-    """Update an existing document with new information from conversation"""
-    
+# incremental (default): the LLM returns a section patch, see document_sections.py | full: it rewrites the document
+DOCUMENT_UPDATE_MODE = os.environ.get("DOCUMENT_UPDATE_MODE", "incremental").lower()
+# Conversation text sent with an incremental update (the newest part is kept)
+DOCUMENT_UPDATE_CONTEXT_CHARS = 4000
+
+async def full_document_update(existing_doc, updating_agent, conversation_text, update_reason, llm_manager):
+    """The whole document in, the whole document out; None when the LLM gave nothing usable"""
     system_message = f"""You are {updating_agent.name}, updating the document "{existing_doc['title']}".
 
 CURRENT DOCUMENT CONTENT:
@@ -4502,26 +4392,61 @@ Your task: Update the document to incorporate the new information and decisions
 - Mark updates with revision notes where appropriate
 - Maintain professional formatting"""
 
+    chat = LlmChat(
+        api_key=llm_manager.api_key,
+        session_id=f"doc_update_{updating_agent.id}_{datetime.now().timestamp()}",
+        system_message=system_message
+    ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(400)
+    
+    prompt = f"Update this document to include the new conversation insights. Maintain the structure but add new information:\n\n{existing_doc['content']}"
+    response = await timed_llm_call("document_update", "gemini-2.0-flash", chat.send_message(UserMessage(text=prompt)), timeout=10.0)
+    
+    if response and len(response.strip()) > 100:
+        return response.strip()
+    return None
+
+async def incremental_document_update(existing_doc, updating_agent, conversation_text, update_reason, llm_manager):
+    """
+    Outline plus the relevant sections in, a section patch out, applied locally.
+    None when the LLM gave no applicable patch.
+    """
+    sections = parse_sections(existing_doc['content'])
+    conversation_text = conversation_text[-DOCUMENT_UPDATE_CONTEXT_CHARS:]
+    shown = relevant_sections(sections, f"{update_reason}\n{conversation_text}")
+    system_message = f"""You are {updating_agent.name}, updating the document "{existing_doc['title']}".
+You edit documents by returning a small JSON patch, never the whole document."""
+    prompt = patch_prompt(sections, shown, conversation_text, update_reason)
+
+    chat = LlmChat(
+        api_key=llm_manager.api_key,
+        session_id=f"doc_patch_{updating_agent.id}_{datetime.now().timestamp()}",
+        system_message=system_message
+    ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(800)
+    
+    response = await timed_llm_call("document_patch", "gemini-2.0-flash", chat.send_message(UserMessage(text=prompt)), timeout=10.0)
     try:
-        chat = LlmChat(
-            api_key=llm_manager.api_key,
-            session_id=f"doc_update_{updating_agent.id}_{datetime.now().timestamp()}",
-            system_message=system_message
-        ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(400)
-        
-        prompt = f"Update this document to include the new conversation insights. Maintain the structure but add new information:\n\n{existing_doc['content']}"
-        user_message = UserMessage(text=prompt)
-        
-        response = await asyncio.wait_for(chat.send_message(user_message), timeout=10.0)
-        
-        if response and len(response.strip()) > 100:
-            updated_content = response.strip()
-        else:
-            # Fallback: append new insights to existing content
-            updated_content = existing_doc['content'] + f"\n\n## UPDATE ({datetime.now().strftime('%Y-%m-%d')})\n\nBased on recent team discussion:\n- {update_reason}\n- New insights: [Summary of key points from conversation]"
-            
-    except Exception as e:
-        print(f"LLM document update failed: {e}")
+        patch = parse_patch(response)
+    except ValueError as e:
+        logging.warning(f"Unusable document patch for '{existing_doc['title']}': {e}")
+        return None
+    return apply_patch(sections, patch, replaceable={section["id"] for section in shown})
+
+async def update_existing_document(existing_doc, updating_agent, conversation_text, update_reason, llm_manager, mode=None):
+    """Update an existing document with new information from conversation"""
+    mode = mode or DOCUMENT_UPDATE_MODE
+    update = incremental_document_update if mode == "incremental" else full_document_update
+    
+    start_time = time.perf_counter()
+    with track_llm_usage() as usage:
+        try:
+            updated_content = await update(existing_doc, updating_agent, conversation_text, update_reason, llm_manager)
+        except Exception as e:
+            print(f"LLM document update failed: {e}")
+            updated_content = None
+    record_document_update(mode, "success" if updated_content else "fallback",
+                           usage.prompt_tokens, usage.completion_tokens, time.perf_counter() - start_time)
+    
+    if not updated_content:
         # Fallback: append new insights to existing content
         updated_content = existing_doc['content'] + f"\n\n## UPDATE ({datetime.now().strftime('%Y-%m-%d')})\n\nBased on recent team discussion:\n- {update_reason}\n- Key conversation points: {conversation_text[:200]}..."
     
@@ -4793,7 +4718,7 @@ SCENARIO: {scenario}"""
         prompt = f"Create detailed content for this {doc_type} document. Fill in the template with specific information based on the conversation:\n\n{template}"
         user_message = UserMessage(text=prompt)
         
-        response = await asyncio.wait_for(chat.send_message(user_message), timeout=10.0)
+        response = await timed_llm_call("document_create", "gemini-2.0-flash", chat.send_message(user_message), timeout=10.0)
         
         if response and len(response.strip()) > 50:
             content = response.strip()
@@ -4820,9 +4745,17 @@ SCENARIO: {scenario}"""
     
     return document
 
+# Phrases an agent uses when volunteering to write a document
+COMMITMENT_PHRASES = PhraseMatcher(["i'll create", "let me create", "i'll develop", "i'll draft", "i'm creating"])
+
 @api_router.post("/conversation/generate")
-async def generate_conversation(current_user: User = Depends(get_current_user)):
+async def generate_conversation(mode: Optional[str] = Query(None, description="Round generation mode: per_agent or ensemble"), current_user: User = Depends(get_current_user)):
     """Generate a conversation round between agents with sequential responses and progression tracking"""
+    try:
+        round_mode = resolve_round_mode(mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Get current user's agents
     all_agents = await db.agents.find({"user_id": current_user.id}).to_list(100)
     if len(all_agents) < 2:
@@ -4841,8 +4774,8 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
     scenario = state.get("scenario", "General discussion about current topics")
     scenario_name = state.get("scenario_name", "General Discussion")
     
-    # Get conversation count for round numbering and context (user-specific)
-    conversation_count = await db.conversations.count_documents({"user_id": current_user.id})
+    # Get conversation count for round numbering and context (user-specific, archived rounds included)
+    conversation_count = await count_rounds(db, current_user.id)
     
     # Get existing conversations for context (user-specific)
     existing_conversations = await db.conversations.find({"user_id": current_user.id}).sort("created_at", -1).limit(5).to_list(5)
@@ -4898,107 +4831,119 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
     # Generate messages with REAL Gemini API calls first, fallback to smart responses if needed
     messages = []
     
-    for i, agent in enumerate(agent_objects):
-        try:
-            # First, try to generate response with real Gemini API
-            print(f"🔥 DEBUG: Attempting Gemini API call for {agent.name}")
-            
-            # Build rich conversation context with previous work and documents
-            if i == 0:
-                # First speaker - include previous conversation context and existing documents
-                previous_context = ""
-                
-                # Get recent conversations for context
-                recent_conversations = await db.conversations.find({"user_id": current_user.id}).sort("created_at", -1).limit(3).to_list(3)
-                if recent_conversations:
-                    previous_context += "PREVIOUS TEAM DISCUSSIONS:\n"
-                    for conv in recent_conversations:
-                        prev_messages = conv.get('messages', [])
-                        if prev_messages:
-                            key_points = " | ".join([msg.get('message', '')[:80] + "..." for msg in prev_messages[:2]])
-                            previous_context += f"- {conv.get('scenario_name', 'Discussion')}: {key_points}\n"
-                    previous_context += "\n"
-                
-                # Get existing documents for context
-                existing_documents = await db.documents.find({"user_id": current_user.id}).sort("updated_at", -1).limit(5).to_list(5)
-                if existing_documents:
-                    previous_context += "EXISTING TEAM DOCUMENTS:\n"
-                    for doc in existing_documents:
-                        previous_context += f"- {doc.get('title', 'Untitled')} ({doc.get('category', 'Document')}): {doc.get('description', 'No description')}\n"
-                    previous_context += "\n"
-                
-                conversation_context = f"{previous_context}{observer_context}You're starting a discussion about: {scenario}\n\nBuild on previous work where relevant and drive toward concrete decisions and actions. Pay special attention to any Observer directives - they are your project lead/CEO."
-            else:
-                # Build context from what others have said so far
-                conversation_context = "CURRENT DISCUSSION:\n\n"
-                for j, msg in enumerate(messages):
-                    conversation_context += f"{msg.agent_name}: \"{msg.message}\"\n\n"
-                conversation_context += f"{observer_context}Respond to the discussion above. Look for opportunities to:\n- Synthesize what's been said\n- Propose concrete next steps\n- Call for decisions or votes\n- Commit to creating/updating documents\n\nRemember: The Observer is your project lead/CEO - their guidance should heavily influence your response."
+    # Previous work and documents, given to the first speaker (or the whole round in ensemble mode)
+    previous_context = ""
+    
+    # Earlier rounds come from the simulation's rolling state rather than being re-read every round;
+    # observer and fast-forward rounds written since the last generated round are folded in first
+    conversation_state = ConversationState(state.get("conversation_state"))
+    # (a state saved before folded_through was recorded is current as of its last round)
+    if "conversation_state" not in state or conversation_state.folded_through:
+        newer_rounds = await db.conversations.find(conversation_state.newer_rounds_query(current_user.id)).sort(
+            "created_at", -1).limit(CATCH_UP_ROUNDS).to_list(CATCH_UP_ROUNDS)
+        conversation_state.fold_rounds(reversed(newer_rounds))
+    if conversation_state.narrative or conversation_state.recent:
+        previous_context += "PREVIOUS TEAM DISCUSSIONS:\n"
+        previous_context += conversation_state.narrative or " | ".join(
+            f"{msg['agent_name']}: {msg['message'][:80]}..." for msg in conversation_state.recent
+        )
+        previous_context += "\n\n"
+    
+    # Get existing documents for context
+    existing_documents = await db.documents.find({"user_id": current_user.id}).sort("updated_at", -1).limit(5).to_list(5)
+    if existing_documents:
+        previous_context += "EXISTING TEAM DOCUMENTS:\n"
+        for doc in existing_documents:
+            previous_context += f"- {doc.get('title', 'Untitled')} ({doc.get('category', 'Document')}): {doc.get('description', 'No description')}\n"
+        previous_context += "\n"
+    
+    round_start = time.perf_counter()
+    with track_llm_usage() as usage:
+        if round_mode == "ensemble":
+            # One LLM call writes the whole round; failed entries are regenerated per agent
+            ensemble_context = f"{previous_context}{observer_context}The team is discussing: {scenario}\n\nBuild on previous work where relevant and drive toward concrete decisions and actions. Pay special attention to any Observer directives - they are your project lead/CEO."
+            round_results = await llm_manager.generate_ensemble_round(
+                agent_objects, scenario, ensemble_context, [], language_instruction, existing_documents, state
+            )
+            for agent, response, mood in round_results:
+                messages.append(ConversationMessage(
+                    agent_name=agent.name,
+                    agent_id=agent.id,
+                    message=response.replace(f"{agent.name}: ", "").strip(),
+                    mood=mood or archetype_mood(agent.archetype),
+                    timestamp=datetime.utcnow()
+                ))
+                conversation_state.add_message(agent.name, messages[-1].message)
+        else:
+            for i, agent in enumerate(agent_objects):
+                try:
+                    # First, try to generate response with real Gemini API
+                    print(f"🔥 DEBUG: Attempting Gemini API call for {agent.name}")
             
-            # Build conversation history in the format expected by generate_agent_response
-            conversation_history_msgs = [{"agent_name": msg.agent_name, "content": msg.message} for msg in messages]
+                    # Build rich conversation context with previous work and documents
+                    if i == 0:
+                        conversation_context = f"{previous_context}{observer_context}You're starting a discussion about: {scenario}\n\nBuild on previous work where relevant and drive toward concrete decisions and actions. Pay special attention to any Observer directives - they are your project lead/CEO."
+                    else:
+                        # Build context from what others have said so far
+                        conversation_context = "CURRENT DISCUSSION:\n\n"
+                        for j, msg in enumerate(messages):
+                            conversation_context += f"{msg.agent_name}: \"{msg.message}\"\n\n"
+                        conversation_context += f"{observer_context}Respond to the discussion above. Look for opportunities to:\n- Synthesize what's been said\n- Propose concrete next steps\n- Call for decisions or votes\n- Commit to creating/updating documents\n\nRemember: The Observer is your project lead/CEO - their guidance should heavily influence your response."
             
-            response = await llm_manager.generate_agent_response(
-                agent=agent,
-                scenario=scenario,
-                other_agents=[a for a in agent_objects if a.id != agent.id],
-                context=conversation_context,  # Use our rich context instead of generic context
-                conversation_history=conversation_history_msgs,
-                language_instruction=language_instruction,
-                existing_documents=existing_documents,
-                simulation_state=state
-            )
+                    response = await llm_manager.generate_agent_response(
+                        agent=agent,
+                        scenario=scenario,
+                        other_agents=[a for a in agent_objects if a.id != agent.id],
+                        context=conversation_context,  # Use our rich context instead of generic context
+                        language_instruction=language_instruction,
+                        existing_documents=existing_documents,
+                        simulation_state=state,
+                        conversation_state=conversation_state
+                    )
             
-            # Clean up response - remove agent name prefix if present
-            message_text = response.replace(f"{agent.name}: ", "").strip()
-            print(f"✅ GEMINI API SUCCESS for {agent.name}: {message_text[:100]}...")
+                    # Clean up response - remove agent name prefix if present
+                    message_text = response.replace(f"{agent.name}: ", "").strip()
+                    print(f"✅ GEMINI API SUCCESS for {agent.name}: {message_text[:100]}...")
             
-        except Exception as e:
-            print(f"❌ GEMINI API FAILED for {agent.name}: {str(e)[:100]}...")
+                except Exception as e:
+                    print(f"❌ GEMINI API FAILED for {agent.name}: {str(e)[:100]}...")
             
-            # Fall back to smart conversation generator
-            agent_dict = {
-                "name": agent.name,
-                "archetype": agent.archetype,
-                "expertise": agent.expertise,
-                "background": agent.background,
-                "personality": agent.personality.dict() if agent.personality else {}
-            }
+                    # Fall back to smart conversation generator
+                    record_fallback("smart_conversation", "error")
+                    agent_dict = {
+                        "name": agent.name,
+                        "archetype": agent.archetype,
+                        "expertise": agent.expertise,
+                        "background": agent.background,
+                        "personality": agent.personality.dict() if agent.personality else {}
+                    }
             
-            message_text = conversation_gen.generate_contextual_response(
-                agent=agent_dict,
-                scenario=scenario,
-                scenario_name=scenario_name,
-                conversation_history=[{"agent_name": msg.agent_name, "message": msg.message} for msg in messages],
-                turn_number=i
-            )
-            print(f"🔄 Using smart fallback for {agent.name}: {message_text[:100]}...")
-        
-        # Determine mood based on agent archetype and message content
-        if agent.archetype == "optimist":
-            mood = "enthusiastic"
-        elif agent.archetype == "skeptic":
-            mood = "cautious"
-        elif agent.archetype == "scientist":
-            mood = "analytical"
-        elif agent.archetype == "leader":
-            mood = "strategic"
-        elif agent.archetype == "artist":
-            mood = "creative"
-        else:
-            mood = "engaged"
+                    message_text = conversation_gen.generate_contextual_response(
+                        agent=agent_dict,
+                        scenario=scenario,
+                        scenario_name=scenario_name,
+                        conversation_history=[{"agent_name": msg.agent_name, "message": msg.message} for msg in messages],
+                        turn_number=i
+                    )
+                    print(f"🔄 Using smart fallback for {agent.name}: {message_text[:100]}...")
         
-        message = ConversationMessage(
-            agent_name=agent.name,
-            agent_id=agent.id,
-            message=message_text,
-            mood=mood,
-            timestamp=datetime.utcnow()
-        )
-        messages.append(message)
+                # Determine mood based on agent archetype and message content
+                mood = archetype_mood(agent.archetype)
+        
+                message = ConversationMessage(
+                    agent_name=agent.name,
+                    agent_id=agent.id,
+                    message=message_text,
+                    mood=mood,
+                    timestamp=datetime.utcnow()
+                )
+                messages.append(message)
+                conversation_state.add_message(agent.name, message_text)
     
-    # Get conversation count for round numbering (user-specific)
-    conversation_count = await db.conversations.count_documents({"user_id": current_user.id})
+    record_round_generation(round_mode, usage.calls, usage.total_tokens, time.perf_counter() - round_start)
+    
+    # Get conversation count for round numbering (user-specific, archived rounds included)
+    conversation_count = await count_rounds(db, current_user.id)
     
     # Create conversation round  
     conversation_round = ConversationRound(
@@ -5012,13 +4957,17 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
     
     # Save conversation
     await db.conversations.insert_one(conversation_round.dict())
+    await record_rounds(db, [conversation_round])
     
-    # AUTO-GENERATE HELPFUL DOCUMENTS based on conversation content
-    try:
-        await auto_generate_documents_from_conversation(conversation_round, agent_objects, scenario, scenario_name, llm_manager)
-    except Exception as e:
-        print(f"Document auto-generation failed: {e}")
-        # Don't let document generation failure break conversation generation
+    # Persisted next to the rest of the simulation state; GET /simulation/state leaves it out
+    conversation_state.mark_folded(conversation_round.created_at)
+    await db.simulation_state.update_one(
+        {"user_id": current_user.id}, {"$set": {"conversation_state": conversation_state.to_dict()}}
+    )
+    
+    # AUTO-GENERATE HELPFUL DOCUMENTS in the background; bursts of rounds are coalesced
+    document_pipeline.enqueue(current_user.id, scenario_name, conversation_round,
+                              agent_objects=agent_objects, scenario=scenario, llm_manager=llm_manager)
     
     return conversation_round
     agent_objects = [Agent(**agent) for agent in agents]
@@ -5178,6 +5127,7 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
     )
     
     await db.conversations.insert_one(conversation_round.dict())
+    await record_rounds(db, [conversation_round])
     
     # Update agent relationships based on interactions
     await update_relationships(agent_objects, messages)
@@ -5215,8 +5165,7 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
                     # Look for commitment phrases in their messages
                     for msg in messages:
                         if msg.agent_name == agent.name:
-                            commitment_phrases = ["i'll create", "let me create", "i'll develop", "i'll draft", "i'm creating"]
-                            if any(phrase in msg.message.lower() for phrase in commitment_phrases):
+                            if COMMITMENT_PHRASES.search(msg.message):
                                 creating_agent = agent
                                 break
                     if creating_agent.id != agent_objects[0].id:
@@ -5271,12 +5220,11 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
                     mood="productive"
                 )
                 
-                # Update the conversation round with the document creation message
+                # Append the document creation message to the stored round
                 conversation_round.messages.append(doc_notification)
-                await db.conversations.update_one(
-                    {"id": conversation_round.id},
-                    {"$set": {"messages": [msg.dict() for msg in conversation_round.messages]}}
-                )
+                writer = ConversationWriter(db.conversations)
+                writer.append({"id": conversation_round.id}, doc_notification.dict())
+                await writer.flush()
                 
                 logging.info(f"Document created successfully with team approval: {document.id}")
             else:
@@ -5290,12 +5238,11 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
                     mood="neutral"
                 )
                 
-                # Update the conversation round with the voting results
+                # Append the voting results to the stored round
                 conversation_round.messages.append(rejection_notification)
-                await db.conversations.update_one(
-                    {"id": conversation_round.id},
-                    {"$set": {"messages": [msg.dict() for msg in conversation_round.messages]}}
-                )
+                writer = ConversationWriter(db.conversations)
+                writer.append({"id": conversation_round.id}, rejection_notification.dict())
+                await writer.flush()
             
     except Exception as e:
         logging.error(f"Error in action-oriented document creation: {e}")
@@ -5305,15 +5252,25 @@ async def generate_conversation(current_user: User = Depends(get_current_user)):
     return conversation_round
 
 @api_router.get("/conversations")
-async def get_conversations(current_user: User = Depends(get_current_user)):
+async def get_conversations(
+    limit: int = Query(HOT_ROUNDS, ge=1, le=1000, description="Number of rounds to return, newest first"),
+    offset: int = Query(0, ge=0, description="Number of newest rounds to skip"),
+    archived: bool = Query(False, description="Page back into archived rounds"),
+    current_user: User = Depends(get_current_user),
+):
     """Get conversation rounds for the current user"""
     # Get user's simulation conversations
     # Ensure we're only getting conversations for the current user
     user_id = current_user.id
     
-    # Get only the conversations for the current user
-    # Use $eq operator to ensure exact match and filter out empty user_id
-    conversations = await db.conversations.find({"user_id": {"$eq": user_id}}).sort("created_at", 1).to_list(1000)
+    # The frontend polls this endpoint, so by default only the hot tier is read; the archive
+    # is decompressed only when explicitly paging back into history
+    if archived:
+        conversations = (await recent_rounds(db, offset + limit, user_id))[offset:]
+    else:
+        conversations = await db.conversations.find({"user_id": user_id}).sort(
+            "created_at", -1).skip(offset).limit(limit).to_list(limit)
+    conversations.reverse()
     
     # Convert to response format, handling any missing fields
     conversation_rounds = []
@@ -5339,31 +5296,36 @@ async def get_conversations(current_user: User = Depends(get_current_user)):
             logging.warning(f"Skipping malformed conversation: {e}")
             continue
     
-    return conversation_rounds
+    return json_response(conversation_rounds)
 
 @api_router.get("/relationships")
 async def get_relationships():
     """Get all agent relationships"""
-    relationships = await db.relationships.find().to_list(1000)
-    
-    # Convert MongoDB documents to JSON-serializable format
-    processed_relationships = []
-    for rel in relationships:
-        rel_dict = {
-            "id": rel.get("id", str(rel.get("_id", ""))),
-            "agent1_id": rel.get("agent1_id", ""),
-            "agent2_id": rel.get("agent2_id", ""),
-            "score": rel.get("score", 0),
-            "status": rel.get("status", "neutral"),
-            "updated_at": rel.get("updated_at").isoformat() if rel.get("updated_at") else ""
-        }
-        processed_relationships.append(rel_dict)
+    async def fetch_relationships():
+        relationships = await db.relationships.find().to_list(1000)
+        
+        # Convert MongoDB documents to JSON-serializable format
+        processed_relationships = []
+        for rel in relationships:
+            rel_dict = {
+                "id": rel.get("id", str(rel.get("_id", ""))),
+                "agent1_id": rel.get("agent1_id", ""),
+                "agent2_id": rel.get("agent2_id", ""),
+                "score": rel.get("score", 0),
+                "status": rel.get("status", "neutral"),
+                "updated_at": rel.get("updated_at").isoformat() if rel.get("updated_at") else ""
+            }
+            processed_relationships.append(rel_dict)
+        
+        return processed_relationships
     
-    return processed_relationships
+    # Relationships are not user-scoped yet, so they share one global key
+    return json_response(await cached_user_data("global", "relationships", fetch_relationships, ttl=60))
 
 @api_router.post("/avatars/generate-library", response_model=dict)
 async def generate_library_avatars():
     """Generate avatars for all agents in the library that don't have them"""
+    require_feature("avatars")
     try:
         # Define all library agents with their prompts
         library_agents = []
@@ -5476,40 +5438,30 @@ async def generate_library_avatars():
         generated_count = 0
         errors = []
         
-        for agent in library_agents:
-            try:
-                # Enhanced prompt for better avatar results
-                enhanced_prompt = f"professional portrait, headshot, detailed face, {agent['prompt']}, high quality, photorealistic, studio lighting, neutral background"
-                
-                # Submit to fal.ai using the Flux Schnell model
-                handler = await fal_client.submit_async(
-                    "fal-ai/flux/schnell",
-                    arguments={
-                        "prompt": enhanced_prompt,
-                        "image_size": "portrait_4_3",
-                        "num_images": 1,
-                        "enable_safety_checker": True
-                    }
-                )
-                
-                # Get the result
-                result = await handler.get()
-                
-                if result and result.get("images") and len(result["images"]) > 0:
-                    avatar_url = result["images"][0]["url"]
-                    agent["avatar_url"] = avatar_url
-                    generated_count += 1
-                    logging.info(f"Avatar generated for {agent['name']}: {avatar_url}")
-                else:
-                    errors.append(f"Failed to generate avatar for {agent['name']}: No image returned")
-                    
-            except Exception as e:
-                errors.append(f"Error generating avatar for {agent['name']}: {str(e)}")
-                logging.error(f"Avatar generation error for {agent['name']}: {str(e)}")
+        # Generate concurrently; duplicate prompts are generated once and cached prompts are free
+        from avatar_service import enhance_avatar_prompt, generate_avatars
+        prompts = [enhance_avatar_prompt(agent["prompt"]) for agent in library_agents]
+        outcomes = await generate_avatars(db, prompts, arguments={"enable_safety_checker": True})
+        
+        for agent, prompt in zip(library_agents, prompts):
+            outcome = outcomes[prompt]
+            if outcome["image_url"]:
+                agent["avatar_url"] = outcome["image_url"]
+                generated_count += 1
+            else:
+                errors.append(f"Failed to generate avatar for {agent['name']}: {outcome['error']}")
+        
+        new_outcomes = [outcome for outcome in outcomes.values() if outcome["image_url"] and not outcome["cached"]]
+        latencies = sorted(outcome["latency_ms"] for outcome in new_outcomes)
+        logging.info(f"Library avatars: {len(new_outcomes)} generated, {len(outcomes) - len(new_outcomes)} cached or failed, {len(prompts) - len(outcomes)} duplicate prompts")
         
         return {
             "success": True,
             "generated_count": generated_count,
+            "newly_generated": len(new_outcomes),
+            "cached_count": sum(1 for outcome in outcomes.values() if outcome["cached"]),
+            "unique_prompts": len(outcomes),
+            "median_latency_ms": latencies[len(latencies) // 2] if latencies else 0.0,
             "total_agents": len(library_agents),
             "errors": errors,
             "agents": library_agents
@@ -5522,6 +5474,7 @@ async def generate_library_avatars():
 @api_router.post("/avatars/generate", response_model=AvatarResponse)
 async def generate_avatar(request: AvatarGenerateRequest):
     """Generate an avatar image using fal.ai"""
+    require_feature("avatars")
     if not request.prompt or len(request.prompt.strip()) < 2:
         raise HTTPException(
             status_code=400,
@@ -5529,35 +5482,24 @@ async def generate_avatar(request: AvatarGenerateRequest):
         )
     
     try:
-        # Enhanced prompt for better avatar results
-        enhanced_prompt = f"professional portrait, headshot, detailed face, {request.prompt}, high quality, photorealistic, studio lighting, neutral background"
-        
-        # Submit to fal.ai using the Flux Schnell model (fastest and cheapest)
-        handler = await fal_client.submit_async(
-            "fal-ai/flux/schnell",
-            arguments={
-                "prompt": enhanced_prompt,
-                "image_size": "portrait_4_3",  # Good for avatars
-                "num_images": 1,
-                "enable_safety_checker": True
-            }
+        # Flux Schnell (fastest and cheapest), served from the avatar cache when the prompt was seen before
+        from avatar_service import enhance_avatar_prompt, generate_cached_avatar
+        outcome = await generate_cached_avatar(
+            db, enhance_avatar_prompt(request.prompt), arguments={"enable_safety_checker": True}
         )
         
-        # Get the result
-        result = await handler.get()
-        
-        if result and result.get("images") and len(result["images"]) > 0:
-            avatar_url = result["images"][0]["url"]
+        if outcome["image_url"]:
+            avatar_url = outcome["image_url"]
             logging.info(f"Avatar generated successfully for prompt: {request.prompt}")
             return AvatarResponse(
                 success=True,
                 image_url=avatar_url
             )
         else:
-            logging.warning(f"No avatar generated for prompt: {request.prompt}")
+            logging.warning(f"No avatar generated for prompt: {request.prompt}: {outcome['error']}")
             return AvatarResponse(
                 success=False,
-                error="No image was generated"
+                error="No image was generated" if outcome["error"] == "No image returned" else f"Avatar generation failed: {outcome['error']}"
             )
             
     except Exception as e:
@@ -5567,6 +5509,22 @@ async def generate_avatar(request: AvatarGenerateRequest):
             error=f"Avatar generation failed: {str(e)}"
         )
 
+@api_router.get("/avatars/proxy")
+async def proxy_avatar(request: Request, url: str, size: int = Query(96, ge=1, le=1024), format: str = "auto"):
+    """Serve a square, resized copy of an avatar from the local blob store"""
+    from fastapi.responses import FileResponse
+    from avatar_proxy import AvatarProxyError, CACHE_CONTROL, MEDIA_TYPES, get_avatar_variant, negotiate_format, snap_size
+    try:
+        fmt = negotiate_format(format, request.headers.get("accept", ""))
+        path = await get_avatar_variant(url, snap_size(size), fmt)
+    except AvatarProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logging.error(f"Avatar proxy error for {url}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to load avatar")
+    
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], headers={"Cache-Control": CACHE_CONTROL, "Vary": "Accept"})
+
 async def update_relationships(agents: List[Agent], messages: List[ConversationMessage]):
     """Update agent relationships based on conversation sentiment"""
     # Simple relationship update logic
@@ -5599,6 +5557,8 @@ async def update_relationships(agents: List[Agent], messages: List[ConversationM
                     {"agent1_id": agent1.id, "agent2_id": agent2.id},
                     {"$set": {"score": new_score, "status": status, "updated_at": datetime.utcnow()}}
                 )
+    
+    await invalidate_data_type("relationships")
 
 def calculate_compatibility(agent1: Agent, agent2: Agent) -> float:
     """Calculate compatibility between two agents based on personality traits"""
@@ -5629,6 +5589,7 @@ async def toggle_auto_mode(request: dict):
         }},
         upsert=True
     )
+    await invalidate_data_type("simulation_state")
     
     return {
         "message": f"Auto mode updated - Conversations: {'ON' if auto_conversations else 'OFF'}, Time: {'ON' if auto_time else 'OFF'}",
@@ -5639,13 +5600,13 @@ async def toggle_auto_mode(request: dict):
     }
 
 @api_router.post("/simulation/auto-weekly-report")
-async def setup_auto_weekly_report(request: dict):
+async def setup_auto_weekly_report(request: dict, current_user: User = Depends(get_current_user)):
     """Setup automatic weekly report generation"""
     enabled = request.get("enabled", False)
     interval_hours = request.get("interval_hours", 168)  # Default 7 days = 168 hours
     
     await db.simulation_state.update_one(
-        {},
+        {"user_id": current_user.id},
         {"$set": {
             "auto_weekly_reports": enabled,
             "report_interval_hours": interval_hours,
@@ -5653,6 +5614,7 @@ async def setup_auto_weekly_report(request: dict):
         }},
         upsert=True
     )
+    await invalidate_user_cache(current_user.id, ["simulation_state"])
     
     return {
         "message": f"Auto weekly reports {'enabled' if enabled else 'disabled'}",
@@ -5661,9 +5623,9 @@ async def setup_auto_weekly_report(request: dict):
     }
 
 @api_router.get("/reports/check-auto-generation")
-async def check_auto_report_generation():
+async def check_auto_report_generation(current_user: User = Depends(get_current_user)):
     """Check if it's time to generate an automatic weekly report"""
-    state = await db.simulation_state.find_one()
+    state = await db.simulation_state.find_one({"user_id": current_user.id})
     if not state or not state.get("auto_weekly_reports"):
         return {"should_generate": False, "reason": "Auto reports disabled"}
     
@@ -5685,9 +5647,9 @@ async def check_auto_report_generation():
     }
 
 @api_router.get("/summaries")
-async def get_summaries():
-    """Get all generated summaries with structured formatting"""
-    summaries = await db.summaries.find().sort("created_at", -1).to_list(100)
+async def get_summaries(current_user: User = Depends(get_current_user)):
+    """Get the user's generated summaries with structured formatting"""
+    summaries = await db.summaries.find({"user_id": current_user.id}).sort("created_at", -1).to_list(100)
     
     # Convert MongoDB documents to JSON-serializable format
     processed_summaries = []
@@ -5880,6 +5842,7 @@ async def init_research_station(current_user: User = Depends(get_current_user)):
         
         await db.agents.insert_one(agent.dict())
         created_agents.append(agent)
+    await invalidate_user_cache(current_user.id, ["agents"])
     
     # Start simulation with crypto-focused scenario
     await start_simulation()
@@ -5890,6 +5853,7 @@ async def init_research_station(current_user: User = Depends(get_current_user)):
         {"$set": {"scenario": "A major DeFi protocol has discovered a critical smart contract vulnerability that could drain $500M in user funds. The exploit hasn't been used yet, but blockchain analytics suggest sophisticated actors are probing the system. The team must decide whether to quietly patch the vulnerability, publicly disclose it, or implement an emergency protocol upgrade. Each decision has massive implications for user trust, legal liability, and market stability."}},
         upsert=True
     )
+    await invalidate_data_type("simulation_state")
     
     return {
         "message": "Crypto team agents initialized with rich personalities and expertise", 
@@ -5907,6 +5871,7 @@ async def clear_agent_memory(agent_id: str):
         {"id": agent_id},
         {"$set": {"memory_summary": ""}}
     )
+    await invalidate_user_cache(agent.get("user_id", ""), ["agents"])
     
     return {"message": f"Memory cleared for {agent['name']}", "agent_id": agent_id}
 
@@ -5939,6 +5904,7 @@ async def add_agent_memory(agent_id: str, request: dict):
         {"id": agent_id},
         {"$set": {"memory_summary": updated_memory}}
     )
+    await invalidate_user_cache(agent.get("user_id", ""), ["agents"])
     
     return {
         "message": f"Memory added to {agent['name']}", 
@@ -5998,26 +5964,24 @@ async def send_observer_message(request: dict):
     state = await db.simulation_state.find_one()
     scenario = state.get("scenario", "Crypto project development") if state else "Crypto project development"
     
-    responses = []
+    # Generate every agent's response concurrently, under the same cap and timeout as /observer/send-message
+    semaphore = _observer_semaphores.setdefault("", asyncio.Semaphore(OBSERVER_MAX_CONCURRENCY))
     
-    # Generate response from each agent with staggered timing
-    for i, agent in enumerate(agent_objects):
-        # Add delay to respect rate limits
-        if i > 0:
-            await asyncio.sleep(3)
-        
-        try:
-            response = await generate_observer_response(agent, message, scenario, agent_objects)
-            responses.append({
-                "agent_name": agent.name,
-                "response": response
-            })
-        except Exception as e:
-            logging.error(f"Error generating observer response for {agent.name}: {e}")
-            responses.append({
-                "agent_name": agent.name,
-                "response": f"{agent.name} is processing your message..."
-            })
+    async def respond(agent: Agent):
+        async with semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    generate_observer_response(agent, message, scenario, agent_objects), timeout=OBSERVER_REPLY_TIMEOUT
+                )
+            except Exception as e:
+                logging.error(f"Error generating observer response for {agent.name}: {e!r}")
+                response = f"{agent.name} is processing your message..."
+        return {
+            "agent_name": agent.name,
+            "response": response
+        }
+    
+    responses = await asyncio.gather(*[respond(agent) for agent in agent_objects])
     
     # Store the observer interaction in database
     observer_interaction = {
@@ -6083,7 +6047,7 @@ Respond to the CEO's message in 2-3 sentences. Be professional, authentic to you
         prompt = f"The CEO/Observer has sent this message to the team: '{observer_message}'\n\nRespond professionally based on your expertise and personality."
         
         user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        response = await timed_llm_call("observer_response", "gemini-2.0-flash", chat.send_message(user_message))
         await llm_manager.increment_usage()
         
         return response.strip() if response else f"{agent.name} acknowledges your guidance and will implement accordingly."
@@ -6117,6 +6081,7 @@ async def delete_agent(agent_id: str, current_user: User = Depends(get_current_u
     result = await db.agents.delete_one({"id": agent_id, "user_id": current_user.id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Agent not found")
+    await invalidate_user_cache(current_user.id, ["agents"])
     return {"message": "Agent deleted successfully"}
 
 @api_router.delete("/agents/bulk")
@@ -6147,6 +6112,7 @@ async def delete_agents_bulk(
             "id": {"$in": agent_ids},
             "user_id": current_user.id
         })
+        await invalidate_user_cache(current_user.id, ["agents"])
         
         return {
             "message": f"Successfully deleted {result.deleted_count} agents",
@@ -6202,6 +6168,7 @@ async def delete_agents_bulk_post(
             "id": {"$in": agent_ids},
             "user_id": current_user.id
         })
+        await invalidate_user_cache(current_user.id, ["agents"])
         
         return {
             "message": f"Successfully deleted {result.deleted_count} agents",
@@ -6267,19 +6234,21 @@ async def translate_conversations(request: dict):
                 )
                 
                 if translated_messages:
-                    # Always update - force translation regardless of current language
-                    await db.conversations.update_one(
-                        {"_id": conversation["_id"]},
-                        {
-                            "$set": {
-                                "messages": translated_messages,
-                                "language": target_language,
-                                "original_language": conversation.get("language", "en"),
-                                "translated_at": datetime.utcnow(),
-                                "force_translated": True  # Mark as force translated
-                            }
-                        }
-                    )
+                    # Always update - force translation regardless of current language.
+                    # Only the message texts that changed are written.
+                    round_filter = {"_id": conversation["_id"]}
+                    writer = ConversationWriter(db.conversations)
+                    for index, (original, translated) in enumerate(zip(conversation["messages"], translated_messages)):
+                        if translated.get("message") != original.get("message"):
+                            writer.set_message(round_filter, {"message": translated["message"]},
+                                               message_id=original.get("id"), index=index)
+                    writer.set_fields(round_filter, {
+                        "language": target_language,
+                        "original_language": conversation.get("language", "en"),
+                        "translated_at": datetime.utcnow(),
+                        "force_translated": True  # Mark as force translated
+                    })
+                    await writer.flush()
                     translated_count += 1
                     await llm_manager.increment_usage()
                 else:
@@ -6337,7 +6306,7 @@ Translate to {target_language_name}:"""
             ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(300)
             
             user_message = UserMessage(text=translation_prompt)
-            translated_text = await chat.send_message(user_message)
+            translated_text = await timed_llm_call("translation", "gemini-2.0-flash", chat.send_message(user_message))
             
             # Update message with translation
             translated_message = message.copy()
@@ -6363,6 +6332,7 @@ async def set_language(request: dict):
         {"$set": {"language": language}},
         upsert=True
     )
+    await invalidate_data_type("simulation_state")
     
     return {"message": f"Language set to {language}", "language": language}
 
@@ -6375,6 +6345,7 @@ class TTSRequest(BaseModel):
 @api_router.post("/tts/synthesize")
 async def synthesize_speech(request: TTSRequest):
     """Convert text to speech using Google Cloud TTS with language support"""
+    require_feature("tts")
     try:
         from google.cloud import texttospeech
         import base64
@@ -6549,6 +6520,7 @@ async def create_document(
         
         # Save to database
         await db.documents.insert_one(doc.dict())
+        await invalidate_user_cache(current_user.id, ["documents"])
         
         return {"success": True, "document_id": doc.id, "filename": filename}
         
@@ -6602,6 +6574,26 @@ async def check_document_quality(request: dict, current_user: User = Depends(get
     
     return quality_check
 
+# DocumentMetadata defaults, for listing documents without validating them through the model
+DOCUMENT_METADATA_DEFAULTS = {
+    "authors": [], "status": "Draft", "keywords": [], "simulation_id": "",
+    "conversation_round": 0, "scenario_name": "", "user_id": "",
+}
+DOCUMENT_METADATA_REQUIRED = ("title", "filename", "category", "description")
+
+def document_listing(doc: dict) -> Optional[dict]:
+    """DocumentResponse-shaped dict straight from a stored document, or None if its metadata is incomplete"""
+    metadata = doc.get("metadata")
+    if not metadata or any(not isinstance(metadata.get(field), str) for field in DOCUMENT_METADATA_REQUIRED):
+        return None
+    content = doc.get("content", "")
+    return {
+        "id": doc.get("id", str(doc.get("_id", ""))),
+        "metadata": {**DOCUMENT_METADATA_DEFAULTS, **metadata},
+        "content": content,
+        "preview": content[:200] + "..." if len(content) > 200 else content,
+    }
+
 @api_router.get("/documents")
 async def get_documents(
     category: Optional[str] = None,
@@ -6610,59 +6602,49 @@ async def get_documents(
 ):
     """Get documents from File Center with optional filtering"""
     try:
-        # Build query - include user's own documents AND global simulation documents
-        query = {
-            "$or": [
-                {"metadata.user_id": current_user.id},  # User's personal documents
-                {"user_id": ""}  # Global simulation documents (auto-generated)
-            ]
-        }
+        async def fetch_documents():
+            # Build query - include user's own documents AND global simulation documents
+            query = {
+                "$or": [
+                    {"metadata.user_id": current_user.id},  # User's personal documents
+                    {"user_id": ""}  # Global simulation documents (auto-generated)
+                ]
+            }
         
-        if category:
-            query["metadata.category"] = category
+            if category:
+                query["metadata.category"] = category
             
-        if search:
-            # Update search to work with the user filter
-            search_conditions = [
-                {"metadata.title": {"$regex": search, "$options": "i"}},
-                {"metadata.description": {"$regex": search, "$options": "i"}},
-                {"metadata.keywords": {"$in": [search]}}
-            ]
-            query["$and"] = [
-                {"metadata.user_id": current_user.id},
-                {"$or": search_conditions}
-            ]
-        
-        # Get documents
-        docs = await db.documents.find(query).sort("metadata.created_at", -1).to_list(50)
+            if search:
+                # Update search to work with the user filter
+                search_conditions = [
+                    {"metadata.title": {"$regex": search, "$options": "i"}},
+                    {"metadata.description": {"$regex": search, "$options": "i"}},
+                    {"metadata.keywords": {"$in": [search]}}
+                ]
+                query["$and"] = [
+                    {"metadata.user_id": current_user.id},
+                    {"$or": search_conditions}
+                ]
         
-        # Convert to response format
-        documents = []
-        for doc in docs:
-            try:
-                # Safely access metadata and content with defaults
-                metadata = doc.get("metadata", {})
-                if not metadata:
-                    # Skip documents without proper metadata
-                    logging.warning(f"Document {doc.get('id', 'unknown')} has no metadata, skipping")
+            # Get documents
+            docs = await db.documents.find(query).sort("metadata.created_at", -1).to_list(50)
+            
+            # Project straight to the response shape; skip malformed documents instead of failing the request
+            documents = []
+            for doc in docs:
+                listing = document_listing(doc)
+                if listing is None:
+                    logging.warning(f"Document {doc.get('id', 'unknown')} has incomplete metadata, skipping")
                     continue
-                    
-                content = doc.get("content", "")
-                doc_id = doc.get("id", str(doc.get("_id", "")))
-                
-                doc_response = DocumentResponse(
-                    id=doc_id,
-                    metadata=DocumentMetadata(**metadata),
-                    content=content,
-                    preview=content[:200] + "..." if len(content) > 200 else content
-                )
-                documents.append(doc_response)
-            except Exception as doc_error:
-                logging.error(f"Error processing document {doc.get('id', 'unknown')}: {doc_error}")
-                # Skip malformed documents instead of failing the entire request
-                continue
+                documents.append(listing)
+            
+            return documents
         
-        return documents
+        # Filtered listings get their own entries under the user's documents key
+        suffix = ""
+        if category or search:
+            suffix = hashlib.md5(f"{category or ''}|{search or ''}".encode()).hexdigest()[:16]
+        return json_response(await cached_user_data(current_user.id, "documents", fetch_documents, ttl=120, suffix=suffix))
         
     except Exception as e:
         logging.error(f"Error getting documents: {e}")
@@ -6752,6 +6734,26 @@ async def get_documents_by_scenario(
         logging.error(f"Error getting documents by scenario: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get documents by scenario: {str(e)}")
 
+@api_router.get("/documents/events")
+async def document_events(current_user: User = Depends(get_current_user)):
+    """Stream (NDJSON) an event whenever a background document job for this user finishes"""
+    queue = document_pipeline.subscribe(current_user.id)
+    
+    async def event_lines():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps idle streams inside the proxy's read timeout
+                    yield json.dumps({"type": "keepalive"}) + "\n"
+                    continue
+                yield json.dumps(jsonable_encoder(event)) + "\n"
+        finally:
+            document_pipeline.unsubscribe(queue)
+    
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson", headers=STREAM_HEADERS)
+
 @api_router.get("/documents/{document_id}")
 async def get_document(
     document_id: str,
@@ -6784,6 +6786,65 @@ async def get_document(
         logging.error(f"Error getting document {document_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get document: {str(e)}")
 
+def readable_document_query(document_id: str, user_id: str) -> dict:
+    """The user's own documents plus system-generated ones, as get_document allows"""
+    return {
+        "id": document_id,
+        "$or": [
+            {"metadata.user_id": user_id},
+            {"metadata.user_id": ""},
+            {"metadata.user_id": {"$exists": False}}
+        ]
+    }
+
+@api_router.get("/documents/{document_id}/versions")
+async def get_document_versions(document_id: str, current_user: User = Depends(get_current_user)):
+    """Version history of a document, newest first, with its storage footprint"""
+    doc = await db.documents.find_one(readable_document_query(document_id, current_user.id))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return json_response({
+        "document_id": document_id,
+        "current_version": head_version(doc),
+        "versions": await list_versions(db, doc),
+        "storage": await storage_stats(db, document_id),
+    })
+
+@api_router.get("/documents/{document_id}/versions/{version}")
+async def get_document_version(document_id: str, version: int, current_user: User = Depends(get_current_user)):
+    """Content of one version of a document"""
+    doc = await db.documents.find_one(readable_document_query(document_id, current_user.id))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    try:
+        content = await load_version(db, doc, version)
+    except VersionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"document_id": document_id, "version": version, "current": version == head_version(doc), "content": content}
+
+@api_router.get("/documents/{document_id}/diff")
+async def get_document_diff(
+    document_id: str,
+    from_version: int = Query(..., alias="from"),
+    to_version: Optional[int] = Query(None, alias="to", description="Defaults to the current version"),
+    current_user: User = Depends(get_current_user)
+):
+    """Unified diff between two versions of a document"""
+    doc = await db.documents.find_one(readable_document_query(document_id, current_user.id))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    to_version = to_version or head_version(doc)
+    try:
+        old, new = await load_version(db, doc, from_version), await load_version(db, doc, to_version)
+    except VersionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "document_id": document_id,
+        "from": from_version,
+        "to": to_version,
+        "diff": diff_versions(old, new, f"v{from_version}", f"v{to_version}"),
+    }
+
 @api_router.delete("/documents/{document_id}")
 async def delete_document(
     document_id: str,
@@ -6798,6 +6859,8 @@ async def delete_document(
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Document not found")
+        await db.document_versions.delete_many({"document_id": document_id})
+        await invalidate_user_cache(current_user.id, ["documents"])
         
         return {"success": True, "message": "Document deleted successfully"}
         
@@ -6890,6 +6953,7 @@ async def generate_document_from_conversation(
         
         # Save to database
         await db.documents.insert_one(doc.dict())
+        await invalidate_user_cache(current_user.id, ["documents"])
         
         return {
             "success": True,
@@ -6974,15 +7038,9 @@ The team has voted to approve these changes. Create an updated version of the do
             updated_metadata.updated_at = datetime.utcnow()
             updated_metadata.status = "Draft"  # Reset to draft after update
             
-            await db.documents.update_one(
-                {"id": document_id},
-                {
-                    "$set": {
-                        "content": updated_content,
-                        "metadata": updated_metadata.dict()
-                    }
-                }
-            )
+            await save_revision(db, existing_doc, updated_content, {"metadata": updated_metadata.dict()},
+                                author=proposing_agent.name, reason=proposed_changes)
+            await invalidate_user_cache(current_user.id, ["documents"])
             
             return {
                 "success": True,
@@ -6997,6 +7055,9 @@ The team has voted to approve these changes. Create an updated version of the do
                 "voting_results": voting_results
             }
             
+    except VersionConflict as e:
+        # Someone else revised the document while the team was voting
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logging.error(f"Error proposing document update: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to propose document update: {str(e)}")
@@ -7058,15 +7119,9 @@ Incorporate these improvements into the document while maintaining its overall s
             updated_metadata.updated_at = datetime.utcnow()
             updated_metadata.status = "Updated"
             
-            await db.documents.update_one(
-                {"id": document_id},
-                {
-                    "$set": {
-                        "content": improved_content,
-                        "metadata": updated_metadata.dict()
-                    }
-                }
-            )
+            await save_revision(db, document, improved_content, {"metadata": updated_metadata.dict()},
+                                author=creator_agent.name, reason=suggestion['suggestion'])
+            await invalidate_user_cache(current_user.id, ["documents"])
             
             # Update suggestion status
             await db.document_suggestions.update_one(
@@ -7083,6 +7138,7 @@ Incorporate these improvements into the document while maintaining its overall s
                 {"id": creator_agent_id},
                 {"$set": {"memory_summary": updated_memory}}
             )
+            await invalidate_user_cache(creator_agent.user_id, ["agents"])
             
             return {
                 "success": True,
@@ -7101,6 +7157,9 @@ Incorporate these improvements into the document while maintaining its overall s
                 "message": "Improvement suggestion rejected"
             }
     
+    except VersionConflict as e:
+        # Someone else revised the document while the team was voting
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logging.error(f"Error handling improvement suggestion: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to handle suggestion: {str(e)}")
@@ -7153,7 +7212,7 @@ async def transcribe_speech(
             raise HTTPException(status_code=400, detail="Audio file is empty")
         
         # Transcribe using Whisper
-        result = await whisper_service.transcribe_audio(
+        result = await get_whisper_service().transcribe_audio(
             audio_data, 
             language=language,
             filename=audio.filename or "audio.webm"
@@ -7170,8 +7229,9 @@ async def transcribe_speech(
 @api_router.get("/speech/languages")
 async def get_supported_languages():
     """Get list of supported languages for speech recognition"""
+    require_feature("voice")
     try:
-        languages = whisper_service.get_supported_languages()
+        languages = get_whisper_service().get_supported_languages()
         return {
             "languages": languages,
             "total_count": len(languages),
@@ -7200,7 +7260,7 @@ async def transcribe_scenario_audio(
             raise HTTPException(status_code=400, detail="Audio file is empty")
         
         # Transcribe using Whisper
-        result = await whisper_service.transcribe_audio(
+        result = await get_whisper_service().transcribe_audio(
             audio_data, 
             language=language,
             filename=audio.filename or "scenario_audio.webm"
@@ -7256,7 +7316,7 @@ async def transcribe_and_summarize_for_field(
             raise HTTPException(status_code=400, detail="Audio file is empty")
         
         # Transcribe using Whisper
-        transcription_result = await whisper_service.transcribe_audio(
+        transcription_result = await get_whisper_service().transcribe_audio(
             audio_data, 
             language=language,
             filename=audio.filename or f"{field_type}_audio.webm"
@@ -7313,7 +7373,7 @@ async def create_field_appropriate_text(raw_text: str, field_type: str) -> str:
             text=f"Transform this text to be appropriate for {field_type}: {raw_text}"
         )
         
-        response = await chat.send_message(user_message)
+        response = await timed_llm_call("field_text", "gemini-2.0-flash", chat.send_message(user_message))
         await llm_manager.increment_usage()
         return response.strip()
         
@@ -7347,35 +7407,19 @@ def determine_gender_from_name(first_name: str) -> str:
         return "male"
 
 async def generate_professional_avatar(agent_name: str) -> str:
-    """Generate a professional avatar using FAL AI"""
+    """Take a professional avatar from the pre-generated pool for the name's gender"""
+    if not feature_enabled("avatars"):
+        return ""
     try:
         # Parse first name from full name
         first_name = agent_name.split()[0] if agent_name else "Person"
         gender = determine_gender_from_name(first_name)
         
-        # Create gender-appropriate prompt
-        gender_descriptor = "woman" if gender == "female" else "man"
-        
-        prompt = f"Professional headshot portrait of a {gender_descriptor}, business attire, clean neutral background, high quality, photorealistic, confident expression, professional lighting, facing camera"
-        
-        handler = await fal_client.submit_async(
-            "fal-ai/flux/dev",
-            arguments={
-                "prompt": prompt,
-                "image_size": "portrait_4_3",
-                "num_inference_steps": 28,
-                "guidance_scale": 3.5,
-                "num_images": 1
-            }
-        )
-        
-        result = await handler.get()
-        
-        if result and result.get("images") and len(result["images"]) > 0:
-            return result["images"][0]["url"]
-        else:
-            logging.error(f"No images returned for avatar generation: {agent_name}")
-            return ""
+        from avatar_service import avatar_pool
+        avatar_url = await avatar_pool.pop(db, gender)
+        if not avatar_url:
+            logging.error(f"No avatar available for: {agent_name}")
+        return avatar_url
             
     except Exception as e:
         logging.error(f"Error generating avatar for {agent_name}: {e}")
@@ -7387,6 +7431,7 @@ async def generate_agent_avatar(
     current_user: dict = Depends(get_current_user)
 ):
     """Generate professional avatar for an agent"""
+    require_feature("avatars")
     try:
         agent_name = request.get("agent_name", "")
         if not agent_name:
@@ -7619,6 +7664,8 @@ async def delete_documents_bulk_post(
             "id": {"$in": document_ids},
             "metadata.user_id": current_user.id
         })
+        await db.document_versions.delete_many({"document_id": {"$in": document_ids}})
+        await invalidate_user_cache(current_user.id, ["documents"])
         
         return {
             "message": f"Successfully deleted {result.deleted_count} documents",
@@ -7671,6 +7718,8 @@ async def delete_documents_bulk(
             "id": {"$in": document_ids},
             "metadata.user_id": current_user.id
         })
+        await db.document_versions.delete_many({"document_id": {"$in": document_ids}})
+        await invalidate_user_cache(current_user.id, ["documents"])
         
         return {
             "message": f"Successfully deleted {result.deleted_count} documents",
@@ -7758,25 +7807,27 @@ async def get_comprehensive_analytics(current_user: User = Depends(get_current_u
             {"$limit": 10}
         ]
         
-        scenario_distribution = []
-        async for doc in db.conversation_history.aggregate(scenarios_pipeline):
-            scenario_distribution.append({
-                "scenario": doc["_id"] or "Unnamed Scenario",
-                "count": doc["count"]
-            })
-        
         # 7. API usage over time
         api_usage_pipeline = [
             {"$match": {"date": {"$gte": thirty_days_ago.strftime("%Y-%m-%d")}}},
             {"$sort": {"date": 1}}
         ]
         
+        # Aggregations over a user's whole history may outlast the client's socket timeout
+        scenario_distribution = []
         api_usage_history = []
-        async for doc in db.api_usage.aggregate(api_usage_pipeline):
-            api_usage_history.append({
-                "date": doc["date"],
-                "requests": doc.get("requests_used", 0)
-            })
+        async with long_operation(db):
+            async for doc in db.conversation_history.aggregate(scenarios_pipeline):
+                scenario_distribution.append({
+                    "scenario": doc["_id"] or "Unnamed Scenario",
+                    "count": doc["count"]
+                })
+            
+            async for doc in db.api_usage.aggregate(api_usage_pipeline):
+                api_usage_history.append({
+                    "date": doc["date"],
+                    "requests": doc.get("requests_used", 0)
+                })
         
         # 8. Current API status
         current_usage = await llm_manager.get_usage_today()
@@ -7911,35 +7962,25 @@ async def send_feedback(feedback_data: dict, current_user: User = Depends(get_cu
 @api_router.post("/auth/generate-profile-avatar")
 async def generate_profile_avatar(request: dict, current_user: User = Depends(get_current_user)):
     """Generate professional avatar for user profile using FAL AI"""
+    require_feature("avatars")
     try:
         prompt = request.get("prompt", "")
         user_name = request.get("name", "User")
         
+        from avatar_service import avatar_pool, custom_headshot_prompt, generate_cached_avatar, FLUX_DEV, DEFAULT_IMAGE_SIZE, HEADSHOT_ARGUMENTS
         if not prompt:
-            # Use default professional prompt if none provided
+            # Default professional headshot straight from the pre-generated pool
             first_name = user_name.split()[0] if user_name else "Person"
             gender = determine_gender_from_name(first_name)
-            gender_descriptor = "woman" if gender == "female" else "man"
-            prompt = f"Professional headshot portrait of a {gender_descriptor}, business attire, clean neutral background, high quality, photorealistic, confident expression, professional lighting, facing camera"
+            avatar_url = await avatar_pool.pop(db, gender)
         else:
-            # Use user's custom prompt but make it professional
-            prompt = f"Professional headshot portrait, {prompt}, business attire, clean neutral background, high quality, photorealistic, confident expression, professional lighting, facing camera"
-        
-        handler = await fal_client.submit_async(
-            "fal-ai/flux/dev",
-            arguments={
-                "prompt": prompt,
-                "image_size": "portrait_4_3",
-                "num_inference_steps": 28,
-                "guidance_scale": 3.5,
-                "num_images": 1
-            }
-        )
-        
-        result = await handler.get()
+            # Use user's custom prompt but make it professional; repeated prompts come from the avatar cache
+            outcome = await generate_cached_avatar(
+                db, custom_headshot_prompt(prompt), FLUX_DEV, DEFAULT_IMAGE_SIZE, HEADSHOT_ARGUMENTS
+            )
+            avatar_url = outcome["image_url"]
         
-        if result and result.get("images") and len(result["images"]) > 0:
-            avatar_url = result["images"][0]["url"]
+        if avatar_url:
             return {
                 "success": True,
                 "avatar_url": avatar_url
@@ -8146,6 +8187,7 @@ async def export_user_data(current_user: User = Depends(get_current_user)):
                 "export_date": datetime.utcnow().isoformat()
             },
             "conversations": [],
+            "conversation_rounds": [],
             "agents": [],
             "documents": [],
             "profile": None
@@ -8158,6 +8200,11 @@ async def export_user_data(current_user: User = Depends(get_current_user)):
                 conv['_id'] = str(conv['_id'])
             user_data["conversations"].append(conv)
         
+        # Get simulation rounds, hot and archived
+        for conversation_round in await all_rounds(db, user_id):
+            conversation_round.pop('_id', None)
+            user_data["conversation_rounds"].append(conversation_round)
+        
         # Get saved agents
         agents = await db.saved_agents.find({"user_id": user_id}).to_list(length=1000)
         for agent in agents:
@@ -8190,6 +8237,15 @@ async def export_user_data(current_user: User = Depends(get_current_user)):
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus request metrics labelled by route template
+instrument_app(app)
+
+# Per-request query profiling (QUERY_PROFILER_ENABLED=1)
+install_query_profiler(app)
+
+# Compress large JSON bodies (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, specify your frontend domain
@@ -8205,6 +8261,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    # Idempotent; see indexes.py for the registry. Builds on large collections outlast the socket timeout
+    try:
+        async with long_operation(db):
+            await ensure_indexes(db)
+    except Exception as e:
+        logging.error(f"Error creating indexes: {e}")
+
+@app.on_event("startup")
+async def connect_cache():
+    await cache_manager.connect()
+
+@app.on_event("startup")
+async def start_instrumentation():
+    await monitor.start_monitoring()
+    start_loop_lag_monitor()
+
+@app.on_event("startup")
+async def warm_avatar_pool():
+    # Opt-in: importing the avatar service loads fal_client in every worker
+    if feature_enabled("avatars") and os.environ.get("AVATAR_POOL_WARM_ON_STARTUP", "").lower() in ("1", "true", "yes"):
+        from avatar_service import avatar_pool
+        avatar_pool.warm(db)
+
+@app.on_event("startup")
+async def fail_orphaned_fast_forward_jobs():
+    # Jobs run in-process, so a restart leaves them queued or running forever
+    try:
+        orphaned = await fail_orphaned_jobs(db)
+        if orphaned:
+            logging.warning(f"Marked {orphaned} orphaned fast-forward jobs as failed")
+    except Exception as e:
+        logging.error(f"Error failing orphaned fast-forward jobs: {e}")
+
+@app.on_event("startup")
+async def start_conversation_archiver():
+    conversation_archiver.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    monitor.stop_monitoring()
+    await conversation_archiver.stop()
+    await document_pipeline.stop()
     client.close()
+    await cache_manager.close()
@@ -11,6 +11,7 @@ from cache import cache_manager, cached_user_data, invalidate_user_cache
 from database import db_manager, get_db
 from rate_limiter import rate_limiter, check_rate_limit
 from monitoring import monitor
+from instrumentation import route_template, start_loop_lag_monitor
 import structlog
 
 # Configure structured logging
@@ -41,6 +42,7 @@ async def lifespan(app: FastAPI):
     
     # Start monitoring
     await monitor.start_monitoring()
+    start_loop_lag_monitor()
     
     logger.info("✅ All services initialized successfully")
     
@@ -122,7 +124,7 @@ async def rate_limiting_middleware(request: Request, call_next):
     duration = time.time() - start_time
     monitor.record_request(
         method=request.method,
-        endpoint=path,
+        endpoint=route_template(request),
         status_code=response.status_code,
         duration=duration
     )
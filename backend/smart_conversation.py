@@ -7,6 +7,32 @@ import random
 from typing import List, Dict, Any
 from datetime import datetime
 
+from phrase_matcher import PhraseMatcher
+
+# Theme slot -> (theme keywords in priority order, fallback theme)
+THEME_SLOTS = {
+    # Technology themes
+    "tech_focus": ({
+        "artificial intelligence": ["ai", "artificial intelligence", "machine learning"],
+        "renewable energy": ["solar", "renewable", "energy", "battery"],
+        "blockchain technology": ["blockchain", "crypto", "digital"],
+        "biotechnology": ["bio", "medical", "health", "genetic"],
+    }, "emerging technology"),
+    # Challenge themes
+    "challenge": ({
+        "economic viability": ["investment", "funding", "cost", "economic"],
+        "international coordination": ["cooperation", "global", "international"],
+        "ethical considerations": ["ethical", "privacy", "safety", "risk"],
+    }, "implementation challenges"),
+    # Opportunity themes
+    "opportunity": ({
+        "transformative potential": ["transform", "revolution", "breakthrough"],
+        "scalable impact": ["scale", "global", "widespread"],
+        "sustainability benefits": ["sustainable", "environment", "climate"],
+    }, "innovation opportunities"),
+}
+SCENARIO_THEMES = PhraseMatcher({theme: keywords for themes, _ in THEME_SLOTS.values() for theme, keywords in themes.items()})
+
 class SmartConversationGenerator:
     def __init__(self):
         self.conversation_starters = {
@@ -100,44 +126,11 @@ class SmartConversationGenerator:
     
     def extract_key_themes(self, scenario: str, scenario_name: str) -> Dict[str, str]:
         """Extract key themes and concepts from the scenario"""
-        scenario_lower = scenario.lower()
-        scenario_name_lower = scenario_name.lower()
-        
-        themes = {}
-        
-        # Technology themes
-        if any(word in scenario_lower for word in ["ai", "artificial intelligence", "machine learning"]):
-            themes["tech_focus"] = "artificial intelligence"
-        elif any(word in scenario_lower for word in ["solar", "renewable", "energy", "battery"]):
-            themes["tech_focus"] = "renewable energy"
-        elif any(word in scenario_lower for word in ["blockchain", "crypto", "digital"]):
-            themes["tech_focus"] = "blockchain technology"
-        elif any(word in scenario_lower for word in ["bio", "medical", "health", "genetic"]):
-            themes["tech_focus"] = "biotechnology"
-        else:
-            themes["tech_focus"] = "emerging technology"
-        
-        # Challenge themes
-        if any(word in scenario_lower for word in ["investment", "funding", "cost", "economic"]):
-            themes["challenge"] = "economic viability"
-        elif any(word in scenario_lower for word in ["cooperation", "global", "international"]):
-            themes["challenge"] = "international coordination"
-        elif any(word in scenario_lower for word in ["ethical", "privacy", "safety", "risk"]):
-            themes["challenge"] = "ethical considerations"
-        else:
-            themes["challenge"] = "implementation challenges"
-        
-        # Opportunity themes
-        if any(word in scenario_lower for word in ["transform", "revolution", "breakthrough"]):
-            themes["opportunity"] = "transformative potential"
-        elif any(word in scenario_lower for word in ["scale", "global", "widespread"]):
-            themes["opportunity"] = "scalable impact"
-        elif any(word in scenario_lower for word in ["sustainable", "environment", "climate"]):
-            themes["opportunity"] = "sustainability benefits"
-        else:
-            themes["opportunity"] = "innovation opportunities"
-        
-        return themes
+        found = SCENARIO_THEMES.categories(scenario)
+        return {
+            slot: next((theme for theme in themes if theme in found), fallback)
+            for slot, (themes, fallback) in THEME_SLOTS.items()
+        }
     
     def generate_opening_statement(self, agent: Dict[str, Any], themes: Dict[str, str], scenario_name: str) -> str:
         """Generate an opening statement based on agent archetype and scenario themes"""
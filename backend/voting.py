@@ -0,0 +1,77 @@
+"""
+Agent voting
+Votes are collected concurrently. Consensus is a simple majority of the YES/NO
+votes (abstentions don't count), so the outcome is often settled before every
+agent has answered; by default the remaining in-flight votes are then cancelled.
+
+    VOTING_WAIT_FOR_ALL  false (default) | true - always collect every vote
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+VOTE_CHOICES = ("YES", "NO", "ABSTAIN")
+
+_VOTE_PATTERN = re.compile(r"^\W*(YES|NO|ABSTAIN)\b\W*(.*)$", re.IGNORECASE | re.DOTALL)
+
+def wait_for_all_votes() -> bool:
+    return os.environ.get("VOTING_WAIT_FOR_ALL", "false").lower() == "true"
+
+def parse_vote(response: str) -> Dict[str, str]:
+    """{"vote", "reason"} from a reply like "YES - reason"; anything unparseable abstains"""
+    match = _VOTE_PATTERN.match(response or "")
+    if not match:
+        return {"vote": "ABSTAIN", "reason": (response or "").strip()}
+    return {"vote": match.group(1).upper(), "reason": match.group(2).strip() or match.group(1).upper()}
+
+def decided_outcome(yes_votes: int, no_votes: int, pending: int) -> Optional[bool]:
+    """The consensus if no pending vote can change it, else None"""
+    if yes_votes > no_votes + pending:
+        return True
+    if yes_votes + pending <= no_votes:
+        return False
+    return None
+
+def tally(votes: Dict[str, dict]) -> Tuple[int, int, int]:
+    yes_votes = sum(1 for vote in votes.values() if vote["vote"] == "YES")
+    no_votes = sum(1 for vote in votes.values() if vote["vote"] == "NO")
+    return yes_votes, no_votes, len(votes) - yes_votes - no_votes
+
+async def collect_votes(voters: Dict[str, Callable[[], Awaitable[Dict[str, str]]]],
+                        wait_for_all: Optional[bool] = None) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Run each voter's coroutine concurrently; voters maps name -> zero-arg coroutine
+    returning a parsed vote. Returns (votes by name, names of cancelled voters).
+    """
+    if wait_for_all is None:
+        wait_for_all = wait_for_all_votes()
+
+    tasks = {asyncio.create_task(cast()): name for name, cast in voters.items()}
+    votes: Dict[str, dict] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                try:
+                    votes[name] = task.result()
+                except Exception as e:
+                    logging.error(f"Error getting vote from {name}: {e}")
+                    votes[name] = {"vote": "ABSTAIN", "reason": "Unable to vote due to technical issue"}
+
+            yes_votes, no_votes, _ = tally(votes)
+            if not wait_for_all and pending and decided_outcome(yes_votes, no_votes, len(pending)) is not None:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    cancelled = [name for task, name in tasks.items() if task in pending]
+    # Keep the agents' order rather than completion order
+    return {name: votes[name] for name in voters if name in votes}, cancelled
@@ -0,0 +1,393 @@
+"""
+Whisper speech-to-text service
+Imported on first use (see get_whisper_service in server.py) so workers that never
+transcribe audio don't load it.
+
+Uploads are decoded and resampled to 16 kHz mono PCM by an ffmpeg subprocess over
+pipes, which also reports silences. MP4-family uploads (m4a, mp4, mov) are spooled to a
+temp file first: their index (moov atom) is often at the end, which ffmpeg can only reach
+by seeking. Recordings longer than WHISPER_CHUNK_SECONDS are split at silences, the
+chunks are transcribed concurrently and stitched back together with word timestamps
+shifted to the full recording.
+
+When ffmpeg is missing or cannot decode an upload, the original file is sent to the
+Whisper API as-is (one request, no chunking), as before decoding moved in-process; the
+local backend hands it to openai-whisper through a temp file instead.
+
+    WHISPER_BACKEND          openai (default) | local
+    WHISPER_LOCAL_MODEL      openai-whisper model name for the local backend (default base)
+    WHISPER_CHUNK_SECONDS    target chunk length (default 120)
+    WHISPER_MAX_CONCURRENCY  chunks transcribed at once (default 4)
+    WHISPER_SILENCE_DB       silence threshold (default -35)
+    WHISPER_MIN_SILENCE      minimum silence length in seconds (default 0.4)
+    FFMPEG_BINARY            ffmpeg executable (default ffmpeg)
+"""
+
+import io
+import os
+import re
+import wave
+import tempfile
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+MOCK_API_KEY = "sk-dummy-api-key-for-testing-purposes-only"
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+SEEKABLE_EXTENSIONS = (".m4a", ".mp4", ".mov", ".3gp", ".aac")
+
+class AudioDecodeError(Exception):
+    pass
+
+def needs_seekable_input(data: bytes, filename: str = "") -> bool:
+    """MP4-family containers (ftyp box first), which ffmpeg can't always read from a pipe"""
+    return data[4:8] == b"ftyp" or filename.lower().endswith(SEEKABLE_EXTENSIONS)
+
+async def decode_audio(data: bytes, silence_db: float = -35, min_silence: float = 0.4,
+                       filename: str = "") -> Tuple[bytes, List[Tuple[float, float]]]:
+    """Decode any ffmpeg-readable upload to 16 kHz mono s16le PCM.
+
+    Returns the PCM bytes and the (start, end) seconds of every detected silence. Raises
+    AudioDecodeError when ffmpeg is missing or fails.
+    """
+    spool = None
+    if needs_seekable_input(data, filename):
+        spool = tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1] or ".m4a", delete=False)
+        await asyncio.to_thread(spool.write, data)
+        spool.close()
+    try:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                os.environ.get("FFMPEG_BINARY", "ffmpeg"), "-hide_banner", "-nostdin",
+                "-i", spool.name if spool else "pipe:0",
+                "-af", f"silencedetect=noise={silence_db}dB:d={min_silence}",
+                "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+                stdin=asyncio.subprocess.DEVNULL if spool else asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            raise AudioDecodeError(f"ffmpeg unavailable: {e}")
+        pcm, log = await process.communicate(None if spool else data)
+    finally:
+        if spool:
+            os.unlink(spool.name)
+    if process.returncode != 0 or not pcm:
+        lines = log.decode(errors="replace").strip().splitlines()
+        raise AudioDecodeError(lines[-1] if lines else "ffmpeg failed")
+
+    log_text = log.decode(errors="replace")
+    starts = [max(0.0, float(value)) for value in _SILENCE_START.findall(log_text)]
+    ends = [float(value) for value in _SILENCE_END.findall(log_text)]
+    duration = len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH)
+    # A recording that ends in silence has no final silence_end
+    ends += [duration] * (len(starts) - len(ends))
+    return pcm, list(zip(starts, ends))
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], target_seconds: float) -> List[Tuple[float, float]]:
+    """Split [0, duration] into chunks of about target_seconds, cutting in the middle of silences.
+
+    A chunk is cut at the last silence before its target length; when there is none it is
+    cut hard at 1.5x the target so one long monologue can't produce an oversized chunk.
+    """
+    if duration <= target_seconds:
+        return [(0.0, duration)]
+
+    midpoints = [(start + end) / 2 for start, end in silences]
+    chunks = []
+    chunk_start = 0.0
+    while duration - chunk_start > target_seconds:
+        candidates = [point for point in midpoints if chunk_start + target_seconds / 2 < point <= chunk_start + target_seconds]
+        cut = candidates[-1] if candidates else min(chunk_start + target_seconds * 1.5, duration)
+        chunks.append((chunk_start, cut))
+        chunk_start = cut
+    if duration - chunk_start > 0.05:
+        chunks.append((chunk_start, duration))
+    return chunks
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+def slice_pcm(pcm: bytes, start: float, end: float) -> bytes:
+    return pcm[int(start * SAMPLE_RATE) * SAMPLE_WIDTH:int(end * SAMPLE_RATE) * SAMPLE_WIDTH]
+
+def stitch_transcripts(parts: List[Tuple[float, Dict[str, Any]]], duration: float) -> Dict[str, Any]:
+    """Join chunk transcripts, shifting word timestamps by each chunk's offset"""
+    words = []
+    for offset, part in parts:
+        for word in part.get("words") or []:
+            words.append({"word": word["word"], "start": round(word["start"] + offset, 3), "end": round(word["end"] + offset, 3)})
+    confidences = [part["confidence"] for _, part in parts if part.get("confidence") is not None]
+    return {
+        "success": True,
+        "text": " ".join(part["text"].strip() for _, part in parts if part.get("text", "").strip()),
+        "language": parts[0][1].get("language") if parts else None,
+        "duration": duration,
+        "words": words,
+        "confidence": sum(confidences) / len(confidences) if confidences else None,
+        "chunks": len(parts)
+    }
+
+class TranscriptionBackend:
+    """Transcribes one 16 kHz mono WAV chunk"""
+
+    async def transcribe(self, wav: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        """Return {"text", "language", "words": [{"word", "start", "end"}], "confidence"}"""
+        raise NotImplementedError
+
+    async def transcribe_upload(self, data: bytes, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe the upload as sent, for audio that could not be decoded locally;
+        returns the transcribe() fields plus "duration" """
+        raise NotImplementedError
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """OpenAI's hosted whisper-1 through one shared async client"""
+
+    def __init__(self, api_key: str):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key)
+
+    async def _create(self, file, language: Optional[str]):
+        return await self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=file,
+            language=language if language else None,  # Auto-detect if not specified
+            response_format="verbose_json",
+            timestamp_granularities=["word"]
+        )
+
+    @staticmethod
+    def _result(transcript) -> Dict[str, Any]:
+        return {
+            "text": transcript.text,
+            "language": transcript.language,
+            "words": [{"word": w.word, "start": w.start, "end": w.end} for w in (getattr(transcript, "words", None) or [])],
+            "confidence": getattr(transcript, "avg_logprob", None)
+        }
+
+    async def transcribe(self, wav: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        return self._result(await self._create(("audio.wav", wav, "audio/wav"), language))
+
+    async def transcribe_upload(self, data: bytes, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        transcript = await self._create((filename or "audio.webm", data), language)
+        return {**self._result(transcript), "duration": getattr(transcript, "duration", 0)}
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """openai-whisper running in-process; model calls run in a worker thread"""
+
+    def __init__(self, model_name: str = "base"):
+        import whisper
+        self.model = whisper.load_model(model_name)
+        self._lock = asyncio.Lock()  # One model instance can only run one transcription at a time
+
+    @staticmethod
+    def _result(result) -> Dict[str, Any]:
+        words = [
+            {"word": word["word"].strip(), "start": word["start"], "end": word["end"]}
+            for segment in result.get("segments", []) for word in segment.get("words", [])
+        ]
+        return {"text": result["text"], "language": result.get("language"), "words": words, "confidence": None}
+
+    def _transcribe_sync(self, wav: bytes, language: Optional[str]) -> Dict[str, Any]:
+        import numpy as np
+        with wave.open(io.BytesIO(wav)) as reader:
+            samples = np.frombuffer(reader.readframes(reader.getnframes()), dtype=np.int16)
+        return self._result(self.model.transcribe(samples.astype(np.float32) / 32768.0, language=language, word_timestamps=True))
+
+    def _transcribe_upload_sync(self, data: bytes, filename: str, language: Optional[str]) -> Dict[str, Any]:
+        # openai-whisper loads files through its own ffmpeg call, which takes a path
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1] or ".webm") as upload:
+            upload.write(data)
+            upload.flush()
+            result = self.model.transcribe(upload.name, language=language, word_timestamps=True)
+        segments = result.get("segments") or []
+        return {**self._result(result), "duration": segments[-1]["end"] if segments else 0}
+
+    async def transcribe(self, wav: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        async with self._lock:
+            return await asyncio.to_thread(self._transcribe_sync, wav, language)
+
+    async def transcribe_upload(self, data: bytes, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        async with self._lock:
+            return await asyncio.to_thread(self._transcribe_upload_sync, data, filename, language)
+
+def create_transcription_backend() -> Optional[TranscriptionBackend]:
+    """Backend selected by WHISPER_BACKEND, or None when no real backend is configured"""
+    if os.environ.get("WHISPER_BACKEND", "openai").lower() == "local":
+        return LocalWhisperBackend(os.environ.get("WHISPER_LOCAL_MODEL", "base"))
+
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key or api_key == MOCK_API_KEY:
+        logging.warning("OPENAI_API_KEY not found in environment variables - using mock transcription")
+        return None
+    logging.info("OpenAI Whisper service initialized")
+    return OpenAIWhisperBackend(api_key)
+
+class WhisperService:
+    def __init__(self, backend: Optional[TranscriptionBackend] = None):
+        self.backend = backend if backend is not None else create_transcription_backend()
+        self.chunk_seconds = float(os.environ.get("WHISPER_CHUNK_SECONDS", "120"))
+        self.max_concurrency = int(os.environ.get("WHISPER_MAX_CONCURRENCY", "4"))
+        self.silence_db = float(os.environ.get("WHISPER_SILENCE_DB", "-35"))
+        self.min_silence = float(os.environ.get("WHISPER_MIN_SILENCE", "0.4"))
+    
+    async def transcribe_audio(self, audio_file: bytes, language: str = None, filename: str = "audio.webm") -> Dict[str, Any]:
+        """Transcribe audio with Whisper, splitting long recordings into concurrent chunks"""
+        if self.backend is None:
+            # Mock transcription for demo/testing when no real API key is available
+            logging.warning("Using mock transcription - no real OpenAI API key configured")
+            return {
+                "success": True,
+                "text": "This is a mock transcription. Your voice input was recorded successfully, but a real OpenAI API key is needed for actual transcription.",
+                "language": "en",
+                "duration": 5.0,
+                "confidence": 0.95
+            }
+        
+        try:
+            pcm, silences = await decode_audio(audio_file, self.silence_db, self.min_silence, filename)
+        except AudioDecodeError as e:
+            logging.warning(f"Could not decode {filename} ({e}) - sending the original upload")
+            return await self.transcribe_original(audio_file, language, filename)
+        
+        duration = len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH)
+        chunks = plan_chunks(duration, silences, self.chunk_seconds)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def transcribe_chunk(start: float, end: float):
+            async with semaphore:
+                return start, await self.backend.transcribe(pcm_to_wav(slice_pcm(pcm, start, end)), language)
+        
+        try:
+            parts = await asyncio.gather(*[transcribe_chunk(start, end) for start, end in chunks])
+        except Exception as e:
+            logging.error(f"Error transcribing audio: {e}")
+            raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+        
+        return stitch_transcripts(list(parts), duration)
+    
+    async def transcribe_original(self, audio_file: bytes, language: Optional[str], filename: str) -> Dict[str, Any]:
+        """Fallback: direct transcription without conversion, in one request"""
+        try:
+            result = await self.backend.transcribe_upload(audio_file, filename, language)
+        except Exception as e:
+            logging.error(f"Direct transcription failed: {e}")
+            raise HTTPException(status_code=400, detail="Invalid audio format. Please try recording again.")
+        return {"success": True, **result, "chunks": 1}
+    
+    def get_supported_languages(self) -> List[Dict[str, str]]:
+        """Get list of supported languages for Whisper"""
+        return [
+            {"code": "af", "name": "Afrikaans"},
+            {"code": "am", "name": "Amharic"},
+            {"code": "ar", "name": "Arabic"},
+            {"code": "as", "name": "Assamese"},
+            {"code": "az", "name": "Azerbaijani"},
+            {"code": "ba", "name": "Bashkir"},
+            {"code": "be", "name": "Belarusian"},
+            {"code": "bg", "name": "Bulgarian"},
+            {"code": "bn", "name": "Bengali"},
+            {"code": "bo", "name": "Tibetan"},
+            {"code": "br", "name": "Breton"},
+            {"code": "bs", "name": "Bosnian"},
+            {"code": "ca", "name": "Catalan"},
+            {"code": "cs", "name": "Czech"},
+            {"code": "cy", "name": "Welsh"},
+            {"code": "da", "name": "Danish"},
+            {"code": "de", "name": "German"},
+            {"code": "el", "name": "Greek"},
+            {"code": "en", "name": "English"},
+            {"code": "es", "name": "Spanish"},
+            {"code": "et", "name": "Estonian"},
+            {"code": "eu", "name": "Basque"},
+            {"code": "fa", "name": "Persian"},
+            {"code": "fi", "name": "Finnish"},
+            {"code": "fo", "name": "Faroese"},
+            {"code": "fr", "name": "French"},
+            {"code": "gl", "name": "Galician"},
+            {"code": "gu", "name": "Gujarati"},
+            {"code": "ha", "name": "Hausa"},
+            {"code": "haw", "name": "Hawaiian"},
+            {"code": "he", "name": "Hebrew"},
+            {"code": "hi", "name": "Hindi"},
+            {"code": "hr", "name": "Croatian"},  # ✅ Croatian support!
+            {"code": "ht", "name": "Haitian Creole"},
+            {"code": "hu", "name": "Hungarian"},
+            {"code": "hy", "name": "Armenian"},
+            {"code": "id", "name": "Indonesian"},
+            {"code": "is", "name": "Icelandic"},
+            {"code": "it", "name": "Italian"},
+            {"code": "ja", "name": "Japanese"},
+            {"code": "jw", "name": "Javanese"},
+            {"code": "ka", "name": "Georgian"},
+            {"code": "kk", "name": "Kazakh"},
+            {"code": "km", "name": "Khmer"},
+            {"code": "kn", "name": "Kannada"},
+            {"code": "ko", "name": "Korean"},
+            {"code": "la", "name": "Latin"},
+            {"code": "lb", "name": "Luxembourgish"},
+            {"code": "ln", "name": "Lingala"},
+            {"code": "lo", "name": "Lao"},
+            {"code": "lt", "name": "Lithuanian"},
+            {"code": "lv", "name": "Latvian"},
+            {"code": "mg", "name": "Malagasy"},
+            {"code": "mi", "name": "Maori"},
+            {"code": "mk", "name": "Macedonian"},
+            {"code": "ml", "name": "Malayalam"},
+            {"code": "mn", "name": "Mongolian"},
+            {"code": "mr", "name": "Marathi"},
+            {"code": "ms", "name": "Malay"},
+            {"code": "mt", "name": "Maltese"},
+            {"code": "my", "name": "Myanmar"},
+            {"code": "ne", "name": "Nepali"},
+            {"code": "nl", "name": "Dutch"},
+            {"code": "nn", "name": "Nynorsk"},
+            {"code": "no", "name": "Norwegian"},
+            {"code": "oc", "name": "Occitan"},
+            {"code": "pa", "name": "Punjabi"},
+            {"code": "pl", "name": "Polish"},
+            {"code": "ps", "name": "Pashto"},
+            {"code": "pt", "name": "Portuguese"},
+            {"code": "ro", "name": "Romanian"},
+            {"code": "ru", "name": "Russian"},
+            {"code": "sa", "name": "Sanskrit"},
+            {"code": "sd", "name": "Sindhi"},
+            {"code": "si", "name": "Sinhala"},
+            {"code": "sk", "name": "Slovak"},
+            {"code": "sl", "name": "Slovenian"},
+            {"code": "sn", "name": "Shona"},
+            {"code": "so", "name": "Somali"},
+            {"code": "sq", "name": "Albanian"},
+            {"code": "sr", "name": "Serbian"},
+            {"code": "su", "name": "Sundanese"},
+            {"code": "sv", "name": "Swedish"},
+            {"code": "sw", "name": "Swahili"},
+            {"code": "ta", "name": "Tamil"},
+            {"code": "te", "name": "Telugu"},
+            {"code": "tg", "name": "Tajik"},
+            {"code": "th", "name": "Thai"},
+            {"code": "tk", "name": "Turkmen"},
+            {"code": "tl", "name": "Tagalog"},
+            {"code": "tr", "name": "Turkish"},
+            {"code": "tt", "name": "Tatar"},
+            {"code": "uk", "name": "Ukrainian"},
+            {"code": "ur", "name": "Urdu"},
+            {"code": "uz", "name": "Uzbek"},
+            {"code": "vi", "name": "Vietnamese"},
+            {"code": "yi", "name": "Yiddish"},
+            {"code": "yo", "name": "Yoruba"},
+            {"code": "zh", "name": "Chinese"}
+        ]
+
+# Initialize Whisper service
+whisper_service = WhisperService()
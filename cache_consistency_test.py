@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Cache consistency tests for the polled endpoints.
+
+Every read below runs twice around a mutation: the first read warms the
+per-user cache entry, the mutation must invalidate it, and the second read
+must reflect the change. Any stale read fails the test.
+"""
+import requests
+import os
+import sys
+import uuid
+from dotenv import load_dotenv
+
+# Load environment variables from frontend/.env
+load_dotenv('/app/frontend/.env')
+
+# Get the backend URL from environment variables
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL')
+if not BACKEND_URL:
+    print("Error: REACT_APP_BACKEND_URL not found in environment variables")
+    sys.exit(1)
+
+API_URL = f"{BACKEND_URL}/api"
+print(f"Using API URL: {API_URL}")
+
+# Test results tracking
+test_results = {
+    "passed": 0,
+    "failed": 0,
+    "tests": []
+}
+
+def record(test_name, passed, detail=""):
+    """Record the outcome of a single consistency check"""
+    result = "PASSED" if passed else "FAILED"
+    print(f"{'✅' if passed else '❌'} {test_name}{f' - {detail}' if detail else ''}")
+    test_results["tests"].append({"name": test_name, "result": result, "detail": detail})
+    if passed:
+        test_results["passed"] += 1
+    else:
+        test_results["failed"] += 1
+    return passed
+
+def register_user(label):
+    """Register a throwaway user and return auth headers"""
+    suffix = uuid.uuid4().hex[:8]
+    response = requests.post(f"{API_URL}/auth/register", json={
+        "email": f"cache.{label}.{suffix}@example.com",
+        "password": "CacheTest123",
+        "name": f"Cache {label.title()} {suffix}"
+    })
+    if response.status_code != 200:
+        print(f"Registration failed for {label}: {response.status_code} {response.text}")
+        sys.exit(1)
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def get_json(path, headers, params=None):
+    response = requests.get(f"{API_URL}{path}", headers=headers, params=params)
+    response.raise_for_status()
+    return response.json()
+
+def ids_of(items):
+    return {item["id"] for item in items}
+
+def test_agents(headers, other_headers):
+    """Agent create/update/delete must be visible on the next poll"""
+    print("\n" + "="*80 + "\nAGENTS\n" + "="*80)
+    get_json("/agents", headers)  # warm cache
+
+    agent = requests.post(f"{API_URL}/agents", headers=headers, json={
+        "name": "Cache Probe",
+        "archetype": "scientist",
+        "goal": "Verify cache invalidation",
+        "avatar_url": "https://example.com/avatar.png"
+    }).json()
+    record("GET /agents sees created agent", agent["id"] in ids_of(get_json("/agents", headers)))
+    record("Other user's GET /agents is isolated", agent["id"] not in ids_of(get_json("/agents", other_headers)))
+
+    requests.put(f"{API_URL}/agents/{agent['id']}", headers=headers, json={**agent, "name": "Cache Probe Renamed"})
+    names = {a["id"]: a["name"] for a in get_json("/agents", headers)}
+    record("GET /agents sees renamed agent", names.get(agent["id"]) == "Cache Probe Renamed", names.get(agent["id"], ""))
+
+    requests.put(f"{API_URL}/agents/{agent['id']}/expertise", headers=headers, json={"expertise": "Cache coherence"})
+    expertise = {a["id"]: a["expertise"] for a in get_json("/agents", headers)}
+    record("GET /agents sees expertise update", expertise.get(agent["id"]) == "Cache coherence")
+
+    requests.delete(f"{API_URL}/agents/{agent['id']}", headers=headers)
+    record("GET /agents drops deleted agent", agent["id"] not in ids_of(get_json("/agents", headers)))
+
+    created = []
+    for i in range(2):
+        created.append(requests.post(f"{API_URL}/agents", headers=headers, json={
+            "name": f"Bulk Probe {i}",
+            "archetype": "leader",
+            "goal": "Be bulk deleted",
+            "avatar_url": "https://example.com/avatar.png"
+        }).json()["id"])
+    get_json("/agents", headers)  # warm cache with both agents
+    requests.post(f"{API_URL}/agents/bulk-delete", headers=headers, json={"agent_ids": created})
+    record("GET /agents drops bulk-deleted agents", not (set(created) & ids_of(get_json("/agents", headers))))
+
+def test_saved_agents(headers):
+    """Saved agent create/update/favorite/delete must be visible on the next poll"""
+    print("\n" + "="*80 + "\nSAVED AGENTS\n" + "="*80)
+    get_json("/saved-agents", headers)
+
+    saved = requests.post(f"{API_URL}/saved-agents", headers=headers, json={
+        "name": "Saved Probe",
+        "archetype": "optimist",
+        "goal": "Verify favorites invalidation"
+    }).json()
+    record("GET /saved-agents sees saved agent", saved["id"] in ids_of(get_json("/saved-agents", headers)))
+
+    requests.put(f"{API_URL}/saved-agents/{saved['id']}/favorite", headers=headers)
+    favorites = {a["id"]: a["is_favorite"] for a in get_json("/saved-agents", headers)}
+    record("GET /saved-agents sees favorite toggle", favorites.get(saved["id"]) is True)
+
+    requests.put(f"{API_URL}/saved-agents/{saved['id']}", headers=headers, json={
+        "name": "Saved Probe Updated",
+        "archetype": "optimist",
+        "goal": "Verify update invalidation",
+        "is_favorite": False
+    })
+    names = {a["id"]: a["name"] for a in get_json("/saved-agents", headers)}
+    record("GET /saved-agents sees update", names.get(saved["id"]) == "Saved Probe Updated")
+
+    requests.delete(f"{API_URL}/saved-agents/{saved['id']}", headers=headers)
+    record("GET /saved-agents drops deleted agent", saved["id"] not in ids_of(get_json("/saved-agents", headers)))
+
+def test_documents(headers):
+    """Document create/delete must be visible in filtered and unfiltered listings"""
+    print("\n" + "="*80 + "\nDOCUMENTS\n" + "="*80)
+    get_json("/documents", headers)
+    get_json("/documents", headers, params={"category": "Reference"})
+
+    doc_ids = []
+    for i in range(2):
+        response = requests.post(f"{API_URL}/documents/create", headers=headers, json={
+            "title": f"Cache Probe Document {i}",
+            "category": "Reference",
+            "description": "Consistency check",
+            "content": "# Probe\n\nThis document exists to test cache invalidation."
+        }).json()
+        doc_ids.append(response["document_id"])
+
+    record("GET /documents sees created documents", set(doc_ids) <= ids_of(get_json("/documents", headers)))
+    record("Filtered GET /documents sees created documents",
+           set(doc_ids) <= ids_of(get_json("/documents", headers, params={"category": "Reference"})))
+
+    requests.delete(f"{API_URL}/documents/{doc_ids[0]}", headers=headers)
+    record("GET /documents drops deleted document", doc_ids[0] not in ids_of(get_json("/documents", headers)))
+
+    requests.post(f"{API_URL}/documents/bulk-delete", headers=headers, json={"document_ids": doc_ids[1:]})
+    record("Filtered GET /documents drops bulk-deleted document",
+           doc_ids[1] not in ids_of(get_json("/documents", headers, params={"category": "Reference"})))
+
+def test_simulation_state(headers):
+    """Scenario, pause/resume and start must be visible on the next poll"""
+    print("\n" + "="*80 + "\nSIMULATION STATE\n" + "="*80)
+    get_json("/simulation/state", headers)
+
+    scenario = f"Cache probe scenario {uuid.uuid4().hex[:6]}"
+    requests.post(f"{API_URL}/simulation/set-scenario", headers=headers,
+                  json={"scenario": scenario, "scenario_name": "Cache Probe"})
+    record("GET /simulation/state sees new scenario", get_json("/simulation/state", headers).get("scenario") == scenario)
+
+    requests.post(f"{API_URL}/simulation/pause", headers=headers)
+    record("GET /simulation/state sees pause", get_json("/simulation/state", headers).get("is_active") is False)
+
+    requests.post(f"{API_URL}/simulation/resume", headers=headers)
+    record("GET /simulation/state sees resume", get_json("/simulation/state", headers).get("is_active") is True)
+
+    state_before = get_json("/simulation/state", headers)
+    requests.post(f"{API_URL}/simulation/start", headers=headers, json={"time_limit_hours": 2, "time_limit_display": "2 hours"})
+    state_after = get_json("/simulation/state", headers)
+    record("GET /simulation/state sees restart",
+           state_after.get("id") != state_before.get("id") and state_after.get("time_limit_hours") == 2)
+
+def test_archetypes():
+    """Archetypes are static and served with cache headers"""
+    print("\n" + "="*80 + "\nARCHETYPES\n" + "="*80)
+    response = requests.get(f"{API_URL}/archetypes")
+    record("GET /archetypes returns archetypes", response.status_code == 200 and len(response.json()) > 0)
+    record("GET /archetypes sets Cache-Control", "max-age" in response.headers.get("Cache-Control", ""))
+
+def print_summary():
+    """Print a summary of all test results"""
+    print("\n" + "="*80)
+    print(f"TEST SUMMARY: {test_results['passed']} passed, {test_results['failed']} failed")
+    print("="*80)
+    for i, test in enumerate(test_results["tests"], 1):
+        result_symbol = "✅" if test["result"] == "PASSED" else "❌"
+        print(f"{i}. {result_symbol} {test['name']}")
+    print("="*80)
+    overall_result = "PASSED" if test_results["failed"] == 0 else "FAILED"
+    print(f"OVERALL RESULT: {overall_result}")
+    print("="*80)
+
+if __name__ == "__main__":
+    user_headers = register_user("primary")
+    other_headers = register_user("secondary")
+
+    test_agents(user_headers, other_headers)
+    test_saved_agents(user_headers)
+    test_documents(user_headers)
+    test_simulation_state(user_headers)
+    test_archetypes()
+
+    print_summary()
+    sys.exit(0 if test_results["failed"] == 0 else 1)
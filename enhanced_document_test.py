@@ -16,7 +16,8 @@ import numpy as np
 sys.path.append('/app/backend')
 
 # Import the modules to test
-from enhanced_document_system import DocumentQualityGate, ProfessionalDocumentFormatter, ChartGenerator
+from enhanced_document_system import DocumentQualityGate, ProfessionalDocumentFormatter
+from chart_service import ChartGenerator
 
 # Test results tracking
 test_results = {
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useAuth } from './AuthContext';
 import axios from 'axios';
 import AgentCreateModal from './AgentCreateModal';
+import { avatarThumbnail } from './avatarUrl';
 
 const API = process.env.REACT_APP_BACKEND_URL ? `${process.env.REACT_APP_BACKEND_URL}/api` : 'http://localhost:8001/api';
 
@@ -2032,7 +2033,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
                         <div className="flex items-start space-x-4">
                           <div className="relative">
                             <img
-                              src={agent.avatar}
+                              src={avatarThumbnail(agent.avatar, 64)}
                               alt={agent.name}
                               className="w-16 h-16 rounded-full object-cover ring-2 ring-purple-100 group-hover:ring-purple-300 transition-all"
                               onError={(e) => {
@@ -2135,7 +2136,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
                         {team.agents.slice(0, 3).map((agent, index) => (
                           <div key={agent.id} className="flex items-center space-x-3 text-sm">
                             <img
-                              src={agent.avatar}
+                              src={avatarThumbnail(agent.avatar, 32)}
                               alt={agent.name}
                               className="w-8 h-8 rounded-full object-cover"
                               onError={(e) => {
@@ -2262,7 +2263,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
                           <div className="p-4">
                             <div className="flex items-start space-x-3">
                               <img
-                                src={agent.avatar_url || `data:image/svg+xml,${encodeURIComponent(`
+                                src={avatarThumbnail(agent.avatar_url, 48) || `data:image/svg+xml,${encodeURIComponent(`
                                   <svg width="48" height="48" viewBox="0 0 48 48" fill="none" xmlns="http://www.w3.org/2000/svg">
                                     <circle cx="24" cy="24" r="24" fill="#E5E7EB"/>
                                     <circle cx="24" cy="20" r="8" fill="#9CA3AF"/>
@@ -2345,7 +2346,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
                       <div className="p-4">
                         <div className="flex items-start space-x-3">
                           <img
-                            src={agent.avatar}
+                            src={avatarThumbnail(agent.avatar, 48)}
                             alt={agent.name}
                             className="w-12 h-12 rounded-full object-cover"
                             onError={(e) => {
@@ -2480,7 +2481,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
                         <div className="p-4">
                           <div className="flex items-start space-x-3">
                             <img
-                              src={agent.avatar}
+                              src={avatarThumbnail(agent.avatar, 48)}
                               alt={agent.name}
                               className="w-12 h-12 rounded-full object-cover"
                               onError={(e) => {
@@ -2582,7 +2583,7 @@ const AgentLibrary = ({ onAddAgent, onRemoveAgent }) => {
               </button>
               <div className="flex items-start space-x-4">
                 <img
-                  src={selectedAgentDetails.avatar}
+                  src={avatarThumbnail(selectedAgentDetails.avatar, 64)}
                   alt={selectedAgentDetails.name}
                   className="w-16 h-16 rounded-full object-cover border-2 border-white"
                 />
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { motion, AnimatePresence } from 'framer-motion';
+import { avatarThumbnail } from './avatarUrl';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -183,7 +184,7 @@ const ModernHomePage = () => {
                 whileHover={{ scale: 1.02 }}
               >
                 <img
-                  src={agent.avatar_url}
+                  src={avatarThumbnail(agent.avatar_url, 40)}
                   alt={agent.name}
                   className="w-10 h-10 rounded-full border-2 border-white shadow-sm"
                 />
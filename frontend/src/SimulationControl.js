@@ -3,6 +3,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import axios from 'axios';
 import { useAuth } from './AuthContext';
 import AgentCreateModal from './AgentCreateModal';
+import { avatarThumbnail } from './avatarUrl';
 
 const API = process.env.REACT_APP_BACKEND_URL ? `${process.env.REACT_APP_BACKEND_URL}/api` : 'http://localhost:8001/api';
 
@@ -567,37 +568,61 @@ const SimulationControl = ({ setActiveTab, activeTab }) => {
     setLoading(true);
     try {
       console.log('🔍 Sending observer message:', newMessage);
-      const response = await axios.post(`${API}/observer/send-message`, {
-        observer_message: newMessage
-      }, {
-        headers: { Authorization: `Bearer ${token}` }
+      // Replies are streamed as NDJSON events, each shown as soon as that agent has answered
+      const response = await fetch(`${API}/observer/send-message?stream=true`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${token}`
+        },
+        body: JSON.stringify({ observer_message: newMessage })
       });
-      
-      console.log('✅ Observer message sent successfully:', response.data);
+      if (!response.ok) {
+        throw new Error(`Observer message failed with status ${response.status}`);
+      }
       
       setNewMessage('');
+      const pendingId = `observer-pending-${Date.now()}`;
       
-      // Add the new observer conversation directly to the existing conversations
-      // instead of refreshing everything
-      if (response.data && response.data.agent_responses) {
-        setConversations(prevConversations => {
-          const newConversations = [...prevConversations, response.data.agent_responses];
-          return newConversations;
-        });
-        
-        // Reset loading state immediately after sending, before displaying messages
-        setLoading(false);
-        
-        // Display messages one by one with staggered timing (async, non-blocking)
-        displayMessagesWithDelay(response.data.agent_responses);
-      } else {
-        setLoading(false);
-      }
+      const handleEvent = (event) => {
+        if (event.type === 'observer') {
+          setConversations(prevConversations => [
+            ...prevConversations,
+            { id: pendingId, round_number: '…', time_period: 'Observer Input', scenario_name: 'Observer Guidance', messages: [event.message] }
+          ]);
+          // The observer's own message is on screen - stop blocking the input
+          setLoading(false);
+        } else if (event.type === 'reply') {
+          setConversations(prevConversations => prevConversations.map(conversation =>
+            conversation.id === pendingId
+              ? { ...conversation, messages: [...conversation.messages, event.message] }
+              : conversation
+          ));
+        } else if (event.type === 'done') {
+          console.log('✅ Observer message sent successfully:', event.agent_responses);
+          setConversations(prevConversations => prevConversations.map(conversation =>
+            conversation.id === pendingId ? event.agent_responses : conversation
+          ));
+        } else if (event.type === 'error') {
+          console.error('Observer replies failed:', event.detail);
+        }
+        setTimeout(() => {
+          messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+        }, 100);
+      };
       
-      // Scroll to bottom after new message
-      setTimeout(() => {
-        messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-      }, 100);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      setLoading(false);
       
     } catch (error) {
       console.error('Failed to send observer message:', error);
@@ -1061,8 +1086,8 @@ const SimulationControl = ({ setActiveTab, activeTab }) => {
     setLoading(true);
     try {
       if (!fastForwardMode) {
-        // Start fast forward
-        await axios.post(`${API}/simulation/fast-forward`, {
+        // Start fast forward - it runs as a background job, so poll until it finishes
+        const response = await axios.post(`${API}/simulation/fast-forward`, {
           target_days: 1,
           conversations_per_period: 2
         }, {
@@ -1070,6 +1095,20 @@ const SimulationControl = ({ setActiveTab, activeTab }) => {
         });
         setFastForwardMode(true);
         console.log('✅ Fast forward activated');
+        
+        let job = response.data;
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise(resolve => setTimeout(resolve, 2000));
+          const progress = await axios.get(`${API}/simulation/fast-forward/${job.job_id || job.id}`, {
+            headers: { Authorization: `Bearer ${token}` }
+          });
+          job = progress.data;
+          console.log(`⏩ Fast forward: ${job.rounds_done}/${job.rounds_total} rounds`);
+          await fetchConversations();
+        }
+        if (job.status === 'failed') {
+          throw new Error(job.error || 'Fast forward job failed');
+        }
       } else {
         // Fast forward is automatic, no need to toggle off
         setFastForwardMode(false);
@@ -1137,14 +1176,16 @@ const SimulationControl = ({ setActiveTab, activeTab }) => {
       
       const allConversations = response.data || [];
       
-      // Only update if there are actually new conversations
-      if (allConversations.length > conversations.length) {
+      // The endpoint returns a window of the newest rounds, so compare by id rather than length
+      const knownIds = new Set(conversations.map(c => c.id));
+      if (allConversations.some(c => !knownIds.has(c.id))) {
         // Use functional update to ensure we're working with latest state
         setConversations(prevConversations => {
+          const prevIds = new Set(prevConversations.map(c => c.id));
+          const newConversations = allConversations.filter(c => !prevIds.has(c.id));
           // Check if we actually have new conversations to avoid unnecessary updates
-          if (allConversations.length > prevConversations.length) {
+          if (newConversations.length > 0) {
             // Only add the new conversations, don't replace everything
-            const newConversations = allConversations.slice(prevConversations.length);
             const updatedConversations = [...prevConversations, ...newConversations];
             
             // Smooth scroll to new content only if user is near bottom
@@ -1326,7 +1367,7 @@ const SimulationControl = ({ setActiveTab, activeTab }) => {
                       <div className={`w-8 h-8 rounded-full bg-gradient-to-br ${getArchetypeColor(agent.archetype)} flex items-center justify-center text-white text-xs font-semibold shadow-lg`}>
                         {agent.avatar_url ? (
                           <img 
-                            src={agent.avatar_url} 
+                            src={avatarThumbnail(agent.avatar_url, 32)} 
                             alt={agent.name}
                             className="w-full h-full rounded-full object-cover"
                           />
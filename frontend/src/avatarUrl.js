@@ -0,0 +1,11 @@
+const API = process.env.REACT_APP_BACKEND_URL ? `${process.env.REACT_APP_BACKEND_URL}/api` : 'http://localhost:8001/api';
+
+// Route remote avatars through the backend proxy, which serves small WebP/AVIF
+// thumbnails instead of the full-size portrait. `size` is the displayed size in
+// CSS pixels; twice that is requested so avatars stay sharp on high-DPI screens.
+export const avatarThumbnail = (url, size) => {
+  if (!url || !url.startsWith('https://')) {
+    return url;
+  }
+  return `${API}/avatars/proxy?url=${encodeURIComponent(url)}&size=${size * 2}`;
+};
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Observer AI platform
+Seeds a dedicated MongoDB database with realistic datasets (users with agents,
+deep conversation histories and many documents), then measures p50/p95/p99
+latency and throughput for the conversation, observer, list, analytics and
+admin endpoints.
+
+Start the backend against a local mongod, the benchmark database and the fake
+LLM provider (see backend/llm_providers.py), then run the suite:
+
+    DB_NAME=observer_benchmark LLM_PROVIDER=fake FAKE_LLM_LATENCY=lognormal:800,0.5 \\
+        uvicorn server:app --port 8001            # from backend/
+    python scripts/benchmark_suite.py --scales 10,100,1000 --output bench.json
+    python scripts/benchmark_suite.py --scales 100 --output after.json --compare bench.json
+    python scripts/capacity_calculator.py 5000 --benchmark bench.json
+"""
+
+import asyncio
+import aiohttp
+import time
+import json
+import random
+import uuid
+import argparse
+from datetime import datetime, timedelta
+
+import bcrypt
+from pymongo import MongoClient
+
+from poll_benchmark import percentile
+
+ADMIN_EMAIL = "dino@cytonic.com"  # Must match ADMIN_EMAIL in backend/server.py
+PASSWORD = "BenchmarkPassword123"
+ARCHETYPES = ["scientist", "artist", "leader", "skeptic", "optimist", "introvert", "adventurer", "mediator", "researcher"]
+DOCUMENT_CATEGORIES = ["Protocol", "Training", "Research", "Equipment", "Budget"]
+TIME_PERIODS = ["morning", "afternoon", "evening"]
+SEEDED_COLLECTIONS = ["users", "agents", "conversations", "documents", "simulation_state", "observer_messages", "relationships"]
+
+# name -> (method, path, needs admin, JSON body)
+BENCHMARK_ENDPOINTS = {
+    "conversation_generate": ("POST", "/api/conversation/generate", False, None),
+    "observer_send_message": ("POST", "/api/observer/send-message", False, {"observer_message": "What is the plan for next week?"}),
+    "conversations": ("GET", "/api/conversations", False, None),
+    "documents": ("GET", "/api/documents", False, None),
+    "analytics_comprehensive": ("GET", "/api/analytics/comprehensive", False, None),
+    "analytics_weekly_summary": ("GET", "/api/analytics/weekly-summary", False, None),
+    "admin_dashboard_stats": ("GET", "/api/admin/dashboard/stats", True, None),
+    "admin_users": ("GET", "/api/admin/users", True, None),
+    "admin_recent_activity": ("GET", "/api/admin/activity/recent", True, None),
+}
+
+class DatasetSeeder:
+    """Writes a synthetic dataset straight into MongoDB"""
+
+    def __init__(self, mongo_url, db_name, agents_per_user=4, conversations_per_user=60,
+                 messages_per_conversation=6, documents_per_user=25, seed=42):
+        self.db = MongoClient(mongo_url)[db_name]
+        self.agents_per_user = agents_per_user
+        self.conversations_per_user = conversations_per_user
+        self.messages_per_conversation = messages_per_conversation
+        self.documents_per_user = documents_per_user
+        self.rng = random.Random(seed)
+        # bcrypt is deliberately slow, so every seeded user shares one hash
+        self.password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    def reset(self):
+        for collection in SEEDED_COLLECTIONS:
+            self.db[collection].delete_many({})
+
+    def make_user(self, email, name):
+        now = datetime.utcnow()
+        return {
+            "id": str(uuid.uuid4()), "email": email, "name": name, "picture": "",
+            "google_id": "", "password_hash": self.password_hash, "auth_type": "email",
+            "created_at": now - timedelta(days=self.rng.randint(0, 60)), "last_login": now,
+            "is_active": True,
+        }
+
+    def make_agent(self, user_id, index):
+        return {
+            "id": str(uuid.uuid4()),
+            "name": f"Agent {index} {uuid.uuid4().hex[:4]}",
+            "archetype": self.rng.choice(ARCHETYPES),
+            "personality": {trait: self.rng.randint(1, 10) for trait in ["extroversion", "optimism", "curiosity", "cooperativeness", "energy"]},
+            "goal": "Deliver a workable plan for the station",
+            "expertise": self.rng.choice(["Project Management", "Risk Assessment", "Financial Analysis", "Software Engineering"]),
+            "background": "Ten years running field operations",
+            "current_mood": "neutral", "current_activity": "idle",
+            "memory_summary": "Agreed to pilot the plan; budget risk still open.",
+            "avatar_url": "", "avatar_prompt": "", "user_id": user_id,
+            "created_at": datetime.utcnow(),
+        }
+
+    def make_conversation(self, user_id, agents, round_number):
+        created_at = datetime.utcnow() - timedelta(minutes=self.rng.randint(0, 30 * 24 * 60))
+        messages = []
+        for i in range(self.messages_per_conversation):
+            agent = agents[i % len(agents)]
+            messages.append({
+                "id": str(uuid.uuid4()), "agent_id": agent["id"], "agent_name": agent["name"],
+                "message": "The critical path shows six weeks if procurement starts Monday; I'll own the vendor shortlist. " * 2,
+                "mood": "neutral", "timestamp": created_at + timedelta(seconds=i * 20),
+            })
+        return {
+            "id": str(uuid.uuid4()), "round_number": round_number,
+            "time_period": TIME_PERIODS[round_number % 3], "scenario": "The Research Station",
+            "scenario_name": "Research Station", "messages": messages, "user_id": user_id,
+            "created_at": created_at, "language": "en", "original_language": None,
+            "translated_at": None, "force_translated": False,
+        }
+
+    def make_document(self, user_id, agents, index):
+        created_at = datetime.utcnow() - timedelta(minutes=self.rng.randint(0, 30 * 24 * 60))
+        title = f"Implementation Plan {index}"
+        return {
+            "id": str(uuid.uuid4()),
+            "metadata": {
+                "id": str(uuid.uuid4()), "title": title, "filename": f"implementation_plan_{index}.md",
+                "authors": [agent["name"] for agent in agents[:2]],
+                "category": self.rng.choice(DOCUMENT_CATEGORIES), "status": "Draft",
+                "description": "Milestones, owners and budget for the pilot", "keywords": ["pilot", "budget"],
+                "created_at": created_at, "updated_at": created_at, "simulation_id": "",
+                "conversation_round": index, "scenario_name": "Research Station", "user_id": user_id,
+            },
+            "content": f"# {title}\n\n" + "## Section\nOwners, milestones and budget lines for the pilot.\n\n" * 20,
+            "created_by_agents": [agent["id"] for agent in agents[:2]],
+            "conversation_context": "", "action_trigger": "after careful consideration, let's create",
+        }
+
+    def seed(self, user_count):
+        """Seed user_count users plus the admin; returns the seeded user emails"""
+        self.reset()
+        emails = []
+        admin = self.make_user(ADMIN_EMAIL, "Admin")
+        self.db.users.insert_one(admin)
+
+        for index in range(user_count):
+            user = self.make_user(f"bench.user.{index}@loadtest.com", f"Bench User {index}")
+            emails.append(user["email"])
+            agents = [self.make_agent(user["id"], i) for i in range(self.agents_per_user)]
+            conversations = [self.make_conversation(user["id"], agents, r + 1) for r in range(self.conversations_per_user)]
+            documents = [self.make_document(user["id"], agents, d + 1) for d in range(self.documents_per_user)]
+
+            self.db.users.insert_one(user)
+            self.db.agents.insert_many(agents)
+            self.db.conversations.insert_many(conversations)
+            self.db.documents.insert_many(documents)
+            self.db.simulation_state.insert_one({
+                "id": str(uuid.uuid4()), "current_day": 3, "current_time_period": "morning",
+                "daily_api_requests": 0, "last_reset_date": str(datetime.utcnow().date()),
+                "scenario": "The Research Station", "scenario_name": "Research Station",
+                "is_active": True, "user_id": user["id"],
+            })
+        return emails
+
+class BenchmarkSuite:
+    def __init__(self, base_url="http://localhost:8001", concurrency=10, requests_per_endpoint=100, endpoints=None):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.requests_per_endpoint = requests_per_endpoint
+        self.endpoints = endpoints or list(BENCHMARK_ENDPOINTS)
+
+    async def login(self, session, email):
+        """Log in a seeded user and return auth headers"""
+        async with session.post(f"{self.base_url}/api/auth/login", json={"email": email, "password": PASSWORD}) as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            return {"Authorization": f"Bearer {data['access_token']}"}
+
+    async def measure(self, session, name, user_headers, admin_headers):
+        """Issue requests_per_endpoint requests with `concurrency` workers"""
+        method, path, needs_admin, body = BENCHMARK_ENDPOINTS[name]
+        latencies = []
+        errors = 0
+        remaining = self.requests_per_endpoint
+
+        async def worker(worker_index):
+            nonlocal remaining, errors
+            headers = admin_headers if needs_admin else user_headers[worker_index % len(user_headers)]
+            while remaining > 0:
+                remaining -= 1
+                start_time = time.perf_counter()
+                try:
+                    async with session.request(method, f"{self.base_url}{path}", headers=headers, json=body) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(self.concurrency)])
+        elapsed = time.perf_counter() - start_time
+
+        return {
+            "method": method,
+            "path": path,
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+            "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+    async def run(self, emails):
+        connector = aiohttp.TCPConnector(limit=self.concurrency * 2)
+        timeout = aiohttp.ClientTimeout(total=120)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            active = emails[:self.concurrency]
+            user_headers = [h for h in await asyncio.gather(*[self.login(session, e) for e in active]) if h]
+            admin_headers = await self.login(session, ADMIN_EMAIL)
+            if not user_headers or not admin_headers:
+                raise SystemExit("Could not log in seeded users - is the backend using the benchmark DB_NAME?")
+
+            results = {}
+            for name in self.endpoints:
+                print(f"  {name:<28}", end="", flush=True)
+                results[name] = await self.measure(session, name, user_headers, admin_headers)
+                print(f"p95 {results[name]['p95_ms']:.1f} ms, {results[name]['throughput_rps']:.1f} req/s")
+            return results
+
+def print_results(results, baseline=None):
+    """Print per-scale results, with p95 deltas against a baseline run if given"""
+    print("\n" + "="*80)
+    print("BENCHMARK SUITE RESULTS")
+    print("="*80)
+    for scale, scale_results in results["scales"].items():
+        base_scale = (baseline or {}).get("scales", {}).get(scale, {})
+        print(f"\n{scale} users:")
+        print(f"{'Endpoint':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}{'base p95':>12}")
+        for name, stats in scale_results["endpoints"].items():
+            base_p95 = ""
+            if name in base_scale.get("endpoints", {}):
+                base_p95 = f"{base_scale['endpoints'][name]['p95_ms']:.1f}"
+            print(f"{name:<28}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+                  f"{stats['throughput_rps']:>10.1f}{stats['errors']:>8}{base_p95:>12}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seeded latency/throughput benchmark for Observer AI platform")
+    parser.add_argument("--url", default="http://localhost:8001", help="Base URL for the API")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="MongoDB the backend is using")
+    parser.add_argument("--db", default="observer_benchmark", help="Dedicated benchmark database (reset on every scale)")
+    parser.add_argument("--scales", default="10,100,1000", help="Comma-separated seeded user counts")
+    parser.add_argument("--conversations", type=int, default=60, help="Conversation rounds per user")
+    parser.add_argument("--documents", type=int, default=25, help="Documents per user")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint per scale")
+    parser.add_argument("--endpoints", help=f"Comma-separated subset of: {', '.join(BENCHMARK_ENDPOINTS)}")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    if "bench" not in args.db:
+        raise SystemExit(f"Refusing to reset '{args.db}' - the benchmark database name must contain 'bench'")
+
+    endpoints = args.endpoints.split(",") if args.endpoints else None
+    seeder = DatasetSeeder(args.mongo_url, args.db, conversations_per_user=args.conversations, documents_per_user=args.documents)
+    suite = BenchmarkSuite(base_url=args.url, concurrency=args.concurrency, requests_per_endpoint=args.requests, endpoints=endpoints)
+
+    results = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "concurrency": args.concurrency,
+        "requests_per_endpoint": args.requests,
+        "conversations_per_user": args.conversations,
+        "documents_per_user": args.documents,
+        "scales": {},
+    }
+    for scale in [int(s) for s in args.scales.split(",")]:
+        print(f"\nSeeding {scale} users into {args.db}...")
+        emails = seeder.seed(scale)
+        print(f"Benchmarking with {args.concurrency} concurrent clients:")
+        results["scales"][str(scale)] = {"users": scale, "endpoints": await suite.run(emails)}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
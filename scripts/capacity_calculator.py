@@ -2,10 +2,42 @@
 """
 Capacity Calculator for Observer AI Platform
 Estimates required resources for target user loads
+
+--mongo-pool checks the backend's MongoDB pool settings (MONGO_MAX_POOL_SIZE, see
+backend/database.py) against what the MongoDB deployment in k8s/ can accept when the
+backend is scaled out to its HPA maximum. The pool size is taken from --max-pool-size,
+else from the backend deployment's MONGO_MAX_POOL_SIZE, else the backend default.
 """
 
 import argparse
+import json
 import math
+import re
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# pymongo keeps a monitoring and an RTT connection to every member, outside the pool
+MONITOR_CONNECTIONS_PER_MEMBER = 2
+# Approximate mongod memory per open connection
+MONGOD_MB_PER_CONNECTION = 1.0
+# backend/database.py default when MONGO_MAX_POOL_SIZE is unset
+DEFAULT_MAX_POOL_SIZE = 100
+
+def parse_memory_gb(quantity: str) -> float:
+    """Kubernetes memory quantity ("4Gi", "512Mi", "2G") in GiB"""
+    match = re.fullmatch(r"([0-9.]+)\s*([KMGT]i?)?", str(quantity).strip())
+    if not match:
+        raise ValueError(f"Unrecognised memory quantity '{quantity}'")
+    value, unit = float(match.group(1)), (match.group(2) or "")
+    scale = {"": 1 / 1024**3, "K": 1e3 / 1024**3, "Ki": 1 / 1024**2, "M": 1e6 / 1024**3, "Mi": 1 / 1024,
+             "G": 1e9 / 1024**3, "Gi": 1, "T": 1e12 / 1024**3, "Ti": 1024}[unit]
+    return value * scale
+
+def load_k8s_documents(path):
+    import yaml
+    with open(path) as f:
+        return [doc for doc in yaml.safe_load_all(f) if doc]
 
 class CapacityCalculator:
     def __init__(self):
@@ -25,6 +57,18 @@ class CapacityCalculator:
             "redis_ops_per_second": 10000,
         }
         
+        # Share of a typical user's requests hitting each benchmarked endpoint
+        # (names match scripts/benchmark_suite.py); used with --benchmark
+        self.request_mix = {
+            "conversations": 0.30,
+            "documents": 0.30,
+            "conversation_generate": 0.15,
+            "observer_send_message": 0.05,
+            "analytics_comprehensive": 0.10,
+            "analytics_weekly_summary": 0.10,
+        }
+        self.benchmark_source = None
+        
         # Safety factors
         self.safety_factors = {
             "cpu_overhead": 1.3,  # 30% overhead for system processes
@@ -32,6 +76,81 @@ class CapacityCalculator:
             "peak_load_factor": 2.0,  # Handle 2x expected load
         }
     
+    def apply_benchmark(self, path, scale=None):
+        """Replace the assumed users_per_backend_pod with one derived from benchmark_suite.py results.
+
+        Each endpoint's measured throughput against a single backend process gives its
+        per-request cost; the request mix weights those costs into requests/second per pod.
+        """
+        with open(path) as f:
+            results = json.load(f)
+        
+        scales = results["scales"]
+        scale = str(scale) if scale else max(scales, key=int)
+        endpoints = scales[scale]["endpoints"]
+        
+        seconds_per_request = 0.0
+        total_weight = 0.0
+        for name, weight in self.request_mix.items():
+            throughput = endpoints.get(name, {}).get("throughput_rps", 0)
+            if throughput > 0:
+                seconds_per_request += weight / throughput
+                total_weight += weight
+        if not total_weight:
+            raise ValueError(f"No usable endpoint measurements in {path} for {scale} users")
+        
+        requests_per_second_per_pod = total_weight / seconds_per_request
+        requests_per_user_per_second = self.performance_metrics["requests_per_user_per_minute"] / 60
+        self.performance_metrics["users_per_backend_pod"] = max(1, int(requests_per_second_per_pod / requests_per_user_per_second))
+        self.benchmark_source = f"{path} ({scale} seeded users, {requests_per_second_per_pod:.1f} req/s per pod)"
+        return self.performance_metrics["users_per_backend_pod"]
+    
+    def check_mongo_pool(self, workers, max_pool_size=None, k8s_dir=REPO_ROOT / "k8s", mongod_conf=REPO_ROOT / "mongodb.conf"):
+        """Peak connections per MongoDB member with the backend at its HPA maximum, against
+        the member's connection limit and the memory its container has left for connections"""
+        import yaml
+        backend = {doc["kind"]: doc for doc in load_k8s_documents(Path(k8s_dir) / "backend-deployment.yaml")}
+        mongodb = {doc["kind"]: doc for doc in load_k8s_documents(Path(k8s_dir) / "mongodb-deployment.yaml")}
+        with open(mongod_conf) as f:
+            conf = yaml.safe_load(f)
+        
+        max_pods = backend.get("HorizontalPodAutoscaler", {}).get("spec", {}).get("maxReplicas") \
+            or backend["Deployment"]["spec"]["replicas"]
+        if max_pool_size is None:
+            backend_env = {var["name"]: var.get("value") for var in
+                           backend["Deployment"]["spec"]["template"]["spec"]["containers"][0].get("env", [])}
+            max_pool_size = int(backend_env.get("MONGO_MAX_POOL_SIZE") or DEFAULT_MAX_POOL_SIZE)
+        container = mongodb["Deployment"]["spec"]["template"]["spec"]["containers"][0]
+        memory_limit_gb = parse_memory_gb(container["resources"]["limits"]["memory"])
+        cache_gb = conf.get("storage", {}).get("wiredTiger", {}).get("engineConfig", {}).get("cacheSizeGB", 0)
+        max_incoming = conf.get("net", {}).get("maxIncomingConnections", 65536)
+        
+        # Memory left once WiredTiger has its cache, keeping 1GB for everything else
+        memory_headroom_gb = max(0.0, memory_limit_gb - cache_gb - 1.0)
+        memory_capacity = int(memory_headroom_gb * 1024 / MONGOD_MB_PER_CONNECTION)
+        per_process = max_pool_size + MONITOR_CONNECTIONS_PER_MEMBER
+        peak = max_pods * workers * per_process
+        capacity = min(max_incoming, memory_capacity)
+        
+        self.performance_metrics["database_connections_per_pod"] = workers * max_pool_size
+        problems = []
+        if peak > max_incoming:
+            problems.append(f"{peak} connections exceed net.maxIncomingConnections ({max_incoming})")
+        if peak > memory_capacity:
+            problems.append(f"{peak} connections need ~{peak * MONGOD_MB_PER_CONNECTION / 1024:.1f}GB but only "
+                            f"{memory_headroom_gb:.1f}GB of the {memory_limit_gb:g}GB limit is left after a "
+                            f"{cache_gb}GB WiredTiger cache")
+        return {
+            "backend_max_pods": max_pods,
+            "workers_per_pod": workers,
+            "max_pool_size": max_pool_size,
+            "peak_connections_per_member": peak,
+            "member_connection_capacity": capacity,
+            "recommended_max_pool_size": max(1, capacity // (max_pods * workers) - MONITOR_CONNECTIONS_PER_MEMBER),
+            "ok": not problems,
+            "problems": problems,
+        }
+    
     def calculate_backend_pods(self, target_users):
         """Calculate required backend pods"""
         base_pods = math.ceil(target_users / self.performance_metrics["users_per_backend_pod"])
@@ -163,6 +282,8 @@ class CapacityCalculator:
         print("="*80)
         print(f"Target Concurrent Users: {target_users:,}")
         print(f"Expected Peak Load: {int(target_users * self.safety_factors['peak_load_factor']):,} users")
+        if self.benchmark_source:
+            print(f"Users per Backend Pod: {self.performance_metrics['users_per_backend_pod']} (measured: {self.benchmark_source})")
         
         print("\n📊 REQUIRED INFRASTRUCTURE:")
         print("-"*40)
@@ -212,10 +333,29 @@ def main():
     parser = argparse.ArgumentParser(description="Calculate capacity requirements for Observer AI")
     parser.add_argument("users", type=int, help="Target number of concurrent users")
     parser.add_argument("--detailed", action="store_true", help="Show detailed breakdown")
+    parser.add_argument("--benchmark", help="benchmark_suite.py results JSON to derive per-pod capacity from")
+    parser.add_argument("--scale", type=int, help="Seeded user count to use from the benchmark results (default: largest)")
+    parser.add_argument("--mongo-pool", action="store_true", help="Check MongoDB pool sizing against k8s/mongodb-deployment.yaml")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn workers per backend pod (with --mongo-pool)")
+    parser.add_argument("--max-pool-size", type=int,
+                        help="maxPoolSize per process (with --mongo-pool, default: the backend deployment's MONGO_MAX_POOL_SIZE)")
     
     args = parser.parse_args()
     
     calculator = CapacityCalculator()
+    if args.benchmark:
+        users_per_pod = calculator.apply_benchmark(args.benchmark, args.scale)
+        print(f"Using measured capacity: {users_per_pod} users per backend pod")
+    
+    if args.mongo_pool:
+        pool = calculator.check_mongo_pool(args.workers, args.max_pool_size)
+        print(f"MongoDB pool: {pool['backend_max_pods']} pods x {pool['workers_per_pod']} workers x "
+              f"({pool['max_pool_size']} pool + {MONITOR_CONNECTIONS_PER_MEMBER} monitor) = "
+              f"{pool['peak_connections_per_member']} connections per member, capacity {pool['member_connection_capacity']}")
+        for problem in pool["problems"]:
+            print(f"  ⚠️  {problem}")
+        if not pool["ok"]:
+            print(f"  Recommended MONGO_MAX_POOL_SIZE: {pool['recommended_max_pool_size']}")
     
     if args.detailed:
         calculator.print_capacity_report(args.users)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Document update benchmark for Observer AI backend
+Compares the two DOCUMENT_UPDATE_MODEs on synthetic documents of growing size:
+
+    full         the document goes out twice (system message and prompt) with the
+                 conversation, and the model must write the whole updated document back
+    incremental  outline + relevant sections + conversation go out, a section patch comes
+                 back and is applied locally (backend/document_sections.py)
+
+Tokens are estimated the way llm_providers.track_llm_usage counts them (4 characters per
+token); the patch is the fake provider's canned reply. LLM latency is modelled from the
+token counts (--prefill-ms per 1k prompt tokens, --decode-ms per completion token), and
+the local outline/patch work is measured.
+
+    python scripts/document_update_benchmark.py --output document_updates.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.append(str(BACKEND_DIR))
+
+from document_sections import apply_patch, parse_patch, parse_sections, patch_prompt, relevant_sections
+from llm_providers import _document_patch_reply, estimate_tokens
+
+# Mirrors server.DOCUMENT_UPDATE_CONTEXT_CHARS and the full-mode prompt scaffolding
+CONTEXT_CHARS = 4000
+FULL_SCAFFOLD_CHARS = 700
+FULL_MAX_TOKENS = 400
+
+TOPICS = ["Budget", "Timeline", "Risks", "Staffing", "Vendors", "Training", "Compliance", "Rollout",
+          "Metrics", "Communication", "Equipment", "Facilities"]
+
+def make_document(sections):
+    parts = ["# Warehouse Relocation Plan\n\nOwner: Operations. Status: Draft.\n\n"]
+    for n in range(sections):
+        topic = TOPICS[n % len(TOPICS)]
+        parts.append(f"## {topic} {n + 1}\n\n")
+        parts.extend(f"- {topic} item {i}: confirm the north site figures with finance before the pilot.\n" for i in range(10))
+        parts.append("\n| Owner | Deadline |\n|-------|----------|\n| Operations | Week 2 |\n\n")
+    return "".join(parts)
+
+CONVERSATION = "\n".join([
+    "Maya: The vendor quote for the north site came in 12% over budget, so we need a second bid.",
+    "Tom: Agreed. I'll own the timeline change - pilot moves to week 3.",
+    "Ana: Staffing is fine if training starts in week 2; I'll draft the training schedule.",
+    "Lee: Let's record the decision: pilot first, second vendor bid by Friday.",
+] * 6)
+REASON = "New decisions and discussion points"
+
+def measure(sections, prefill_ms, decode_ms):
+    content = make_document(sections)
+    conversation = CONVERSATION[-CONTEXT_CHARS:]
+
+    full_prompt = 2 * estimate_tokens(content) + estimate_tokens(CONVERSATION) + FULL_SCAFFOLD_CHARS // 4
+    # Without truncation the model has to write the whole document back plus the changes
+    full_completion = estimate_tokens(content) + 60
+
+    start = time.perf_counter()
+    parsed = parse_sections(content)
+    shown = relevant_sections(parsed, f"{REASON}\n{conversation}")
+    prompt = patch_prompt(parsed, shown, conversation, REASON)
+    patch_time = time.perf_counter() - start
+    reply = _document_patch_reply(prompt)
+    start = time.perf_counter()
+    updated = apply_patch(parsed, parse_patch(reply), replaceable={s["id"] for s in shown})
+    patch_time += time.perf_counter() - start
+    assert updated and updated.startswith(content.split("## ")[0])
+
+    incremental_prompt = estimate_tokens(prompt) + 30
+    incremental_completion = estimate_tokens(reply)
+
+    def latency_ms(prompt_tokens, completion_tokens):
+        return round(prompt_tokens / 1000 * prefill_ms + completion_tokens * decode_ms, 1)
+
+    return {
+        "sections": sections,
+        "document_tokens": estimate_tokens(content),
+        "full": {
+            "prompt_tokens": full_prompt, "completion_tokens": full_completion,
+            "truncated_at_max_tokens": full_completion > FULL_MAX_TOKENS,
+            "modelled_latency_ms": latency_ms(full_prompt, full_completion),
+        },
+        "incremental": {
+            "prompt_tokens": incremental_prompt, "completion_tokens": incremental_completion,
+            "sections_shown": len(shown), "local_ms": round(patch_time * 1000, 2),
+            "modelled_latency_ms": latency_ms(incremental_prompt, incremental_completion) + round(patch_time * 1000, 1),
+        },
+    }
+
+def print_results(results):
+    print("\n" + "="*80)
+    print("DOCUMENT UPDATE BENCHMARK RESULTS")
+    print("="*80)
+    print(f"\n{'Sections':>8}{'Doc tok':>9}{'Full in':>9}{'Full out':>10}{'Incr in':>9}{'Incr out':>10}"
+          f"{'Full ms':>10}{'Incr ms':>10}{'Saved':>8}")
+    for sample in results["samples"]:
+        full, incremental = sample["full"], sample["incremental"]
+        total_full = full["prompt_tokens"] + full["completion_tokens"]
+        total_incremental = incremental["prompt_tokens"] + incremental["completion_tokens"]
+        print(f"{sample['sections']:>8}{sample['document_tokens']:>9}{full['prompt_tokens']:>9}{full['completion_tokens']:>10}"
+              f"{incremental['prompt_tokens']:>9}{incremental['completion_tokens']:>10}"
+              f"{full['modelled_latency_ms']:>10.0f}{incremental['modelled_latency_ms']:>10.0f}"
+              f"{1 - total_incremental / total_full:>8.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and incremental document update cost")
+    parser.add_argument("--sections", type=int, nargs="+", default=[4, 12, 30, 60], help="Document sizes in sections")
+    parser.add_argument("--prefill-ms", type=float, default=40, help="Modelled ms per 1k prompt tokens")
+    parser.add_argument("--decode-ms", type=float, default=6, help="Modelled ms per completion token")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = {"samples": [measure(n, args.prefill_ms, args.decode_ms) for n in args.sections]}
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
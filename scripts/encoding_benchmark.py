@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark for Observer AI backend
+Encodes a synthetic /api/conversations history (1000 rounds by default) and a
+/api/documents listing the way the backend used to (Pydantic models, jsonable_encoder,
+stdlib json) and the way it does now (direct projection rendered with orjson, see
+backend/response_encoding.py). Reports CPU time per response and bytes on the wire
+uncompressed, gzipped and - when the brotli package is installed - brotli-compressed.
+
+    python scripts/encoding_benchmark.py --rounds 1000 --output encoding.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.append(str(BACKEND_DIR))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from response_encoding import brotli, compress, dumps
+
+PHRASES = [
+    "Run the pilot at the north site first; I'll track cost per pallet.",
+    "The vendor quote is 12% above budget, so we need a second bid by Friday.",
+    "I can own the rollback plan if Tom covers the staffing gap.",
+    "Let's vote on the two-week trial and revisit the numbers on Monday.",
+    "Lead times doubled last quarter; a safety stock of ten days covers it.",
+]
+
+class DocumentMetadata(BaseModel):
+    id: str
+    title: str
+    filename: str
+    authors: list = []
+    category: str
+    status: str = "Draft"
+    description: str
+    keywords: list = []
+    created_at: datetime
+    updated_at: datetime
+    simulation_id: str = ""
+    conversation_round: int = 0
+    scenario_name: str = ""
+    user_id: str = ""
+
+class DocumentResponse(BaseModel):
+    id: str
+    metadata: DocumentMetadata
+    content: str
+    preview: str = ""
+
+def make_rounds(count, messages_per_round=4, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 9, 0)
+    return [{
+        "_id": ObjectId(), "id": str(uuid.uuid4()), "round_number": n + 1,
+        "time_period": ["morning", "afternoon", "evening"][n % 3], "scenario": "Warehouse relocation",
+        "scenario_name": "Logistics", "user_id": "bench-user", "created_at": start + timedelta(hours=8 * n),
+        "language": "en", "original_language": None, "translated_at": None, "force_translated": False,
+        "messages": [{
+            "id": str(uuid.uuid4()), "agent_id": f"agent-{i}", "agent_name": f"Agent {i}",
+            "message": " ".join(rng.sample(PHRASES, 2)), "mood": "focused",
+            "timestamp": start + timedelta(hours=8 * n, minutes=i),
+        } for i in range(messages_per_round)],
+    } for n in range(count)]
+
+def make_documents(count):
+    now = datetime(2025, 1, 1)
+    content = "# Plan\n\n" + "\n".join(f"- {phrase}" for phrase in PHRASES * 20)
+    return [{
+        "_id": ObjectId(), "id": str(uuid.uuid4()), "content": content,
+        "metadata": {"id": str(uuid.uuid4()), "title": f"Plan {n}", "filename": f"plan_{n}.md", "authors": ["Agent 1"],
+                     "category": "Protocol", "status": "Draft", "description": "Relocation plan", "keywords": ["pilot"],
+                     "created_at": now, "updated_at": now, "simulation_id": "", "conversation_round": n,
+                     "scenario_name": "Logistics", "user_id": "bench-user"},
+    } for n in range(count)]
+
+def conversation_payload(rounds):
+    return [{key: value for key, value in r.items() if key != "_id"} for r in rounds]
+
+def legacy_conversations(rounds):
+    return json.dumps(jsonable_encoder(conversation_payload(rounds))).encode()
+
+def fast_conversations(rounds):
+    return dumps(conversation_payload(rounds))
+
+def legacy_documents(docs):
+    listings = []
+    for doc in docs:
+        content = doc["content"]
+        listings.append(DocumentResponse(id=doc["id"], metadata=DocumentMetadata(**doc["metadata"]), content=content,
+                                         preview=content[:200] + "..." if len(content) > 200 else content).dict())
+    return json.dumps(jsonable_encoder(listings)).encode()
+
+def fast_documents(docs):
+    return dumps([{"id": doc["id"], "metadata": doc["metadata"], "content": doc["content"],
+                   "preview": doc["content"][:200] + "..."} for doc in docs])
+
+def cpu_ms(encode, data, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        body = encode(data)
+    return round((time.process_time() - start) / repeat * 1000, 2), body
+
+def measure(name, encoders, data, repeat):
+    results = {}
+    for variant, encode in encoders.items():
+        milliseconds, body = cpu_ms(encode, data, repeat)
+        wire = {"identity": len(body), "gzip": len(compress(body, "gzip"))}
+        if brotli is not None:
+            wire["br"] = len(compress(body, "br"))
+        results[variant] = {"cpu_ms": milliseconds, "bytes": wire}
+    return {name: results}
+
+def print_results(results):
+    print("\n" + "="*80)
+    print("RESPONSE ENCODING BENCHMARK RESULTS")
+    print("="*80)
+    print(f"\n{'Response':<28}{'variant':<10}{'CPU ms':>10}{'identity':>12}{'gzip':>10}{'br':>10}")
+    for response, variants in results["responses"].items():
+        for variant, sample in variants.items():
+            wire = sample["bytes"]
+            print(f"{response:<28}{variant:<10}{sample['cpu_ms']:>10.2f}{wire['identity']:>12}"
+                  f"{wire['gzip']:>10}{str(wire.get('br', '-')):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response encoding CPU time and bytes on the wire")
+    parser.add_argument("--rounds", type=int, default=1000, help="Conversation rounds in the history response")
+    parser.add_argument("--documents", type=int, default=50, help="Documents in the listing response")
+    parser.add_argument("--repeat", type=int, default=10, help="Encodings per measurement")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    rounds = make_rounds(args.rounds)
+    docs = make_documents(args.documents)
+    responses = {}
+    responses.update(measure(f"conversations ({args.rounds} rounds)",
+                             {"legacy": legacy_conversations, "orjson": fast_conversations}, rounds, args.repeat))
+    responses.update(measure(f"documents ({args.documents})",
+                             {"legacy": legacy_documents, "orjson": fast_documents}, docs, args.repeat))
+    results = {"rounds": args.rounds, "documents": args.documents, "responses": responses}
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
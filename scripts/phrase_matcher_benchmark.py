@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Phrase matcher benchmark for Observer AI backend
+Times the keyword heuristics a generated message and its round go through, as the old
+per-phrase scans (`any(phrase in text.lower() for phrase in LIST)`, one list at a time) and
+as the compiled matchers of backend/phrase_matcher.py (an Aho-Corasick automaton when
+pyahocorasick is installed, the substring sweep otherwise - the engine is reported):
+
+    message  banned reply phrases, conversation-state signals, round key events
+    round    document quality gate, action triggers, decision sentences, document topics
+
+Both versions are checked to agree on every sample before anything is timed (decision
+sentences as a set: the old extraction listed a sentence once per keyword it contained).
+
+    python scripts/phrase_matcher_benchmark.py --messages 6 --output phrase_matcher.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.append(str(BACKEND_DIR))
+
+from conversation_state import ACTION_PHRASES, DECISION_PHRASES, MESSAGE_SIGNALS, TOPIC_KEYWORDS
+from enhanced_document_system import QUALITY_SIGNALS, SUBSTANTIVE_CONTENT, THOUGHTFUL_TRIGGERS
+import phrase_matcher
+from phrase_matcher import PhraseMatcher
+from response_filters import BANNED, BANNED_PHRASES
+from round_summaries import KEY_EVENT_KEYWORDS, KEY_EVENTS
+
+# Mirror server.HIGH_QUALITY_TRIGGERS, server.DECISION_KEYWORDS, server.DOCUMENT_TOPIC_KEYWORDS and
+# server.extract_decisions_from_conversation
+# (server.py needs the full web stack to import)
+HIGH_QUALITY_TRIGGERS = [
+    "after thorough discussion, we need to", "the team consensus is to create", "we've agreed to formalize",
+    "following our analysis, we should document", "it's time to create a comprehensive", "we're ready to develop",
+    "let's formalize our decision in", "we need to capture these conclusions", "the team has decided to create",
+    "based on our thorough review", "after careful consideration, let's create", "we should document our final",
+    "let's put our agreed approach in writing", "we need to formalize this into", "time to create a detailed",
+    "let's develop a comprehensive", "we should establish formal", "our discussion points to the need for",
+]
+DECISION_KEYWORDS = [
+    "vote yes", "vote no", "i vote", "let's vote", "decision", "we should",
+    "i recommend", "my recommendation", "i propose", "let's move forward",
+    "i'll take responsibility", "i commit to", "i'll handle", "i'll create",
+    "i'll update", "based on our discussion", "the consensus", "we've decided",
+]
+DOCUMENT_TOPIC_KEYWORDS = {
+    "budget": ["cost", "budget", "funding", "investment", "economic", "financial"],
+    "implementation": ["implement", "deploy", "rollout", "strategy", "plan"],
+    "risk": ["risk", "challenge", "threat", "danger", "crisis"],
+    "technical": ["technology", "technical", "engineering", "system", "design"],
+    "policy": ["policy", "regulation", "law", "compliance", "governance"],
+    "training": ["training", "education", "skill", "workforce", "job retraining"],
+    "timeline": ["timeline", "schedule", "deadline", "phases", "milestones"],
+    "action": ["action", "next steps", "decisions", "commitments"],
+}
+TRIGGERS = PhraseMatcher(HIGH_QUALITY_TRIGGERS)
+DECISIONS = PhraseMatcher(DECISION_KEYWORDS)
+DOCUMENT_TOPICS = PhraseMatcher(DOCUMENT_TOPIC_KEYWORDS)
+
+AGENTS = ["Maya", "Tom", "Ana", "Lee"]
+SENTENCES = [
+    "The vendor quote for the north site came in twelve percent over what finance expected",
+    "Staffing holds if the onboarding sessions start in week two",
+    "Can the logistics partner handle both sites at once",
+    "The weather window closes at the end of the month",
+    "We should ask for a second vendor bid before Friday",
+    "I will draft the rollout schedule and share it tonight",
+    "We agreed to pilot at the north site first",
+    "The forklift lease runs out in March, which changes the numbers",
+    "Let's move forward with the smaller warehouse",
+    "Honestly the old site still works for most of the inbound freight",
+]
+
+def make_message(rng):
+    return f"{rng.choice(AGENTS)}: " + ". ".join(rng.sample(SENTENCES, 3)) + "."
+
+# Before: one scan of the lowered text per phrase, one list at a time
+
+def message_before(text):
+    lowered = text.lower()
+    banned = any(phrase in lowered for phrase in BANNED_PHRASES)
+    topics = {topic for topic, keywords in TOPIC_KEYWORDS.items() if any(k in lowered for k in keywords)}
+    action = any(phrase in lowered for phrase in ACTION_PHRASES)
+    decision = any(phrase in lowered for phrase in DECISION_PHRASES)
+    key_event = any(k in text.lower() for k in KEY_EVENT_KEYWORDS)
+    return banned, topics, action, decision, key_event
+
+def round_before(conversation_text, scenario):
+    conv_lower = conversation_text.lower()
+    gate = any(t in conv_lower for t in THOUGHTFUL_TRIGGERS) or any(c in conv_lower for c in SUBSTANTIVE_CONTENT)
+    triggers = bool([t for t in HIGH_QUALITY_TRIGGERS if t in conv_lower])
+    decisions = []
+    for keyword in DECISION_KEYWORDS:
+        if keyword.lower() in conversation_text.lower():
+            for sentence in conversation_text.split('.'):
+                if keyword.lower() in sentence.lower():
+                    decisions.append(sentence.strip())
+    scenario_lower = scenario.lower()
+    topics = {doc_type for doc_type, keywords in DOCUMENT_TOPIC_KEYWORDS.items()
+              if any(word in scenario_lower or word in conv_lower for word in keywords)}
+    return gate, triggers, decisions, topics
+
+# After: the compiled matchers the backend uses
+
+def message_after(text):
+    signals = MESSAGE_SIGNALS.categories(text)
+    return (BANNED.search(text) is not None, {t for t in TOPIC_KEYWORDS if t in signals},
+            "action_item" in signals, "decision" in signals, KEY_EVENTS.search(text) is not None)
+
+def extract_decisions(conversation_text):
+    found = DECISIONS.phrases(conversation_text)
+    if not found:
+        return []
+    return [s.strip() for s in conversation_text.split('.') if any(keyword in s.lower() for keyword in found)]
+
+def round_after(conversation_text, scenario):
+    return (QUALITY_SIGNALS.search(conversation_text) is not None,
+            TRIGGERS.search(conversation_text) is not None,
+            extract_decisions(conversation_text),
+            DOCUMENT_TOPICS.categories(scenario) | DOCUMENT_TOPICS.categories(conversation_text))
+
+def per_call_us(func, samples, repeat):
+    """Best of `repeat` sweeps over the samples, per call"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sample in samples:
+            func(*sample)
+        best = min(best, time.perf_counter() - start)
+    return best / len(samples) * 1e6
+
+def run(messages_per_round, rounds, repeat, seed):
+    rng = random.Random(seed)
+    scenario = "Relocate the regional warehouse to the north site without disrupting deliveries"
+    messages = [(make_message(rng),) for _ in range(rounds * messages_per_round)]
+    round_samples = [("\n".join(m for (m,) in messages[n:n + messages_per_round]), scenario)
+                     for n in range(0, len(messages), messages_per_round)]
+
+    for sample in messages:
+        assert message_before(*sample) == message_after(*sample), sample
+    for sample in round_samples:
+        before, after = round_before(*sample), round_after(*sample)
+        assert before[:2] == after[:2] and before[3] == after[3] and set(before[2]) == set(after[2]), sample
+
+    message = {"before_us": per_call_us(message_before, messages, repeat),
+               "after_us": per_call_us(message_after, messages, repeat)}
+    conversation_round = {"before_us": per_call_us(round_before, round_samples, repeat),
+                          "after_us": per_call_us(round_after, round_samples, repeat)}
+    per_message = {
+        "before_us": message["before_us"] + conversation_round["before_us"] / messages_per_round,
+        "after_us": message["after_us"] + conversation_round["after_us"] / messages_per_round,
+    }
+    return {"messages_per_round": messages_per_round, "message": message, "round": conversation_round,
+            "per_message": per_message,
+            "phrases": {"message": len(BANNED_PHRASES) + len(ACTION_PHRASES) + len(DECISION_PHRASES) + len(KEY_EVENT_KEYWORDS)
+                        + sum(len(k) for k in TOPIC_KEYWORDS.values()),
+                        "round": len(THOUGHTFUL_TRIGGERS) + len(SUBSTANTIVE_CONTENT) + len(HIGH_QUALITY_TRIGGERS)
+                        + len(DECISION_KEYWORDS) + sum(len(k) for k in DOCUMENT_TOPIC_KEYWORDS.values())}}
+
+def print_results(results):
+    print("\n" + "="*80)
+    print("PHRASE MATCHER BENCHMARK RESULTS")
+    print("="*80)
+    print(f"\nEngine: {results['engine']}")
+    print(f"\n{'Msgs/round':>10}{'Scope':>14}{'Phrases':>9}{'Before us':>11}{'After us':>10}{'Saved':>8}")
+    for sample in results["samples"]:
+        for scope in ("message", "round", "per_message"):
+            timing = sample[scope]
+            phrases = sample["phrases"].get(scope, "")
+            print(f"{sample['messages_per_round']:>10}{scope:>14}{phrases:>9}{timing['before_us']:>11.1f}"
+                  f"{timing['after_us']:>10.1f}{1 - timing['after_us'] / timing['before_us']:>8.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-phrase scans with the compiled phrase matchers")
+    parser.add_argument("--messages", type=int, nargs="+", default=[4, 6, 12], help="Messages per round")
+    parser.add_argument("--rounds", type=int, default=50, help="Synthetic rounds per sample")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = {
+        "engine": "automaton" if phrase_matcher.ahocorasick else "sweep",
+        "samples": [run(n, args.rounds, args.repeat, args.seed) for n in args.messages],
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Poll throughput benchmark for Observer AI platform
+Replays the frontend's polling loop (agents, saved agents, documents,
+simulation state, archetypes, relationships) and reports throughput and latency.
+
+Run once against a backend without Redis (the cache falls through to MongoDB)
+and once with Redis, saving each run with --output, then compare:
+
+    python scripts/poll_benchmark.py --output before.json
+    python scripts/poll_benchmark.py --output after.json --compare before.json
+"""
+
+import asyncio
+import aiohttp
+import time
+import json
+import uuid
+import argparse
+
+POLL_ENDPOINTS = [
+    "/api/agents",
+    "/api/saved-agents",
+    "/api/documents",
+    "/api/simulation/state",
+    "/api/archetypes",
+    "/api/relationships",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+class PollBenchmark:
+    def __init__(self, base_url="http://localhost:8001", users=20, duration=30):
+        self.base_url = base_url
+        self.users = users
+        self.duration = duration
+        self.latencies = {endpoint: [] for endpoint in POLL_ENDPOINTS}
+        self.errors = 0
+
+    async def register_user(self, session, index):
+        """Register a benchmark user and return auth headers"""
+        user_data = {
+            "email": f"poll.bench.{index}.{uuid.uuid4().hex[:8]}@loadtest.com",
+            "password": "TestPassword123",
+            "name": f"Poll Bench {index}"
+        }
+        async with session.post(f"{self.base_url}/api/auth/register", json=user_data) as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            return {"Authorization": f"Bearer {data['access_token']}"}
+
+    async def poll_loop(self, session, headers, deadline):
+        """Poll every endpoint back to back until the deadline"""
+        while time.time() < deadline:
+            for endpoint in POLL_ENDPOINTS:
+                start_time = time.time()
+                try:
+                    async with session.get(f"{self.base_url}{endpoint}", headers=headers) as response:
+                        await response.read()
+                        if response.status != 200:
+                            self.errors += 1
+                            continue
+                except Exception:
+                    self.errors += 1
+                    continue
+                self.latencies[endpoint].append(time.time() - start_time)
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.users * 2)
+        timeout = aiohttp.ClientTimeout(total=60)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            headers = await asyncio.gather(*[self.register_user(session, i) for i in range(self.users)])
+            headers = [h for h in headers if h]
+            if not headers:
+                raise SystemExit("Could not register any benchmark users")
+
+            print(f"Polling {len(POLL_ENDPOINTS)} endpoints with {len(headers)} users for {self.duration}s")
+            deadline = time.time() + self.duration
+            await asyncio.gather(*[self.poll_loop(session, h, deadline) for h in headers])
+
+        return self.summary()
+
+    def summary(self):
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "users": self.users,
+            "duration_seconds": self.duration,
+            "total_requests": total,
+            "errors": self.errors,
+            "requests_per_second": total / self.duration,
+            "endpoints": {
+                endpoint: {
+                    "requests": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                }
+                for endpoint, values in self.latencies.items()
+            }
+        }
+
+def print_results(results, baseline=None):
+    """Print benchmark results, with deltas against a baseline run if given"""
+    print("\n" + "="*80)
+    print("POLL BENCHMARK RESULTS")
+    print("="*80)
+    print(f"Total Requests: {results['total_requests']}  Errors: {results['errors']}")
+    print(f"Requests per Second: {results['requests_per_second']:.2f}")
+    if baseline:
+        speedup = results['requests_per_second'] / max(baseline['requests_per_second'], 1e-9)
+        print(f"Baseline Requests per Second: {baseline['requests_per_second']:.2f} ({speedup:.2f}x)")
+    print(f"\n{'Endpoint':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'base p95':>12}")
+    for endpoint, stats in results["endpoints"].items():
+        base_p95 = ""
+        if baseline and endpoint in baseline["endpoints"]:
+            base_p95 = f"{baseline['endpoints'][endpoint]['p95_ms']:.1f}"
+        print(f"{endpoint:<28}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{base_p95:>12}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark polling throughput of Observer AI platform")
+    parser.add_argument("--users", type=int, default=20, help="Number of concurrent polling users")
+    parser.add_argument("--duration", type=int, default=30, help="Seconds to poll for")
+    parser.add_argument("--url", default="http://localhost:8001", help="Base URL for the API")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    benchmark = PollBenchmark(base_url=args.url, users=args.users, duration=args.duration)
+    results = await benchmark.run()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for Observer AI backend
+Starts uvicorn the way production does (backend/ as working directory, N workers),
+then reports time-to-first-request and the resident memory of every worker.
+
+Compare a full build against one with optional features switched off:
+
+    python scripts/startup_benchmark.py --workers 4 --output full.json
+    python scripts/startup_benchmark.py --workers 4 --disable charts,tts,voice,avatars --compare full.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import psutil
+
+REPO_ROOT = Path(__file__).parent.parent
+BACKEND_DIR = REPO_ROOT / "backend"
+
+class StartupBenchmark:
+    def __init__(self, workers=4, port=8011, disabled_features=None, timeout=120, settle=5):
+        self.workers = workers
+        self.port = port
+        self.disabled_features = disabled_features or []
+        self.timeout = timeout
+        self.settle = settle
+
+    def server_env(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        for feature in self.disabled_features:
+            env[f"FEATURE_{feature.upper()}"] = "0"
+        return env
+
+    def wait_for_first_request(self, process):
+        """Poll the API root until it answers; returns seconds since launch"""
+        url = f"http://127.0.0.1:{self.port}/api/"
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < self.timeout:
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with code {process.returncode} before serving a request")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start_time
+            except OSError:
+                pass
+            time.sleep(0.05)
+        raise SystemExit(f"No response from {url} within {self.timeout}s")
+
+    def run_once(self):
+        command = [
+            sys.executable, "-m", "uvicorn", "server:app",
+            "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(self.workers),
+        ]
+        launch_time = time.perf_counter()
+        process = subprocess.Popen(command, cwd=BACKEND_DIR, env=self.server_env(),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            time_to_first_request = self.wait_for_first_request(process)
+            # Let every worker finish importing before measuring memory
+            time.sleep(self.settle)
+            master = psutil.Process(process.pid)
+            if self.workers == 1:
+                # A single worker serves requests in the uvicorn process itself
+                workers = [master]
+            else:
+                workers = [child for child in master.children(recursive=True) if "spawn_main" in " ".join(child.cmdline())]
+            worker_rss_mb = sorted(round(child.memory_info().rss / 1024 / 1024, 1) for child in workers)
+            return {
+                "time_to_first_request_s": round(time_to_first_request, 3),
+                "launch_to_ready_s": round(time.perf_counter() - launch_time - self.settle, 3),
+                "master_rss_mb": round(master.memory_info().rss / 1024 / 1024, 1),
+                "worker_rss_mb": worker_rss_mb,
+            }
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def run(self, runs=3):
+        samples = [self.run_once() for _ in range(runs)]
+        ttfr = sorted(sample["time_to_first_request_s"] for sample in samples)
+        worker_rss = [rss for sample in samples for rss in sample["worker_rss_mb"]]
+        return {
+            "workers": self.workers,
+            "disabled_features": self.disabled_features,
+            "runs": runs,
+            "time_to_first_request_s": {"min": ttfr[0], "median": ttfr[len(ttfr) // 2], "max": ttfr[-1]},
+            "worker_rss_mb": {
+                "mean": round(sum(worker_rss) / len(worker_rss), 1) if worker_rss else 0.0,
+                "max": max(worker_rss, default=0.0),
+            },
+            "samples": samples,
+        }
+
+def print_results(results, baseline=None):
+    """Print startup results, with a baseline run alongside if given"""
+    print("\n" + "="*80)
+    print("STARTUP BENCHMARK RESULTS")
+    print("="*80)
+    print(f"Workers: {results['workers']}  Disabled features: {', '.join(results['disabled_features']) or 'none'}")
+    rows = [
+        ("Time to first request (median s)", results["time_to_first_request_s"]["median"],
+         baseline and baseline["time_to_first_request_s"]["median"]),
+        ("Worker RSS (mean MB)", results["worker_rss_mb"]["mean"], baseline and baseline["worker_rss_mb"]["mean"]),
+        ("Worker RSS (max MB)", results["worker_rss_mb"]["max"], baseline and baseline["worker_rss_mb"]["max"]),
+    ]
+    print(f"\n{'Metric':<36}{'value':>10}{'baseline':>12}")
+    for label, value, base in rows:
+        print(f"{label:<36}{value:>10.2f}{(f'{base:.2f}' if base is not None else ''):>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Observer AI backend startup time and worker memory")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8011, help="Port to start the benchmark server on")
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold starts to measure")
+    parser.add_argument("--disable", default="", help="Comma-separated features to switch off (charts,tts,voice,avatars)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+
+    args = parser.parse_args()
+
+    disabled = [feature.strip() for feature in args.disable.split(",") if feature.strip()]
+    benchmark = StartupBenchmark(workers=args.workers, port=args.port, disabled_features=disabled)
+    results = benchmark.run(args.runs)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
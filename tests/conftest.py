@@ -0,0 +1,83 @@
+"""
+Shared pytest fixtures for in-process backend tests.
+
+These run the FastAPI app with TestClient against the MongoDB configured in
+MONGO_URL (backend/.env is loaded by the server) and are skipped when no
+database is configured or it doesn't answer a ping.
+"""
+
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Backend modules import their siblings by plain name, the way server.py sets up sys.path;
+# tests import them the same way so each module is loaded once
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+QUERY_BUDGETS_FILE = Path(__file__).parent / "query_budgets.json"
+
+@pytest.fixture(scope="session")
+def api_client():
+    """TestClient for server.app with the query profiler switched on"""
+    os.environ.setdefault("QUERY_PROFILER_ENABLED", "1")
+    try:
+        from fastapi.testclient import TestClient
+        from server import app
+    except KeyError as e:
+        pytest.skip(f"Backend environment not configured: missing {e}")
+    except ImportError as e:
+        pytest.skip(f"Backend dependencies not installed: {e}")
+
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    probe = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+    try:
+        probe.admin.command("ping")
+    except PyMongoError as e:
+        pytest.skip(f"MongoDB not reachable at MONGO_URL: {e}")
+    finally:
+        probe.close()
+
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def auth_headers(api_client):
+    """Register a throwaway user and return its auth headers"""
+    suffix = uuid.uuid4().hex[:8]
+    response = api_client.post("/api/auth/register", json={
+        "email": f"query.budget.{suffix}@example.com",
+        "password": "QueryBudget123",
+        "name": f"Query Budget {suffix}"
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def query_budgets():
+    with open(QUERY_BUDGETS_FILE) as f:
+        return json.load(f)
+
+@pytest.fixture
+def query_budget(query_budgets):
+    """Fail the test when a response issued more Mongo commands than its recorded budget.
+
+    Usage: query_budget(response, "GET /api/agents")
+    """
+    def check(response, endpoint: str):
+        assert "X-DB-Query-Count" in response.headers, "Query profiler is not enabled"
+        assert endpoint in query_budgets, f"No query budget recorded for {endpoint}"
+        count = int(response.headers["X-DB-Query-Count"])
+        budget = query_budgets[endpoint]
+        assert count <= budget, (
+            f"{endpoint} issued {count} Mongo commands, budget is {budget} "
+            f"({response.headers.get('Server-Timing', '')}). "
+            f"If the increase is intended, update {QUERY_BUDGETS_FILE.name}."
+        )
+        return count
+    return check
@@ -0,0 +1,91 @@
+"""Avatar proxy: source allowlist, size snapping and on-demand variants from a local blob store"""
+
+import asyncio
+import io
+
+import pytest
+
+pytest.importorskip("PIL")
+httpx = pytest.importorskip("httpx")
+
+from PIL import Image
+
+import avatar_proxy
+
+SOURCE_URL = "https://v3.fal.media/files/zebra/portrait.png"
+
+def portrait_png() -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (768, 1024), (120, 80, 40)).save(output, "PNG")
+    return output.getvalue()
+
+@pytest.fixture
+def fetches(monkeypatch, tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, content=portrait_png())
+
+    monkeypatch.setattr(avatar_proxy, "BLOB_DIR", tmp_path)
+    monkeypatch.setattr(avatar_proxy, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return calls
+
+def test_only_allowlisted_https_sources():
+    assert avatar_proxy.is_allowed_source(SOURCE_URL)
+    assert not avatar_proxy.is_allowed_source("http://v3.fal.media/files/a.png")
+    assert not avatar_proxy.is_allowed_source("https://fal.media.evil.example/a.png")
+    assert not avatar_proxy.is_allowed_source("https://169.254.169.254/latest/meta-data")
+
+def test_sizes_snap_to_stored_variants():
+    assert [avatar_proxy.snap_size(size) for size in (10, 48, 64, 96, 200, 4000)] == [48, 48, 96, 96, 256, 256]
+
+def test_format_negotiation_falls_back_to_png():
+    assert avatar_proxy.negotiate_format("auto", "image/png,*/*") == "png"
+    assert avatar_proxy.negotiate_format("png", "") == "png"
+    with pytest.raises(avatar_proxy.AvatarProxyError):
+        avatar_proxy.negotiate_format("gif", "")
+
+def test_variants_are_fetched_once_and_square(fetches):
+    fmt = "webp" if "webp" in avatar_proxy.supported_formats() else "png"
+
+    async def burst():
+        return await asyncio.gather(*[avatar_proxy.get_avatar_variant(SOURCE_URL, 96, fmt) for _ in range(4)])
+
+    paths = asyncio.run(burst())
+    small = asyncio.run(avatar_proxy.get_avatar_variant(SOURCE_URL, 48, fmt))
+
+    assert fetches == [SOURCE_URL]
+    assert len(set(paths)) == 1
+    with Image.open(paths[0]) as image:
+        assert image.size == (96, 96)
+    assert small.stat().st_size < len(portrait_png())
+
+def test_disallowed_source_is_rejected(fetches):
+    with pytest.raises(avatar_proxy.AvatarProxyError):
+        asyncio.run(avatar_proxy.get_avatar_variant("https://example.com/a.png", 96, "png"))
+    assert fetches == []
+
+def test_waiters_take_over_when_the_producing_request_is_cancelled(tmp_path):
+    path = tmp_path / "original"
+    started = []
+
+    async def produce():
+        started.append(len(started))
+        if len(started) == 1:
+            await asyncio.sleep(60)  # The first request disconnects mid-fetch
+        path.write_bytes(b"image")
+
+    async def scenario():
+        owner = asyncio.create_task(avatar_proxy._once(path, produce))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(avatar_proxy._once(path, produce)) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        return owner, await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+
+    owner, paths = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert paths == [path] * 3 and path.read_bytes() == b"image"
+    assert len(started) == 2
+    assert not avatar_proxy._inflight
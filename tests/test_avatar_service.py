@@ -0,0 +1,152 @@
+"""Avatar generation dedup and persistent cache, with fal.ai replaced by a counter"""
+
+import asyncio
+
+import pytest
+
+avatar_service = pytest.importorskip("avatar_service")
+
+from pymongo.errors import DuplicateKeyError
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["key"])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["key"], update["$setOnInsert"])
+
+class FakePoolCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one_and_delete(self, query, sort=None):
+        for doc in self.docs:
+            if doc["bucket"] == query["bucket"]:
+                self.docs.remove(doc)
+                return doc
+        return None
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if doc["bucket"] == query["bucket"])
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+class FakeLeases:
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        held = self.docs.get(query["_id"])
+        owner, expired = query["$or"][0]["owner"], query["$or"][1]["expires_at"]["$lt"]
+        if held and held["owner"] != owner and held["expires_at"] >= expired:
+            raise DuplicateKeyError("E11000 duplicate key error collection: leases")
+        self.docs[query["_id"]] = dict(update["$set"])
+
+    async def delete_one(self, query):
+        if self.docs.get(query["_id"], {}).get("owner") == query["owner"]:
+            del self.docs[query["_id"]]
+
+class FakeDB:
+    def __init__(self):
+        self.avatar_cache = FakeCollection()
+        self.avatar_pool = FakePoolCollection()
+        self.leases = FakeLeases()
+
+@pytest.fixture
+def fal_calls(monkeypatch):
+    calls = []
+
+    async def fake_run_fal_model(model, arguments):
+        calls.append(arguments["prompt"])
+        number = len(calls)
+        await asyncio.sleep(0.01)
+        return {"images": [{"url": f"https://cdn.example/{number}.png"}]}
+
+    monkeypatch.setattr(avatar_service, "run_fal_model", fake_run_fal_model)
+    return calls
+
+def test_duplicate_prompts_are_generated_once(fal_calls):
+    db = FakeDB()
+    outcomes = asyncio.run(avatar_service.generate_avatars(db, ["a", "b", "a", "a"], concurrency=2))
+    assert sorted(fal_calls) == ["a", "b"]
+    assert set(outcomes) == {"a", "b"}
+    assert all(outcome["image_url"] and not outcome["cached"] for outcome in outcomes.values())
+
+def test_rerun_is_served_from_cache(fal_calls):
+    db = FakeDB()
+    first = asyncio.run(avatar_service.generate_avatars(db, ["a", "b"]))
+    second = asyncio.run(avatar_service.generate_avatars(db, ["a", "b"]))
+    assert len(fal_calls) == 2
+    assert all(outcome["cached"] for outcome in second.values())
+    assert second["a"]["image_url"] == first["a"]["image_url"]
+
+def test_concurrent_requests_share_one_job(fal_calls):
+    db = FakeDB()
+
+    async def burst():
+        return await asyncio.gather(*[avatar_service.generate_cached_avatar(db, "same prompt") for _ in range(5)])
+
+    outcomes = asyncio.run(burst())
+    assert fal_calls == ["same prompt"]
+    assert len({outcome["image_url"] for outcome in outcomes}) == 1
+
+def test_waiters_are_released_when_the_generating_request_is_cancelled(fal_calls):
+    db = FakeDB()
+
+    async def scenario():
+        owner = asyncio.create_task(avatar_service.generate_cached_avatar(db, "same prompt"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(avatar_service.generate_cached_avatar(db, "same prompt")) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        outcomes = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+        return owner, outcomes
+
+    owner, outcomes = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert all(outcome["error"] and not outcome["image_url"] for outcome in outcomes)
+    assert not avatar_service._inflight
+
+def test_pool_serves_instantly_and_refills_in_background(fal_calls):
+    db = FakeDB()
+    pool = avatar_service.AvatarPool()
+    pool.target, pool.low_watermark = 3, 2
+
+    async def scenario():
+        # Cold start: the bucket is empty, so the shared headshot is generated once
+        first = await pool.pop(db, "female")
+        await asyncio.gather(*pool._tasks)
+        assert await db.avatar_pool.count_documents({"bucket": "female:professional"}) == 3
+
+        served = [await pool.pop(db, "female") for _ in range(2)]
+        await asyncio.gather(*pool._tasks)
+        return first, served
+
+    first, served = asyncio.run(scenario())
+    assert first and all(served)
+    assert len(set(served)) == 2
+    # 1 cold-start headshot + 3 initial fills + 2 to top back up after dropping below the watermark
+    assert len(fal_calls) == 6
+
+def test_workers_share_one_refill_per_bucket(fal_calls):
+    db = FakeDB()
+    db.avatar_pool.docs = [{"bucket": "male:professional", "image_url": f"https://cdn.example/seed{n}.png"} for n in range(3)]
+    workers = [avatar_service.AvatarPool() for _ in range(4)]
+    for pool in workers:
+        pool.target, pool.low_watermark = 6, 4
+
+    async def scenario():
+        served = [await pool.pop(db, "male") for pool in workers[:2]]
+        await asyncio.gather(*[task for pool in workers for task in pool._tasks])
+        return served
+
+    served = asyncio.run(scenario())
+    assert all(served)
+    # Both workers saw the bucket low, but only the lease holder tops it up from the 1 left
+    assert len(fal_calls) == 5
+    assert len(db.avatar_pool.docs) == 6
+    assert not db.leases.docs
@@ -0,0 +1,78 @@
+"""Conversation archive: compression round trip, bucket merging and the hot/cold threshold"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("bson")
+
+from pymongo.errors import DuplicateKeyError
+
+from conversation_archive import (
+    ConversationArchiver, archive_threshold, bucket_key, compress_rounds, decompress_rounds, merge_rounds,
+)
+
+def make_round(number, created_at):
+    return {
+        "_id": object(), "id": f"r{number}", "round_number": number, "user_id": "u1", "created_at": created_at,
+        "messages": [{"id": f"m{number}", "agent_name": "Maya", "message": "Pilot the north site first. " * 5}],
+    }
+
+def test_rounds_survive_compression():
+    start = datetime(2025, 3, 1, 9, 0)
+    rounds = [make_round(n, start + timedelta(hours=n)) for n in range(20)]
+    codec, data = compress_rounds(rounds, "zlib")
+    restored = decompress_rounds(codec, data)
+    assert [r["id"] for r in restored] == [r["id"] for r in rounds]
+    assert restored[3]["created_at"] == rounds[3]["created_at"]
+    assert "_id" not in restored[0]
+    assert len(data) < sum(len(r["messages"][0]["message"]) for r in rounds) / 5
+    with pytest.raises(ValueError):
+        compress_rounds(rounds, "lz4")
+
+def test_merge_is_idempotent_and_ordered():
+    day = datetime(2025, 3, 1)
+    early, late = make_round(1, day), make_round(2, day + timedelta(hours=5))
+    merged = merge_rounds([late], [early, late])
+    assert [r["id"] for r in merged] == ["r1", "r2"]
+    assert bucket_key(late["created_at"]) == "2025-03-01"
+
+def test_threshold_keeps_the_newest_rounds_hot():
+    now = datetime(2025, 3, 10)
+    age_cutoff = now - timedelta(days=7)
+    assert archive_threshold(age_cutoff, None, None) is None
+    # Few recent rounds: only the age limit applies
+    assert archive_threshold(age_cutoff, now - timedelta(days=1), None) == age_cutoff
+    # Many rounds: everything past the count limit goes, even if recent
+    assert archive_threshold(age_cutoff, now - timedelta(hours=1), now - timedelta(days=2)) == now - timedelta(days=2)
+    # Never past the newest protected rounds
+    assert archive_threshold(age_cutoff, now - timedelta(days=9), None) == now - timedelta(days=9)
+
+class Leases:
+    """The conditional upsert of acquire_lease: a held lease fails the filter and the insert collides"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query["_id"])
+        if doc is None or any(all(doc[k] == v if not isinstance(v, dict) else doc[k] < v["$lt"]
+                                  for k, v in clause.items()) for clause in query["$or"]):
+            self.docs[query["_id"]] = {**(doc or {}), **update["$set"]}
+        else:
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+class Db:
+    def __init__(self):
+        self.leases = Leases()
+
+def test_one_worker_holds_the_compactor_lease():
+    db, now = Db(), datetime(2025, 3, 10)
+    first, second = ConversationArchiver(db), ConversationArchiver(db)
+    acquire = lambda archiver, at: asyncio.run(archiver.acquire_lease(600, now=at))
+    assert acquire(first, now) and not acquire(second, now)
+    # The holder renews; the other worker takes over only once the lease has lapsed
+    assert acquire(first, now + timedelta(minutes=5))
+    assert not acquire(second, now + timedelta(minutes=10))
+    assert acquire(second, now + timedelta(minutes=16)) and not acquire(first, now + timedelta(minutes=17))
@@ -0,0 +1,61 @@
+"""Rolling conversation state: incremental tracking, bounded size and persistence round trip"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from conversation_state import NARRATIVE_MAX_CHARS, RECENT_MESSAGES, ConversationState
+
+MAYA = SimpleNamespace(name="Maya", expertise="Supply chain logistics")
+
+def test_messages_update_topics_actions_and_decisions():
+    state = ConversationState()
+    state.add_message("Tom", "The budget is tight and the deadline is fixed.")
+    state.add_message("Ana", "I will draft the rollout schedule by Friday.")
+    state.add_message("Lee", "We agreed: pilot at the north site first.")
+    assert state.topics == ["budget", "timeline"]
+    assert state.action_count == 1 and state.action_items == ["Ana: I will draft the rollout schedule by Friday."]
+    assert state.decisions == ["Lee: We agreed: pilot at the north site first."]
+    assert state.phase == "solution_development"
+
+def test_questions_for_an_agent():
+    state = ConversationState()
+    state.add_message("Tom", "Maya, can the logistics partner handle two sites?")
+    state.add_message("Ana", "What does the weather look like?")
+    state.add_message("Maya", "Maya here - any logistics questions?")
+    assert [q["asker"] for q in state.pending_questions_for(MAYA)] == ["Tom"]
+
+def test_state_size_is_bounded_by_design():
+    state = ConversationState()
+    for n in range(2000):
+        state.add_message(f"Agent {n % 4}", f"Point {n}: we should review the cost model again. More detail follows here.")
+    assert len(state.recent) == RECENT_MESSAGES
+    assert state.recent[-1]["message"].startswith("Point 1999")
+    assert len(state.narrative) <= NARRATIVE_MAX_CHARS
+    assert "Point 1994" in state.narrative and "Point 10:" not in state.narrative
+    assert state.action_count == 2000 and len(state.action_items) < 10
+    assert state.message_count == 2000
+
+def test_round_trip_and_legacy_history():
+    history = [{"agent_name": "Tom", "content": "Next steps: implement the pilot."},
+               SimpleNamespace(agent_name="Ana", message="I recommend a second vendor bid.")]
+    state = ConversationState.from_messages(history)
+    restored = ConversationState(state.to_dict())
+    assert restored.to_dict() == state.to_dict()
+    assert restored.topics == ["action_planning"]
+    assert "Tom: Next steps" in restored.recent_text()
+    assert ConversationState().recent_text() == "" and ConversationState().phase == "early"
+
+def test_rounds_written_elsewhere_are_folded_in_once():
+    start = datetime(2025, 3, 1, 9, 0)
+    observer_round = {"created_at": start, "messages": [{"agent_name": "Observer (You)", "message": "Focus on the budget."},
+                                                        {"agent_name": "Tom", "message": "We agreed to cut the cost by 10%."}]}
+    fast_forward_round = {"created_at": start + timedelta(hours=1), "messages": [{"agent_name": "Ana", "message": "Next steps: the vendor call."}]}
+    state = ConversationState()
+    assert state.newer_rounds_query("u1") == {"user_id": "u1"}
+    state.fold_rounds([observer_round, fast_forward_round])
+    assert state.message_count == 3 and state.topics == ["budget", "action_planning"]
+    assert state.decisions == ["Tom: We agreed to cut the cost by 10%."]
+    restored = ConversationState(state.to_dict())
+    assert restored.newer_rounds_query("u1") == {"user_id": "u1", "created_at": {"$gt": start + timedelta(hours=1)}}
+    restored.mark_folded(start)
+    assert restored.folded_through == start + timedelta(hours=1)
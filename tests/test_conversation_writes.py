@@ -0,0 +1,49 @@
+"""Conversation write path: appends and targeted message edits instead of array rewrites"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from conversation_writes import ConversationWriter
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.batches.append((operations, ordered))
+
+def test_appends_to_a_round_are_coalesced_into_one_push():
+    writer = ConversationWriter(FakeCollection())
+    writer.append({"id": "r1"}, {"id": "m3", "message": "Vote passed"})
+    writer.append({"id": "r1"}, {"id": "m4", "message": "Document created"})
+    assert writer.operations() == [
+        ({"id": "r1"}, {"$push": {"messages": {"$each": [
+            {"id": "m3", "message": "Vote passed"}, {"id": "m4", "message": "Document created"},
+        ]}}}, None),
+    ]
+
+def test_message_edits_use_array_filters_or_positions():
+    writer = ConversationWriter(FakeCollection())
+    writer.set_message({"_id": 7}, {"message": "Hola"}, message_id="m1")
+    writer.set_message({"_id": 7}, {"message": "Adiós"}, index=2)
+    writer.set_fields({"_id": 7}, {"language": "es"})
+    [(round_filter, update, array_filters)] = writer.operations()
+    assert round_filter == {"_id": 7}
+    assert update == {"$set": {"messages.$[m0].message": "Hola", "messages.2.message": "Adiós", "language": "es"}}
+    assert array_filters == [{"m0.id": "m1"}]
+    with pytest.raises(ValueError):
+        writer.set_message({"_id": 7}, {"message": "?"})
+
+def test_flush_sends_one_ordered_bulk_write_and_resets():
+    collection = FakeCollection()
+    writer = ConversationWriter(collection)
+    writer.append({"id": "r1"}, {"id": "m3"})
+    writer.set_message({"id": "r1"}, {"mood": "productive"}, message_id="m3")
+    assert asyncio.run(writer.flush()) == 2
+    assert asyncio.run(writer.flush()) == 0
+    [(operations, ordered)] = collection.batches
+    assert ordered and len(operations) == 2
+    assert writer.pending == 0
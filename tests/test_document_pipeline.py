@@ -0,0 +1,131 @@
+"""Post-round document pipeline: coalescing bursts, per-key serialization and completion events"""
+
+import asyncio
+
+from document_pipeline import DocumentPipeline
+
+def recording_worker(calls, delay=0.0, fail=False):
+    async def worker(rounds, scenario_name, **context):
+        calls.append((scenario_name, list(rounds), context))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("LLM unavailable")
+        return {"created": [f"{scenario_name} - Budget"], "updated": []}
+    return worker
+
+def test_burst_of_rounds_is_coalesced_into_one_job():
+    async def scenario():
+        calls = []
+        pipeline = DocumentPipeline(recording_worker(calls), debounce=0.05, max_delay=1, concurrency=2)
+        events = pipeline.subscribe()
+        for n in range(4):
+            pipeline.enqueue("u1", "Relocation", f"round-{n}", agent_objects=[n])
+            await asyncio.sleep(0.01)
+        pipeline.enqueue("u2", "Relocation", "other-user")
+        assert pipeline.pending("u1", "Relocation") == 4
+        await pipeline.drain()
+        return calls, [events.get_nowait() for _ in range(events.qsize())]
+
+    calls, events = asyncio.run(scenario())
+    jobs = {rounds[0]: (rounds, context) for _, rounds, context in calls}
+    assert len(calls) == 2
+    assert jobs["round-0"] == (["round-0", "round-1", "round-2", "round-3"], {"agent_objects": [3]})
+    assert jobs["other-user"][0] == ["other-user"]
+    assert {(e["type"], e["user_id"]) for e in events} == {("documents_updated", "u1"), ("documents_updated", "u2")}
+    assert events[0]["result"] == {"created": ["Relocation - Budget"], "updated": []}
+
+def test_steady_stream_is_flushed_after_max_delay():
+    async def scenario():
+        calls = []
+        pipeline = DocumentPipeline(recording_worker(calls), debounce=0.05, max_delay=0.1)
+        for n in range(10):
+            pipeline.enqueue("u1", "Relocation", n)
+            await asyncio.sleep(0.03)
+        await pipeline.drain()
+        return calls
+
+    calls = asyncio.run(scenario())
+    assert len(calls) > 1
+    assert [n for _, rounds, _ in calls for n in rounds] == list(range(10))
+
+def test_rounds_arriving_during_a_job_form_the_next_batch():
+    async def scenario():
+        calls, running = [], []
+        worker = recording_worker(calls, delay=0.1)
+
+        async def tracked(rounds, **context):
+            running.append(1)
+            assert len(running) == 1, "two jobs ran for the same key"
+            try:
+                return await worker(rounds, **context)
+            finally:
+                running.pop()
+
+        pipeline = DocumentPipeline(tracked, debounce=0.01, max_delay=1)
+        pipeline.enqueue("u1", "Relocation", "a")
+        await asyncio.sleep(0.05)
+        pipeline.enqueue("u1", "Relocation", "b")
+        pipeline.enqueue("u1", "Relocation", "c")
+        await pipeline.drain()
+        return calls
+
+    assert [rounds for _, rounds, _ in asyncio.run(scenario())] == [["a"], ["b", "c"]]
+
+def test_failed_job_is_announced():
+    async def scenario():
+        pipeline = DocumentPipeline(recording_worker([], fail=True), debounce=0, max_delay=0)
+        events = pipeline.subscribe()
+        pipeline.enqueue("u1", "Relocation", "a")
+        await pipeline.drain()
+        return await events.get()
+
+    event = asyncio.run(scenario())
+    assert event["type"] == "documents_failed"
+    assert event["detail"] == "LLM unavailable"
+
+class PubSubBroker:
+    """The slice of the Redis client the pipeline uses: publish and a channel subscription"""
+
+    def __init__(self):
+        self.listeners = []
+
+    async def publish(self, channel, data):
+        for listener in self.listeners:
+            listener.put_nowait({"type": "message", "channel": channel, "data": data})
+
+    def pubsub(self):
+        broker = self
+
+        class PubSub:
+            async def subscribe(self, channel):
+                self.messages = asyncio.Queue()
+                self.messages.put_nowait({"type": "subscribe", "channel": channel, "data": 1})
+                broker.listeners.append(self.messages)
+
+            async def listen(self):
+                while True:
+                    yield await self.messages.get()
+
+            async def reset(self):
+                broker.listeners.remove(self.messages)
+
+        return PubSub()
+
+def test_events_reach_subscribers_of_other_workers():
+    async def scenario():
+        broker = PubSubBroker()
+        finishing = DocumentPipeline(recording_worker([]), debounce=0, max_delay=0, redis=lambda: broker)
+        streaming = DocumentPipeline(recording_worker([]), debounce=0, max_delay=0, redis=lambda: broker)
+        mine, theirs = streaming.subscribe("u1"), streaming.subscribe("u2")
+        await asyncio.sleep(0)
+        finishing.enqueue("u1", "Relocation", "a")
+        await finishing.drain()
+        event = await asyncio.wait_for(mine.get(), timeout=1)
+        await streaming.stop()
+        return event, theirs.qsize(), broker.listeners
+
+    event, other_user_events, listeners = asyncio.run(scenario())
+    assert event["type"] == "documents_updated" and event["user_id"] == "u1"
+    assert isinstance(event["finished_at"], str)
+    assert other_user_events == 0
+    assert listeners == []
@@ -0,0 +1,77 @@
+"""Section-level document patches: parsing, section selection and applying LLM patches"""
+
+import json
+
+import pytest
+
+from document_sections import (
+    apply_patch, outline, parse_patch, parse_sections, patch_prompt, relevant_sections, render_sections,
+)
+
+DOCUMENT = """# Relocation Plan
+
+Owner: Operations.
+
+## Budget
+- Vendor quote: pending
+
+## Timeline
+- Pilot: week 2
+
+```mermaid
+graph TD
+# not a heading
+```
+
+### Milestones
+- Review: week 4
+
+## Risks
+- Supplier delays
+"""
+
+def test_sections_round_trip():
+    sections = parse_sections(DOCUMENT)
+    assert [s["heading"] for s in sections] == ["", "# Relocation Plan", "## Budget", "## Timeline", "### Milestones", "## Risks"]
+    assert render_sections(sections) == DOCUMENT
+    assert "s3  ## Timeline  [7 lines]" in outline(sections)
+    assert "(preamble)" not in outline(sections)
+
+def test_relevant_sections_follow_the_conversation():
+    sections = parse_sections(DOCUMENT)
+    shown = relevant_sections(sections, "Maya: the vendor quote came in over budget", limit=2)
+    assert shown[0]["heading"] == "## Budget"
+    assert relevant_sections(sections, "zzzz qqqq") == []
+    prompt = patch_prompt(sections, shown, "Maya: the vendor quote came in over budget", "New decisions")
+    assert "[s2] ## Budget\n- Vendor quote: pending" in prompt
+    assert "- Supplier delays" not in prompt
+
+def test_patch_is_applied_locally():
+    sections = parse_sections(DOCUMENT)
+    patch = parse_patch("Here is the patch:\n```json\n" + json.dumps([
+        {"op": "replace", "section": "s2", "content": "- Vendor quote: 12% over budget (rev 2)"},
+        {"op": "append", "section": "s5", "content": "- Second vendor bid by Friday"},
+        {"op": "add", "after": "s3", "heading": "Rollback Plan", "content": "- Keep the old site for 30 days"},
+        {"op": "append", "section": "s99", "content": "ignored"},
+    ]) + "\n```")
+    updated = apply_patch(sections, patch, replaceable={"s2"})
+    assert "## Budget\n\n- Vendor quote: 12% over budget (rev 2)\n\n## Timeline" in updated
+    assert "- Supplier delays\n\n- Second vendor bid by Friday\n" in updated
+    # New sections go after the anchor's subsections, not inside them
+    assert updated.index("### Milestones") < updated.index("## Rollback Plan") < updated.index("## Risks")
+    assert "ignored" not in updated
+    assert "# not a heading" in updated
+    assert render_sections(sections) == DOCUMENT
+
+def test_replacing_unseen_sections_is_refused():
+    sections = parse_sections(DOCUMENT)
+    patch = [{"op": "replace", "section": "s5", "content": "- Everything is fine"}]
+    assert apply_patch(sections, patch, replaceable={"s2"}) is None
+
+def test_invalid_patches():
+    with pytest.raises(ValueError):
+        parse_patch("# Relocation Plan\n\nThe whole document again")
+    with pytest.raises(ValueError):
+        parse_patch('[{"op": "delete", "section": "s1", "content": ""}]')
+    with pytest.raises(ValueError):
+        parse_patch('[{"op": "add", "content": "no heading"}]')
@@ -0,0 +1,117 @@
+"""Document version history: reverse line deltas, snapshot placement and reconstruction"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("bson")
+
+import document_versions
+from document_versions import (
+    VersionNotFound, apply_delta, diff_versions, make_delta, reconstruct, version_record,
+)
+
+SECTIONS = [f"## Section {n}\n\n" + "".join(f"- Step {n}.{i}: pilot the north site first\n" for i in range(8)) + "\n"
+            for n in range(12)]
+
+def edit(content, n):
+    """A small revision: one line changed in one section and a line appended"""
+    return content.replace(f"Step {n % 12}.3: pilot", f"Step {n % 12}.3 (rev {n}): pilot") + f"- Note from revision {n}\n"
+
+def history(count):
+    versions = ["# Plan\n\n" + "".join(SECTIONS)]
+    for n in range(1, count):
+        versions.append(edit(versions[-1], n))
+    return versions
+
+def test_delta_round_trip():
+    old, new = history(2)
+    delta = make_delta(new, old)
+    assert apply_delta(new, delta) == old
+    assert apply_delta(old, make_delta(old, new)) == new
+    assert make_delta(old, old) == []
+    assert apply_delta("", make_delta("", "a\nb")) == "a\nb"
+
+def test_small_edits_store_a_fraction_of_the_document(monkeypatch):
+    monkeypatch.setattr(document_versions, "SNAPSHOT_EVERY", 10)
+    old, new = history(2)
+    delta = version_record("d1", 1, old, new)
+    snapshot = version_record("d1", 10, old, new)
+    assert delta["kind"] == "delta" and snapshot["kind"] == "snapshot"
+    assert snapshot["content"] == old
+    assert delta["size"] < delta["content_size"] / 10
+
+def test_every_version_is_reconstructed_from_the_head(monkeypatch):
+    monkeypatch.setattr(document_versions, "SNAPSHOT_EVERY", 5)
+    versions = history(23)  # versions 1..23, head is 23
+    head = len(versions)
+    records = {v: version_record("d1", v, versions[v - 1], versions[v]) for v in range(1, head)}
+    assert sorted(v for v, r in records.items() if r["kind"] == "snapshot") == [5, 10, 15, 20]
+    for v in range(1, head + 1):
+        assert reconstruct(versions[-1], head, records, v) == versions[v - 1]
+
+    # Only the records up to the next snapshot are needed
+    nearby = {v: records[v] for v in range(7, 11)}
+    assert reconstruct(versions[-1], head, nearby, 7) == versions[6]
+
+    with pytest.raises(VersionNotFound):
+        reconstruct(versions[-1], head, records, head + 1)
+    with pytest.raises(VersionNotFound):
+        reconstruct(versions[-1], head, {v: r for v, r in records.items() if v != 12}, 11)
+
+def test_diff_between_versions():
+    old, new = history(2)
+    diff = diff_versions(old, new, "v1", "v2")
+    assert diff.startswith("--- v1\n+++ v2\n")
+    assert "+- Note from revision 1\n" in diff
+
+class Collection:
+    """The few async collection calls save_revision makes, over a list of dicts"""
+
+    def __init__(self, docs=None, fail_replace=False):
+        self.docs = docs or []
+        self.fail_replace = fail_replace
+
+    def _match(self, doc, query):
+        for key, value in query.items():
+            current = doc
+            for part in key.split("."):
+                current = current.get(part) if isinstance(current, dict) else None
+            if isinstance(value, dict) and "$exists" in value:
+                if (current is not None) != value["$exists"]:
+                    return False
+            elif current != value:
+                return False
+        return True
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(update.get("$set", {}))
+                for key in update.get("$unset", {}):
+                    doc.pop(key, None)
+                return type("Result", (), {"matched_count": 1})
+        return type("Result", (), {"matched_count": 0})
+
+    async def replace_one(self, query, record, upsert=False):
+        if self.fail_replace:
+            raise ConnectionError("connection reset")
+        self.docs = [d for d in self.docs if not self._match(d, query)] + [dict(record)]
+
+def test_version_record_survives_a_crash_between_writes():
+    db = type("Db", (), {})()
+    db.documents = Collection([{"id": "d1", "content": "v1\n"}])
+    db.document_versions = Collection(fail_replace=True)
+    with pytest.raises(ConnectionError):
+        asyncio.run(document_versions.save_revision(db, dict(db.documents.docs[0]), "v2\n"))
+    head = dict(db.documents.docs[0])
+    assert head["version"] == 2 and head["pending_version"]["version"] == 1
+
+    # The next save stores the stranded record before moving on
+    db.document_versions.fail_replace = False
+    assert asyncio.run(document_versions.save_revision(db, dict(head), "v3\n")) == 3
+    assert sorted(r["version"] for r in db.document_versions.docs) == [1, 2]
+    assert "pending_version" not in db.documents.docs[0]
+
+    with pytest.raises(document_versions.VersionConflict):
+        asyncio.run(document_versions.save_revision(db, dict(head), "stale\n"))
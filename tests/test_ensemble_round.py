@@ -0,0 +1,71 @@
+"""Ensemble round prompt/parse helpers, the fake provider's ensemble replies and usage tracking"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ensemble_round import (
+    ENSEMBLE_SYSTEM_MESSAGE, build_ensemble_prompt, parse_ensemble_response, resolve_round_mode,
+)
+from llm_providers import FakeLLMProvider, LlmChat, UserMessage, set_llm_provider, track_llm_usage
+from response_filters import is_acceptable_response
+
+def make_agent(agent_id, name, archetype="scientist"):
+    personality = SimpleNamespace(extroversion=5, optimism=6, curiosity=8, cooperativeness=7, energy=6)
+    return SimpleNamespace(id=agent_id, name=name, archetype=archetype, personality=personality,
+                           expertise="Supply chain analytics", goal="Cut costs", background="Ten years in logistics")
+
+AGENTS = [make_agent("a1", "Maya Patel"), make_agent("a2", "Tom Reyes", "skeptic"), make_agent("a3", "Ana Lima", "leader")]
+
+def test_resolve_round_mode(monkeypatch):
+    monkeypatch.delenv("ROUND_GENERATION_MODE", raising=False)
+    assert resolve_round_mode(None) == "per_agent"
+    assert resolve_round_mode("Ensemble") == "ensemble"
+    monkeypatch.setenv("ROUND_GENERATION_MODE", "ensemble")
+    assert resolve_round_mode(None) == "ensemble"
+    with pytest.raises(ValueError):
+        resolve_round_mode("batch")
+
+def test_parse_keeps_only_wellformed_known_entries():
+    response = "```json\n" + json.dumps([
+        {"agent_id": "a1", "message": " Pilot it for two weeks. ", "mood": "Focused"},
+        {"agent_id": "a1", "message": "duplicate"},
+        {"agent_id": "zz", "message": "unknown speaker"},
+        {"agent_id": "a2", "message": 42},
+        {"agent_id": "a3", "message": "I'll own the vendor calls."},
+    ]) + "\n```"
+    parsed = parse_ensemble_response(response, AGENTS)
+    assert parsed == {
+        "a1": {"message": "Pilot it for two weeks.", "mood": "focused"},
+        "a3": {"message": "I'll own the vendor calls.", "mood": None},
+    }
+    assert parse_ensemble_response("not json at all", AGENTS) == {}
+    assert parse_ensemble_response("[{broken", AGENTS) == {}
+
+def test_fake_provider_round_trip_and_usage():
+    set_llm_provider(FakeLLMProvider(latency="fixed:0", banned_rate=0.0))
+    prompt = build_ensemble_prompt(AGENTS, {"scientist": "Logical"}, "Warehouse relocation", "Day 2, morning.", "Respond in English.")
+
+    async def run():
+        chat = LlmChat(api_key="", session_id="ensemble_1", system_message=ENSEMBLE_SYSTEM_MESSAGE)
+        return await chat.send_message(UserMessage(text=prompt))
+
+    try:
+        with track_llm_usage() as usage:
+            response = asyncio.run(run())
+    finally:
+        set_llm_provider(None)
+
+    parsed = parse_ensemble_response(response, AGENTS)
+    assert list(parsed) == ["a1", "a2", "a3"]
+    assert all(is_acceptable_response(entry["message"], "Warehouse relocation") for entry in parsed.values())
+    assert usage.calls == 1
+    assert usage.prompt_tokens > len(prompt) // 5
+    assert usage.completion_tokens > 0
+
+def test_response_filters():
+    assert not is_acceptable_response("Good morning team, let's begin.", "Warehouse relocation")
+    assert not is_acceptable_response("ok", "Warehouse relocation")
+    assert is_acceptable_response("Run the pilot at the north site first; I'll track the cost per pallet.", "Warehouse relocation")
@@ -0,0 +1,91 @@
+"""Fast-forward planning, batch reply parsing and bulk relationship scoring"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("fastapi")
+
+from fast_forward import (
+    build_batch_prompt, chunk, fail_orphaned_jobs, parse_batch_response, plan_slots, relationship_updates,
+)
+from llm_providers import FakeLLMProvider, LLMRequest
+
+AGENTS = [SimpleNamespace(id="a1"), SimpleNamespace(id="a2")]
+
+def test_plan_skips_periods_already_passed_today():
+    slots = plan_slots(current_day=4, current_period="afternoon", target_days=2, conversations_per_period=2)
+    assert [(slot["day"], slot["period"]) for slot in slots[::2]] == [
+        (4, "evening"), (5, "morning"), (5, "afternoon"), (5, "evening"),
+    ]
+    assert len(slots) == 8
+    assert [len(batch) for batch in chunk(slots, 3)] == [3, 3, 2]
+
+def test_batch_reply_parsing():
+    reply = json.dumps({
+        "rounds": [
+            {"slot": 1, "messages": [{"agent_id": "a1", "message": "Ship the pilot.", "mood": "Decisive"},
+                                     {"agent_id": "a2", "message": "Only with a rollback plan."}]},
+            {"slot": 9, "messages": [{"agent_id": "a1", "message": "out of range"}]},
+            {"slot": 2, "messages": [{"agent_id": "ghost", "message": "unknown"}]},
+        ],
+        "summary": " Pilot agreed, rollback pending. ",
+    })
+    rounds, summary = parse_batch_response(f"Here you go:\n{reply}", AGENTS, slot_count=2)
+    assert rounds[1]["a1"] == {"message": "Ship the pilot.", "mood": "decisive"}
+    assert rounds[1]["a2"]["mood"] is None
+    assert rounds.get(2) == {} and 9 not in rounds
+    assert summary == "Pilot agreed, rollback pending."
+    assert parse_batch_response("no json", AGENTS, 2) == ({}, None)
+
+def test_relationship_updates_match_per_round_clamping():
+    compatible = lambda a, b: 0.9 if {a.id, b.id} == {"a1", "a2"} and a.id == "a1" else 0.1
+    scores = relationship_updates(AGENTS, {("a1", "a2"): 9, ("a2", "a1"): -2}, rounds=4, compatibility=compatible)
+    assert scores == {("a1", "a2"): 10, ("a2", "a1"): -6}
+
+def test_fake_provider_answers_every_batch_slot():
+    personality = SimpleNamespace(extroversion=5, optimism=5, curiosity=5, cooperativeness=5, energy=5)
+    agents = [SimpleNamespace(id=agent_id, name=agent_id.upper(), archetype="scientist", personality=personality,
+                              expertise="", goal="Ship it", background="") for agent_id in ("a1", "a2")]
+    slots = plan_slots(current_day=1, current_period="morning", target_days=1, conversations_per_period=2)[:3]
+    request = LLMRequest(api_key="test", session_id="fast_forward_1700000000", system_message="",
+                         provider="gemini", model="gemini-2.0-flash", max_tokens=4000,
+                         text=build_batch_prompt(agents, {}, "Relocate the warehouse", "Nothing yet.", slots, 1))
+    assert request.kind == "fast_forward"
+    reply = asyncio.run(FakeLLMProvider(latency="fixed:0", banned_rate=0).complete(request))
+    rounds, summary = parse_batch_response(reply, agents, slot_count=len(slots))
+    assert sorted(rounds) == [1, 2, 3]
+    assert all(set(messages) == {"a1", "a2"} for messages in rounds.values())
+    assert summary
+
+class Jobs:
+    """update_many for the orphaned-job query: active status, heartbeat missing or older than the cutoff"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def update_many(self, query, update):
+        cutoff = query["heartbeat_at"]["$not"]["$gte"]
+        matched = [doc for doc in self.docs if doc["status"] in query["status"]["$in"]
+                   and doc.get("user_id") == query.get("user_id", doc.get("user_id"))
+                   and not (doc.get("heartbeat_at") and doc["heartbeat_at"] >= cutoff)]
+        for doc in matched:
+            doc.update(update["$set"])
+        return SimpleNamespace(modified_count=len(matched))
+
+def test_only_jobs_without_a_heartbeat_are_failed():
+    now = datetime(2025, 3, 10, 12, 0)
+    jobs = Jobs([
+        {"id": "live", "user_id": "u1", "status": "running", "heartbeat_at": now - timedelta(seconds=20)},
+        {"id": "orphaned", "user_id": "u1", "status": "running", "heartbeat_at": now - timedelta(hours=1)},
+        {"id": "legacy", "user_id": "u2", "status": "queued"},
+        {"id": "done", "user_id": "u1", "status": "completed", "heartbeat_at": now - timedelta(hours=1)},
+    ])
+    db = SimpleNamespace(fast_forward_jobs=jobs)
+    assert asyncio.run(fail_orphaned_jobs(db, "u1", now=now)) == 1
+    assert asyncio.run(fail_orphaned_jobs(db, now=now)) == 1
+    assert [job["status"] for job in jobs.docs] == ["running", "failed", "failed", "completed"]
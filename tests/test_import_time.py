@@ -0,0 +1,67 @@
+"""Keep backend.server cheap to import: heavy optional subsystems must load lazily"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+IMPORT_BUDGET_FILE = Path(__file__).parent / "import_budget.json"
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module name -> cumulative import time in microseconds from `python -X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if cumulative.isdigit():
+            modules[name] = int(cumulative)
+    return modules
+
+@pytest.fixture(scope="module")
+def import_profile():
+    with open(IMPORT_BUDGET_FILE) as f:
+        budget = json.load(f)
+
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "import_time_test")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {budget['module']}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+        if "ModuleNotFoundError" in last_line or "ImportError" in last_line:
+            pytest.skip(f"Backend dependencies not installed: {last_line}")
+        pytest.fail(f"Importing {budget['module']} failed:\n{result.stderr[-2000:]}")
+    return budget, parse_importtime(result.stderr)
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      4000 |      52000 | backend.server\n"
+    )
+    assert parse_importtime(stderr) == {"_io": 120, "backend.server": 52000}
+
+def test_heavy_modules_are_not_imported_eagerly(import_profile):
+    budget, modules = import_profile
+    eager = sorted(
+        name for name in modules
+        for forbidden in budget["forbidden_modules"]
+        if name == forbidden or name.startswith(forbidden + ".")
+    )
+    assert not eager, f"{budget['module']} eagerly imports heavy optional modules: {eager}"
+
+def test_import_time_budget(import_profile):
+    budget, modules = import_profile
+    cumulative_ms = modules[budget["module"]] / 1000
+    assert cumulative_ms <= budget["max_cumulative_ms"], (
+        f"Importing {budget['module']} took {cumulative_ms:.0f} ms, budget is {budget['max_cumulative_ms']} ms. "
+        f"Slowest imports: {sorted(modules.items(), key=lambda item: -item[1])[1:11]}"
+    )
@@ -0,0 +1,67 @@
+"""Fake and record/replay LLM providers used for offline benchmarking"""
+
+import asyncio
+
+import pytest
+
+from llm_providers import (
+    FakeLLMProvider, RecordingProvider, ReplayProvider, LLMRequest,
+    BANNED_AGENT_REPLIES, TRIGGER_AGENT_REPLIES, parse_latency_spec,
+)
+
+def make_request(session_id="agent_1234_1700000000", text="What should we do next?", system_message="You are Ada"):
+    return LLMRequest(
+        api_key="test", session_id=session_id, system_message=system_message,
+        provider="gemini", model="gemini-2.0-flash", max_tokens=150, text=text
+    )
+
+def test_request_kind_ignores_ids_and_timestamps():
+    assert make_request("agent_6f1c-22_1700000000").kind == "agent"
+    assert make_request("enhanced_analysis_1700000000.5").kind == "enhanced_analysis"
+    assert make_request("url_summary_-8812").kind == "url_summary"
+    assert make_request("field-summary-1700000000.5").kind == "field"
+    assert make_request("agent_a_1").key == make_request("agent_b_2").key
+
+def test_fake_provider_is_deterministic_per_prompt():
+    provider = FakeLLMProvider(latency="fixed:0", seed=7)
+    request = make_request()
+    first = asyncio.run(provider.complete(request))
+    second = asyncio.run(provider.complete(make_request()))
+    assert first == second
+
+def test_fake_agent_replies_hit_banned_and_trigger_phrases():
+    provider = FakeLLMProvider(latency="fixed:0", banned_rate=0.3, trigger_rate=0.3)
+    replies = [asyncio.run(provider.complete(make_request(text=f"turn {i}"))) for i in range(200)]
+    banned = sum(reply in BANNED_AGENT_REPLIES for reply in replies)
+    triggers = sum(reply in TRIGGER_AGENT_REPLIES for reply in replies)
+    assert 30 < banned < 90
+    assert 30 < triggers < 90
+
+def test_fake_provider_injects_rate_limits_and_errors():
+    provider = FakeLLMProvider(latency="fixed:0", rate_limit_rate=0.5, error_rate=0.5)
+    with pytest.raises(RuntimeError) as excinfo:
+        asyncio.run(provider.complete(make_request()))
+    assert "429" in str(excinfo.value) or "500" in str(excinfo.value)
+
+def test_fake_provider_timeouts_hang_past_caller_timeout():
+    provider = FakeLLMProvider(latency="fixed:0", timeout_rate=1.0, hang_seconds=5)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(provider.complete(make_request()), timeout=0.05))
+
+def test_parse_latency_spec_rejects_bad_specs():
+    assert parse_latency_spec("uniform:100,300") == ("uniform", [100.0, 300.0])
+    with pytest.raises(ValueError):
+        parse_latency_spec("normal:100")
+
+def test_record_then_replay_offline(tmp_path):
+    record_file = tmp_path / "recordings.jsonl"
+    recorder = RecordingProvider(FakeLLMProvider(latency="fixed:0"), record_file)
+    vote = make_request("voting_1_2", text="Proposal: adopt the pilot plan")
+    recorded = asyncio.run(recorder.complete(vote))
+
+    replay = ReplayProvider(record_file, replay_latency=False)
+    assert asyncio.run(replay.complete(make_request("voting_9_9", text="Proposal: adopt the pilot plan"))) == recorded
+    # Unseen prompts of a recorded kind fall back to that kind's recordings
+    assert asyncio.run(replay.complete(make_request("voting_3_3", text="Something else"))) == recorded
+    with pytest.raises(LookupError):
+        asyncio.run(replay.complete(make_request("weekly_summary_1")))
@@ -0,0 +1,80 @@
+"""Pool telemetry from the shared Mongo client's ConnectionPoolListener"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+
+pytest.importorskip("fastapi")
+pytest.importorskip("structlog")
+from prometheus_client import REGISTRY
+
+from instrumentation.mongo import MongoPoolMetrics
+
+ADDRESS = ("mongo-test", 27017)
+LABELS = {"address": "mongo-test:27017"}
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, {**LABELS, **labels}) or 0.0
+
+def event(**fields):
+    return SimpleNamespace(address=ADDRESS, **fields)
+
+def test_pool_listener_tracks_checkouts_and_connections():
+    listener = MongoPoolMetrics()
+    checkouts_before = sample("mongo_pool_checkout_wait_seconds_count", outcome="success")
+
+    listener.pool_created(event(options={"maxPoolSize": 100}))
+    listener.connection_created(event(connection_id=1))
+    listener.connection_check_out_started(event())
+    listener.connection_checked_out(event(connection_id=1))
+    assert sample("mongo_pool_connections_in_use") == 1
+    assert sample("mongo_pool_connections_open") == 1
+    assert sample("mongo_pool_max_size") == 100
+    assert sample("mongo_pool_checkout_wait_seconds_count", outcome="success") == checkouts_before + 1
+
+    listener.connection_checked_in(event(connection_id=1))
+    listener.connection_closed(event(connection_id=1, reason="idle"))
+    assert sample("mongo_pool_connections_in_use") == 0
+    assert sample("mongo_pool_connections_open") == 0
+    assert sample("mongo_pool_connections_closed_total", reason="idle") == 1
+
+def test_k8s_manifests_pass_the_pool_capacity_check():
+    pytest.importorskip("yaml")
+    sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+    from capacity_calculator import CapacityCalculator
+
+    pool = CapacityCalculator().check_mongo_pool(workers=4)
+    assert pool["ok"], pool["problems"]
+    assert pool["max_pool_size"] == 12
+    assert not CapacityCalculator().check_mongo_pool(workers=4, max_pool_size=100)["ok"]
+
+def test_long_operation_pings_under_the_normal_timeouts_first():
+    pytest.importorskip("motor")
+    from pymongo import _csot
+    from pymongo.errors import ServerSelectionTimeoutError
+    from database import long_operation
+
+    class PingDB:
+        def __init__(self, up):
+            self.up = up
+            self.ping_timeouts = []
+
+        async def command(self, name):
+            self.ping_timeouts.append(_csot.get_timeout())
+            if not self.up:
+                raise ServerSelectionTimeoutError("no servers")
+
+    async def run(db):
+        async with long_operation(db, 60):
+            return _csot.get_timeout()
+
+    up = PingDB(up=True)
+    assert asyncio.run(run(up)) == 60
+    down = PingDB(up=False)
+    with pytest.raises(ServerSelectionTimeoutError):
+        asyncio.run(run(down))
+    assert up.ping_timeouts == down.ping_timeouts == [None]
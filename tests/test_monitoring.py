@@ -0,0 +1,32 @@
+"""Prometheus multiprocess mode: samples of every worker are served from one port"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("structlog")
+pytest.importorskip("psutil")
+
+WORKER = """
+from monitoring import monitor
+monitor.record_request("GET", "/api/agents", 200, 0.01)
+"""
+
+SCRAPE = """
+from prometheus_client import generate_latest
+from monitoring import metrics_registry
+print(generate_latest(metrics_registry()).decode())
+"""
+
+def run(code, multiproc_dir):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir),
+           "PYTHONPATH": os.pathsep.join(sys.path)}
+    return subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+
+def test_requests_of_every_worker_are_exported(tmp_path):
+    for _ in range(3):
+        run(WORKER, tmp_path)
+    exported = run(SCRAPE, tmp_path)
+    assert 'http_requests_total{endpoint="/api/agents",method="GET",status="200"} 3.0' in exported
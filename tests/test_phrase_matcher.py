@@ -0,0 +1,57 @@
+"""Compiled phrase matching: substring semantics, categories and the heuristics built on it"""
+
+import random
+
+import pytest
+
+import phrase_matcher
+from phrase_matcher import Hit, PhraseMatcher
+from response_filters import BANNED_PHRASES, has_banned_phrase
+from smart_conversation import SmartConversationGenerator
+
+@pytest.fixture(params=["automaton", "sweep"])
+def engine(request, monkeypatch):
+    """Run with the Aho-Corasick automaton (when pyahocorasick is installed) and without"""
+    if request.param == "automaton" and phrase_matcher.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    if request.param == "sweep":
+        monkeypatch.setattr(phrase_matcher, "ahocorasick", None)
+    return request.param
+
+def test_hits_and_categories(engine):
+    matcher = PhraseMatcher({"action": ["next step", "next steps", "i will"], "risk": ["risk"], "plan": ["step"]})
+    assert sorted(matcher.hits("Next steps: I will own the RISK log, step by step")) == sorted([
+        Hit("next step", "action"), Hit("next steps", "action"), Hit("step", "plan"),
+        Hit("i will", "action"), Hit("risk", "risk"),
+    ])
+    assert matcher.categories("the next step") == {"action", "plan"}
+    assert matcher.phrases("risk, then risk again") == ["risk"]
+    assert matcher.search("nothing here") is None and matcher.hits("") == []
+    assert matcher.search("THE NEXT STEPS") in ("next step", "next steps", "step")
+
+def test_phrase_in_several_categories(engine):
+    matcher = PhraseMatcher({"challenge": ["global", "cost"], "opportunity": ["global", "scale"]})
+    assert matcher.categories("A GLOBAL rollout") == {"challenge", "opportunity"}
+
+def test_matches_plain_substring_checks(engine):
+    rng = random.Random(7)
+    alphabet = "ais' mn"
+    for _ in range(300):
+        groups = {category: ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+                  for category in ("x", "y")}
+        text = "".join(rng.choice(alphabet + "AI") for _ in range(40))
+        lowered = text.lower()
+        matcher = PhraseMatcher(groups)
+        assert set(matcher.phrases(text)) == {p for phrases in groups.values() for p in phrases if p in lowered}
+        assert matcher.categories(text) == {c for c, phrases in groups.items() if any(p in lowered for p in phrases)}
+        assert (matcher.search(text) is not None) == any(p in lowered for phrases in groups.values() for p in phrases)
+
+def test_banned_phrases_and_themes_unchanged():
+    for reply in ["Good morning team, here is the plan.", "Ship the pilot in week two.", "That has a cost, as a rule.",
+                  "We need to make sure the vendor signs."]:
+        assert has_banned_phrase(reply) == any(phrase in reply.lower() for phrase in BANNED_PHRASES)
+
+    themes = SmartConversationGenerator().extract_key_themes("Global solar battery rollout with privacy risk", "Grid")
+    assert themes == {"tech_focus": "renewable energy", "challenge": "international coordination",
+                      "opportunity": "scalable impact"}
+    assert SmartConversationGenerator().extract_key_themes("Zzz", "Grid")["challenge"] == "implementation challenges"
@@ -0,0 +1,30 @@
+"""Guard against query-count regressions (N+1 patterns) on the hot read endpoints"""
+
+import pytest
+
+AUTHENTICATED_ENDPOINTS = [
+    "/api/agents",
+    "/api/saved-agents",
+    "/api/documents",
+    "/api/simulation/state",
+    "/api/conversations",
+    "/api/analytics/weekly-summary",
+    "/api/analytics/comprehensive",
+]
+
+PUBLIC_ENDPOINTS = [
+    "/api/relationships",
+    "/api/archetypes",
+]
+
+@pytest.mark.parametrize("path", AUTHENTICATED_ENDPOINTS)
+def test_authenticated_endpoint_query_budget(api_client, auth_headers, query_budget, path):
+    response = api_client.get(path, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    query_budget(response, f"GET {path}")
+
+@pytest.mark.parametrize("path", PUBLIC_ENDPOINTS)
+def test_public_endpoint_query_budget(api_client, query_budget, path):
+    response = api_client.get(path)
+    assert response.status_code == 200, response.text
+    query_budget(response, f"GET {path}")
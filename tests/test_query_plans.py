@@ -0,0 +1,130 @@
+"""
+Run the hot endpoints' Mongo queries through explain() and fail on collection scans and
+large in-memory sorts. Needs a local mongod (see conftest.py); the user is seeded with
+enough data for the planner's choices to matter. Fix failures by adding the supporting
+index to backend/indexes.py.
+
+    QUERY_PLAN_MAX_SORT_DOCS  documents an in-memory SORT may handle (default 100)
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+MAX_SORT_DOCS = int(os.environ.get("QUERY_PLAN_MAX_SORT_DOCS", "100"))
+SEED_ROUNDS = 300
+
+ENDPOINTS = [
+    "/api/agents",
+    "/api/saved-agents",
+    "/api/documents",
+    "/api/documents/by-scenario",
+    "/api/simulation/state",
+    "/api/conversations",
+    "/api/conversation-history",
+    "/api/observer/messages",
+    "/api/relationships",
+    "/api/summaries",
+    "/api/usage",
+    "/api/scenario/uploads",
+    "/api/analytics/weekly-summary",
+    "/api/analytics/comprehensive",
+]
+
+EXPLAINABLE = ("find", "aggregate", "count", "distinct", "findAndModify", "update", "delete")
+# Session and cluster bookkeeping the driver adds; explain rejects some of it
+DRIVER_FIELDS = ("lsid", "txnNumber", "$clusterTime", "$db", "$readPreference", "readConcern", "writeConcern",
+                 "autocommit", "startTransaction")
+
+def plan_nodes(explain):
+    """Every plan stage in an explain() result (find, aggregate and SBE layouts)"""
+    if isinstance(explain, dict):
+        if isinstance(explain.get("stage"), str):
+            yield explain
+        for value in explain.values():
+            yield from plan_nodes(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from plan_nodes(value)
+
+def plan_problems(command: dict, explain: dict, max_sort_docs: int = MAX_SORT_DOCS):
+    """Collection scans of filtered or sorted queries, and in-memory sorts over max_sort_docs"""
+    name = next(iter(command))
+    # A plain full read (no predicate, no sort) is a collection scan by definition
+    full_read = not (command.get("filter") or command.get("query") or command.get("sort")
+                     or any("$match" in stage or "$sort" in stage for stage in command.get("pipeline", [])))
+    problems = []
+    for node in plan_nodes(explain):
+        if node["stage"] == "COLLSCAN" and not full_read:
+            problems.append(f"COLLSCAN on {command[name]}")
+        if node["stage"] == "SORT":
+            sorted_docs = node.get("inputStage", {}).get("nReturned", node.get("nReturned", 0))
+            if sorted_docs > max_sort_docs:
+                problems.append(f"in-memory SORT of {sorted_docs} documents on {command[name]}")
+    return sorted(set(problems))
+
+def test_plan_problems_flags_scans_and_big_sorts():
+    command = {"find": "conversations", "filter": {"user_id": "u1"}, "sort": {"created_at": -1}}
+    explain = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+               "executionStats": {"executionStages": {"stage": "SORT", "nReturned": 50,
+                                                      "inputStage": {"stage": "COLLSCAN", "nReturned": 500}}}}
+    assert plan_problems(command, explain) == ["COLLSCAN on conversations", "in-memory SORT of 500 documents on conversations"]
+    indexed = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+    assert plan_problems(command, indexed) == []
+    assert plan_problems({"find": "agents", "filter": {}}, {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}) == []
+
+@pytest.fixture(scope="session")
+def seeded_db(api_client, auth_headers):
+    """The backend's database, with a deep history seeded for the benchmark user"""
+    from pymongo import MongoClient
+
+    user_id = api_client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    client = MongoClient(os.environ["MONGO_URL"])
+    db = client[os.environ.get("DB_NAME", "ai_simulation")]
+    now = datetime.utcnow()
+    db.conversations.insert_many([{
+        "id": str(uuid.uuid4()), "user_id": user_id, "round_number": n + 1, "time_period": "morning",
+        "scenario": "Plan review", "scenario_name": "Plan review", "created_at": now - timedelta(hours=n),
+        "messages": [{"id": str(uuid.uuid4()), "agent_id": "a1", "agent_name": "Maya", "message": "Ship it.", "mood": "focused"}],
+    } for n in range(SEED_ROUNDS)])
+    db.conversation_history.insert_many([{
+        "id": str(uuid.uuid4()), "user_id": user_id, "scenario_name": "Plan review",
+        "created_at": now - timedelta(hours=n), "timestamp": now - timedelta(hours=n),
+    } for n in range(SEED_ROUNDS)])
+    db.observer_messages.insert_many([
+        {"user_id": user_id, "message": f"Question {n}", "timestamp": now - timedelta(minutes=n)} for n in range(SEED_ROUNDS)
+    ])
+    db.documents.insert_many([{
+        "id": str(uuid.uuid4()), "content": "# Plan", "metadata": {
+            "id": str(uuid.uuid4()), "title": f"Plan {n}", "filename": f"plan_{n}.md", "category": "Protocol",
+            "description": "Plan", "user_id": user_id, "scenario_name": "Plan review",
+            "created_at": now - timedelta(hours=n), "updated_at": now - timedelta(hours=n)},
+    } for n in range(SEED_ROUNDS)])
+    yield db
+    for collection in ("conversations", "conversation_history", "observer_messages"):
+        db[collection].delete_many({"user_id": user_id})
+    db.documents.delete_many({"metadata.user_id": user_id})
+    client.close()
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_endpoint_queries_use_indexes(api_client, auth_headers, seeded_db, path):
+    # The server imports its siblings by plain name, so use the listener instance it registered
+    from instrumentation import query_profiler_listener
+
+    query_profiler_listener.captured = []
+    try:
+        response = api_client.get(path, headers=auth_headers)
+    finally:
+        captured, query_profiler_listener.captured = query_profiler_listener.captured, None
+    assert response.status_code == 200, response.text
+
+    problems = []
+    for database, command in captured:
+        if next(iter(command)) not in EXPLAINABLE:
+            continue
+        command = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+        explain = seeded_db.client[database].command({"explain": command, "verbosity": "executionStats"})
+        problems.extend(plan_problems(command, explain))
+    assert not problems, f"GET {path}: " + "; ".join(sorted(set(problems)))
@@ -0,0 +1,64 @@
+"""Response encoding: orjson rendering of BSON values and size-gated compression"""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("orjson")
+
+from bson import ObjectId
+
+from response_encoding import CompressionMiddleware, choose_encoding, json_response
+
+def test_bson_values_render_like_jsonable_encoder():
+    object_id = ObjectId()
+    response = json_response({"_id": object_id, "created_at": datetime(2025, 3, 1, 9, 30), 1: "one"})
+    assert json.loads(response.body) == {"_id": str(object_id), "created_at": "2025-03-01T09:30:00", "1": "one"}
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate", "auto") == "gzip"
+    assert choose_encoding("gzip", "off") is None
+    assert choose_encoding("identity", "auto") is None
+
+def app_sending(body: bytes, content_type: str, more_body: bool = False):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+        if more_body:
+            await send({"type": "http.response.body", "body": b""})
+    return app
+
+def call(app, accept_encoding="gzip"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=500, mode="gzip")(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    return headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+def test_large_json_is_gzipped():
+    body = json.dumps([{"message": "Pilot the north site first."}] * 100).encode()
+    headers, sent_body = call(app_sending(body, "application/json"))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(sent_body) < len(body)
+    assert gzip.decompress(sent_body) == body
+
+@pytest.mark.parametrize("body,content_type,more_body,accept", [
+    (b"{}", "application/json", False, "gzip"),
+    (b"x" * 2000, "image/webp", False, "gzip"),
+    (b"x" * 2000, "application/x-ndjson", True, "gzip"),
+    (b"x" * 2000, "application/json", False, "identity"),
+])
+def test_small_binary_streaming_and_unaccepted_pass_through(body, content_type, more_body, accept):
+    headers, sent_body = call(app_sending(body, content_type, more_body), accept)
+    assert b"content-encoding" not in headers
+    assert sent_body == body
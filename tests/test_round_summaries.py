@@ -0,0 +1,45 @@
+"""Hierarchical report summaries: round digests, the report window and report input size"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from round_summaries import DAY_MAX_CHARS, digest_text, report_days, round_digest, week_text
+
+def make_round(number, messages, created_at=datetime(2025, 3, 4, 15, 30)):
+    return {
+        "id": f"r{number}", "user_id": "u1", "round_number": number, "time_period": "Day 2 - afternoon",
+        "scenario_name": "Relocation", "created_at": created_at,
+        "messages": [{"agent_name": name, "message": text} for name, text in messages],
+    }
+
+def test_digest_keeps_key_events_first():
+    conversation_round = make_round(7, [
+        ("Maya", "Morning everyone."),
+        ("Tom", "Coffee first, then the plan."),
+        ("Ana", "We found a cheaper vendor for the north site. " * 10),
+        ("Lee", "Then we decide today: pilot at the north site."),
+    ])
+    digest = round_digest(conversation_round)
+    assert digest["day"] == "2025-03-04"
+    assert digest["agents"] == ["Ana", "Lee", "Maya", "Tom"]
+    assert digest["key_events"] == 2
+    assert [line.split(":")[0] for line in digest["highlights"]] == ["Ana", "Lee", "Maya"]
+    assert len(digest["highlights"][0]) <= len("Ana: ") + 200
+    assert digest_text(digest).startswith("Round 7 (Day 2 - afternoon):\n- Ana: We found")
+
+def test_report_window():
+    assert report_days(datetime(2025, 3, 4, 23, 59), days=3) == ["2025-03-02", "2025-03-03", "2025-03-04"]
+
+def test_report_input_does_not_grow_with_round_count():
+    def week(rounds_per_day):
+        return {"days": [{"day": f"2025-03-0{n}", "rounds": rounds_per_day, "agents": ["Maya", "Tom"],
+                          "summary": "x" * DAY_MAX_CHARS} for n in range(1, 8)], "unfolded": []}
+
+    # Only the round counts in the day headers differ
+    assert len(week_text(week(300))) - len(week_text(week(3))) == 2 * 7
+
+    pending = {"days": [], "unfolded": [round_digest(make_round(1, [("Maya", "We decide on the pilot.")]))]}
+    assert "**Latest rounds:**\nRound 1" in week_text(pending)
@@ -0,0 +1,58 @@
+"""Concurrent agent voting: vote parsing, the majority early exit and cancellation"""
+
+import asyncio
+
+from voting import collect_votes, decided_outcome, parse_vote
+
+def test_parse_vote():
+    assert parse_vote("YES - the plan is concrete.") == {"vote": "YES", "reason": "the plan is concrete."}
+    assert parse_vote("**no**: too aggressive")["vote"] == "NO"
+    assert parse_vote("Not sure yet")["vote"] == "ABSTAIN"
+    assert parse_vote("")["vote"] == "ABSTAIN"
+
+def test_decided_outcome():
+    assert decided_outcome(3, 0, 2) is True
+    assert decided_outcome(2, 0, 2) is None
+    assert decided_outcome(0, 2, 2) is False
+    assert decided_outcome(1, 1, 0) is False
+
+def voters(replies):
+    started, finished = [], []
+
+    def voter(name, delay, reply):
+        async def cast():
+            started.append(name)
+            await asyncio.sleep(delay)
+            finished.append(name)
+            return parse_vote(reply)
+        return cast
+
+    return {name: voter(name, delay, reply) for name, (delay, reply) in replies.items()}, finished
+
+REPLIES = {
+    "Maya": (0.01, "YES - ok"),
+    "Tom": (0.02, "YES - fine"),
+    "Ana": (0.03, "YES - agreed"),
+    "Lee": (5, "NO - too slow"),
+    "Sam": (5, "NO - too slow"),
+}
+
+def test_remaining_votes_are_cancelled_once_the_majority_is_settled():
+    team, finished = voters(REPLIES)
+    votes, cancelled = asyncio.run(collect_votes(team, wait_for_all=False))
+    assert list(votes) == ["Maya", "Tom", "Ana"]
+    assert cancelled == ["Lee", "Sam"]
+    assert finished == ["Maya", "Tom", "Ana"]
+
+def test_wait_for_all_and_failed_votes_abstain():
+    replies = {name: (0.01, reply) for name, (_, reply) in REPLIES.items()}
+    team, _ = voters(replies)
+
+    async def broken():
+        raise RuntimeError("provider down")
+
+    team["Tom"] = broken
+    votes, cancelled = asyncio.run(collect_votes(team, wait_for_all=True))
+    assert cancelled == []
+    assert list(votes) == list(REPLIES)
+    assert votes["Tom"]["vote"] == "ABSTAIN"
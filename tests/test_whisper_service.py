@@ -0,0 +1,93 @@
+"""Chunked Whisper transcription with a stand-in backend (no OpenAI calls)"""
+
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from whisper_service import (
+    WhisperService, TranscriptionBackend, needs_seekable_input, plan_chunks, stitch_transcripts, SAMPLE_RATE,
+)
+
+class RecordingBackend(TranscriptionBackend):
+    """Returns one word per chunk and records how many chunks ran at once"""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def transcribe(self, wav, language=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"text": f"chunk{self.calls}", "language": "en",
+                "words": [{"word": f"chunk{self.calls}", "start": 0.5, "end": 1.0}], "confidence": -0.2}
+
+    async def transcribe_upload(self, data, filename, language=None):
+        self.uploads = getattr(self, "uploads", []) + [filename]
+        return {"text": "whole upload", "language": "en", "words": [], "confidence": None, "duration": 4.0}
+
+def test_plan_chunks_cuts_inside_silences():
+    chunks = plan_chunks(300.0, [(95.0, 97.0), (190.0, 192.0)], target_seconds=120)
+    assert chunks == [(0.0, 96.0), (96.0, 191.0), (191.0, 300.0)]
+
+def test_plan_chunks_hard_cuts_without_silence():
+    assert plan_chunks(400.0, [], target_seconds=120) == [(0.0, 180.0), (180.0, 360.0), (360.0, 400.0)]
+    assert plan_chunks(30.0, [], target_seconds=120) == [(0.0, 30.0)]
+
+def test_stitch_shifts_word_timestamps():
+    result = stitch_transcripts([
+        (0.0, {"text": "hello", "language": "en", "words": [{"word": "hello", "start": 0.1, "end": 0.4}], "confidence": -0.1}),
+        (60.0, {"text": "world", "language": "en", "words": [{"word": "world", "start": 0.2, "end": 0.5}], "confidence": -0.3}),
+    ], duration=90.0)
+    assert result["text"] == "hello world"
+    assert result["words"][1] == {"word": "world", "start": 60.2, "end": 60.5}
+    assert result["confidence"] == pytest.approx(-0.2)
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_long_recording_is_transcribed_in_concurrent_chunks():
+    # 9 seconds: tone, silence, tone, silence, tone
+    source = "aevalsrc='if(between(t,2,3)+between(t,5,6),0,0.5*sin(440*2*PI*t))':s=16000:d=9"
+    audio = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", source, "-f", "wav", "pipe:1"],
+        capture_output=True, check=True
+    ).stdout
+
+    backend = RecordingBackend()
+    service = WhisperService(backend=backend)
+    service.chunk_seconds = 3.5
+    result = asyncio.run(service.transcribe_audio(audio))
+
+    assert result["duration"] == pytest.approx(9.0, abs=0.1)
+    assert result["chunks"] == backend.calls >= 2
+    assert backend.max_active > 1
+    assert result["words"][-1]["start"] > 3.5
+    assert len(audio) > 9 * SAMPLE_RATE  # sanity check on the fixture itself
+
+def test_mp4_family_is_spooled():
+    assert needs_seekable_input(b"\x00\x00\x00\x20ftypM4A \x00", "recording.webm")
+    assert needs_seekable_input(b"", "Voice Memo.M4A")
+    assert not needs_seekable_input(b"\x1aE\xdf\xa3 webm header", "audio.webm")
+
+def test_missing_ffmpeg_falls_back_to_the_original_upload(monkeypatch):
+    monkeypatch.setenv("FFMPEG_BINARY", "/nonexistent/ffmpeg")
+    backend = RecordingBackend()
+    result = asyncio.run(WhisperService(backend=backend).transcribe_audio(b"not really audio", filename="memo.m4a"))
+    assert result["text"] == "whole upload" and result["duration"] == 4.0
+    assert backend.uploads == ["memo.m4a"] and backend.calls == 0
+
+def test_undecodable_upload_with_blank_ffmpeg_stderr_falls_back(monkeypatch, tmp_path):
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text("#!/bin/sh\nprintf '  \\n' >&2\nexit 1\n")
+    ffmpeg.chmod(0o755)
+    monkeypatch.setenv("FFMPEG_BINARY", str(ffmpeg))
+    backend = RecordingBackend()
+    result = asyncio.run(WhisperService(backend=backend).transcribe_audio(b"not really audio", filename="memo.webm"))
+    assert result["text"] == "whole upload"
+    assert backend.uploads == ["memo.webm"] and backend.calls == 0